@@ -10,6 +10,17 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The stresses at the integration points are printed to the .dat and .fil files, so abaqus_tools/peak_stress.py can
+# find the peaks without the viewer.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+from abaqus_tools.output_profiles import apply_profile, edge_element_set
+from abaqus_tools.peak_stress import request_printed_results
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -102,7 +113,7 @@ holeAssembly.regenerate()
 from step import *
 holeModel.StaticStep(name='Load Step', previous='Initial', description='Loads is applied now')
 
-# Field output and history output request left at default.
+# Field output and history output requests are set after meshing (scf profile, see below).
 
 # Application of boundary conditions -
 
@@ -209,6 +220,16 @@ holePart.seedEdgeByBias(biasMethod=SINGLE, end1Edges=edge_in_square3, ratio=5.0,
 holePart.seedPart(size=0.0015,  deviationFactor=0.1)
 holePart.generateMesh()
 
+# Field output: S of the elements on the hole edge at the end of the step (the scf profile of
+# abaqus_tools/output_profiles.py), and no history output.
+
+edge_element_set(holeAssembly, 'HOLE_EDGE', holeInstance, edge_in_circle1, edge_in_circle2)
+apply_profile(holeModel, 'Load Step', 'scf')
+
+# Integration point coordinates and stresses for abaqus_tools/peak_stress.py
+
+request_printed_results(holeModel, 'Load Step')
+
 # Job creation
 # Get access to the job objects by using the import statement. The job() method is used to create a job. Make sure
 # that you enter the correct name of the model. Most of the arguments entered here are not mandatory. You can edit the
@@ -227,3 +248,7 @@ mdb.Job(name='PlateWithHoleJob', model='Model-1', type=ANALYSIS, explicitPrecisi
 
 mdb.jobs['PlateWithHoleJob'].submit(consistencyChecking=OFF)
 mdb.jobs['PlateWithHoleJob'].waitForCompletion()
+
+# Fields of every frame to PlateWithHoleJob_fields (see abaqus_tools/field_store.py)
+
+export_job('PlateWithHoleJob')
@@ -10,6 +10,17 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The entities are selected with predicates on their coordinates (abaqus_tools/predicates.py) instead of
+# getSequenceFromMask() masks, which break when a partition changes.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+from abaqus_tools.output_profiles import apply_profile
+from abaqus_tools.predicates import EntitySelector, on_arc, everything
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -108,7 +119,10 @@ holeModel.HeatTransferStep(name='Step-1', previous='Initial',
                                        timePeriod=15000.0, initialInc=1.0, minInc=0.15, maxInc=15000.0,
                                        deltmx=1000.0)
 
-# Field output and history output request left at default.
+# Field output: only NT, every 1000 s of the 15000 s step (the thermal profile of abaqus_tools/output_profiles.py),
+# and no history output.
+
+apply_profile(holeModel, 'Step-1', 'thermal')
 
 # Application of boundary conditions -
 
@@ -150,23 +164,20 @@ holeModel.YsymmBC(name='Bottom Edge Y_Symmetry3', createStepName='Initial', regi
 # ConcentratedForce() method is used to apply the force of 160N at this vertex. Note that, we have referred the
 # the step that we created sometime back.
 
-side1Edges1 = holeInstance.edges.getSequenceFromMask(mask=('[#30000 ]',), )
-region = regionToolset.Region(side1Edges=side1Edges1)
+holeSelector = EntitySelector(holeInstance)
+
+region = holeSelector.region(side1Edges=on_arc(0.01))
 holeModel.FilmCondition(name='Int-1', createStepName='Step-1',
                                     surface=region, definition=EMBEDDED_COEFF, filmCoeff=750.0,
                                     filmCoeffAmplitude='', sinkTemperature=0.0, sinkAmplitude='',
                                     sinkDistributionType=UNIFORM, sinkFieldName='')
 
-edges1 = holeInstance.edges.getSequenceFromMask(mask=('[#30000 ]',), )
-region = regionToolset.Region(edges=edges1)
+region = holeSelector.region(edges=on_arc(0.01))
 holeModel.TemperatureBC(name='BC-6', createStepName='Step-1',
                                     region=region, fixed=OFF, distributionType=UNIFORM, fieldName='',
                                     magnitude=125.0, amplitude=UNSET)
 
-faces_ambient = holeInstance.faces.getSequenceFromMask(mask=('[#7f ]',), )
-edges_ambient = holeInstance.edges.getSequenceFromMask(mask=('[#fffff ]',), )
-verts_ambient = holeInstance.vertices.getSequenceFromMask(mask=('[#3fff ]',), )
-region_ambient = regionToolset.Region(vertices=verts_ambient, edges=edges_ambient, faces=faces_ambient)
+region_ambient = holeSelector.region(vertices=everything(), edges=everything(), faces=everything())
 holeModel.Temperature(name='Predefined Field-1',
                                   createStepName='Initial', region=region, distributionType=UNIFORM,
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(20.0,
@@ -239,3 +250,7 @@ mdb.Job(name='PlateWithHoleJob', model='Model-1', type=ANALYSIS, explicitPrecisi
 
 mdb.jobs['PlateWithHoleJob'].submit(consistencyChecking=OFF)
 mdb.jobs['PlateWithHoleJob'].waitForCompletion()
+
+# Fields of every frame to PlateWithHoleJob_fields (see abaqus_tools/field_store.py)
+
+export_job('PlateWithHoleJob')
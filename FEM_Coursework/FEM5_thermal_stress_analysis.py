@@ -11,6 +11,15 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The entities are selected with predicates on their coordinates (abaqus_tools/predicates.py) instead of
+# getSequenceFromMask() masks, which break when a partition changes.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.predicates import EntitySelector, R, everything
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -170,18 +179,18 @@ holeModel.YsymmBC(name='Bottom Edge Y_Symmetry5', createStepName='Initial', regi
 # ConcentratedForce() method is used to apply the force of 160N at this vertex. Note that, we have referred the
 # the step that we created sometime back.
 
-faces_ambient = holeInstance.faces.getSequenceFromMask(mask=('[#1ff ]',), )
-edges_ambient = holeInstance.edges.getSequenceFromMask(mask=('[#3ffffff ]',), )
-verts_ambient = holeInstance.vertices.getSequenceFromMask(mask=('[#3ffff ]',), )
-region_ambient = regionToolset.Region(vertices=verts_ambient, edges=edges_ambient, faces=faces_ambient)
+holeSelector = EntitySelector(holeInstance)
+
+region_ambient = holeSelector.region(vertices=everything(), edges=everything(), faces=everything())
 holeModel.Temperature(name='Predefined Field-1',
                                   createStepName='Initial', region=region_ambient, distributionType=UNIFORM,
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(20.0, ))
 
-faces_ambient2 = holeInstance.faces.getSequenceFromMask(mask=('[#7 ]',), )
-edges_ambient2 = holeInstance.edges.getSequenceFromMask(mask=('[#23 ]',), )
-verts_ambient2 = holeInstance.vertices.getSequenceFromMask(mask=('[#2 ]',), )
-region_ambient2 = regionToolset.Region(vertices=verts_ambient2, edges=edges_ambient2, faces=faces_ambient2)
+# The three faces that fill the hole (r <= 0.01) are heated. The masks this replaces added only the edges and the
+# vertex inside the hole, which the faces already hold; R <= 0.01 on edges and vertices would also take the arc and
+# the axis entities shared with the plate.
+
+region_ambient2 = holeSelector.region(faces=R <= 0.01)
 mdb.models['Model-1'].Temperature(name='Predefined Field-2',
                                   createStepName='Step-1', region=region_ambient2, distributionType=UNIFORM,
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(125.0,))
@@ -10,6 +10,14 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The fields of the finished job are exported with abaqus_tools/field_store.py.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -213,3 +221,7 @@ mdb.Job(name='PlateWithHoleJob', model='Model-1', type=ANALYSIS, explicitPrecisi
 mdb.jobs['PlateWithHoleJob'].submit(consistencyChecking=OFF)
 mdb.jobs['PlateWithHoleJob'].waitForCompletion()
 
+# Fields of every frame to PlateWithHoleJob_fields (see abaqus_tools/field_store.py)
+
+export_job('PlateWithHoleJob')
+
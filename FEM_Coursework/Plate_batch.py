@@ -0,0 +1,44 @@
+# 200 variants of the plate with a hole of FEM5_1.1.py in a single CAE session
+
+# Run with: abaqus cae noGUI=Plate_batch.py
+# The plate is sketched, partitioned and meshed once as the model PlateBase (abaqus_tools/plate_model.py). Every
+# variant is a copy of it, mdb.Model(name=..., objectToCopy=PlateBase), with only its load, material, thickness or
+# mesh changed (abaqus_tools/model_batch.py), and only its input deck is written, so the CAE kernel starts once for all
+# of them. Values equal to those of the base (PLATE_WITH_HOLE) are left alone: the 100 CPS4 variants keep the mesh of
+# the base, only the CPS8 variants are meshed again. The decks can then be run with 'abaqus job=<name>' or side by side with the job farm:
+#
+#     python -m abaqus_tools.job_farm run runs 'plate_*.inp' --budget 32 --cpus 4
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+
+from abaqus import *
+from abaqusConstants import *
+
+from abaqus_tools.model_batch import ModelBatch
+from abaqus_tools.plate_model import PLATE_CHANGES, PLATE_WITH_HOLE, build_plate_model, mesh_plate
+from abaqus_tools.profiling import save_profile
+
+session.viewports['Viewport: 1'].setValues(displayedObject=None)
+
+# Pressures (Pa), Young's moduli (Pa), plate thicknesses (m) and element types of the batch: 5 x 5 x 4 x 2 variants.
+# The variant plate_i_j_k_l has the i-th element type, the j-th pressure, the k-th thickness and the l-th modulus.
+
+plate_pressures = (0.8e8, 1.2e8, 1.6e8, 2.0e8, 2.4e8)
+plate_moduli = (0.7e11, 1.1e11, 1.5e11, 1.9e11, 2.1e11)
+plate_thicknesses = (0.005, 0.01, 0.015, 0.02)
+plate_elements = ('CPS4', 'CPS8')
+
+batch = ModelBatch(build_plate_model('PlateBase'), PLATE_CHANGES, remesh=mesh_plate, baseValues=PLATE_WITH_HOLE)
+batch.grid('plate', pressure=plate_pressures, youngsModulus=plate_moduli, thickness=plate_thicknesses,
+           elemCode=plate_elements)
+
+jobNames = batch.write_inputs()
+print('%d input decks written: %s ... %s' % (len(jobNames), jobNames[0], jobNames[-1]))
+
+# Time of every build stage of every variant (abaqus_tools/profiling.py); the totals per stage are printed by
+# python -m abaqus_tools.profiling report Plate_batch.profile.json
+
+save_profile('Plate_batch')
@@ -19,6 +19,8 @@ b = k_theoretical()
 print('k_theoretical = ', b)
 
     # from 1.1
+    # (python -m abaqus_tools.convergence reruns this refinement ladder and extrapolates the peak)
+    # (python -m abaqus_tools.peak_stress <runs> reads the peaks of every run and prints the k ratios below)
 
 sig_max_low = 4.974e8
 sig_max_mid = 5.017e8
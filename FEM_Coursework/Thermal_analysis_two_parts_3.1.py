@@ -11,6 +11,16 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The entities are selected with predicates on their coordinates (abaqus_tools/predicates.py) instead of
+# getSequenceFromMask() masks, which break when a partition changes.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+from abaqus_tools.predicates import EntitySelector, on_arc, everything
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -142,8 +152,10 @@ holeModel.StaticStep(name='Step-1', previous='Initial', description='Loads is ap
 
 from interaction import *
 
-side1Edges1 = holeAssembly.instances['Plate Instance'].edges.getSequenceFromMask(mask=('#30000 ]',), )
-region1 = regionToolset.Region(side1Edges=side1Edges1)
+plateSelector = EntitySelector(holeAssembly.instances['Plate Instance'])
+holeSelector = EntitySelector(holeAssembly.instances['Hole Instance'])
+
+region1 = plateSelector.region(side1Edges=on_arc(0.01))
 
 
 #holeModel.FilmCondition(name='Int-1', createStepName='Step-1',
@@ -151,8 +163,7 @@ region1 = regionToolset.Region(side1Edges=side1Edges1)
 #                                    filmCoeffAmplitude='', sinkTemperature=20, sinkAmplitude='',
 #                                    sinkDistributionType=UNIFORM, sinkFieldName='')
 
-side1Edges2 = holeAssembly.instances['Hole Instance'].edges.getSequenceFromMask(mask=('[#102 ]',), )
-region2 = regionToolset.Region(side1Edges=side1Edges2)
+region2 = holeSelector.region(side1Edges=on_arc(0.01))
 holeModel.Tie(name='Constraint-1', master=region1, slave=region2,
                           positionToleranceMethod=COMPUTED, adjust=ON, tieRotations=ON,
                           thickness=ON)
@@ -223,14 +234,12 @@ holeModel.Temperature(name='Predefined Field-1',
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(20.0,))
 """
 
-faces1 = holeAssembly.instances['Plate Instance'].faces.getSequenceFromMask(mask=('[#3f ]',), )
-region_plate_temp = regionToolset.Region(faces=faces1)
+region_plate_temp = plateSelector.region(faces=everything())
 holeModel.Temperature(name='Predefined Field-1',
                                   createStepName='Initial', region=region_plate_temp, distributionType=UNIFORM,
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(20.0, ))
 
-faces2 = holeAssembly.instances['Hole Instance'].faces.getSequenceFromMask(mask=('[#7 ]',), )
-region_hole_temp = regionToolset.Region(faces=faces2)
+region_hole_temp = holeSelector.region(faces=everything())
 holeModel.Temperature(name='Predefined Field-2',
                                   createStepName='Initial', region=region_hole_temp, distributionType=UNIFORM,
                                   crossSectionDistribution=CONSTANT_THROUGH_THICKNESS, magnitudes=(20.0, ))
@@ -336,3 +345,7 @@ mdb.Job(name='PlateWithHoleJob', model='Model-1', type=ANALYSIS, explicitPrecisi
 
 mdb.jobs['PlateWithHoleJob'].submit(consistencyChecking=OFF)
 mdb.jobs['PlateWithHoleJob'].waitForCompletion()
+
+# Fields of every frame to PlateWithHoleJob_fields (see abaqus_tools/field_store.py)
+
+export_job('PlateWithHoleJob')
@@ -0,0 +1,42 @@
+# Settlement sweep of the 2D footing model in a single CAE session
+
+# Run with: abaqus cae noGUI=Bearing_sweep.py
+# Instead of launching a new CAE kernel for every copy of Better_2D_pressure.py, every variant is built from one
+# BearingParams object by build_bearing_model() and only its input deck is written. The decks can then be run with
+# 'abaqus job=<name>' or side by side with the job farm:
+#
+#     python -m abaqus_tools.job_farm run runs 'bearing_*.inp' --budget 32 --cpus 4
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+
+from abaqus import *
+from abaqusConstants import *
+
+from abaqus_tools.bearing_model import write_bearing_inputs
+from abaqus_tools.bearing_params import PRESSURE_2D
+from abaqus_tools.profiling import save_profile
+
+session.viewports['Viewport: 1'].setValues(displayedObject=None)
+
+# Footing widths (m) and footing pressures (Pa) of the sweep. Only the footing settlement is read from the variants,
+# so they write the settlement output profile (abaqus_tools/output_profiles.py) instead of the default output.
+
+footing_widths = (1.0, 1.5, 2.0, 2.5, 3.0)
+footing_pressures = (50000.0, 100000.0, 150000.0, 200000.0)
+
+variants = []
+for B in footing_widths:
+    for q in footing_pressures:
+        name = 'bearing_B%03d_q%06d' % (int(round(100 * B)), int(round(q / 1000.0)))
+        variants.append(PRESSURE_2D.copy(name=name, footingWidth=B, pressure=q, outputProfile='settlement'))
+
+jobNames = write_bearing_inputs(variants)
+print('%d input decks written: %s ... %s' % (len(jobNames), jobNames[0], jobNames[-1]))
+
+# Time of every build stage of every variant (abaqus_tools/profiling.py); the totals per stage are printed by
+# python -m abaqus_tools.profiling report Bearing_sweep.profile.json
+
+save_profile('Bearing_sweep')
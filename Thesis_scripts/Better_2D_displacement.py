@@ -10,6 +10,15 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The fields of the finished job are exported with abaqus_tools/field_store.py.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+from abaqus_tools.output_profiles import apply_profile
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -95,11 +104,14 @@ from step import *
 
 bearingModel.StaticStep(name='Load Step', previous='Initial', description='Loads is applied now')
 
-# Field output: (only the S22 value is required).
-
-# bearingModel.fieldOutputRequests['F-Output-1'].setValues(variables=('S',))
+# Field output: (only the S22 value is required). The output profiles of abaqus_tools/output_profiles.py replace the
+# default output of the whole model: U and RF of the footing edges at the end of the step with their U2 / RF2 history
+# (settlement), and S at the end of the step (stress).
 
-# History output request left at default.
+footing_edges = bearingInstance.edges.findAt(((0.5, 20.0, 0.0),), ((0.9, 20.0, 0.0),))
+bearingAssembly.Set(name='FOOTING', edges=footing_edges)
+apply_profile(bearingModel, 'Load Step', 'settlement')
+apply_profile(bearingModel, 'Load Step', 'stress', replace=False)
 
 # Application of boundary conditions -
 
@@ -281,3 +293,7 @@ mdb.Job(name='bearingJob2D', model='Model-1', type=ANALYSIS, explicitPrecision=S
 
 mdb.jobs['bearingJob2D'].submit(consistencyChecking=OFF)
 mdb.jobs['bearingJob2D'].waitForCompletion()
+
+# Fields of every frame to bearingJob2D_fields (see abaqus_tools/field_store.py)
+
+export_job('bearingJob2D')
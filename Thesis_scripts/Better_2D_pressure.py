@@ -10,6 +10,17 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The fields of the finished job are exported with abaqus_tools/field_store.py; the time spent in every stage of the
+# script is written to bearingJob2D.profile.json and bearingJob2D.trace.json (abaqus_tools/profiling.py).
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.field_store import export_job
+from abaqus_tools.output_profiles import apply_profile
+from abaqus_tools.profiling import mark, record_mesh, save_profile
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -20,6 +31,7 @@ bearingModel = mdb.models['Model-1']
 # These two statements will provide access to all the objects related to sketch and part. Including this is not
 # mandatory, but it is good practice.
 
+mark('sketch and part')
 from sketch import *
 from part import *
 
@@ -38,6 +50,7 @@ bearingSketch.Line(point1=(0.0, 20.0), point2=(0.0, 0.0))
 bearingPart = bearingModel.Part(name='bearingPart', dimensionality=TWO_D_PLANAR, type=DEFORMABLE_BODY)
 bearingPart.BaseShell(sketch=bearingSketch)
 
+mark('material and section')
 from material import *
 
 bearingMaterial = bearingModel.Material(name='Soil')
@@ -66,6 +79,7 @@ bearingPart.SectionAssignment(region=soil_region, sectionName='Soil layer')
 # 'dependent' parameter is set to OFF. Set this to ON. We have already defined the part name as 'steadyPart'.
 # We will refer to that now.
 
+mark('assembly and partition')
 from assembly import *
 
 bearingAssembly = bearingModel.rootAssembly
@@ -91,15 +105,19 @@ bearingAssembly.regenerate()
 # static step which could be used for loading. This is the step next to 'Initial' step created by dafault. Enter the
 # initial increment and maximum increment as shown below.
 
+mark('step and output')
 from step import *
 
 bearingModel.StaticStep(name='Load Step', previous='Initial', description='Loads is applied now')
 
-# Field output: (only the S22 value is required).
-
-# bearingModel.fieldOutputRequests['F-Output-1'].setValues(variables=('S',))
+# Field output: (only the S22 value is required). The output profiles of abaqus_tools/output_profiles.py replace the
+# default output of the whole model: U and RF of the footing edges at the end of the step with their U2 / RF2 history
+# (settlement), and S at the end of the step (stress).
 
-# History output request left at default.
+footing_edges = bearingInstance.edges.findAt(((0.5, 20.0, 0.0),), ((0.9, 20.0, 0.0),))
+bearingAssembly.Set(name='FOOTING', edges=footing_edges)
+apply_profile(bearingModel, 'Load Step', 'settlement')
+apply_profile(bearingModel, 'Load Step', 'stress', replace=False)
 
 # Application of boundary conditions -
 
@@ -108,6 +126,7 @@ bearingModel.StaticStep(name='Load Step', previous='Initial', description='Loads
 # For doing this, we will first identify the point and use the findAT() method to find the left face and then redefine
 # the face and then define the region.
 
+mark('boundary conditions and load')
 edge_on_leftface = bearingInstance.edges.findAt(((0.0, 10.0, 0.0),))
 leftface_region = regionToolset.Region(edges=edge_on_leftface)
 edge_on_leftface2 = bearingInstance.edges.findAt(((0.0, 19.9, 0.0),))
@@ -177,6 +196,7 @@ bearingModel.Pressure(name='Load2', createStepName='Load Step', region=bearingfa
 # Get access to the mesh objects by using the import statement. We will use the predefined regions for element
 # type definition. C3D8R elements are used in this simulation
 
+mark('seeding')
 import mesh
 
         #Bodies within the soil
@@ -256,18 +276,20 @@ bearingPart.seedEdgeByBias(biasMethod=SINGLE, end1Edges=edge_in_square, ratio=20
                       number=60, constraint=FINER)
 bearingPart.seedEdgeByBias(biasMethod=SINGLE, end1Edges=edge_on_top3, ratio=20.0,
                       number=60, constraint=FINER)
-pickedEdges2 = bearingPart.edges.getSequenceFromMask(mask=('[#8000 ]',), )
-bearingPart.seedEdgeByBias(biasMethod=SINGLE, end2Edges=pickedEdges2, ratio=20.0,
+bearingPart.seedEdgeByBias(biasMethod=SINGLE, end2Edges=edge_on_top4, ratio=20.0,
                  number=60, constraint=FINER)
 
 bearingPart.seedPart(size=2, deviationFactor=0.03)
+mark('generateMesh')
 bearingPart.generateMesh()
+record_mesh('bearingPart', bearingPart)
 
 # Job creation
 # Get access to the job objects by using the import statement. The job() method is used to create a job. Make sure
 # that you enter the correct name of the model. Most of the arguments entered here are not mandatory. You can edit the
 # values beased on your requirements.
 
+mark('job')
 from job import *
 
 mdb.Job(name='bearingJob2D', model='Model-1', type=ANALYSIS, explicitPrecision=SINGLE,
@@ -276,5 +298,14 @@ mdb.Job(name='bearingJob2D', model='Model-1', type=ANALYSIS, explicitPrecision=S
         numCpus=1, memory=50, memoryUnits=PERCENTAGE, scratch='', echoPrint=OFF, modelPrint=OFF, contactPrint=OFF,
         historyPrint=OFF)
 
+mark('solve')
 mdb.jobs['bearingJob2D'].submit(consistencyChecking=OFF)
 mdb.jobs['bearingJob2D'].waitForCompletion()
+
+# Fields of every frame to bearingJob2D_fields (see abaqus_tools/field_store.py)
+
+mark('export')
+export_job('bearingJob2D')
+mark(None)
+
+save_profile('bearingJob2D')
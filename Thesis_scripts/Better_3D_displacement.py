@@ -10,6 +10,16 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The footing settlement comes from abaqus_tools/footing_theory.py and the footing output is requested for
+# abaqus_tools/load_settlement.py.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.footing_theory import prescribed_settlement
+from abaqus_tools.load_settlement import request_footing_file_output
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -203,10 +213,15 @@ bearingModel.DisplacementBC(name='Outside near edge pin', createStepName='Initia
 # ConcentratedForce() method is used to apply the force of 1000N at this vertex. Note that, we have referred the
 # the step that we created sometime back.
 
-faces1 = bearingAssembly.instances['Bearing Instance'].faces.getSequenceFromMask(mask=('[#100 ]',), )
+# The prescribed settlement is the elastic settlement of a rigid square footing under the 100 kPa of
+# Better_3D_Pressure.py (abaqus_tools/footing_theory.py), -0.0024873 m.
+
+footing_settlement = prescribed_settlement(100000.0, 1.0, 30E6, 0.3, shape='square', position='rigid')
+
+faces1 = bearingInstance.faces.findAt(((0.5, 20.0, 0.5),))
 region = regionToolset.Region(faces=faces1)
 mdb.models['Model-1'].DisplacementBC(name='BC-13', createStepName='Load Step',
-                                     region=region, u1=UNSET, u2=-0.0024873333333333336, u3=UNSET, ur1=UNSET, ur2=UNSET,
+                                     region=region, u1=UNSET, u2=footing_settlement, u3=UNSET, ur1=UNSET, ur2=UNSET,
                                      ur3=UNSET, amplitude=UNSET, fixed=OFF, distributionType=UNIFORM,
                                      fieldName='', localCsys=None)
 
@@ -229,6 +244,12 @@ bearingPart.seedPart(size=0.5, deviationFactor=0.01)
 
 bearingPart.generateMesh()
 
+# U and RF of the footing face at every increment in the ASCII results file, read back while the job runs to build
+# the load-settlement curve (abaqus_tools/load_settlement.py)
+
+bearingAssembly.Set(name='FOOTING', faces=faces1)
+request_footing_file_output(bearingModel, 'Load Step')
+
 # Job creation
 # Get access to the job objects by using the import statement. The job() method is used to create a job. Make sure
 # that you enter the correct name of the model. Most of the arguments entered here are not mandatory. You can edit the
@@ -10,6 +10,19 @@ from abaqus import *
 from abaqusConstants import *
 import regionToolset
 
+# The footing settlement comes from abaqus_tools/footing_theory.py and the footing output is requested for
+# abaqus_tools/load_settlement.py.
+
+import inspect
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(inspect.currentframe().f_code.co_filename), '..')))
+from abaqus_tools.bearing_params import PLASTIC_2D
+from abaqus_tools.footing_theory import prescribed_settlement
+from abaqus_tools.load_settlement import request_footing_file_output
+from abaqus_tools.output_profiles import apply_profile
+from abaqus_tools.restart_orchestrator import cae_step_options, seed_settings
+
 # This line is required to make the ABAQUS viewport display nothing
 session.viewports['Viewport: 1'].setValues(displayedObject=None)
 
@@ -112,15 +125,22 @@ bearingAssembly.regenerate()
 # static step which could be used for loading. This is the step next to 'Initial' step created by dafault. Enter the
 # initial increment and maximum increment as shown below.
 
-from step import *
-bearingModel.StaticStep(name='Load Step', previous='Initial', timePeriod=1000.0, initialInc=100.0, minInc=0.00000001,
-                        maxInc=100.0)
+# The increments (and stabilization) are those that converged for the most similar model run by
+# abaqus_tools/restart_orchestrator.py (python -m abaqus_tools.restart_orchestrator run runs PLASTIC_2D); without a
+# similar run in the history they are initialInc=100.0, minInc=1e-8 and maxInc=100.0 as before.
 
-# Field output: (only the S22 value is required).
+from step import *
+increments = seed_settings(PLASTIC_2D)
+bearingModel.StaticStep(name='Load Step', previous='Initial', timePeriod=1000.0, **cae_step_options(increments))
 
-# bearingModel.fieldOutputRequests['F-Output-1'].setValues(variables=('S',))
+# Field output: (only the S22 value is required). The output profiles of abaqus_tools/output_profiles.py replace the
+# default output of the whole model: U and RF of the footing edges at the end of the step with their U2 / RF2 history
+# (settlement), and S at the end of the step (stress).
 
-# History output request left at default.
+footing_edges = bearingInstance.edges.findAt(((0.5, 20.0, 0.0),))
+bearingAssembly.Set(name='FOOTING', edges=footing_edges)
+apply_profile(bearingModel, 'Load Step', 'settlement')
+apply_profile(bearingModel, 'Load Step', 'stress', replace=False)
 
 # Application of boundary conditions -
 
@@ -186,8 +206,13 @@ edge_on_bearingface1 = bearingInstance.edges.findAt(((0.5, 20.0, 0.0),))
 
 bearingface_region1 = regionToolset.Region(edges=edge_on_bearingface1)
 
+# The prescribed settlement is the elastic settlement of a rigid strip footing under 100 kPa
+# (abaqus_tools/footing_theory.py), -0.0105257 m.
+
+footing_settlement = prescribed_settlement(100000.0, 1.0, 30E6, 0.3, shape='strip', position='rigid')
+
 bearingModel.DisplacementBC(name='Bearing analytical settlement1', createStepName='Load Step', region=bearingface_region1,
-                     u1=UNSET, u2=-0.010525666666666668, ur3=UNSET, amplitude=UNSET, distributionType=UNIFORM, fieldName='',
+                     u1=UNSET, u2=footing_settlement, ur3=UNSET, amplitude=UNSET, distributionType=UNIFORM, fieldName='',
                         localCsys=None)
 
 # Mesh creation
@@ -243,7 +268,9 @@ elemType1 = mesh.ElemType(elemCode=CPE4, elemLibrary=STANDARD)
 elemType2 = mesh.ElemType(elemCode=CPE3, elemLibrary=STANDARD)
 
 f = bearingPart.faces
-faces = f.getSequenceFromMask(mask=('[#aff ]',), )
+faces = f.findAt((point_in_square1,), (point_in_square2,), (point_in_square3,), (point_in_square4,),
+                 (point_in_square5,), (point_in_square6,), (point_in_square7,), (point_in_square8,),
+                 (point_in_square9,), (point_in_square10,))
 pickedRegions = (faces,)
 bearingPart.setElementType(regions=pickedRegions, elemTypes=(elemType1, elemType2))
 elemType1 = mesh.ElemType(elemCode=CPE4, elemLibrary=STANDARD,
@@ -252,7 +279,7 @@ elemType1 = mesh.ElemType(elemCode=CPE4, elemLibrary=STANDARD,
 elemType2 = mesh.ElemType(elemCode=CPE3, elemLibrary=STANDARD,
                           secondOrderAccuracy=OFF, distortionControl=DEFAULT)
 
-faces = f.getSequenceFromMask(mask=('[#500 ]',), )
+faces = f.findAt((point_in_tri1,), (point_in_tri2,))
 pickedRegions = (faces,)
 bearingPart.setElementType(regions=pickedRegions, elemTypes=(elemType1, elemType2))
 
@@ -293,6 +320,11 @@ bearingPart.seedEdgeByNumber(edges=edge_on_inner_rhs, number=20, constraint=FINE
 bearingPart.seedPart(size=0.4, deviationFactor=0.03)
 bearingPart.generateMesh()
 
+# U and RF of set FOOTING at every increment in the ASCII results file, read back while the job runs to build the
+# load-settlement curve (abaqus_tools/load_settlement.py)
+
+request_footing_file_output(bearingModel, 'Load Step')
+
 # Job creation
 # Get access to the job objects by using the import statement. The job() method is used to create a job. Make sure
 # that you enter the correct name of the model. Most of the arguments entered here are not mandatory. You can edit the
@@ -0,0 +1,5 @@
+# Shared helpers for the Abaqus scripts in FEM_Coursework and Thesis_scripts.
+
+# Modules that talk to the CAE kernel (they import abaqus, abaqusConstants, regionToolset, ...) must only be imported
+# from inside an Abaqus/CAE session. Nothing is imported here so that the pure Python modules can still be used on
+# machines without an Abaqus installation.
@@ -0,0 +1,233 @@
+# Parametric builder for the 2D plane strain footing (bearing) models in Thesis_scripts
+
+# Better_2D_pressure.py, Better_2D_displacement.py and Plastic_2D_disp.py all build the same half model of a strip
+# footing: a rectangle of soil with a symmetry plane at x = 0, the footing on the top edge between x = 0 and x = B/2,
+# partition lines to control the mesh and a pressure or prescribed settlement under the footing. Here every literal of
+# those scripts is a field of a BearingParams object, so one CAE session can build any number of variants:
+#
+#     from abaqus_tools.bearing_model import build_bearing_model, write_bearing_inputs
+#     from abaqus_tools.bearing_params import BearingParams
+#     params = BearingParams(name='B2', footingWidth=2.0, pressure=150000.0)
+#     bearingModel = build_bearing_model(params)
+#
+# The partitions are a grid of full length vertical lines (xCuts) and horizontal lines (yCuts), so every face is a
+# rectangle and can be meshed with structured quads.
+
+from abaqus import *
+from abaqusConstants import *
+import mesh
+
+from abaqus_tools.bearing_params import edge_points, face_points
+from abaqus_tools.output_profiles import apply_profile
+from abaqus_tools.profiling import mark, record_mesh, stage, timed
+from abaqus_tools.selection import PointLookup, sequence_from_indices
+
+
+def _seed_towards(part, lookup, edgeIds, point, ratio, number):
+    # seedEdgeByBias() needs to know which end of each edge is fine. Instead of guessing end1/end2 from the sketch
+    # order (the original scripts used trial and error), compare the first vertex of every edge with the vertex at the
+    # point that should get the small elements.
+
+    end1Ids = []
+    end2Ids = []
+    vertex = lookup.find_vertices([point])[0]
+    for i in edgeIds:
+        if part.edges[i].getVertices()[0] == vertex:
+            end1Ids.append(i)
+        else:
+            end2Ids.append(i)
+    if end1Ids:
+        part.seedEdgeByBias(biasMethod=SINGLE, end1Edges=sequence_from_indices(part.edges, end1Ids), ratio=ratio,
+                            number=number, constraint=FINER)
+    if end2Ids:
+        part.seedEdgeByBias(biasMethod=SINGLE, end2Edges=sequence_from_indices(part.edges, end2Ids), ratio=ratio,
+                            number=number, constraint=FINER)
+
+
+@timed()
+def build_bearing_model(params, modelName=None):
+    """Build the sketch, partitions, material, section, step, BCs, load and mesh of one footing model.
+
+    The model is created as mdb.models[modelName] (params.name by default), replacing any model of that name, and
+    a job params.jobName is created for it. The model is returned.
+    """
+
+    modelName = modelName or params.name
+    if modelName in mdb.models.keys():
+        del mdb.models[modelName]
+    bearingModel = mdb.Model(name=modelName)
+
+    # Part creation
+
+    mark('sketch')
+    width, height = params.width, params.height
+    bearingSketch = bearingModel.ConstrainedSketch(name='bearing Sketch', sheetSize=2.0 * max(width, height))
+    bearingSketch.Line(point1=(0.0, 0.0), point2=(width, 0.0))
+    bearingSketch.Line(point1=(width, 0.0), point2=(width, height))
+    bearingSketch.Line(point1=(width, height), point2=(0.0, height))
+    bearingSketch.Line(point1=(0.0, height), point2=(0.0, 0.0))
+
+    bearingPart = bearingModel.Part(name='bearingPart', dimensionality=TWO_D_PLANAR, type=DEFORMABLE_BODY)
+    bearingPart.BaseShell(sketch=bearingSketch)
+
+    # Material
+
+    mark('material and section')
+    bearingMaterial = bearingModel.Material(name='Soil')
+    bearingMaterial.Density(table=((params.density, ), ))
+    bearingMaterial.Elastic(table=((params.youngsModulus, params.poissonsRatio), ))
+    if params.frictionAngle is not None:
+        bearingMaterial.MohrCoulombPlasticity(table=((params.frictionAngle, params.dilationAngle), ))
+        bearingMaterial.mohrCoulombPlasticity.MohrCoulombHardening(table=params.cohesionTable)
+
+    # Section creation and assignment
+
+    bearingModel.HomogeneousSolidSection(name='Soil layer', material='Soil', thickness=params.thickness)
+    face_on_soil = bearingPart.faces.findAt(((0.5 * width, 0.5 * height, 0.0),))
+    bearingPart.SectionAssignment(region=(face_on_soil,), sectionName='Soil layer')
+
+    # Assembly creation
+
+    bearingAssembly = bearingModel.rootAssembly
+    bearingInstance = bearingAssembly.Instance(name='Bearing Instance', part=bearingPart, dependent=ON)
+
+    # Partitions: one grid line per cut, over the full width or height of the domain
+
+    mark('partition')
+    for x in params.x_lines()[1:-1]:
+        bearingSketch.Line(point1=(x, 0.0), point2=(x, height))
+    for y in params.y_lines()[1:-1]:
+        bearingSketch.Line(point1=(0.0, y), point2=(width, y))
+    bearingPart.PartitionFaceBySketch(faces=face_on_soil, sketch=bearingSketch)
+    bearingAssembly.regenerate()
+
+    # Step creation
+
+    mark('step')
+    stepOptions = dict(timePeriod=params.timePeriod)
+    for key in ('initialInc', 'minInc', 'maxInc'):
+        if getattr(params, key) is not None:
+            stepOptions[key] = getattr(params, key)
+    if params.stabilize is not None:
+        stepOptions.update(stabilizationMethod=DISSIPATED_ENERGY_FRACTION, stabilizationMagnitude=params.stabilize,
+                           continueDampingFactors=False)
+    bearingModel.StaticStep(name='Load Step', previous='Initial', description='Loads is applied now', **stepOptions)
+    loadStep = bearingModel.steps['Load Step']
+    if params.incrementAttempts is not None:
+        # IA, the eighth time incrementation control, is the number of cutbacks allowed in one increment
+        controls = list(loadStep.control.timeIncrementation)
+        controls[7] = float(params.incrementAttempts)
+        loadStep.control.setValues(allowPropagation=OFF, resetDefaultValues=OFF, timeIncrementation=tuple(controls))
+    if params.restartFrequency is not None:
+        loadStep.Restart(frequency=params.restartFrequency, numberIntervals=0, overlay=OFF, timeMarks=OFF)
+
+    # Boundary conditions and load. All edges are looked up in one findAt() on the partitioned part, the dependent
+    # instance has the same edge numbering as the part.
+
+    if params.loading not in ('pressure', 'displacement'):
+        raise ValueError("loading must be 'pressure' or 'displacement', not %r" % (params.loading, ))
+
+    mark('boundary conditions')
+    points = edge_points(params)
+    fixedU1 = SET if params.pinnedBase else UNSET
+    loadArgument = 'side1Edges' if params.loading == 'pressure' else 'edges'
+
+    lookup = PointLookup(bearingPart)
+    regions = lookup.regions({'left': {'edges': points['left']},
+                              'right': {'edges': points['right']},
+                              'bottom': {'edges': points['bottom']},
+                              'footing': {loadArgument: points['footing']}}, target=bearingInstance)
+
+    bearingModel.XsymmBC(name='Left Edge X_Symmetry', createStepName='Initial', region=regions['left'],
+                         localCsys=None)
+    bearingModel.DisplacementBC(name='Right Edge Free Vertical', createStepName='Initial', region=regions['right'],
+                                u1=fixedU1, u2=SET, ur3=UNSET, amplitude=UNSET, distributionType=UNIFORM,
+                                fieldName='', localCsys=None)
+    bearingModel.DisplacementBC(name='Bottom Edge Pin', createStepName='Initial', region=regions['bottom'],
+                                u1=fixedU1, u2=SET, ur3=UNSET, amplitude=UNSET, distributionType=UNIFORM,
+                                fieldName='', localCsys=None)
+
+    if params.loading == 'pressure':
+        bearingModel.Pressure(name='Load', createStepName='Load Step', region=regions['footing'],
+                              distributionType=UNIFORM, field='', magnitude=params.pressure, amplitude=UNSET)
+    else:
+        bearingModel.DisplacementBC(name='Bearing analytical settlement', createStepName='Load Step',
+                                    region=regions['footing'], u1=UNSET, u2=params.settlement, ur3=UNSET,
+                                    amplitude=UNSET, distributionType=UNIFORM, fieldName='', localCsys=None)
+
+    # Mesh creation: every face of the grid is a rectangle, so all of them are meshed with structured quads
+
+    mark('seeding')
+    allFaces = lookup.face_sequence(face_points(params))
+    quadType = mesh.ElemType(elemCode=SymbolicConstant(params.elemCode), elemLibrary=STANDARD)
+    triType = mesh.ElemType(elemCode=SymbolicConstant(params.elemCode.replace('4', '3')), elemLibrary=STANDARD)
+    bearingPart.setElementType(regions=(allFaces, ), elemTypes=(quadType, triType))
+    bearingPart.setMeshControls(regions=allFaces, elemShape=QUAD, technique=STRUCTURED)
+
+    bearingPart.seedPart(size=params.seedSize, deviationFactor=params.deviationFactor)
+
+    ys = params.y_lines()
+    leftIds = lookup.find_edges(points['left'])
+    for i, y0, y1 in zip(leftIds, ys[:-1], ys[1:]):
+        number = max(1, int(round(params.leftSeeds * (y1 - y0) / height)))
+        bearingPart.seedEdgeByNumber(edges=bearingPart.edges[i:i + 1], number=number, constraint=FINER)
+    bearingPart.seedEdgeByNumber(edges=lookup.edge_sequence(points['footing']), number=params.footingSeeds,
+                                 constraint=FINER)
+
+    # Grade the edges that meet at the footing corner so the elements are smallest where the stresses peak
+
+    corner = (0.5 * params.footingWidth, height, 0.0)
+    xs = params.x_lines()
+    i = xs.index(corner[0])
+    cornerIds = lookup.find_edges([(corner[0], 0.5 * (ys[-2] + ys[-1]), 0.0),
+                                  (0.5 * (xs[i - 1] + xs[i]), height, 0.0),
+                                  (0.5 * (xs[i] + xs[i + 1]), height, 0.0)])
+    _seed_towards(bearingPart, lookup, cornerIds, corner, params.biasRatio, params.biasSeeds)
+
+    mark('generateMesh')
+    bearingPart.generateMesh()
+    record_mesh(params.name, bearingPart)
+
+    # Output requests: the preset output unless the parameters name a profile. The footing edges are the set FOOTING
+    # of the settlement profile.
+
+    if params.outputProfile is not None:
+        bearingAssembly.Set(name='FOOTING', edges=lookup.edge_sequence(points['footing'], target=bearingInstance))
+        apply_profile(bearingModel, 'Load Step', params.outputProfile)
+
+    # Job creation
+
+    mark('output and job')
+    mdb.Job(name=params.jobName, model=modelName, type=ANALYSIS, explicitPrecision=SINGLE,
+            nodalOutputPrecision=SINGLE, description='Job simulates the loading of a bearing (%s)' % modelName,
+            parallelizationMethodExplicit=DOMAIN, multiprocessingMode=DEFAULT, numDomains=params.numCpus,
+            userSubroutine='', numCpus=params.numCpus, memory=50, memoryUnits=PERCENTAGE, scratch='', echoPrint=OFF,
+            modelPrint=OFF, contactPrint=OFF, historyPrint=OFF)
+    mark(None)
+
+    return bearingModel
+
+
+def write_bearing_inputs(paramsList, submit=False, keepModels=False):
+    """Build every model in paramsList in this session and write its input deck (or submit it).
+
+    Unless keepModels is True each model is deleted once its deck is written, so hundreds of variants do not pile up
+    in the mdb. Returns the list of job names.
+    """
+
+    jobNames = []
+    for params in paramsList:
+        build_bearing_model(params)
+        bearingJob = mdb.jobs[params.jobName]
+        if submit:
+            with stage('solve'):
+                bearingJob.submit(consistencyChecking=OFF)
+                bearingJob.waitForCompletion()
+        else:
+            with stage('write input'):
+                bearingJob.writeInput(consistencyChecking=OFF)
+        jobNames.append(params.jobName)
+        if not keepModels:
+            del mdb.jobs[params.jobName]
+            del mdb.models[params.name]
+    return jobNames
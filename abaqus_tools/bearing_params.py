@@ -0,0 +1,128 @@
+# Parameters of the 2D plane strain footing (bearing) models
+
+# BearingParams holds every literal of Better_2D_pressure.py, Better_2D_displacement.py and Plastic_2D_disp.py. It is
+# kept apart from bearing_model.py (which needs the CAE kernel) so that the same parameter objects can drive the
+# offline tools (the input deck writer and the native solvers) on machines without Abaqus.
+
+from abaqus_tools.footing_theory import prescribed_settlement
+
+
+class BearingParams(object):
+
+    # Default values reproduce Better_2D_pressure.py (the horizontal partition at y = 19.8 is extended over the full
+    # width, so the partition is a grid).
+
+    defaults = dict(
+        name='bearing2D',
+        width=10.0,                     # half width of the soil domain (m)
+        height=20.0,                    # depth of the soil domain (m)
+        footingWidth=2.0,               # full footing width B, the model holds B/2 (m)
+        thickness=0.1,                  # section thickness
+        xCuts=(0.8, 1.0, 1.2, 2.0, 6.0),
+        yCuts=(19.8,),
+        density=2000.0,
+        youngsModulus=30e6,
+        poissonsRatio=0.3,
+        frictionAngle=None,             # degrees, None for an elastic soil
+        dilationAngle=1.0,
+        cohesionTable=((100.0, 0.0),),  # (yield stress, plastic strain) for MohrCoulombHardening
+        loading='pressure',             # 'pressure' or 'displacement'
+        pressure=100000.0,              # footing pressure (Pa) for loading='pressure'
+        settlement=-0.001,              # prescribed u2 (m) for loading='displacement'
+        pinnedBase=False,               # True fixes u1 and u2 on the base and right edge, False only u2
+        timePeriod=1.0,
+        initialInc=None,
+        minInc=None,
+        maxInc=None,
+        stabilize=None,                 # dissipated energy fraction of automatic stabilization, None for none
+        incrementAttempts=None,         # cutbacks allowed per increment (IA of *CONTROLS), None for the default 5
+        restartFrequency=None,          # write restart data every n increments, None for no restart data
+        outputProfile=None,             # name of an output_profiles.py profile, None for the preset output
+        elemCode='CPE4',
+        seedSize=2.0,
+        deviationFactor=0.03,
+        leftSeeds=250,                  # number of elements down each left edge segment, spread by edge length
+        footingSeeds=50,                # number of elements along the loaded top edge
+        biasRatio=20.0,                 # grading towards the footing corner (x = B/2, y = height)
+        biasSeeds=60,
+        jobName=None,
+        numCpus=1,
+    )
+
+    def __init__(self, **kwargs):
+        unknown = set(kwargs) - set(self.defaults)
+        if unknown:
+            raise TypeError('Unknown bearing parameters: %s' % ', '.join(sorted(unknown)))
+        values = dict(self.defaults)
+        values.update(kwargs)
+        self.__dict__.update(values)
+        if self.jobName is None:
+            self.jobName = self.name + 'Job'
+
+    def copy(self, **changes):
+        values = self.as_dict()
+        values.update(changes)
+        if 'name' in changes and 'jobName' not in changes:
+            values['jobName'] = None
+        return BearingParams(**values)
+
+    def as_dict(self):
+        return dict((key, getattr(self, key)) for key in self.defaults)
+
+    def x_lines(self):
+        # All vertical lines of the partition grid, including the domain boundary and the footing edge
+        lines = set([0.0, self.width, 0.5 * self.footingWidth])
+        lines.update(x for x in self.xCuts if 0.0 < x < self.width)
+        return sorted(lines)
+
+    def y_lines(self):
+        lines = set([0.0, self.height])
+        lines.update(y for y in self.yCuts if 0.0 < y < self.height)
+        return sorted(lines)
+
+    def __repr__(self):
+        return 'BearingParams(%s)' % ', '.join('%s=%r' % (key, getattr(self, key)) for key in sorted(self.defaults))
+
+
+# Presets matching the original scripts. The partial partition lines of Plastic_2D_disp.py are replaced by full grid
+# lines at the same positions; its settlement is the elastic settlement of a rigid strip footing under 100 kPa.
+
+PRESSURE_2D = BearingParams(name='bearingPressure2D', jobName='bearingJob2D')
+
+DISPLACEMENT_2D = PRESSURE_2D.copy(name='bearingDisplacement2D', jobName='bearingDispJob2D',
+                                   loading='displacement', settlement=-0.001, pinnedBase=True)
+
+PLASTIC_2D = BearingParams(name='bearingPlastic2D', jobName='bearingPlasticJob2D', xCuts=(1.0, 3.0, 3.5, 6.0, 6.5),
+                           yCuts=(9.5, 10.0, 17.5, 18.0), frictionAngle=10.0, dilationAngle=1.0,
+                           loading='displacement', pinnedBase=True,
+                           settlement=prescribed_settlement(100000.0, 1.0, 30e6, 0.3, 'strip'),
+                           timePeriod=1000.0, initialInc=100.0, minInc=1e-8, maxInc=100.0,
+                           seedSize=0.4, leftSeeds=60, footingSeeds=30, biasSeeds=20)
+
+
+def _midpoints(lines):
+    return [0.5 * (a + b) for a, b in zip(lines[:-1], lines[1:])]
+
+
+def edge_points(params):
+    # Points on every edge of the partitioned rectangle, grouped by where they are. Each point is the midpoint of one
+    # edge of the partition grid, so every point resolves to exactly one edge.
+
+    xs = params.x_lines()
+    ys = params.y_lines()
+    halfWidth = 0.5 * params.footingWidth
+    top = [(x, params.height, 0.0) for x in _midpoints(xs)]
+    return dict(
+        left=[(0.0, y, 0.0) for y in _midpoints(ys)],
+        right=[(params.width, y, 0.0) for y in _midpoints(ys)],
+        bottom=[(x, 0.0, 0.0) for x in _midpoints(xs)],
+        footing=[p for p in top if p[0] < halfWidth],
+        surface=[p for p in top if p[0] > halfWidth],
+        underFooting=[(halfWidth, y, 0.0) for y in _midpoints(ys)],
+    )
+
+
+def face_points(params):
+    xs = _midpoints(params.x_lines())
+    ys = _midpoints(params.y_lines())
+    return [(x, y, 0.0) for y in ys for x in xs]
@@ -0,0 +1,345 @@
+# Build and solve cost of every model script against its mesh density, kept as a history so regressions show
+
+# How long the models take to build and to solve, and how that grows as the seeds get finer (C3D20R at seedPart size
+# 0.5 in Better_3D_displacement.py, DC3D20 at 0.001 in Fem_3d_quarter_symm.py), was never measured. A benchmark case
+# is a script at a seed scale. The script runs against the offline stand-in (offline_cae.py) with every seed size
+# multiplied and every seed number divided by the scale, which times the build and gives the nodes, elements and
+# degrees of freedom of the mesh it would get (standInDofs). Scripts with a native counterpart (plane_strain.py,
+# heat_transfer.py, mohr_coulomb.py) are then solved natively on a mesh refined the same way, each in a worker process
+# of its own so that its memory is that of the solve, and record the degrees of freedom they solved for (nativeDofs).
+# The two are kept apart: the solve time is only ever fitted against nativeDofs, the meshes it was measured on.
+#
+#     python -m abaqus_tools.benchmarks run --scales 1,0.7,0.5 --history benchmarks.jsonl
+#     python -m abaqus_tools.benchmarks run Thesis_scripts/Better_3D_displacement.py --scales 1,0.5 --no-native
+#     python -m abaqus_tools.benchmarks report --history benchmarks.jsonl
+#
+# Every result is appended to the history (JSON lines, one per case, with the commit, host and Python version) and
+# compared with the earlier results of the same case on the same host: a build or solve time more than slack above
+# the median of the last five runs is a regression, and so is any change of the mesh counts, which the same seeds
+# must reproduce exactly. run exits with 1 when something regressed. The solver times of real Abaqus jobs come from
+# their profiles (python -m abaqus_tools.profiling report), not from here.
+
+import glob
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from abaqus_tools.bearing_params import DISPLACEMENT_2D, PLASTIC_2D, PRESSURE_2D
+from abaqus_tools.convergence import plate_mesh, plate_peak_stress
+from abaqus_tools.heat_transfer import FEM5_HEAT_STEP, plate_heat_model, solve_transient
+from abaqus_tools.mohr_coulomb import solve_plastic_bearing
+from abaqus_tools.offline_cae import run_script
+from abaqus_tools.plane_strain import solve_bearing
+from abaqus_tools.profiling import memory_usage
+from abaqus_tools.structured_mesh import bearing_mesh, plate_with_hole_mesh
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_FOLDERS = ('FEM_Coursework', 'Thesis_scripts')
+HISTORY = 'benchmarks.jsonl'
+SCALES = (1.0, )
+
+SLACK = 0.25                # allowed growth of a time over the median of the earlier runs
+NOISE = 0.05                # seconds; smaller differences are never a regression
+WINDOW = 5                  # earlier runs the median is taken over
+SOLVE_TIMEOUT = 600.0       # seconds per native solve
+
+COUNT_KEYS = ('nodes', 'elements', 'standInDofs', 'nativeDofs')
+TIME_KEYS = ('buildSeconds', 'solveSeconds')
+
+# Element codes: family, dimension, nodes per element, and T for coupled temperature-displacement elements
+
+_ELEMENT_CODE = re.compile(r'^(DC[23]D|C3D|CPE|CPS|CAX)(\d+)')
+
+
+def dofs_per_node(elemCode):
+    """Degrees of freedom per node of an element code: 1 for heat transfer, 2 or 3 for stress, +1 if coupled."""
+
+    match = _ELEMENT_CODE.match(elemCode)
+    if match is None:
+        raise ValueError('Unknown element code %r' % (elemCode, ))
+    family = match.group(1)
+    if family.startswith('DC'):
+        return 1
+    coupled = 'T' in elemCode[match.end():]
+    return (3 if family == 'C3D' else 2) + (1 if coupled else 0)
+
+
+def is_quadratic(elemCode):
+    """True for elements with midside nodes (CPE8R, CPS6, C3D20R, C3D10, DC2D8, DC3D20, ...)."""
+
+    match = _ELEMENT_CODE.match(elemCode)
+    if match is None:
+        raise ValueError('Unknown element code %r' % (elemCode, ))
+    corners = 8 if match.group(1) in ('C3D', 'DC3D') else 4
+    return int(match.group(2)) > corners
+
+
+def mesh_dofs(counts):
+    """Degrees of freedom of a mesh count of the offline stand-in (nodes, edges and elemCode of one part)."""
+
+    nodes = counts['nodes'] + (counts['edges'] if is_quadratic(counts['elemCode']) else 0)
+    return nodes * dofs_per_node(counts['elemCode'])
+
+
+# Native counterparts of the scripts. Each takes the seed scale and returns the degrees of freedom it solved for; they
+# run in worker processes, so they are module level functions.
+
+def _seeds(number, scale):
+    return max(1, int(round(number / scale)))
+
+
+def scaled_bearing(params, scale):
+    """BearingParams with the seed size multiplied and the seed numbers divided by scale."""
+
+    return params.copy(seedSize=params.seedSize * scale, leftSeeds=_seeds(params.leftSeeds, scale),
+                       footingSeeds=_seeds(params.footingSeeds, scale), biasSeeds=_seeds(params.biasSeeds, scale))
+
+
+def native_pressure_2d(scale):
+    params = scaled_bearing(PRESSURE_2D, scale)
+    mesh = bearing_mesh(params)
+    solve_bearing(params, mesh)
+    return 2 * mesh.numNodes
+
+
+def native_displacement_2d(scale):
+    params = scaled_bearing(DISPLACEMENT_2D, scale)
+    mesh = bearing_mesh(params)
+    solve_bearing(params, mesh)
+    return 2 * mesh.numNodes
+
+
+def native_plastic_2d(scale):
+    params = scaled_bearing(PLASTIC_2D, scale)
+    mesh = bearing_mesh(params)
+    solve_plastic_bearing(params, mesh)
+    return 2 * mesh.numNodes
+
+
+def native_plate_tension(scale):
+    plate_peak_stress(1.0 / scale)
+    return 2 * plate_mesh(1.0 / scale).numNodes
+
+
+def native_plate_heat(scale):
+    mesh = plate_with_hole_mesh(arcSeeds=_seeds(40, scale), radialSeeds=_seeds(80, scale), size=0.0015 * scale,
+                                elemType='DC2D4')
+    solve_transient(plate_heat_model(mesh=mesh), **FEM5_HEAT_STEP)
+    return mesh.numNodes
+
+
+NATIVE_SOLVERS = {
+    'Better_2D_pressure.py': native_pressure_2d,
+    'Better_2D_displacement.py': native_displacement_2d,
+    'Plastic_2D_disp.py': native_plastic_2d,
+    'FEM5_1.1.py': native_plate_tension,
+    'FEM5_heat_transfer.py': native_plate_heat,
+}
+
+
+def _measure(function, scale):
+    # In the worker: wall and CPU seconds of one native solve, its degrees of freedom and memory
+    resident = memory_usage()[0]
+    start, cpu = time.time(), os.times()
+    dofs = function(scale)
+    end, cpuEnd = time.time(), os.times()
+    after, peak = memory_usage()
+    return dict(solveSeconds=end - start, solveCpu=cpuEnd[0] + cpuEnd[1] - cpu[0] - cpu[1], nativeDofs=dofs,
+                peakMemory=peak, memoryGrowth=None if peak is None or resident is None else peak - resident)
+
+
+def solve_native(function, scale, timeout=SOLVE_TIMEOUT):
+    """Measurements of a native solve in a fresh worker process; solveStatus tells whether it completed in time."""
+
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        result = pool.apply_async(_measure, (function, scale)).get(timeout)
+        result['solveStatus'] = 'completed'
+    except multiprocessing.TimeoutError:
+        result = dict(solveStatus='timeout')
+    except Exception as error:
+        result = dict(solveStatus='failed', solveError='%s: %s' % (type(error).__name__, error))
+    finally:
+        pool.terminate()
+        pool.join()
+    return result
+
+
+def default_scripts():
+    """The scripts of FEM_Coursework and Thesis_scripts that build a model (those importing abaqus)."""
+
+    scripts = []
+    for folder in SCRIPT_FOLDERS:
+        for path in sorted(glob.glob(os.path.join(REPOSITORY, folder, '*.py'))):
+            with open(path) as source:
+                if 'from abaqus import' in source.read():
+                    scripts.append(path)
+    return scripts
+
+
+def _commit():
+    # Short hash of the checked out commit, None outside a git work tree
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPOSITORY,
+                                         stderr=subprocess.STDOUT)
+        return output.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(script, scale, native=True, repeat=3, timeout=SOLVE_TIMEOUT):
+    """Result of one benchmark case: the fastest of repeat offline builds, and the native solve when there is one."""
+
+    # The scripts write their own files (profiles, decks) into a scratch directory
+    directory = tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        builds = [run_script(script, 'stop', directory, seedScale=scale) for _ in range(max(1, repeat))]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    journal = min(builds, key=lambda journal: journal.elapsed)
+    counts = list(journal.counts.values())
+    record = dict(case='%s@%g' % (os.path.basename(script), scale), script=os.path.basename(script), scale=scale,
+                  time=time.time(), commit=_commit(), host=platform.node(), python=platform.python_version(),
+                  status=journal.status, buildSeconds=journal.elapsed, calls=len(journal.calls),
+                  warnings=len(journal.warnings), parts=len(counts),
+                  nodes=sum(count['nodes'] for count in counts), elements=sum(count['elements'] for count in counts),
+                  standInDofs=sum(mesh_dofs(count) for count in counts),
+                  elemCodes=sorted(set(count['elemCode'] for count in counts)))
+    function = NATIVE_SOLVERS.get(os.path.basename(script))
+    if native and function is not None:
+        record.update(solve_native(function, scale, timeout))
+    return record
+
+
+def load_history(path):
+    """The records of a history file, oldest first ([] when there is none yet)."""
+
+    if not os.path.exists(path):
+        return []
+    with open(path) as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def append_history(path, records):
+    with open(path, 'a') as target:
+        for record in records:
+            target.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def regressions(record, history, slack=SLACK, noise=NOISE, window=WINDOW):
+    """What got worse in record against the earlier runs of its case on the same host, as messages."""
+
+    earlier = [other for other in history if other['case'] == record['case'] and other['host'] == record['host']]
+    if not earlier:
+        return []
+    problems = []
+    for key in TIME_KEYS:
+        values = sorted(other[key] for other in earlier[-window:] if other.get(key) is not None)
+        if values and record.get(key) is not None:
+            median = values[len(values) // 2]
+            if record[key] > (1.0 + slack) * median and record[key] - median > noise:
+                problems.append('%s %.3f s against a median of %.3f s' % (key, record[key], median))
+    last = earlier[-1]
+    for key in COUNT_KEYS:
+        if key in last and last.get(key) != record.get(key):
+            problems.append('%s %s, was %s' % (key, record.get(key), last[key]))
+    for key in ('status', 'solveStatus'):
+        if last.get(key) in ('completed', 'solver') and record.get(key) not in ('completed', 'solver'):
+            problems.append('%s %s, was %s' % (key, record.get(key), last[key]))
+    return problems
+
+
+def scaling_exponent(records, key='solveSeconds', dofsKey='nativeDofs'):
+    """k of key ~ dofsKey ** k over the scales of one script (least squares in log-log), None with fewer than two.
+
+    Records without dofsKey are left out rather than filled in from the other DOF count.
+    """
+
+    points = [(math.log(record[dofsKey]), math.log(record[key])) for record in records
+              if record.get(key) and record.get(dofsKey)]
+    if len(set(x for x, y in points)) < 2:
+        return None
+    mx = sum(x for x, y in points) / len(points)
+    my = sum(y for x, y in points) / len(points)
+    return sum((x - mx) * (y - my) for x, y in points) / sum((x - mx) ** 2 for x, y in points)
+
+
+def format_records(records):
+    # Table of the latest record of every case, then the growth of the solve time with the degrees of freedom per
+    # script (the build of the offline stand-in does not grow with the mesh)
+    latest = {}
+    for record in records:
+        latest[record['case']] = record
+    lines = ['%-38s %-8s %9s %9s %9s %12s %9s %10s %8s' % ('Case', 'Status', 'Build ms', 'Nodes', 'Elements',
+                                                          'Stand-in DOF', 'Solve s', 'Native DOF', 'Peak MB')]
+    for case, record in sorted(latest.items()):
+        solve = record.get('solveSeconds')
+        peak = record.get('peakMemory')
+        lines.append('%-38s %-8s %9.1f %9d %9d %12s %9s %10s %8s' % (
+            case[:38], record['status'], 1000.0 * record['buildSeconds'], record['nodes'], record['elements'],
+            record.get('standInDofs', '-'), record.get('solveStatus', '-') if solve is None else '%.3f' % solve,
+            record.get('nativeDofs', '-'), '-' if peak is None else '%.0f' % (peak / 2.0 ** 20)))
+    byScript = {}
+    for record in latest.values():
+        byScript.setdefault(record['script'], []).append(record)
+    for script, scriptRecords in sorted(byScript.items()):
+        exponent = scaling_exponent(scriptRecords)
+        if exponent is not None:
+            lines.append('%s: solve time ~ native DOFs ** %.2f' % (script, exponent))
+    return '\n'.join(lines)
+
+
+def main(arguments):
+    # python -m abaqus_tools.benchmarks run [<script> ...] [--scales 1,0.7,0.5] [--history <file>] [--repeat <n>]
+    #                                       [--timeout <seconds>] [--no-native]
+    # python -m abaqus_tools.benchmarks report [--history <file>]
+    if not arguments or arguments[0] not in ('run', 'report'):
+        print('Usage: python -m abaqus_tools.benchmarks run [<script> ...] [--scales 1,0.7,0.5] [--history <file>] '
+              '[--repeat <n>] [--timeout <seconds>] [--no-native]\n'
+              '       python -m abaqus_tools.benchmarks report [--history <file>]')
+        return 2
+    options = {'--scales': ','.join('%g' % scale for scale in SCALES), '--history': HISTORY, '--repeat': '3',
+               '--timeout': str(SOLVE_TIMEOUT)}
+    native = True
+    scripts = []
+    remaining = list(arguments[1:])
+    while remaining:
+        argument = remaining.pop(0)
+        if argument == '--no-native':
+            native = False
+        elif argument in options:
+            options[argument] = remaining.pop(0)
+        else:
+            scripts.append(argument)
+    history = load_history(options['--history'])
+    if arguments[0] == 'report':
+        print(format_records(history) if history else 'No benchmarks in %s' % options['--history'])
+        return 0
+    scales = [float(scale) for scale in options['--scales'].split(',')]
+    records = []
+    regressed = 0
+    for script in scripts or default_scripts():
+        for scale in scales:
+            record = run_case(script, scale, native, int(options['--repeat']), float(options['--timeout']))
+            problems = regressions(record, history)
+            regressed += bool(problems)
+            records.append(record)
+            append_history(options['--history'], [record])
+            print('%-38s %-8s build %8.1f ms %9d stand-in DOFs%s%s' % (
+                record['case'][:38], record['status'], 1000.0 * record['buildSeconds'], record['standInDofs'],
+                '' if record.get('solveSeconds') is None else '  solve %.3f s' % record['solveSeconds'],
+                ''.join('\n    regression: %s' % problem for problem in problems)))
+    print(format_records(records))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
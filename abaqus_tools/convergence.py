@@ -0,0 +1,188 @@
+# Mesh convergence studies: refinement ladders, Richardson extrapolation and the grid convergence index
+
+# Thermal_analysis_two_parts.py and Thermal_analysis_two_parts_3.1.py are the same model with coarser and finer
+# seeds, and Theory_code.py takes sig_max_low / mid / high from three such runs by hand. A ConvergenceStudy runs the
+# levels of a refinement ladder itself, several at a time, and stops refining once the grid convergence index of the
+# finest three levels is below the tolerance:
+#
+#     from abaqus_tools.convergence import ConvergenceStudy, plate_peak_stress
+#     study = ConvergenceStudy(plate_peak_stress, tolerance=0.005)
+#     study.run()
+#     print(study.report())
+#
+# The quantity is a function of the refinement factor (1 is the base mesh) returning (value, number of elements);
+# plate_peak_stress() is the peak S11 at the hole of FEM5_1.1.py, solved natively. The function is called in worker
+# processes, so it must be a module level function. The representative element size of a level is
+# (1 / number of elements) ** (1 / dimension), as in the procedure of Celik et al. (J. Fluids Eng. 130, 2008) that
+# richardson() follows, so the rounding of seed numbers does not distort the refinement ratios.
+
+import math
+import multiprocessing
+
+import numpy as np
+
+from abaqus_tools.plane_strain import ElasticSystem
+from abaqus_tools.structured_mesh import plate_with_hole_mesh
+
+# Refinement factors of the ladder grow by RATIO per level; Celik et al. ask for ratios above 1.3
+
+RATIO = 2.0 ** 0.5
+SAFETY_FACTOR = 1.25
+
+# FEM5_1.1.py: steel plate, 0.01 thick, pulled by 1.6e8 Pa on its right edge
+
+PLATE_TENSION = dict(youngsModulus=1.9e11, poissonsRatio=0.31, thickness=0.01, traction=1.6e8)
+
+
+def refinement_ladder(levels, ratio=RATIO, start=1.0):
+    """Refinement factors start, start * ratio, start * ratio ** 2, ... (levels of them)."""
+
+    return [start * ratio ** level for level in range(int(levels))]
+
+
+class ConvergenceEstimate(object):
+
+    # Richardson extrapolation from three levels, finest first: observed order, extrapolated value, relative error
+    # of the finest level against the next and the fine grid convergence index (a relative error band, 0.01 = 1 %).
+    # oscillatory is True when the differences change sign; the order is then less reliable.
+
+    def __init__(self, values, sizes, order, extrapolated, oscillatory):
+        self.values = values
+        self.sizes = sizes
+        self.order = order
+        self.extrapolated = extrapolated
+        self.oscillatory = oscillatory
+        ratio = (sizes[1] / sizes[0]) ** order
+        self.relativeError = abs((values[0] - values[1]) / values[0])
+        self.gci = SAFETY_FACTOR * self.relativeError / (ratio - 1.0)
+
+    def __repr__(self):
+        return 'ConvergenceEstimate(order=%.3f, extrapolated=%.6g, gci=%.3g%%)' % (self.order, self.extrapolated,
+                                                                                    100.0 * self.gci)
+
+
+def richardson(values, sizes, maxIterations=50):
+    """Observed order, extrapolated value and GCI from the values on three meshes of element size sizes.
+
+    The levels may be given in any order. The order comes from the fixed point iteration of Celik et al., which
+    allows unequal refinement ratios.
+    """
+
+    if len(values) != 3 or len(sizes) != 3:
+        raise ValueError('Richardson extrapolation needs exactly three levels')
+    order = np.argsort(sizes)
+    f1, f2, f3 = (float(values[i]) for i in order)
+    h1, h2, h3 = (float(sizes[i]) for i in order)
+    if not h1 < h2 < h3:
+        raise ValueError('The three levels need different element sizes, got %r' % (list(sizes), ))
+    r21, r32 = h2 / h1, h3 / h2
+    e21, e32 = f2 - f1, f3 - f2
+    if e21 == 0.0 or e32 == 0.0:
+        # Converged to round off: no order can be observed, and no error is left to estimate
+        return ConvergenceEstimate([f1, f2, f3], [h1, h2, h3], float('inf'), f1, False)
+    sign = 1.0 if e32 / e21 > 0 else -1.0
+    p = abs(math.log(abs(e32 / e21))) / math.log(r21)
+    for _ in range(maxIterations):
+        q = math.log((r21 ** p - sign) / (r32 ** p - sign)) if p > 0 else 0.0
+        updated = abs(math.log(abs(e32 / e21)) + q) / math.log(r21)
+        if abs(updated - p) <= 1e-10 * max(1.0, p):
+            p = updated
+            break
+        p = updated
+    if p == 0.0:
+        raise ValueError('The values %r show no convergence' % ([f1, f2, f3], ))
+    extrapolated = (r21 ** p * f1 - f2) / (r21 ** p - 1.0)
+    return ConvergenceEstimate([f1, f2, f3], [h1, h2, h3], p, extrapolated, sign < 0)
+
+
+class ConvergenceStudy(object):
+
+    # quantity(refinement) -> (value, number of elements). Levels run in waves: the first wave is the coarsest
+    # `first` levels, every later wave `batch` finer levels, all levels of a wave at the same time in `processes`
+    # worker processes. After each wave the finest three levels are extrapolated and the study stops when their GCI
+    # is at most tolerance, or when the ladder (maxLevels long) is used up.
+
+    def __init__(self, quantity, tolerance=0.01, ratio=RATIO, start=1.0, maxLevels=7, first=3, batch=1,
+                 processes=None, dimension=2):
+        if first < 3:
+            raise ValueError('The first wave needs at least three levels, not %r' % (first, ))
+        self.quantity = quantity
+        self.tolerance = float(tolerance)
+        self.ladder = refinement_ladder(maxLevels, ratio, start)
+        self.first = int(first)
+        self.batch = int(batch)
+        self.processes = processes
+        self.dimension = dimension
+        self.refinements = []
+        self.values = []
+        self.elements = []
+        self.estimates = []
+
+    @property
+    def sizes(self):
+        return [(1.0 / n) ** (1.0 / self.dimension) for n in self.elements]
+
+    @property
+    def converged(self):
+        return bool(self.estimates) and self.estimates[-1].gci <= self.tolerance
+
+    def _evaluate(self, refinements):
+        if len(refinements) == 1 or self.processes == 1:
+            return [self.quantity(refinement) for refinement in refinements]
+        pool = multiprocessing.Pool(min(len(refinements), self.processes or multiprocessing.cpu_count()))
+        try:
+            return pool.map(self.quantity, refinements)
+        finally:
+            pool.close()
+            pool.join()
+
+    def run(self):
+        """Run waves until converged or out of levels; returns the last ConvergenceEstimate."""
+
+        while len(self.refinements) < len(self.ladder) and not self.converged:
+            done = len(self.refinements)
+            wave = self.ladder[done:done + (self.first if done == 0 else self.batch)]
+            for refinement, (value, elements) in zip(wave, self._evaluate(wave)):
+                self.refinements.append(refinement)
+                self.values.append(float(value))
+                self.elements.append(int(elements))
+            if len(self.values) >= 3:
+                self.estimates.append(richardson(self.values[-3:], self.sizes[-3:]))
+        return self.estimates[-1] if self.estimates else None
+
+    def report(self):
+        lines = ['%10s %10s %16s' % ('Refinement', 'Elements', 'Value')]
+        for refinement, elements, value in zip(self.refinements, self.elements, self.values):
+            lines.append('%10.3f %10d %16.6g' % (refinement, elements, value))
+        if self.estimates:
+            estimate = self.estimates[-1]
+            lines.append('Observed order %.3f%s, extrapolated %.6g, GCI %.3g %% (%s %.3g %%)'
+                         % (estimate.order, ' (oscillatory)' if estimate.oscillatory else '', estimate.extrapolated,
+                            100.0 * estimate.gci, 'converged, tolerance' if self.converged else 'tolerance',
+                            100.0 * self.tolerance))
+        return '\n'.join(lines)
+
+
+def plate_mesh(refinement, elemType='CPS4'):
+    # The mesh of FEM5_1.1.py (40 seeds per hole edge, 40 biased seeds along the diagonals, seedPart size 0.0015)
+    # with every seed number multiplied and the seed size divided by refinement
+    return plate_with_hole_mesh(arcSeeds=max(2, int(round(40 * refinement))),
+                                radialSeeds=max(2, int(round(40 * refinement))),
+                                size=0.0015 / refinement, elemType=elemType)
+
+
+def plate_peak_stress(refinement):
+    """(peak S11 at the integration points, number of elements) of the plate with a hole of FEM5_1.1.py."""
+
+    mesh = plate_mesh(refinement)
+    system = ElasticSystem(mesh, PLATE_TENSION['youngsModulus'], PLATE_TENSION['poissonsRatio'],
+                           PLATE_TENSION['thickness'], {('LEFT', 1): 0.0, ('BOTTOM', 2): 0.0})
+    solution = system.solve(system.pressure_loads([(elset, int(face[1:]) - 1, -PLATE_TENSION['traction'])
+                                                   for elset, face in mesh.surfaces['RIGHT']]))
+    return float(solution.stresses[..., 0].max()), mesh.numElements
+
+
+if __name__ == '__main__':
+    study = ConvergenceStudy(plate_peak_stress, tolerance=0.005)
+    study.run()
+    print(study.report())
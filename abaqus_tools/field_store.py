@@ -0,0 +1,274 @@
+# Columnar store of the node and element fields of a job: one .npy file per field, frame and instance
+
+# Plots and tables of a job keep extracting the same U, S, NT and RF fields from its ODB. export_job() does it once,
+# right after waitForCompletion(), and writes every field of every frame as a contiguous typed array:
+#
+#     export_job('bearingJob2D')                      # bearingJob2D.odb -> bearingJob2D_fields/
+#
+#     store = FieldStore('bearingJob2D_fields')
+#     u = store.field('U', step='Load Step', frame=-1, instance='BEARINGINSTANCE')
+#     u.values[:, 1].min()                            # settlement, read from the mapped file without parsing
+#     u.labels                                        # node labels of the rows
+#
+# Arrays are opened with np.load(mmap_mode='r'), so opening even a 10^6 node field costs nothing and slicing it reads
+# only the pages that are touched. The store is a directory with manifest.json, which lists one entry per (field,
+# step, frame, instance) with the names of its .npy files:
+#
+#     values    (rows, components), the dtype of the source (float32 from the ODB)
+#     labels    (rows, ), node labels for nodal fields, element labels otherwise
+#     points    (rows, ), integration point numbers of integration point fields (no file otherwise)
+#
+# The ODB is read with the bulkDataBlocks of odbAccess (Abaqus Python only); where odbAccess is not available the
+# fields of the ASCII .fil file are exported instead (see result_files.py), with the component names left empty.
+
+import json
+import os
+import re
+
+import numpy as np
+
+from abaqus_tools.result_files import ELEMENT_KEYS, NODE_KEYS, FilFile
+
+DEFAULT_FIELDS = ('U', 'S', 'NT', 'RF')
+MANIFEST = 'manifest.json'
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class StoredField(object):
+
+    # One manifest entry with its arrays opened: values (rows, components), labels (rows, ) and points (rows, ) or
+    # None. The arrays are memory mapped (read only) unless the store was opened with mmapMode=None.
+
+    def __init__(self, entry, values, labels, points):
+        self.entry = entry
+        self.field = entry['field']
+        self.step = entry['step']
+        self.frame = entry['frame']
+        self.frameValue = entry['frameValue']
+        self.instance = entry['instance']
+        self.position = entry['position']
+        self.components = entry['components']
+        self.values = values
+        self.labels = labels
+        self.points = points
+
+    def __len__(self):
+        return len(self.values)
+
+    def component(self, component):
+        """Column of one component, by name ('U2') or index."""
+
+        if not isinstance(component, int):
+            if component not in self.components:
+                raise ValueError('%s has no component %r, only %s' % (self.field, component,
+                                                                      ', '.join(self.components) or 'unnamed ones'))
+            component = self.components.index(component)
+        return self.values[:, component]
+
+    def __repr__(self):
+        return 'StoredField(%s, step %r, frame %d, %s, %d rows x %d)' % (self.field, self.step, self.frame,
+                                                                          self.instance, len(self.values),
+                                                                          self.values.shape[1])
+
+
+class FieldStore(object):
+
+    # A store directory; created on the first write. Entries added with write() are only listed in the manifest after
+    # save(), so a reader never sees an entry whose files are still being written.
+
+    version = 1
+
+    def __init__(self, root, mmapMode='r'):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.mmapMode = mmapMode
+        self.info = {}
+        self.entries = []
+        manifest = os.path.join(self.root, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as source:
+                stored = json.load(source)
+            if stored.get('version') != self.version:
+                raise ValueError('%s has store version %r, expected %r' % (manifest, stored.get('version'),
+                                                                           self.version))
+            self.info = stored.get('info', {})
+            self.entries = stored['entries']
+
+    def write(self, field, step, frame, frameValue, instance, position, components, labels, values, points=None):
+        """Save the arrays of one field, frame and instance; an existing entry of the same key is replaced."""
+
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        labels = np.asarray(labels)
+        if len(labels) != len(values) or (points is not None and len(points) != len(values)):
+            raise ValueError('%s of %s: %d labels for %d rows of values' % (field, instance, len(labels), len(values)))
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        key = (field, step, frame, instance)
+        self.entries = [entry for entry in self.entries
+                        if (entry['field'], entry['step'], entry['frame'], entry['instance']) != key]
+        stem = _UNSAFE.sub('_', '%s_%s_%s_%d' % (field, instance, step, frame))
+        entry = dict(field=field, step=step, frame=int(frame), frameValue=float(frameValue), instance=instance,
+                     position=position, components=list(components), rows=len(values), dtype=values.dtype.str,
+                     values=stem + '.values.npy', labels=stem + '.labels.npy', points=None)
+        np.save(os.path.join(self.root, entry['values']), np.ascontiguousarray(values))
+        np.save(os.path.join(self.root, entry['labels']), np.ascontiguousarray(labels))
+        if points is not None:
+            entry['points'] = stem + '.points.npy'
+            np.save(os.path.join(self.root, entry['points']), np.ascontiguousarray(points))
+        self.entries.append(entry)
+        return entry
+
+    def save(self, **info):
+        """Write the manifest; keyword arguments (job, source, ...) are kept as its info."""
+
+        self.info.update(info)
+        temporary = os.path.join(self.root, MANIFEST + '.tmp')
+        with open(temporary, 'w') as target:
+            json.dump({'version': self.version, 'info': self.info, 'entries': self.entries}, target, indent=1)
+        if os.path.exists(os.path.join(self.root, MANIFEST)):
+            os.remove(os.path.join(self.root, MANIFEST))
+        os.rename(temporary, os.path.join(self.root, MANIFEST))
+
+    def steps(self):
+        steps = []
+        for entry in self.entries:
+            if entry['step'] not in steps:
+                steps.append(entry['step'])
+        return steps
+
+    def frames(self, step):
+        """Sorted (frame, frameValue) pairs of a step."""
+
+        return sorted(set((entry['frame'], entry['frameValue']) for entry in self.entries if entry['step'] == step))
+
+    def select(self, field=None, step=None, frame=None, instance=None):
+        # Manifest entries matching the given keys (None matches all); frame -1 is the last frame of the step
+        if frame is not None and frame < 0:
+            frames = sorted(set(entry['frame'] for entry in self.entries if (field is None or entry['field'] == field)
+                                and (step is None or entry['step'] == step)))
+            frame = frames[frame] if len(frames) >= -frame else None
+            if frame is None:
+                return []
+        return [entry for entry in self.entries if (field is None or entry['field'] == field)
+                and (step is None or entry['step'] == step) and (frame is None or entry['frame'] == frame)
+                and (instance is None or entry['instance'] == instance)]
+
+    def open(self, entry):
+        """StoredField of a manifest entry."""
+
+        def load(name):
+            return None if name is None else np.load(os.path.join(self.root, name), mmap_mode=self.mmapMode)
+        return StoredField(entry, load(entry['values']), load(entry['labels']), load(entry['points']))
+
+    def field(self, field, step=None, frame=-1, instance=None):
+        """StoredField of one field, frame (-1 for the last) and instance; step and instance may be left out when the
+        store has only one."""
+
+        entries = self.select(field, step, frame, instance)
+        if len(entries) != 1:
+            raise ValueError('%d stored %s fields match step %r, frame %r, instance %r; the store has steps %s and '
+                             'instances %s' % (len(entries), field, step, frame, instance, self.steps(),
+                                               sorted(set(entry['instance'] for entry in self.entries))))
+        return self.open(entries[0])
+
+    def fields(self, field=None, step=None, frame=None, instance=None):
+        """Generator of the StoredField of every matching entry."""
+
+        for entry in self.select(field, step, frame, instance):
+            yield self.open(entry)
+
+
+def export_odb(odbPath, root, fields=DEFAULT_FIELDS, steps=None):
+    """Write the fields of every frame of an ODB to the store root (Abaqus Python only); returns the FieldStore."""
+
+    from odbAccess import openOdb
+
+    store = FieldStore(root)
+    odb = openOdb(path=odbPath, readOnly=True)
+    try:
+        for stepName, step in odb.steps.items():
+            if steps is not None and stepName not in steps:
+                continue
+            for frameNumber, frame in enumerate(step.frames):
+                for name in fields:
+                    if name not in frame.fieldOutputs.keys():
+                        continue
+                    output = frame.fieldOutputs[name]
+                    # Blocks of the same instance (one per element type) are joined into one array
+                    blocks = {}
+                    for block in output.bulkDataBlocks:
+                        instance = block.instance.name if block.instance is not None else 'ASSEMBLY'
+                        blocks.setdefault(instance, []).append(block)
+                    for instance, parts in blocks.items():
+                        nodal = parts[0].elementLabels is None or len(parts[0].elementLabels) == 0
+                        labels = np.concatenate([np.asarray(part.nodeLabels if nodal else part.elementLabels)
+                                                 for part in parts])
+                        points = None
+                        if not nodal and parts[0].integrationPoints is not None and \
+                                len(parts[0].integrationPoints):
+                            points = np.concatenate([np.asarray(part.integrationPoints) for part in parts])
+                        values = np.concatenate([np.asarray(part.data).reshape(len(part.data), -1) for part in parts])
+                        store.write(name, stepName, frameNumber, frame.frameValue, instance,
+                                    str(parts[0].position), list(output.componentLabels) or [name], labels, values,
+                                    points)
+        store.save(source=os.path.abspath(odbPath))
+    finally:
+        odb.close()
+    return store
+
+
+def export_fil(filPath, root, fields=DEFAULT_FIELDS):
+    """Write the fields of every increment of an ASCII .fil file to the store root; returns the FieldStore.
+
+    The .fil file does not name instances or components: the instance is 'ASSEMBLY' and the components are unnamed.
+    """
+
+    store = FieldStore(root)
+    fil = FilFile(filPath)
+    try:
+        nodal = [name for name in fields if name in NODE_KEYS.values()]
+        element = [name for name in fields if name in ELEMENT_KEYS.values()]
+        for step, increment in fil.frames():
+            blocks = fil.select(step, increment)
+            frameValue = blocks[0]['stepTime']
+            keys = set(key for block in blocks for key in block['keys'])
+            for name in nodal:
+                if any(NODE_KEYS.get(key) == name for key in keys):
+                    labels, values = fil.node_values(step, increment, name)
+                    store.write(name, 'Step-%d' % step, increment, frameValue, 'ASSEMBLY', 'NODAL', [], labels, values)
+            if any(ELEMENT_KEYS.get(key) in element for key in keys):
+                frame = fil.element_frame(step, increment, element)
+                for name in element:
+                    if name in frame.fields:
+                        store.write(name, 'Step-%d' % step, increment, frameValue, 'ASSEMBLY', 'INTEGRATION_POINT',
+                                    [], frame.elements, frame.fields[name], frame.points)
+        store.save(source=os.path.abspath(filPath))
+    finally:
+        fil.close()
+    return store
+
+
+def export_job(jobName, directory='.', root=None, fields=DEFAULT_FIELDS):
+    """Export the fields of a finished job: from <jobName>.odb inside Abaqus, else from <jobName>.fil.
+
+    The store is <directory>/<jobName>_fields unless root is given.
+    """
+
+    root = root or os.path.join(directory, jobName + '_fields')
+    odbPath = os.path.join(directory, jobName + '.odb')
+    filPath = os.path.join(directory, jobName + '.fil')
+    try:
+        import odbAccess
+    except ImportError:
+        odbAccess = None
+    if odbAccess is not None and os.path.exists(odbPath):
+        store = export_odb(odbPath, root, fields)
+    elif os.path.exists(filPath):
+        store = export_fil(filPath, root, fields)
+    else:
+        raise ValueError('No results of job %s in %s (%s.odb needs the Abaqus Python, %s.fil *FILE FORMAT, ASCII)'
+                         % (jobName, os.path.abspath(directory), jobName, jobName))
+    store.save(job=jobName)
+    return store
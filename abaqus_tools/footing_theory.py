@@ -0,0 +1,167 @@
+# Bearing capacity (Terzaghi, Meyerhof, Vesic) and elastic settlement of shallow footings, for whole sweeps at once
+
+# The prescribed settlements of Better_3D_displacement.py (u2 = -0.0024873333333333336) and Plastic_2D_disp.py
+# (u2 = -0.010525666666666668) are the elastic settlements of a rigid footing under 100 kPa on the soil of the
+# pressure models, s = q B (1 - nu^2) I / E with B = 1.0 m and the influence factor I of a square (0.82) and a strip
+# (3.47) footing. Here they are computed instead of copied, and every argument is a NumPy array, so one call gives
+# the displacement boundary conditions of a whole sweep:
+#
+#     from abaqus_tools.footing_theory import bearing_capacity, prescribed_settlement
+#     prescribed_settlement(100000.0, 1.0, 30e6, 0.3, 'square')             # -0.0024873333333333336
+#     u2 = prescribed_settlement(q, B=np.array([1.0, 1.5, 2.0])[:, None], E=30e6, nu=0.3, shape='strip')
+#     qult = bearing_capacity('vesic', B=2.0, c=100.0, phi=np.arange(0.0, 41.0, 5.0), gamma=19620.0)
+#
+# B is the footing width (the short side), L its length (None for a strip), c the cohesion (Pa), phi the friction
+# angle (degrees), gamma the unit weight of the soil (N/m^3), Df the embedment depth and q the footing pressure (Pa).
+# The settlement is that of an elastic half space; position 'centre', 'corner' or 'average' of a flexible footing or
+# 'rigid'. The flexible centre and corner factors are Schleicher's closed form, the average and rigid ones are
+# interpolated in log(L / B) in the table of Terzaghi (1943) as given by Das, with a strip taken as L / B = 100.
+
+import numpy as np
+
+METHODS = ('terzaghi', 'meyerhof', 'vesic')
+SHAPES = ('strip', 'square', 'rectangle', 'circle')
+POSITIONS = ('centre', 'corner', 'average', 'rigid')
+STRIP_RATIO = 100.0
+
+# L / B and the influence factors of the average settlement of a flexible footing and of a rigid footing
+
+INFLUENCE_RATIOS = (1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 50.0, 100.0)
+INFLUENCE_AVERAGE = (0.95, 1.20, 1.31, 1.52, 1.83, 2.25, 2.70, 3.15, 3.69)
+INFLUENCE_RIGID = (0.82, 1.06, 1.20, 1.42, 1.70, 2.10, 2.46, 3.00, 3.47)
+
+# Circular footing: centre, edge, average of a flexible footing and rigid footing
+
+CIRCLE_INFLUENCE = dict(centre=1.0, corner=0.64, average=0.85, rigid=0.79)
+
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in values))
+
+
+def _ratio(B, L):
+    # B / L, 0 for a strip (L None or infinite)
+    if L is None:
+        return np.zeros_like(B)
+    B, L = _arrays(B, L)
+    return np.where(np.isfinite(L), np.minimum(B, L) / np.maximum(B, L), 0.0)
+
+
+def capacity_factors(phi, method='vesic'):
+    """(Nc, Nq, Ngamma) of the friction angle phi (degrees) by the method 'terzaghi', 'meyerhof' or 'vesic'."""
+
+    if method not in METHODS:
+        raise ValueError('method must be one of %s, not %r' % (', '.join(METHODS), method))
+    phi = np.radians(np.asarray(phi, dtype=float))
+    tanPhi = np.tan(phi)
+    if method == 'terzaghi':
+        nq = np.exp(2.0 * (0.75 * np.pi - 0.5 * phi) * tanPhi) / (2.0 * np.cos(0.25 * np.pi + 0.5 * phi) ** 2)
+        nc0 = 1.5 * np.pi + 1.0
+        # Coduto's fit of Terzaghi's bearing capacity factor for the soil weight
+        ngamma = 2.0 * (nq + 1.0) * tanPhi / (1.0 + 0.4 * np.sin(4.0 * phi))
+    else:
+        nq = np.exp(np.pi * tanPhi) * np.tan(0.25 * np.pi + 0.5 * phi) ** 2
+        nc0 = np.pi + 2.0
+        ngamma = (nq - 1.0) * np.tan(1.4 * phi) if method == 'meyerhof' else 2.0 * (nq + 1.0) * tanPhi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nc = np.where(phi > 0.0, (nq - 1.0) / tanPhi, nc0)
+    return nc, nq, ngamma
+
+
+def bearing_capacity(method, B, c, phi, gamma, Df=0.0, L=None, shape=None):
+    """Ultimate bearing pressure (Pa) of a shallow footing under a vertical central load.
+
+    shape 'circle' makes B the diameter; otherwise the footing is a rectangle B x L (a strip when L is None). Terzaghi
+    has shape factors for strips, squares and circles only: rectangles use those of the square.
+    """
+
+    B, c, phi, gamma, Df = _arrays(B, c, phi, gamma, Df)
+    nc, nq, ngamma = capacity_factors(phi, method)
+    ratio = np.ones_like(B) if shape == 'circle' else _ratio(B, L)
+    surcharge = gamma * Df
+    phiRad = np.radians(phi)
+    if method == 'terzaghi':
+        sc = np.where(ratio > 0.0, 1.3, 1.0)
+        sq = np.ones_like(B)
+        sgamma = np.where(ratio > 0.0, 0.6 if shape == 'circle' else 0.8, 1.0)
+        dc = dq = dgamma = np.ones_like(B)
+    elif method == 'meyerhof':
+        kp = np.tan(0.25 * np.pi + 0.5 * phiRad) ** 2
+        frictional = phi > 10.0
+        sc = 1.0 + 0.2 * kp * ratio
+        sq = sgamma = np.where(frictional, 1.0 + 0.1 * kp * ratio, 1.0)
+        dc = 1.0 + 0.2 * np.sqrt(kp) * Df / B
+        dq = dgamma = np.where(frictional, 1.0 + 0.1 * np.sqrt(kp) * Df / B, 1.0)
+    else:
+        sc = 1.0 + ratio * nq / nc
+        sq = 1.0 + ratio * np.tan(phiRad)
+        sgamma = 1.0 - 0.4 * ratio
+        # Depth factors for Df / B <= 1, with arctan(Df / B) beyond
+        k = np.where(Df <= B, Df / B, np.arctan(Df / B))
+        dc = 1.0 + 0.4 * k
+        dq = 1.0 + 2.0 * np.tan(phiRad) * (1.0 - np.sin(phiRad)) ** 2 * k
+        dgamma = np.ones_like(B)
+    return sc * dc * c * nc + sq * dq * surcharge * nq + 0.5 * sgamma * dgamma * gamma * B * ngamma
+
+
+def _schleicher_centre(m):
+    # Influence factor of the centre of a flexible rectangle with L / B = m
+    root = np.sqrt(1.0 + m * m)
+    return (2.0 / np.pi) * (np.log(root + m) + m * np.log((root + 1.0) / m))
+
+
+def influence_factor(shape='strip', position='rigid', L=None, B=None):
+    """Influence factor I of the elastic settlement s = q B (1 - nu^2) I / E; rectangles need L and B."""
+
+    if shape not in SHAPES:
+        raise ValueError('shape must be one of %s, not %r' % (', '.join(SHAPES), shape))
+    if position not in POSITIONS:
+        raise ValueError('position must be one of %s, not %r' % (', '.join(POSITIONS), position))
+    if shape == 'circle':
+        return np.asarray(CIRCLE_INFLUENCE[position])
+    if shape == 'rectangle':
+        if L is None or B is None:
+            raise ValueError('A rectangular footing needs L and B')
+        B, L = _arrays(B, L)
+        m = np.clip(np.maximum(B, L) / np.minimum(B, L), 1.0, STRIP_RATIO)
+    else:
+        m = np.asarray(1.0 if shape == 'square' else STRIP_RATIO)
+    if position in ('centre', 'corner'):
+        centre = _schleicher_centre(m)
+        return centre if position == 'centre' else 0.5 * centre
+    table = INFLUENCE_RIGID if position == 'rigid' else INFLUENCE_AVERAGE
+    return np.interp(np.log(m), np.log(INFLUENCE_RATIOS), table)
+
+
+def elastic_settlement(q, B, E, nu, shape='strip', position='rigid', L=None):
+    """Elastic settlement (m, positive downwards) of a footing of width B (diameter of a circle) under pressure q."""
+
+    q, B, E, nu = _arrays(q, B, E, nu)
+    return q * B * (1.0 - nu ** 2) * influence_factor(shape, position, L, B) / E
+
+
+def prescribed_settlement(q, B, E, nu, shape='strip', position='rigid', L=None):
+    """u2 of the settlement DisplacementBC (negative): a float for scalar input, an array for a sweep."""
+
+    u2 = -elastic_settlement(q, B, E, nu, shape, position, L)
+    return float(u2) if u2.ndim == 0 else u2
+
+
+def safety_factor(method, q, B, c, phi, gamma, Df=0.0, L=None, shape=None):
+    """Ultimate bearing pressure over the applied pressure q."""
+
+    return bearing_capacity(method, B, c, phi, gamma, Df, L, shape) / np.asarray(q, dtype=float)
+
+
+def settlement_variants(paramsList, shape='strip', position='rigid'):
+    """Copies of BearingParams objects with loading 'displacement' and the elastic settlement of their pressure.
+
+    As in the original scripts, B is the loaded width of the symmetric half model, half the footing width.
+    """
+
+    variants = []
+    for params in paramsList:
+        u2 = prescribed_settlement(params.pressure, 0.5 * params.footingWidth, params.youngsModulus,
+                                   params.poissonsRatio, shape, position)
+        variants.append(params.copy(loading='displacement', settlement=u2))
+    return variants
@@ -0,0 +1,218 @@
+# Transient heat conduction for DC2D4 / DC2D3 meshes: backward Euler with deltmx style time incrementation
+
+# FEM5_heat_transfer.py heats the hole of the plate to 125 C for 15000 s (HeatTransferStep with deltmx=1000). The same
+# analysis runs here in a few seconds, so studies of the conductivity or the film coefficient need no Abaqus job:
+#
+#     from abaqus_tools.heat_transfer import plate_heat_model, solve_transient, FEM5_HEAT_STEP
+#     for conductivity in (30.0, 54.0, 80.0):
+#         result = solve_transient(plate_heat_model(conductivity=conductivity), **FEM5_HEAT_STEP)
+#         print(conductivity, result.temperatures[-1].max())
+#
+# The capacitance C and conductance K (conduction plus film) matrices are assembled once. Every increment solves
+# (C / dt + K) T1 = C / dt T0 + F for the nodes without a prescribed temperature, and the sparse LU factorisation of
+# that matrix is kept for as long as dt stays the same. The increment is controlled by deltmx as in Abaqus: an
+# increment that changes a nodal temperature by more than deltmx is repeated with a smaller dt, and dt only grows (by
+# a fixed factor, so the factorisation is reused in between) while the changes stay well below deltmx.
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from abaqus_tools.plane_strain import ELEMENTS, shape_gradients
+from abaqus_tools.structured_mesh import plate_with_hole_mesh
+
+# The diffusive elements interpolate like the plane strain elements of the same shape
+
+DIFFUSIVE = {'DC2D4': ELEMENTS['CPE4'], 'DC2D3': ELEMENTS['CPE3']}
+
+# HeatTransferStep() of FEM5_heat_transfer.py
+
+FEM5_HEAT_STEP = dict(timePeriod=15000.0, initialInc=1.0, minInc=0.15, maxInc=15000.0, deltmx=1000.0)
+
+# Increment control: a rejected increment is retried with dt * max(CUTBACK_MIN, SAFETY * deltmx / change). Like the
+# Abaqus rule for increasing the increment, dt is multiplied by GROWTH only after HOLD consecutive increments of the
+# current size whose largest change would still be below SAFETY * deltmx after growing. The change is measured on the
+# nodes without a prescribed temperature.
+
+SAFETY = 0.8
+CUTBACK_MIN = 0.25
+GROWTH = 1.5
+HOLD = 2
+
+
+class ThermalModel(object):
+
+    # A mesh with material, film conditions, prescribed temperatures and the initial temperature. Films and fixed
+    # temperatures refer to surfaces and node sets of the mesh (see structured_mesh.add_surface()).
+
+    def __init__(self, mesh, conductivity, density, specificHeat, thickness=1.0, lumped=True):
+        if mesh.elemType not in DIFFUSIVE:
+            raise ValueError('Element type %r is not a heat transfer element, use one of %s'
+                             % (mesh.elemType, ', '.join(sorted(DIFFUSIVE))))
+        self.mesh = mesh
+        self.conductivity = float(conductivity)
+        self.density = float(density)
+        self.specificHeat = float(specificHeat)
+        self.thickness = float(thickness)
+        self.lumped = lumped
+        self.films = []
+        self.fixed = []
+        self.initial = 0.0
+
+    def film(self, surface, filmCoeff, sinkTemperature):
+        self.films.append((surface, float(filmCoeff), float(sinkTemperature)))
+
+    def temperature_bc(self, nodeSet, magnitude):
+        self.fixed.append((nodeSet, float(magnitude)))
+
+    def matrices(self):
+        """Capacitance C, conductance K (sparse) and the constant heat flux vector F of the film sinks."""
+
+        mesh = self.mesh
+        nodes, elements = mesh.nodes, mesh.elements
+        element = DIFFUSIVE[mesh.elemType]
+        shape, dN, detJ, _ = shape_gradients(nodes, elements, element)
+        scale = detJ * element['weights'][None, :] * self.thickness
+        size = len(nodes)
+        rows = np.repeat(elements - 1, elements.shape[1], axis=1).ravel()
+        cols = np.tile(elements - 1, (1, elements.shape[1])).ravel()
+
+        ke = self.conductivity * np.einsum('egai,egaj,eg->eij', dN, dN, scale, optimize=True)
+        ce = self.density * self.specificHeat * np.einsum('gi,gj,eg->eij', shape, shape, scale, optimize=True)
+        K = scipy.sparse.coo_matrix((ke.ravel(), (rows, cols)), shape=(size, size))
+        if self.lumped:
+            capacity = np.zeros(size)
+            np.add.at(capacity, elements.ravel() - 1, ce.sum(axis=2).ravel())
+            C = scipy.sparse.diags(capacity)
+        else:
+            C = scipy.sparse.coo_matrix((ce.ravel(), (rows, cols)), shape=(size, size))
+
+        F = np.zeros(size)
+        filmRows, filmCols, filmValues = [], [], []
+        corners = elements.shape[1]
+        for surface, filmCoeff, sink in self.films:
+            for elset, face in mesh.surfaces[surface]:
+                k = int(face[1:]) - 1
+                selected = elements[mesh.elementSets[elset] - 1]
+                first, second = selected[:, k] - 1, selected[:, (k + 1) % corners] - 1
+                length = np.hypot(*(nodes[second] - nodes[first]).T)
+                h = filmCoeff * self.thickness * length
+                for a, b, weight in ((first, first, 2.0), (second, second, 2.0), (first, second, 1.0),
+                                     (second, first, 1.0)):
+                    filmRows.append(a)
+                    filmCols.append(b)
+                    filmValues.append(h * weight / 6.0)
+                np.add.at(F, first, 0.5 * h * sink)
+                np.add.at(F, second, 0.5 * h * sink)
+        if filmValues:
+            K = K + scipy.sparse.coo_matrix((np.concatenate(filmValues), (np.concatenate(filmRows),
+                                                                           np.concatenate(filmCols))),
+                                            shape=(size, size))
+        return C.tocsr(), K.tocsr(), F
+
+
+class TransientResult(object):
+
+    # times: (frames, ) step times, temperatures: (frames, N) nodal temperatures, frame 0 is the initial state
+
+    def __init__(self, times, temperatures, cutbacks, factorisations):
+        self.times = np.asarray(times)
+        self.temperatures = np.asarray(temperatures)
+        self.cutbacks = cutbacks
+        self.factorisations = factorisations
+
+    @property
+    def increments(self):
+        return len(self.times) - 1
+
+
+def transient_frames(model, timePeriod, initialInc, minInc, maxInc, deltmx=None, amplitude='step', stats=None):
+    """Generator of (time, nodal temperatures) for every converged increment, starting with (0, initial state).
+
+    amplitude 'step' applies the prescribed temperatures at once, 'ramp' linearly over the step. stats, if given, is
+    a dict that receives the number of cutbacks and factorisations.
+    """
+
+    if amplitude not in ('step', 'ramp'):
+        raise ValueError("amplitude must be 'step' or 'ramp', not %r" % (amplitude, ))
+    C, K, F = model.matrices()
+    size = C.shape[0]
+    T = np.full(size, model.initial)
+    target = np.full(size, np.nan)
+    for nodeSet, magnitude in model.fixed:
+        target[model.mesh.nodeSets[nodeSet] - 1] = magnitude
+    known = ~np.isnan(target)
+    free = np.flatnonzero(~known)
+    start = np.where(known, T, 0.0)
+
+    Cff = C[free][:, free]
+    Kff = K[free][:, free]
+    Cfc = C[free][:, known]
+    Kfc = K[free][:, known]
+    factors = {}
+    stats = {} if stats is None else stats
+    stats.update(cutbacks=0, factorisations=0)
+
+    def solve(dt, fixedValues):
+        if dt not in factors:
+            if len(factors) > 4:
+                factors.clear()
+            factors[dt] = scipy.sparse.linalg.splu((Cff / dt + Kff).tocsc())
+            stats['factorisations'] += 1
+        rhs = Cff.dot(T[free]) / dt + Cfc.dot(T[known] - fixedValues) / dt + F[free] - Kfc.dot(fixedValues)
+        Tnew = T.copy()
+        Tnew[known] = fixedValues
+        Tnew[free] = factors[dt].solve(rhs)
+        return Tnew
+
+    time = 0.0
+    dt = float(initialInc)
+    held = 0
+    yield time, T.copy()
+    while time < timePeriod * (1.0 - 1e-12):
+        increment = min(dt, timePeriod - time)
+        fraction = 1.0 if amplitude == 'step' else (time + increment) / timePeriod
+        Tnew = solve(increment, start[known] + fraction * (target[known] - start[known]))
+        change = np.abs(Tnew[free] - T[free]).max() if len(free) else 0.0
+        if deltmx is not None and change > deltmx:
+            dt = increment * max(CUTBACK_MIN, SAFETY * deltmx / change)
+            stats['cutbacks'] += 1
+            held = 0
+            if dt < minInc:
+                raise ValueError('Time increment required is less than the minimum specified (%r) at time %r'
+                                 % (minInc, time))
+            continue
+        time += increment
+        T = Tnew
+        yield time, T.copy()
+        if increment == dt and (deltmx is None or change * GROWTH < SAFETY * deltmx):
+            held += 1
+            if held >= HOLD:
+                dt = min(dt * GROWTH, maxInc)
+                held = 0
+        else:
+            held = 0
+
+
+def solve_transient(model, timePeriod, initialInc, minInc, maxInc, deltmx=None, amplitude='step'):
+    """Run a transient heat transfer step and keep every increment; returns a TransientResult."""
+
+    stats = {}
+    times, temperatures = [], []
+    for time, T in transient_frames(model, timePeriod, initialInc, minInc, maxInc, deltmx, amplitude, stats):
+        times.append(time)
+        temperatures.append(T)
+    return TransientResult(times, temperatures, stats['cutbacks'], stats['factorisations'])
+
+
+def plate_heat_model(conductivity=54.0, density=7915.0, specificHeat=465.0, filmCoeff=750.0, sinkTemperature=0.0,
+                     holeTemperature=125.0, initialTemperature=20.0, thickness=0.01, mesh=None, elemType='DC2D4'):
+    """The heat transfer model of FEM5_heat_transfer.py (film and 125 C on the hole, 20 C initially)."""
+
+    if mesh is None:
+        mesh = plate_with_hole_mesh(elemType=elemType)
+    model = ThermalModel(mesh, conductivity, density, specificHeat, thickness)
+    model.film('HOLE', filmCoeff, sinkTemperature)
+    model.temperature_bc('HOLE', holeTemperature)
+    model.initial = initialTemperature
+    return model
@@ -0,0 +1,169 @@
+# Abaqus input deck (.inp) writer for the 2D footing models, without the CAE kernel
+
+# build_bearing_model() plus writeInput() needs a CAE licence and a kernel start for every deck. For the rectangular
+# soil domain the mesh is generated by structured_mesh.py and the keyword deck (*NODE, *ELEMENT, *NSET/*ELSET,
+# *SURFACE, material, section, *BOUNDARY, *STEP with *DSLOAD or a prescribed settlement) is written here directly:
+#
+#     from abaqus_tools.bearing_params import PRESSURE_2D
+#     from abaqus_tools.inp_writer import write_bearing_deck
+#     write_bearing_deck(PRESSURE_2D.copy(name='B3', footingWidth=3.0), 'decks/B3.inp')
+#
+# or for the presets: python -m abaqus_tools.inp_writer decks
+#
+# The decks are flat (no *PART / *ASSEMBLY), which Abaqus/Standard accepts as they are.
+
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from abaqus_tools.output_profiles import deck_keywords
+from abaqus_tools.profiling import record_mesh, stage, timed
+from abaqus_tools.structured_mesh import bearing_mesh
+
+# Abaqus reads at most 16 entries per data line
+
+_PER_LINE = 16
+
+
+def _rows(template, array):
+    # Format all rows of a 2D array in one string operation, far faster than a Python loop over the rows
+    array = np.asarray(array)
+    if not len(array):
+        return ''
+    return (template * len(array)) % tuple(array.ravel().tolist())
+
+
+def write_ids(out, ids):
+    ids = np.asarray(ids, dtype=int)
+    full = len(ids) // _PER_LINE * _PER_LINE
+    out.write(_rows(', '.join(['%d'] * _PER_LINE) + '\n', ids[:full].reshape(-1, _PER_LINE)))
+    if full < len(ids):
+        out.write(', '.join('%d' % i for i in ids[full:]) + '\n')
+
+
+def write_node_values(out, labels, values):
+    # Data lines 'node label, value', e.g. for *TEMPERATURE or *INITIAL CONDITIONS, TYPE=TEMPERATURE
+    out.write(_rows('%d, %.10g\n', np.column_stack((np.asarray(labels, dtype=float), values))))
+
+
+def element_nodes(elemType):
+    """Number of nodes of an element type from the digits its code ends with (CPE4R 4, CPE3 3, DC2D4 4, C3D8R 8)."""
+
+    match = re.search(r'(\d+)[A-Z]*$', elemType.upper())
+    if match is None:
+        raise ValueError('Cannot tell the number of nodes of element type %r' % (elemType, ))
+    return int(match.group(1))
+
+
+def write_mesh(out, mesh):
+    if element_nodes(mesh.elemType) != mesh.elements.shape[1]:
+        raise ValueError('Element type %s has %d nodes, the mesh has %d nodes per element'
+                         % (mesh.elemType, element_nodes(mesh.elemType), mesh.elements.shape[1]))
+    labels = np.arange(1, mesh.numNodes + 1, dtype=float)
+    out.write('*NODE\n')
+    out.write(_rows('%d, %.12g, %.12g\n', np.column_stack((labels, mesh.nodes))))
+    out.write('*ELEMENT, TYPE=%s, ELSET=ALL_ELEMENTS\n' % mesh.elemType)
+    elementLabels = np.arange(1, mesh.numElements + 1)
+    width = mesh.elements.shape[1]
+    out.write(_rows(', '.join(['%d'] * (width + 1)) + '\n', np.column_stack((elementLabels, mesh.elements))))
+    for name in sorted(mesh.nodeSets):
+        out.write('*NSET, NSET=%s\n' % name)
+        write_ids(out, mesh.nodeSets[name])
+    for name in sorted(mesh.elementSets):
+        out.write('*ELSET, ELSET=%s\n' % name)
+        write_ids(out, mesh.elementSets[name])
+    for name in sorted(mesh.surfaces):
+        out.write('*SURFACE, TYPE=ELEMENT, NAME=%s\n' % name)
+        for elset, face in mesh.surfaces[name]:
+            out.write('%s, %s\n' % (elset, face))
+
+
+def write_material(out, params):
+    out.write('*MATERIAL, NAME=SOIL\n')
+    out.write('*DENSITY\n%r,\n' % float(params.density))
+    out.write('*ELASTIC\n%r, %r\n' % (float(params.youngsModulus), float(params.poissonsRatio)))
+    if params.frictionAngle is not None:
+        out.write('*MOHR COULOMB\n%r, %r\n' % (float(params.frictionAngle), float(params.dilationAngle)))
+        out.write('*MOHR COULOMB HARDENING\n')
+        for row in params.cohesionTable:
+            out.write(', '.join('%r' % float(v) for v in row) + '\n')
+
+
+def write_step(out, params, name='Load Step', period=None):
+    # Same defaults as StaticStep(): the first increment is the whole step unless set otherwise. period overrides the
+    # step time of params (the rest of the step in a restart, see restart_orchestrator.py).
+    period = float(params.timePeriod if period is None else period)
+    initialInc = period if params.initialInc is None else min(float(params.initialInc), period)
+    minInc = min(initialInc, 1e-5 * period) if params.minInc is None else min(float(params.minInc), initialInc)
+    maxInc = period if params.maxInc is None else min(float(params.maxInc), period)
+    out.write('*STEP, NAME="%s", NLGEOM=NO, INC=%d\n' % (name, 1000 if params.frictionAngle is not None else 100))
+    if params.stabilize is None:
+        out.write('*STATIC\n')
+    else:
+        out.write('*STATIC, STABILIZE=%r\n' % float(params.stabilize))
+    out.write('%r, %r, %r, %r\n' % (initialInc, period, minInc, maxInc))
+    if params.incrementAttempts is not None:
+        # IA, the eighth time incrementation control, is the number of cutbacks allowed in one increment
+        out.write('*CONTROLS, PARAMETERS=TIME INCREMENTATION\n, , , , , , , %d\n' % int(params.incrementAttempts))
+    if params.restartFrequency is not None:
+        out.write('*RESTART, WRITE, FREQUENCY=%d\n' % int(params.restartFrequency))
+    if params.loading == 'pressure':
+        out.write('*DSLOAD\nFOOTING, P, %r\n' % float(params.pressure))
+    elif params.loading == 'displacement':
+        out.write('*BOUNDARY\nFOOTING, 2, 2, %r\n' % float(params.settlement))
+    else:
+        raise ValueError("loading must be 'pressure' or 'displacement', not %r" % (params.loading, ))
+    if params.outputProfile is None:
+        out.write('*OUTPUT, FIELD, VARIABLE=PRESET\n')
+        out.write('*OUTPUT, HISTORY, VARIABLE=PRESET\n')
+    else:
+        out.write(deck_keywords(params.outputProfile))
+    out.write('*END STEP\n')
+
+
+@timed()
+def write_bearing_deck(params, path, mesh=None):
+    """Write the complete input deck of one footing model to path and return the mesh it used."""
+
+    if mesh is None:
+        with stage('structured mesh'):
+            mesh = bearing_mesh(params)
+            record_mesh(params.name, mesh)
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    firstFixedDof = 1 if params.pinnedBase else 2
+    with open(path, 'w') as out:
+        out.write('*HEADING\n%s: 2D footing model written by abaqus_tools.inp_writer\n' % params.name)
+        out.write('*PREPRINT, ECHO=NO, MODEL=NO, HISTORY=NO, CONTACT=NO\n')
+        write_mesh(out, mesh)
+        out.write('*SOLID SECTION, ELSET=SOIL, MATERIAL=SOIL\n%r,\n' % float(params.thickness))
+        write_material(out, params)
+        out.write('*BOUNDARY\nLEFT, XSYMM\n')
+        for name in ('RIGHT', 'BOTTOM'):
+            out.write('%s, %d, 2\n' % (name, firstFixedDof))
+        write_step(out, params)
+    return mesh
+
+
+def write_bearing_decks(paramsList, directory):
+    # One deck per parameter set, named after its job. Returns the list of paths.
+    paths = []
+    for params in paramsList:
+        path = os.path.join(directory, params.jobName + '.inp')
+        write_bearing_deck(params, path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == '__main__':
+    from abaqus_tools.bearing_params import PRESSURE_2D, DISPLACEMENT_2D, PLASTIC_2D
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else '.'
+    for preset in (PRESSURE_2D, DISPLACEMENT_2D, PLASTIC_2D):
+        start = time.time()
+        mesh = write_bearing_deck(preset, os.path.join(directory, preset.jobName + '.inp'))
+        print('%s: %s in %.3f s' % (preset.jobName, mesh, time.time() - start))
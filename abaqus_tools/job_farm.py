@@ -0,0 +1,275 @@
+# Concurrent solver runs of many input decks, in place of submit() / waitForCompletion() one job at a time
+
+# The scripts create every job with numCpus=1 under a fixed name ('bearingJob2D', 'PlateWithHoleJob'), so two copies
+# cannot run side by side and a 32 core node runs one job. JobFarm gives every deck its own job name and working
+# directory and keeps as many solver processes running as the CPU budget allows:
+#
+#     from abaqus_tools.job_farm import JobFarm
+#     farm = JobFarm('runs', cpuBudget=32)
+#     for path in write_bearing_decks(variants, 'decks'):
+#         farm.add(path, cpus=4)
+#     farm.run()
+#     print(farm.summary())
+#
+# or from the shell: python -m abaqus_tools.job_farm run runs decks/*.inp --budget 32 --cpus 4
+#
+# The solver is started from a command template, ABAQUS_COMMAND by default. STAND_IN_COMMAND runs this module as a
+# stand-in solver that only waits and writes a status file, so the scheduling can be tried on any Linux box.
+#
+# With a ResultCache (result_cache.py) a deck whose normalised contents have been solved before is not run again: the
+# stored result files are copied into its directory under its job name and the job is CACHED. A deck identical to one
+# that is still running waits for it and is then served from the cache.
+
+import glob
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from abaqus_tools.result_cache import RESULT_EXTENSIONS, ResultCache, deck_key
+
+ABAQUS_COMMAND = ('abaqus', 'job={job}', 'input={input}', 'cpus={cpus}', 'interactive')
+STAND_IN_COMMAND = (sys.executable, '-c', 'import sys; sys.path.insert(0, %r); from abaqus_tools.job_farm import main; '
+                    'sys.exit(main(sys.argv[1:]))' % os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    'stand-in', 'job={job}', 'input={input}', 'cpus={cpus}')
+
+# Seconds the stand-in solver takes per job, unless the deck has a '** STAND-IN SECONDS=<s>' comment line
+
+STAND_IN_SECONDS = 1.0
+
+QUEUED, RUNNING, COMPLETED, CACHED, ABORTED, TIMED_OUT = ('QUEUED', 'RUNNING', 'COMPLETED', 'CACHED', 'ABORTED',
+                                                           'TIMED_OUT')
+
+
+class FarmJob(object):
+
+    # One deck of the farm: its unique job name, working directory (holding a copy of the deck as <name>.inp and the
+    # solver log <name>.log), the number of CPUs it is started with, the cache key of the deck (None without a
+    # cache) and, once run, status, exit code and times
+
+    def __init__(self, name, inputFile, directory, cpus):
+        self.name = name
+        self.inputFile = inputFile
+        self.directory = directory
+        self.cpus = int(cpus)
+        self.key = None
+        self.status = QUEUED
+        self.returncode = None
+        self.start = None
+        self.end = None
+        self.process = None
+
+    @property
+    def elapsed(self):
+        if self.start is None:
+            return None
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def __repr__(self):
+        return 'FarmJob(%r, %s, cpus=%d)' % (self.name, self.status, self.cpus)
+
+
+def unique_name(name, taken):
+    # name, or name_2, name_3, ... whichever is not in taken
+    candidate, number = name, 1
+    while candidate in taken:
+        number += 1
+        candidate = '%s_%d' % (name, number)
+    return candidate
+
+
+class JobFarm(object):
+
+    # Jobs start in the order they were added; when the next job does not fit in the free CPUs, later jobs that do
+    # fit are started first. timeout (seconds per job) kills jobs that run longer. cache is a ResultCache, salt is
+    # hashed into the deck keys (e.g. the solver version, so a new release does not reuse old results).
+
+    def __init__(self, root, cpuBudget=None, command=ABAQUS_COMMAND, timeout=None, poll=0.2, cache=None, salt=''):
+        self.root = os.path.abspath(root)
+        self.cpuBudget = int(cpuBudget or multiprocessing.cpu_count())
+        self.command = tuple(command)
+        self.timeout = timeout
+        self.poll = poll
+        self.cache = cache
+        self.salt = salt
+        self.jobs = []
+
+    def add(self, inputFile, name=None, cpus=1):
+        """Queue a deck; the job name defaults to the file name and is made unique. Returns the FarmJob."""
+
+        if not os.path.isfile(inputFile):
+            raise ValueError('Input file %r does not exist' % (inputFile, ))
+        if not 1 <= int(cpus) <= self.cpuBudget:
+            raise ValueError('A job needs between 1 and %d CPUs (the budget), not %r' % (self.cpuBudget, cpus))
+        if name is None:
+            name = os.path.splitext(os.path.basename(inputFile))[0]
+        # Names of directories left by earlier runs count as taken, so their results are never overwritten
+        taken = set(job.name for job in self.jobs)
+        if os.path.isdir(self.root):
+            taken.update(os.listdir(self.root))
+        name = unique_name(name, taken)
+        job = FarmJob(name, os.path.abspath(inputFile), os.path.join(self.root, name), cpus)
+        if self.cache is not None:
+            job.key = deck_key(inputFile, self.salt)
+        self.jobs.append(job)
+        return job
+
+    def _start(self, job):
+        os.makedirs(job.directory)
+        deck = os.path.join(job.directory, job.name + '.inp')
+        shutil.copyfile(job.inputFile, deck)
+        if job.key is not None and self.cache.restore(job.key, job.directory, job.name):
+            job.start = job.end = time.time()
+            job.returncode = 0
+            job.status = CACHED
+            return
+        arguments = [part.format(job=job.name, input=job.name + '.inp', cpus=job.cpus, directory=job.directory)
+                     for part in self.command]
+        log = open(os.path.join(job.directory, job.name + '.log'), 'w')
+        job.start = time.time()
+        try:
+            job.process = subprocess.Popen(arguments, cwd=job.directory, stdout=log, stderr=subprocess.STDOUT)
+        except OSError as error:
+            log.write('Could not start %s: %s\n' % (arguments[0], error))
+            job.end = time.time()
+            job.status = ABORTED
+        finally:
+            log.close()
+        if job.process is not None:
+            job.status = RUNNING
+
+    def _finish(self, job, returncode, status=None):
+        job.end = time.time()
+        job.returncode = returncode
+        job.status = status or (COMPLETED if returncode == 0 else ABORTED)
+        job.process = None
+        if job.status == COMPLETED and job.key is not None:
+            self.cache.put(job.key, [os.path.join(job.directory, job.name + extension)
+                                     for extension in RESULT_EXTENSIONS
+                                     if os.path.isfile(os.path.join(job.directory, job.name + extension))])
+
+    def run(self, report=None):
+        """Run every queued job, at most cpuBudget CPUs at a time; returns the jobs.
+
+        report, if given, is called with each job when it finishes.
+        """
+
+        queued = [job for job in self.jobs if job.status == QUEUED]
+        running = []
+        try:
+            while queued or running:
+                free = self.cpuBudget - sum(job.cpus for job in running)
+                runningKeys = set(job.key for job in running if job.key is not None)
+                for job in list(queued):
+                    if job.cpus <= free and job.key not in runningKeys:
+                        queued.remove(job)
+                        self._start(job)
+                        if job.status == RUNNING:
+                            running.append(job)
+                            free -= job.cpus
+                            if job.key is not None:
+                                runningKeys.add(job.key)
+                        elif report:
+                            report(job)
+                time.sleep(self.poll)
+                for job in list(running):
+                    returncode = job.process.poll()
+                    if returncode is None:
+                        if self.timeout is None or job.elapsed <= self.timeout:
+                            continue
+                        job.process.kill()
+                        self._finish(job, job.process.wait(), TIMED_OUT)
+                    else:
+                        self._finish(job, returncode)
+                    running.remove(job)
+                    if report:
+                        report(job)
+        finally:
+            # Interrupted (e.g. Ctrl+C): do not leave solver processes behind
+            for job in running:
+                if job.process is not None:
+                    job.process.kill()
+                    self._finish(job, job.process.wait(), ABORTED)
+        return self.jobs
+
+    def summary(self):
+        """One line per job: name, status, exit code, CPUs and wall time, then the totals."""
+
+        lines = ['%-32s %-10s %5s %5s %10s' % ('Job', 'Status', 'Exit', 'CPUs', 'Time (s)')]
+        for job in self.jobs:
+            lines.append('%-32s %-10s %5s %5d %10s' % (job.name, job.status, '-' if job.returncode is None
+                                                       else job.returncode, job.cpus,
+                                                       '-' if job.elapsed is None else '%.1f' % job.elapsed))
+        finished = [job for job in self.jobs if job.end is not None]
+        if finished:
+            wall = max(job.end for job in finished) - min(job.start for job in finished)
+            serial = sum(job.elapsed for job in finished)
+            lines.append('%d of %d completed (%d from the cache), %.1f s wall time for %.1f s of job time'
+                         % (sum(job.status in (COMPLETED, CACHED) for job in self.jobs), len(self.jobs),
+                            sum(job.status == CACHED for job in self.jobs), wall, serial))
+        return '\n'.join(lines)
+
+
+def stand_in_solver(arguments):
+    # Behaves like 'abaqus job=<name> input=<deck> cpus=<n> interactive' as far as the farm can tell: exits with 1
+    # when the deck is missing, otherwise waits and writes <job>.sta
+    options = dict(argument.split('=', 1) for argument in arguments if '=' in argument)
+    job, deck = options.get('job'), options.get('input')
+    if not job or not deck or not os.path.isfile(deck):
+        print('Abaqus Error: the input file %r could not be found' % (deck, ))
+        return 1
+    seconds = STAND_IN_SECONDS
+    with open(deck) as lines:
+        for line in lines:
+            if line.upper().startswith('** STAND-IN SECONDS='):
+                seconds = float(line.split('=', 1)[1])
+    print('Stand-in solver: job %s on %s CPUs' % (job, options.get('cpus', '1')))
+    time.sleep(seconds)
+    with open(job + '.sta', 'w') as status:
+        status.write(' THE ANALYSIS HAS COMPLETED SUCCESSFULLY\n')
+    return 0
+
+
+def main(arguments):
+    # python -m abaqus_tools.job_farm run <root> <deck or pattern> ... [--budget N] [--cpus N] [--timeout S]
+    #                                     [--cache <directory>] [--cache-bytes N] [--stand-in]
+    # python -m abaqus_tools.job_farm stand-in job=<name> input=<deck> cpus=<n>
+    if arguments[:1] == ['stand-in']:
+        return stand_in_solver(arguments[1:])
+    if len(arguments) < 3 or arguments[0] != 'run':
+        print('Usage: python -m abaqus_tools.job_farm run <root> <deck> ... [--budget N] [--cpus N] [--timeout S] '
+              '[--cache <directory>] [--cache-bytes N] [--stand-in]')
+        return 2
+    options = {'--budget': None, '--cpus': '1', '--timeout': None, '--cache': None, '--cache-bytes': None}
+    decks = []
+    standIn = False
+    remaining = list(arguments[2:])
+    while remaining:
+        argument = remaining.pop(0)
+        if argument == '--stand-in':
+            standIn = True
+        elif argument in options:
+            options[argument] = remaining.pop(0)
+        else:
+            decks.extend(sorted(glob.glob(argument)) or [argument])
+    cache = None
+    if options['--cache'] is not None:
+        cache = ResultCache(options['--cache'], None if options['--cache-bytes'] is None
+                            else int(float(options['--cache-bytes'])))
+    farm = JobFarm(arguments[1], options['--budget'], STAND_IN_COMMAND if standIn else ABAQUS_COMMAND,
+                   None if options['--timeout'] is None else float(options['--timeout']), cache=cache)
+    for deck in decks:
+        farm.add(deck, cpus=int(options['--cpus']))
+
+    def report(job):
+        print('%s %s after %.1f s' % (job.name, job.status, job.elapsed))
+
+    farm.run(report)
+    print(farm.summary())
+    return 0 if all(job.status in (COMPLETED, CACHED) for job in farm.jobs) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,243 @@
+# Load-settlement curves of the footing models, built increment by increment while the job runs
+
+# The bearing pressure of a footing is the sum of RF2 over the footing nodes divided by the footing area, its settlement
+# the (negative) mean U2 of those nodes. request_footing_file_output() asks the solver to write U and RF of set FOOTING
+# to the ASCII results file (.fil) at every increment, and a FootingMonitor follows that file as it grows:
+#
+#     mdb.jobs['bearingJob2D'].submit(consistencyChecking=OFF)
+#     curve = watch_job('bearingJob2D', area=0.1)       # returns when the job has ended, completed or not
+#
+#     python -m abaqus_tools.load_settlement bearingPlasticJob2D 0.1     # the same from a shell, next to the job
+#
+# Every completed increment is appended to <job>_load_settlement.csv at once, so a run that fails or is killed still
+# leaves its curve up to its last increment; <job>_load_settlement.npz (arrays and the ultimate load) is written when
+# the job ends. The area is per unit of the out of plane thickness of the model: footing width times the section
+# thickness for the plane strain half models (0.1 m thick), the loaded face for the 3D quarter models. The curves
+# are only meaningful for displacement controlled footings; under a pressure load RF2 of the footing is zero.
+#
+# Plastic_2D_disp.py and Better_3D_displacement.py request the footing file output but, like the original scripts,
+# leave their submit() commented out. A script that submits its job follows it with watch_job(jobName, area) in place
+# of waitForCompletion(): area=0.1 for the 2D half footing, area=1.0 for the 3D quarter footing.
+#
+# The ultimate load is where the tangent stiffness of the curve collapses: the first increment from which the tangent
+# stays below collapseRatio times the initial stiffness (or the curve goes down) for `persist` increments.
+
+import csv
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from abaqus_tools.peak_stress import request_printed_results
+from abaqus_tools.result_files import INCREMENT_END, INCREMENT_START, NODE_KEYS, stream_records
+
+FOOTING_FILE_KEYWORDS = ('*NODE FILE, NSET=%s, FREQUENCY=1\n'
+                         'U, RF\n'
+                         '*FILE FORMAT, ASCII')
+
+COLLAPSE_RATIO = 0.05
+CSV_COLUMNS = ('step', 'increment', 'totalTime', 'settlement', 'force', 'pressure')
+
+_END_RECORD = re.compile(br'\*I[ \d]\d\d+I 4%d' % INCREMENT_END)
+_KEYS = dict((name, key) for key, name in NODE_KEYS.items() if name in ('U', 'RF'))
+_STATUS_END = ('THE ANALYSIS HAS COMPLETED SUCCESSFULLY', 'THE ANALYSIS HAS NOT BEEN COMPLETED')
+
+
+def request_footing_file_output(model, stepName, nodeSet='FOOTING'):
+    """Write U and RF of the assembly node set nodeSet to the ASCII .fil file at every increment of a step."""
+
+    request_printed_results(model, stepName, FOOTING_FILE_KEYWORDS % nodeSet)
+
+
+def footing_area(params):
+    # Loaded area of a BearingParams half model: half the footing width times the section thickness
+    return 0.5 * params.footingWidth * params.thickness
+
+
+def ultimate_load(settlement, pressure, collapseRatio=COLLAPSE_RATIO, persist=2):
+    """(index, settlement, pressure) of the ultimate load of a curve, None while the stiffness has not collapsed."""
+
+    settlement = np.asarray(settlement, dtype=float)
+    pressure = np.asarray(pressure, dtype=float)
+    if len(settlement) < persist + 1 or settlement[0] == 0.0:
+        return None
+    initial = pressure[0] / settlement[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tangent = np.diff(pressure) / np.diff(settlement)
+    collapsed = (tangent < collapseRatio * initial) | (np.diff(pressure) < 0.0)
+    run = 0
+    for i, flag in enumerate(collapsed):
+        run = run + 1 if flag else 0
+        if run == persist:
+            # The curve is at its ultimate load where the collapsing stretch starts
+            index = i - persist + 1
+            return index, float(settlement[index]), float(pressure[index])
+    return None
+
+
+class LoadSettlementCurve(object):
+
+    # Points of the curve, one per increment; written to csvPath as they come when a path is given
+
+    def __init__(self, area, csvPath=None):
+        if area <= 0.0:
+            raise ValueError('The footing area must be positive, not %r' % (area, ))
+        self.area = float(area)
+        self.csvPath = csvPath
+        self.rows = []
+        if csvPath is not None:
+            with open(csvPath, 'w') as target:
+                target.write(','.join(CSV_COLUMNS) + '\n')
+
+    def add(self, step, increment, totalTime, displacements, reactions):
+        """Add the point of one increment from the U2 and RF2 values of the footing nodes."""
+
+        settlement = -float(np.mean(displacements))
+        force = float(np.sum(reactions))
+        row = (step, increment, totalTime, settlement, force, force / self.area)
+        self.rows.append(row)
+        if self.csvPath is not None:
+            with open(self.csvPath, 'a') as target:
+                target.write('%d,%d,%r,%r,%r,%r\n' % row)
+        return row
+
+    def column(self, name):
+        return np.array([row[CSV_COLUMNS.index(name)] for row in self.rows], dtype=float)
+
+    def ultimate(self, collapseRatio=COLLAPSE_RATIO, persist=2):
+        return ultimate_load(self.column('settlement'), self.column('pressure'), collapseRatio, persist)
+
+    def save(self, path):
+        """Write the curve and its ultimate load (NaN when not reached) to an .npz file."""
+
+        ultimate = self.ultimate()
+        arrays = dict((name, self.column(name)) for name in CSV_COLUMNS)
+        arrays['area'] = np.array(self.area)
+        arrays['ultimate'] = np.array([np.nan, np.nan] if ultimate is None else ultimate[1:])
+        np.savez(path, **arrays)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def read_curve_csv(path, area=1.0):
+    """LoadSettlementCurve of a CSV written by a monitor (the pressure is taken from the file)."""
+
+    curve = LoadSettlementCurve(area)
+    with open(path) as source:
+        for row in csv.DictReader(source):
+            curve.rows.append((int(row['step']), int(row['increment']), float(row['totalTime']),
+                               float(row['settlement']), float(row['force']), float(row['pressure'])))
+    return curve
+
+
+class FootingMonitor(object):
+
+    # Follows a growing ASCII .fil file: poll() reads what has been written since the last call, parses every increment
+    # that is complete (up to its end record) and adds its point to the curve.
+
+    def __init__(self, filPath, area, csvPath=None):
+        self.filPath = filPath
+        self.curve = LoadSettlementCurve(area, csvPath)
+        self.offset = 0
+        self.pending = b''
+
+    def poll(self):
+        """Read the new part of the file; returns the rows added."""
+
+        if not os.path.exists(self.filPath):
+            return []
+        with open(self.filPath, 'rb') as source:
+            source.seek(self.offset)
+            data = source.read()
+        # Only whole lines: the solver may be half way through writing the last one
+        complete = data.rfind(b'\n') + 1
+        self.offset += complete
+        self.pending += data[:complete].replace(b'\r', b'').replace(b'\n', b'')
+        rows = []
+        while True:
+            end = _END_RECORD.search(self.pending)
+            if end is None:
+                break
+            row = self._increment(self.pending[:end.start()])
+            if row is not None:
+                rows.append(row)
+            self.pending = self.pending[end.end():]
+        return rows
+
+    def _increment(self, text):
+        # One increment: its start record and the U / RF records of the footing nodes
+        start, fields = None, {'U': {}, 'RF': {}}
+        for key, words in stream_records(text, set([INCREMENT_START, _KEYS['U'], _KEYS['RF']])):
+            if key == INCREMENT_START:
+                start = words
+            else:
+                fields['U' if key == _KEYS['U'] else 'RF'][words[0]] = words[2]
+        if start is None or not fields['U'] or not fields['RF']:
+            return None
+        return self.curve.add(start[5], start[6], start[0], list(fields['U'].values()), list(fields['RF'].values()))
+
+
+def job_finished(jobName, directory='.'):
+    # True once the status file reports the end of the analysis, completed or not
+    path = os.path.join(directory, jobName + '.sta')
+    if not os.path.exists(path):
+        return False
+    with open(path) as source:
+        text = source.read()
+    return any(line in text for line in _STATUS_END)
+
+
+def watch_job(jobName, area, directory='.', interval=2.0, startTimeout=300.0, report=None):
+    """Follow <jobName>.fil until the job has ended and return its LoadSettlementCurve.
+
+    The job counts as ended when its .sta file says so, or when its lock file (.lck) is gone after it has been seen,
+    or when nothing has appeared startTimeout seconds after the call. report(row) is called for every new increment.
+    """
+
+    stem = os.path.join(directory, jobName)
+    monitor = FootingMonitor(stem + '.fil', area, stem + '_load_settlement.csv')
+    start = time.time()
+    seenLock = False
+    while True:
+        rows = monitor.poll()
+        if report is not None:
+            for row in rows:
+                report(row)
+        locked = os.path.exists(stem + '.lck')
+        seenLock = seenLock or locked
+        if job_finished(jobName, directory) or (seenLock and not locked):
+            break
+        if not seenLock and not os.path.exists(stem + '.sta') and time.time() - start > startTimeout:
+            break
+        time.sleep(interval)
+    for row in monitor.poll():
+        if report is not None:
+            report(row)
+    monitor.curve.save(stem + '_load_settlement.npz')
+    return monitor.curve
+
+
+def main(arguments):
+    # python -m abaqus_tools.load_settlement <job name> <footing area> [directory]
+    if len(arguments) < 2:
+        print('Usage: python -m abaqus_tools.load_settlement <job name> <footing area> [directory]')
+        return 2
+
+    def report(row):
+        print('step %d increment %4d  time %10.4g  settlement %12.5e  pressure %12.5e' % (row[0], row[1], row[2],
+                                                                                          row[3], row[5]))
+
+    curve = watch_job(arguments[0], float(arguments[1]), arguments[2] if len(arguments) > 2 else '.', report=report)
+    ultimate = curve.ultimate()
+    if ultimate is None:
+        print('%d increments, no collapse of the tangent stiffness' % len(curve))
+    else:
+        print('%d increments, ultimate pressure %.5e at a settlement of %.5e' % (len(curve), ultimate[2], ultimate[1]))
+    return 0 if len(curve) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+# Encoding and decoding of the mask strings used by getSequenceFromMask()
+
+# A mask such as '[#1ff ]' is a bit set over the entity indices of a part or instance, written as 32 bit hexadecimal
+# words starting with the lowest word. A word repeated n times is written once with ':n', e.g. '[#0:2 #10 ]' is entity
+# 68 only. The masks replayed from the CAE journal are only valid for the exact partition they were recorded on, so
+# this module also scans scripts for them, so they can be checked and replaced by predicates (see predicates.py):
+#
+#     python -m abaqus_tools.masks FEM_Coursework/FEM5_thermal_stress_analysis.py
+
+import re
+import sys
+
+_WORD = re.compile(r'^#([0-9a-fA-F]+)(?::(\d+))?$')
+_CALL = re.compile(r"(\w[\w\[\]'. ]*?)\.getSequenceFromMask\(\s*mask=\(\s*'([^']*)'")
+
+
+def decode_mask(mask):
+    """Sorted list of the entity indices selected by an Abaqus mask string."""
+
+    text = mask.strip()
+    if not (text.startswith('[') and text.endswith(']')):
+        raise ValueError('Malformed mask %r: it must be enclosed in [ ]' % (mask, ))
+    indices = []
+    wordIndex = 0
+    for token in text[1:-1].split():
+        match = _WORD.match(token)
+        if match is None:
+            raise ValueError('Malformed mask %r: bad word %r' % (mask, token))
+        value = int(match.group(1), 16)
+        if value >> 32:
+            raise ValueError('Malformed mask %r: word %r has more than 32 bits' % (mask, token))
+        for _ in range(int(match.group(2) or 1)):
+            indices.extend(32 * wordIndex + bit for bit in range(32) if value >> bit & 1)
+            wordIndex += 1
+    return indices
+
+
+def encode_mask(indices):
+    """Abaqus mask string selecting the given entity indices (repeated words are compressed with ':n')."""
+
+    indices = sorted(set(int(i) for i in indices))
+    if not indices:
+        raise ValueError('Cannot encode an empty selection')
+    if indices[0] < 0:
+        raise ValueError('Entity indices must not be negative')
+    words = [0] * (indices[-1] // 32 + 1)
+    for i in indices:
+        words[i // 32] |= 1 << (i % 32)
+    tokens = []
+    i = 0
+    while i < len(words):
+        j = i
+        while j + 1 < len(words) and words[j + 1] == words[i]:
+            j += 1
+        count = j - i + 1
+        tokens.append('#%x' % words[i] + (':%d' % count if count > 1 else ''))
+        i = j + 1
+    return '[%s ]' % ' '.join(tokens)
+
+
+def sequence_from_mask_indices(entities, indices):
+    # One getSequenceFromMask() call for any selection, instead of adding single element slices together
+    return entities.getSequenceFromMask(mask=(encode_mask(indices), ))
+
+
+def scan_script(path):
+    """List every getSequenceFromMask() call of a script as (line number, entity array, mask, indices or error)."""
+
+    found = []
+    with open(path) as script:
+        for lineNumber, line in enumerate(script, 1):
+            if line.lstrip().startswith('#'):
+                continue
+            for match in _CALL.finditer(line):
+                target, mask = match.group(1).strip(), match.group(2)
+                try:
+                    result = decode_mask(mask)
+                except ValueError as error:
+                    result = error
+                found.append((lineNumber, target, mask, result))
+    return found
+
+
+def describe_mask(entities, mask):
+    # Inside CAE: a point on every entity a mask selects. These are the points to put into findAt() or a predicate
+    # when a mask is migrated.
+    return [entities[i].pointOn[0] for i in decode_mask(mask)]
+
+
+def main(paths):
+    problems = 0
+    for path in paths:
+        for lineNumber, target, mask, result in scan_script(path):
+            if isinstance(result, ValueError):
+                problems += 1
+                print('%s:%d: %s -> ERROR %s' % (path, lineNumber, target, result))
+            else:
+                print('%s:%d: %s %s -> entities %s' % (path, lineNumber, target, mask, result))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+# Variants of one model as copies of a pre-built base model in a single CAE session
+
+# A flat script such as FEM5_1.1.py builds its model from scratch in mdb.models['Model-1'], so 200 variants of it are
+# 200 CAE kernel launches, each sketching, partitioning and meshing the same plate again. A ModelBatch builds the base
+# model once and makes every variant with mdb.Model(name=..., objectToCopy=base), then changes only what differs from
+# the base (a load magnitude, a material table, a section thickness) and, if a change needs it, meshes the copy again.
+# All input decks are written in one pass:
+#
+#     from abaqus_tools.model_batch import ModelBatch
+#     from abaqus_tools.plate_model import PLATE_CHANGES, PLATE_WITH_HOLE, build_plate_model, mesh_plate
+#     batch = ModelBatch(build_plate_model('PlateBase'), PLATE_CHANGES, remesh=mesh_plate, baseValues=PLATE_WITH_HOLE)
+#     batch.add('plate_p120', pressure=1.2e8)
+#     batch.grid('plate', pressure=(1.2e8, 1.6e8), thickness=(0.005, 0.01))
+#     jobNames = batch.write_inputs()
+#
+# A change is a Change(function, remesh=False) in a dict of changes keyed by parameter name; function(model, value)
+# changes the copied model. Changes that need a new mesh (element type, seed density) only record their value, and the
+# remesh function is then called once with the copy and those values as keyword arguments. baseValues are the values
+# the base model was built with: a variant value equal to them is not applied, so a variant that differs from the base
+# only in its load is not meshed again just because the grid also names the element type of the base. When a copy is
+# meshed again, the remesh function gets the base values of the other mesh parameters. Changes of the geometry
+# (hole radius, plate size) are not copies of the same base model; build a base model per geometry and a batch per
+# base.
+
+import itertools
+
+from abaqus import *
+from abaqusConstants import *
+
+from abaqus_tools.profiling import record_mesh, stage
+
+
+class Change(object):
+
+    # How one parameter of the variants is applied to a copy of the base model
+
+    def __init__(self, function=None, remesh=False):
+        self.function = function
+        self.remesh = remesh
+
+
+class ModelBatch(object):
+
+    # The base model, the changes it accepts, the values it was built with and the variants added so far, in order:
+    # (model name, dict of values)
+
+    def __init__(self, base, changes, remesh=None, jobOptions=None, baseValues=None):
+        self.base = base
+        self.changes = changes
+        self.remesh = remesh
+        self.jobOptions = dict(numCpus=1, numDomains=1) if jobOptions is None else dict(jobOptions)
+        self.baseValues = dict((key, value) for key, value in (baseValues or {}).items() if key in changes)
+        self.variants = []
+
+    def add(self, name, **values):
+        """Add a variant named name (model and job) with the values that differ from the base model."""
+
+        unknown = sorted(key for key in values if key not in self.changes)
+        if unknown:
+            raise ValueError('Unknown parameters %s; known are %s' % (', '.join(unknown),
+                                                                     ', '.join(sorted(self.changes))))
+        if name == self.base.name or name in [variant[0] for variant in self.variants]:
+            raise ValueError('Variant %r is already in the batch' % (name, ))
+        if any(self.changes[key].remesh for key in values) and self.remesh is None:
+            raise ValueError('Variant %r changes the mesh but the batch has no remesh function' % (name, ))
+        self.variants.append((name, values))
+        return name
+
+    def grid(self, prefix, **levels):
+        """Add a variant for every combination of the levels of each parameter; returns their names.
+
+        The names are prefix followed by the index of the level of each parameter, in the order of the parameter names
+        (plate_0_2_1), so they stay valid job names whatever the values are.
+        """
+
+        keys = sorted(levels)
+        names = []
+        for indices in itertools.product(*[range(len(levels[key])) for key in keys]):
+            name = '_'.join([prefix] + ['%d' % i for i in indices])
+            names.append(self.add(name, **dict((key, levels[key][i]) for key, i in zip(keys, indices))))
+        return names
+
+    def differences(self, values):
+        """The values of a variant that differ from those of the base model."""
+
+        return dict((key, value) for key, value in values.items()
+                    if key not in self.baseValues or self.baseValues[key] != value)
+
+    def build(self, name, values):
+        """Copy the base model as mdb.models[name] and apply the values that differ from the base; returns the copy."""
+
+        values = self.differences(values)
+        if name in mdb.models.keys():
+            del mdb.models[name]
+        with stage('copy model'):
+            model = mdb.Model(name=name, objectToCopy=self.base)
+        with stage('change'):
+            for key in sorted(values):
+                change = self.changes[key]
+                if change.function is not None:
+                    change.function(model, values[key])
+        if any(self.changes[key].remesh for key in values):
+            meshValues = dict((key, value) for key, value in self.baseValues.items() if self.changes[key].remesh)
+            meshValues.update((key, value) for key, value in values.items() if self.changes[key].remesh)
+            with stage('remesh'):
+                self.remesh(model, **meshValues)
+        return model
+
+    def write_inputs(self, submit=False, keepModels=False):
+        """Build every variant and write its input deck (or submit it); returns the job names.
+
+        As with write_bearing_inputs() every model and job is deleted once its deck is written unless keepModels is
+        True, so only the base model stays in the mdb.
+        """
+
+        jobNames = []
+        for name, values in self.variants:
+            model = self.build(name, values)
+            for partName in model.parts.keys():
+                record_mesh('%s/%s' % (name, partName), model.parts[partName])
+            job = mdb.Job(name=name, model=name, type=ANALYSIS, description='Variant %s of %s' % (name, self.base.name),
+                          **self.jobOptions)
+            if submit:
+                with stage('solve'):
+                    job.submit(consistencyChecking=OFF)
+                    job.waitForCompletion()
+            else:
+                with stage('write input'):
+                    job.writeInput(consistencyChecking=OFF)
+            jobNames.append(name)
+            if not keepModels:
+                del mdb.jobs[name]
+                del mdb.models[name]
+        return jobNames
@@ -0,0 +1,420 @@
+# Plane strain Mohr-Coulomb plasticity for the plastic footing model, without an Abaqus job
+
+# Plastic_2D_disp.py pushes the footing down with MohrCoulombPlasticity(table=((10, 1), )) and a constant cohesion of
+# 100. This module solves the same model:
+#
+#     from abaqus_tools.bearing_params import PLASTIC_2D
+#     from abaqus_tools.mohr_coulomb import solve_plastic_bearing
+#     history = solve_plastic_bearing(PLASTIC_2D)
+#     print(history.settlements, history.forces)
+#
+# MohrCoulomb.return_map() updates the stresses of all integration points at once in principal stress space (see
+# de Souza Neto, Peric and Owen, Computational Methods for Plasticity, chapter 8): a return to the main plane of the
+# yield surface, to its right or left edge when the main plane return gives the wrong order of the principal stresses,
+# and to the apex when the edge return has a negative plastic multiplier or the wrong order as well. The flow potential
+# is the Mohr-Coulomb surface with the dilation angle (Abaqus smooths the potential, the yield surface is the same).
+# The equivalent plastic strain that drives the cohesion table grows by 2 cos(phi) per unit plastic multiplier.
+#
+# The algorithmic (consistent) tangent is the derivative of the batched return map, worked out alongside it: the
+# linearised consistency conditions of the plane, edge or apex return give the derivative of the principal stresses,
+# and the turn of the principal axes adds the in-plane shear term. Only apex points, which have no stiffness at all
+# when the cohesion is constant, get a small part of De added. The global equations are solved by Newton's method with
+# a line search; increments that do not converge are cut back like StaticStep() does, down to minInc.
+#
+# CPE4 elements use the B-bar method (the volumetric strain is averaged over the element), which is how Abaqus
+# integrates the volumetric part of fully integrated CPE4 elements, and avoids locking in nearly isochoric flow.
+
+import numpy as np
+import scipy.sparse.linalg
+
+from abaqus_tools.plane_strain import (ELEMENTS, Solution, assemble_matrix, element_dofs, pressure_loads,
+                                       shape_gradients)
+from abaqus_tools.profiling import timed
+from abaqus_tools.structured_mesh import bearing_mesh
+
+# Increment control: cut back by CUTBACK after a failed increment, grow by GROWTH after two increments that needed at
+# most FAST_ITERATIONS Newton iterations
+
+CUTBACK = 0.25
+GROWTH = 1.5
+FAST_ITERATIONS = 5
+
+# After SLOW_ITERATIONS Newton iterations the residual only has to be below SLOW_TOLERANCE times the average nodal
+# force, the alternate criterion R_P of Abaqus (*CONTROLS, PARAMETERS=FIELD) for iterations that do not converge
+# quadratically. With the non-associated flow of Plastic_2D_disp.py (phi 10, psi 1) hundreds of points at the edge of
+# the plastic zone switch between elastic and plastic from one iteration to the next in mid-sized increments.
+
+SLOW_ITERATIONS = 9
+SLOW_TOLERANCE = 2e-2
+
+
+class MohrCoulomb(object):
+
+    # Stresses and strains are (P, 4) arrays of the components 11, 22, 33, 12 (engineering shear strain). Angles in
+    # degrees, cohesionTable as for MohrCoulombHardening: (cohesion, equivalent plastic strain) rows.
+
+    def __init__(self, youngsModulus, poissonsRatio, frictionAngle, dilationAngle, cohesionTable, tolerance=1e-10):
+        E, nu = float(youngsModulus), float(poissonsRatio)
+        self.shearModulus = G = E / (2.0 * (1.0 + nu))
+        self.bulkModulus = K = E / (3.0 * (1.0 - 2.0 * nu))
+        self.youngsModulus, self.poissonsRatio = E, nu
+        lame = K - 2.0 * G / 3.0
+        self.De = np.array([[lame + 2 * G, lame, lame, 0.0], [lame, lame + 2 * G, lame, 0.0],
+                            [lame, lame, lame + 2 * G, 0.0], [0.0, 0.0, 0.0, G]])
+        self.sinPhi = np.sin(np.radians(frictionAngle))
+        self.cosPhi = np.cos(np.radians(frictionAngle))
+        self.sinPsi = np.sin(np.radians(dilationAngle))
+        table = np.array(sorted(cohesionTable, key=lambda row: row[1]), dtype=float).reshape(-1, 2)
+        self.cohesionValues, self.cohesionStrains = table[:, 0], table[:, 1]
+        self.tolerance = tolerance
+        self.stiffnessFloor = 1e-4
+
+        # Yield (f) and flow (n) vectors in sorted principal space of the planes 1-3 (main), 2-3 and 1-2
+        sp, ss = self.sinPhi, self.sinPsi
+        self.planes = {'main': ([(1 + sp, 0.0, -(1 - sp))], [(1 + ss, 0.0, -(1 - ss))]),
+                       'right': ([(1 + sp, 0.0, -(1 - sp)), (0.0, 1 + sp, -(1 - sp))],
+                                 [(1 + ss, 0.0, -(1 - ss)), (0.0, 1 + ss, -(1 - ss))]),
+                       'left': ([(1 + sp, 0.0, -(1 - sp)), (1 + sp, -(1 - sp), 0.0)],
+                                [(1 + ss, 0.0, -(1 - ss)), (1 + ss, -(1 - ss), 0.0)])}
+
+    def cohesion(self, eqps):
+        # Cohesion and its slope, constant beyond the ends of the table
+        c = np.interp(eqps, self.cohesionStrains, self.cohesionValues)
+        if len(self.cohesionStrains) < 2:
+            return c, np.zeros_like(c)
+        slopes = np.diff(self.cohesionValues) / np.diff(self.cohesionStrains)
+        segment = np.clip(np.searchsorted(self.cohesionStrains, eqps, side='right') - 1, 0, len(slopes) - 1)
+        inside = (eqps >= self.cohesionStrains[0]) & (eqps < self.cohesionStrains[-1])
+        return c, np.where(inside, slopes[segment], 0.0)
+
+    def elastic_strain(self, stress):
+        E, nu, G = self.youngsModulus, self.poissonsRatio, self.shearModulus
+        s11, s22, s33, s12 = stress.T
+        return np.column_stack(((s11 - nu * (s22 + s33)) / E, (s22 - nu * (s11 + s33)) / E,
+                                (s33 - nu * (s11 + s22)) / E, s12 / G))
+
+    def yield_function(self, principal, eqps):
+        c, _ = self.cohesion(eqps)
+        return (principal[:, 0] - principal[:, 2] + (principal[:, 0] + principal[:, 2]) * self.sinPhi
+                - 2.0 * c * self.cosPhi)
+
+    def _surface_return(self, trial, eqps, kind):
+        # Return of sorted trial principal stresses (P, 3) to one plane or an edge: Newton on the plastic multipliers
+        f, n = (np.array(v) for v in self.planes[kind])
+        G, K = self.shearModulus, self.bulkModulus
+        Dn = (K - 2.0 * G / 3.0) * n.sum(axis=1)[:, None] + 2.0 * G * n
+        A = f.dot(Dn.T)
+        m = len(f)
+        gamma = np.zeros((len(trial), m))
+        ftrial = trial.dot(f.T)
+        scale = 1.0 + np.abs(ftrial).max(axis=1)
+        for _ in range(50):
+            c, H = self.cohesion(eqps + 2.0 * self.cosPhi * gamma.sum(axis=1))
+            residual = ftrial - gamma.dot(A.T) - 2.0 * (c * self.cosPhi)[:, None]
+            if (np.abs(residual).max(axis=1) <= self.tolerance * scale).all():
+                break
+            jacobian = -A[None] - (4.0 * H * self.cosPhi ** 2)[:, None, None] * np.ones((m, m))
+            gamma = gamma - np.linalg.solve(jacobian, residual[..., None])[..., 0]
+        principal = trial - gamma.dot(Dn)
+        newEqps = eqps + 2.0 * self.cosPhi * gamma.sum(axis=1)
+
+        # Derivative of the returned principal stresses with respect to the trial ones: the consistency conditions
+        # give d(gamma) = J^-1 f d(trial) with J = A + 4 H cos(phi)^2 (one row and column per active plane)
+        _, H = self.cohesion(newEqps)
+        J = A[None] + (4.0 * H * self.cosPhi ** 2)[:, None, None] * np.ones((m, m))
+        dGamma = np.linalg.solve(J, np.broadcast_to(f, (len(trial), m, 3)))
+        derivative = np.eye(3)[None] - np.einsum('ki,pkj->pij', Dn, dGamma)
+        return principal, newEqps, gamma, derivative
+
+    def _apex_return(self, trial, eqps):
+        K = self.bulkModulus
+        p = trial.mean(axis=1)
+        cotPhi = self.cosPhi / self.sinPhi
+        factor = self.cosPhi / self.sinPsi if self.sinPsi > 0 else 0.0
+        volumetric = np.zeros(len(trial))
+        for _ in range(50):
+            c, H = self.cohesion(eqps + factor * volumetric)
+            residual = c * cotPhi - (p - K * volumetric)
+            if (np.abs(residual) <= self.tolerance * (1.0 + np.abs(p))).all():
+                break
+            volumetric = volumetric - residual / (H * factor * cotPhi + K)
+        pressure = p - K * volumetric
+        newEqps = eqps + factor * volumetric
+
+        # All three returned stresses are the pressure, which follows the mean trial stress by the hardening share of
+        # the stiffness: nothing at all for a constant cohesion or no dilation
+        _, H = self.cohesion(newEqps)
+        hardening = H * factor * cotPhi
+        derivative = (hardening / (hardening + K) / 3.0)[:, None, None] * np.ones((1, 3, 3))
+        return np.repeat(pressure[:, None], 3, axis=1), newEqps, derivative
+
+    def return_map(self, strain, plasticStrain, eqps, tangent=False):
+        """Stresses, plastic strains, equivalent plastic strains and the plastic flags for total strains (P, 4).
+
+        With tangent the algorithmic tangent (P, 4, 4) of the return is added as a fifth value (see tangent()).
+        """
+
+        trialStress = (strain - plasticStrain).dot(self.De.T)
+        s11, s22, s33, s12 = trialStress.T
+        centre = 0.5 * (s11 + s22)
+        radius = np.hypot(0.5 * (s11 - s22), s12)
+        twoTheta = np.arctan2(s12, 0.5 * (s11 - s22))
+        unsorted = np.column_stack((centre + radius, centre - radius, s33))
+        order = np.argsort(-unsorted, axis=1, kind='mergesort')
+        rows = np.arange(len(strain))[:, None]
+        principal = unsorted[rows, order]
+
+        c, _ = self.cohesion(eqps)
+        plastic = self.yield_function(principal, eqps) > self.tolerance * (1.0 + c)
+        newEqps = eqps.copy()
+        apex = np.zeros(len(strain), dtype=bool)
+        if plastic.any():
+            trial = principal[plastic]
+            eqpsTrial = eqps[plastic]
+            result, resultEqps, _, derivative = self._surface_return(trial, eqpsTrial, 'main')
+            valid = (result[:, 0] >= result[:, 1]) & (result[:, 1] >= result[:, 2])
+            for kind, wrong in (('right', result[:, 1] > result[:, 0]), ('left', result[:, 2] > result[:, 1])):
+                wrong &= ~valid
+                if wrong.any():
+                    edge, edgeEqps, gamma, edgeDerivative = self._surface_return(trial[wrong], eqpsTrial[wrong], kind)
+                    slack = 1e-9 * (1.0 + np.abs(edge).max(axis=1))
+                    ok = ((gamma >= 0.0).all(axis=1) & (edge[:, 0] >= edge[:, 1] - slack)
+                          & (edge[:, 1] >= edge[:, 2] - slack))
+                    index = np.flatnonzero(wrong)
+                    result[index[ok]] = edge[ok]
+                    resultEqps[index[ok]] = edgeEqps[ok]
+                    derivative[index[ok]] = edgeDerivative[ok]
+                    valid[index[ok]] = True
+            if (~valid).any():
+                result[~valid], resultEqps[~valid], derivative[~valid] = self._apex_return(trial[~valid],
+                                                                                           eqpsTrial[~valid])
+                apex[np.flatnonzero(plastic)[~valid]] = True
+            principal[plastic] = result
+            newEqps[plastic] = resultEqps
+
+        unsorted = np.empty_like(principal)
+        unsorted[rows, order] = principal
+        a, b, s33 = unsorted.T
+        half = 0.5 * (a - b)
+        stress = np.column_stack((0.5 * (a + b) + half * np.cos(twoTheta), 0.5 * (a + b) - half * np.cos(twoTheta),
+                                  s33, half * np.sin(twoTheta)))
+        newPlastic = np.where(plastic[:, None], strain - self.elastic_strain(stress), plasticStrain)
+        if not tangent:
+            return stress, newPlastic, newEqps, plastic
+
+        tangents = np.repeat(self.De[None], len(strain), axis=0)
+        if plastic.any():
+            # Principal derivative in the unsorted order (in-plane a, b, then 33) of the plastic points
+            points = np.flatnonzero(plastic)
+            unsortedDerivative = np.empty_like(derivative)
+            pointRows = np.arange(len(points))[:, None, None]
+            order = order[points]
+            unsortedDerivative[pointRows, order[:, :, None], order[:, None, :]] = derivative
+            tangents[points] = np.einsum('pij,jk->pik', self._spectral_derivative(
+                unsortedDerivative, unsorted[points], radius[points], twoTheta[points]), self.De)
+            # A point returned to the apex of a perfectly plastic surface has no stiffness at all, a small part of De
+            # keeps the global matrix regular
+            tangents[apex] += self.stiffnessFloor * self.De
+        return stress, newPlastic, newEqps, plastic, tangents
+
+    def _spectral_derivative(self, derivative, principal, radius, twoTheta):
+        # Derivative (P, 4, 4) of the stresses 11, 22, 33, 12 with respect to the trial stresses for the principal
+        # derivative (P, 3, 3) in the order in-plane a, in-plane b, 33: the change of a, b and s33 plus the turn of
+        # the principal axes, which scales the shear of the trial stress by (a - b) / (trial a - trial b)
+
+        cos2, sin2 = np.cos(twoTheta), np.sin(twoTheta)
+        zero, one = np.zeros_like(cos2), np.ones_like(cos2)
+        trialDerivative = np.stack((np.column_stack((0.5 * (1 + cos2), 0.5 * (1 - cos2), zero, sin2)),
+                                    np.column_stack((0.5 * (1 - cos2), 0.5 * (1 + cos2), zero, -sin2)),
+                                    np.column_stack((zero, zero, one, zero))), axis=1)
+        da, db, ds33 = np.transpose(np.einsum('pij,pjk->pik', derivative, trialDerivative), (1, 0, 2))
+        a, b = principal[:, 0], principal[:, 1]
+        # Equal trial a and b: the limit of the ratio is the derivative of a - b along a - b
+        split = 2.0 * radius > 1e-12 * (1.0 + np.abs(principal).max(axis=1))
+        ratio = np.where(split, (a - b) / np.where(split, 2.0 * radius, 1.0),
+                         derivative[:, 0, 0] - derivative[:, 0, 1])
+        spin = ratio[:, None] * np.column_stack((-0.5 * sin2, 0.5 * sin2, zero, cos2))
+        mean, half = 0.5 * (da + db), 0.5 * (da - db)
+        cos2, sin2 = cos2[:, None], sin2[:, None]
+        return np.stack((mean + cos2 * half - sin2 * spin, mean - cos2 * half + sin2 * spin, ds33,
+                         sin2 * half + cos2 * spin), axis=1)
+
+    def tangent(self, strain, plasticStrain, eqps):
+        """Algorithmic tangent (P, 4, 4): De at elastic points, the derivative of return_map() at plastic points."""
+
+        return self.return_map(strain, plasticStrain, eqps, tangent=True)[-1]
+
+
+def strain_matrices(nodes, elements, elemType, bbar=True):
+    """B matrices (E, G, 4, 2n) for the strains 11, 22, 33, 12, the integration volumes (E, G) and point coordinates.
+
+    With bbar the volumetric strain of quads is replaced by its element average (B-bar).
+    """
+
+    element = ELEMENTS[elemType]
+    _, dN, detJ, points = shape_gradients(nodes, elements, element)
+    numElements, numPoints, _, numNodes = dN.shape
+    B = np.zeros((numElements, numPoints, 4, 2 * numNodes))
+    B[:, :, 0, 0::2] = dN[:, :, 0]
+    B[:, :, 1, 1::2] = dN[:, :, 1]
+    B[:, :, 3, 0::2] = dN[:, :, 1]
+    B[:, :, 3, 1::2] = dN[:, :, 0]
+    volume = detJ * element['weights'][None, :]
+    if bbar and numPoints > 1:
+        volumetric = B[:, :, 0] + B[:, :, 1]
+        average = np.einsum('eg,egi->ei', volume, volumetric) / volume.sum(axis=1)[:, None]
+        correction = (average[:, None, :] - volumetric) / 3.0
+        for row in range(3):
+            B[:, :, row] += correction
+    return B, volume, points
+
+
+class PlasticHistory(object):
+
+    # One entry per converged increment: step time, prescribed footing settlement (or load factor times the pressure)
+    # and the total vertical force on the footing nodes. solution is the last converged state, with the equivalent
+    # plastic strain per integration point as solution.eqps.
+
+    def __init__(self):
+        self.times = [0.0]
+        self.settlements = [0.0]
+        self.forces = [0.0]
+        self.iterations = []
+        self.cutbacks = 0
+        self.solution = None
+
+
+@timed()
+def solve_plastic_bearing(params, mesh=None, tolerance=5e-3, maxIterations=40, lineSearch=True):
+    """Displacement (or pressure) controlled Mohr-Coulomb analysis of a footing model; returns a PlasticHistory.
+
+    An increment has converged when the largest residual force is below tolerance times the average nodal force, the
+    Abaqus default criterion. As in Abaqus the nodal force is the sum of the magnitudes of the element forces at the
+    node, not their sum, which cancels out at every free node once the model is in equilibrium.
+
+    The line search halves the Newton step until the residual norm drops. It does not make the slow iterations of
+    the non-associated flow quadratic, so maxIterations is well above the 16 of StaticStep(); an increment cut back
+    for want of iterations costs more than the extra iterations do.
+    """
+
+    if params.frictionAngle is None:
+        raise ValueError('%s has no friction angle, it is an elastic model' % params.name)
+    if params.loading not in ('pressure', 'displacement'):
+        raise ValueError("loading must be 'pressure' or 'displacement', not %r" % (params.loading, ))
+    mesh = mesh or bearing_mesh(params)
+    material = MohrCoulomb(params.youngsModulus, params.poissonsRatio, params.frictionAngle, params.dilationAngle,
+                           params.cohesionTable)
+    B, volume, points = strain_matrices(mesh.nodes, mesh.elements, mesh.elemType)
+    volume = volume * params.thickness
+    dofs = element_dofs(mesh.elements)
+    size = 2 * mesh.numNodes
+    numElements, numPoints = volume.shape
+
+    target = np.full(size, np.nan)
+    fixed = {('LEFT', 1): 0.0, ('RIGHT', 2): 0.0, ('BOTTOM', 2): 0.0}
+    if params.pinnedBase:
+        fixed.update({('RIGHT', 1): 0.0, ('BOTTOM', 1): 0.0})
+    if params.loading == 'displacement':
+        fixed[('FOOTING', 2)] = params.settlement
+    for (nset, dof), value in fixed.items():
+        target[2 * (mesh.nodeSets[nset] - 1) + dof - 1] = value
+    known = ~np.isnan(target)
+    free = np.flatnonzero(~known)
+    target = np.where(known, target, 0.0)
+    external = np.zeros(size)
+    if params.loading == 'pressure':
+        for elset, face in mesh.surfaces['FOOTING']:
+            footing = mesh.elements[mesh.elementSets[elset] - 1]
+            external += pressure_loads(mesh.nodes, footing, np.full(len(footing), int(face[1:]) - 1), params.pressure,
+                                       params.thickness, size)
+    footingDofs = 2 * (mesh.nodeSets['FOOTING'] - 1) + 1
+
+    u = np.zeros(size)
+    plasticStrain = np.zeros((numElements * numPoints, 4))
+    eqps = np.zeros(numElements * numPoints)
+    history = PlasticHistory()
+
+    def state(displacements, tangent=False):
+        strain = np.einsum('egai,ei->ega', B, displacements[dofs]).reshape(-1, 4)
+        result = material.return_map(strain, plasticStrain, eqps, tangent)
+        internal = np.zeros(size)
+        magnitude = np.zeros(size)
+        forces = np.einsum('egai,ega,eg->ei', B, result[0].reshape(numElements, numPoints, 4), volume)
+        np.add.at(internal, dofs.ravel(), forces.ravel())
+        np.add.at(magnitude, dofs.ravel(), np.abs(forces).ravel())
+        return result + (internal, magnitude.sum() / max(1, np.count_nonzero(magnitude)))
+
+    period = float(params.timePeriod)
+    dt = period if params.initialInc is None else float(params.initialInc)
+    minInc = min(dt, 1e-5 * period) if params.minInc is None else float(params.minInc)
+    maxInc = period if params.maxInc is None else float(params.maxInc)
+    time = 0.0
+    fast = 0
+    lastIncrement, lastChange = 0.0, np.zeros(size)
+    while time < period * (1.0 - 1e-12):
+        increment = min(dt, period - time)
+        factor = (time + increment) / period
+        # Predictor: the displacement increment of the last converged increment, scaled to the new size
+        trial = u + (increment / lastIncrement) * lastChange if lastIncrement else u.copy()
+        trial[known] = factor * target[known]
+        converged = False
+        for iteration in range(1, maxIterations + 1):
+            stress, newPlastic, newEqps, plastic, tangent, internal, average = state(trial, tangent=True)
+            residual = factor * external - internal
+            limit = tolerance if iteration <= SLOW_ITERATIONS else max(tolerance, SLOW_TOLERANCE)
+            if np.abs(residual[free]).max() <= limit * max(average, 1e-12):
+                converged = True
+                break
+            ke = np.einsum('egai,egab,egbj,eg->eij', B, tangent.reshape(numElements, numPoints, 4, 4), B, volume,
+                           optimize=True)
+            K = assemble_matrix(ke, dofs, size)
+            du = np.zeros(size)
+            # The minimum degree ordering of K + K^T fills in about half as much as the default column ordering
+            du[free] = scipy.sparse.linalg.spsolve(K[free][:, free].tocsc(), residual[free],
+                                                   permc_spec='MMD_AT_PLUS_A')
+            alpha = 1.0
+            if lineSearch:
+                # Backtracking: halve the step, at most a few times, until the residual norm is smaller
+                norm = np.linalg.norm(residual[free])
+                for _ in range(5):
+                    moved = state(trial + alpha * du)[-2]
+                    if np.linalg.norm(factor * external[free] - moved[free]) < norm:
+                        break
+                    alpha *= 0.5
+            trial = trial + alpha * du
+        if not converged:
+            history.cutbacks += 1
+            fast = 0
+            dt = increment * CUTBACK
+            if dt < minInc:
+                raise ValueError('Time increment required is less than the minimum specified (%r) at time %r'
+                                 % (minInc, time))
+            continue
+
+        lastIncrement, lastChange = increment, trial - u
+        u = trial
+        plasticStrain, eqps = newPlastic, newEqps
+        time += increment
+        history.times.append(time)
+        history.settlements.append(factor * (params.settlement if params.loading == 'displacement'
+                                             else params.pressure))
+        history.forces.append(float(internal[footingDofs].sum()))
+        history.iterations.append(iteration)
+        history.solution = Solution(mesh, u.reshape(-1, 2), stress.reshape(numElements, numPoints, 4), points,
+                                    internal.reshape(-1, 2))
+        history.solution.eqps = eqps.reshape(numElements, numPoints)
+        fast = fast + 1 if iteration <= FAST_ITERATIONS else 0
+        if increment == dt and fast >= 2:
+            dt = min(dt * GROWTH, maxInc)
+            fast = 0
+    return history
+
+
+def strength_sweep(params, frictionAngles, cohesions, **options):
+    # Final footing force of every friction angle / cohesion combination, {(phi, c): force}
+    forces = {}
+    for phi in frictionAngles:
+        for c in cohesions:
+            variant = params.copy(frictionAngle=phi, cohesionTable=((c, 0.0), ))
+            forces[(phi, c)] = solve_plastic_bearing(variant, **options).forces[-1]
+    return forces
@@ -0,0 +1,5 @@
+# The abaqus module of the offline stand-in (abaqus_tools/offline_cae.py)
+
+from abaqus_tools.offline_cae import mdb, session
+
+__all__ = ['mdb', 'session']
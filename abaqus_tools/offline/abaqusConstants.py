@@ -0,0 +1,7 @@
+# The abaqusConstants module of the offline stand-in (abaqus_tools/offline_cae.py)
+
+from abaqus_tools.offline_cae import CONSTANTS, SymbolicConstant
+
+globals().update(CONSTANTS)
+
+__all__ = ['SymbolicConstant'] + sorted(CONSTANTS)
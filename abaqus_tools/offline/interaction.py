@@ -0,0 +1 @@
+# The interaction module of the offline stand-in (abaqus_tools/offline_cae.py): everything is reached through mdb
@@ -0,0 +1,3 @@
+# The mesh module of the offline stand-in (abaqus_tools/offline_cae.py)
+
+from abaqus_tools.offline_cae import ElemType
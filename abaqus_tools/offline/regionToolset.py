@@ -0,0 +1,3 @@
+# The regionToolset module of the offline stand-in (abaqus_tools/offline_cae.py)
+
+from abaqus_tools.offline_cae import Region
@@ -0,0 +1,2120 @@
+# Offline stand-in for the Abaqus/CAE scripting interface: runs the model scripts without CAE or a licence token
+
+# None of the scripts can even be imported outside CAE: they start with from abaqus import *, import regionToolset
+# and mesh, and build everything through mdb. This module implements the part of that interface the scripts and
+# abaqus_tools use (mdb.models, ConstrainedSketch, Part.BaseShell / BaseSolidExtrude, PartitionFaceBySketch, findAt,
+# getSequenceFromMask, the material, section, step, BC, load, constraint and interaction constructors, seeding,
+# generateMesh, keywordBlock and Job) and records every call in a compact journal. The folder abaqus_tools/offline
+# holds the top level modules (abaqus, abaqusConstants, regionToolset, mesh, part, ...) that re-export it, and the
+# runner puts it on sys.path:
+#
+#     python -m abaqus_tools.offline_cae run FEM_Coursework/FEM5_1.2.py Thesis_scripts/*.py --journal journals
+#     python -m abaqus_tools.offline_cae diff journals/FEM5_1.2.journal.json baseline/FEM5_1.2.journal.json
+#
+#     from abaqus_tools.offline_cae import run_script
+#     journal = run_script('Thesis_scripts/Better_2D_pressure.py')
+#     journal.status, journal.digest(), journal.counts['Model-1/bearingPart']
+#
+# A script runs up to its first waitForCompletion(), where the dry run stops (solver='stop'), or on through every job
+# (solver='continue', the job status is then DRY_RUN and post-processing that reads results fails). Planar parts get
+# their real topology: the sketch curves are split wherever they meet, the faces are traced from the pieces and
+# PartitionFaceBySketch() keeps the sketch pieces inside the picked faces, so findAt() resolves as on the partitioned
+# part and masks select from the same number of entities (the numbering itself is not documented by Abaqus and
+# differs). Solid parts are exact prisms of their sketch; their partitions by datum planes are journalled but not
+# modelled. generateMesh() estimates the node and element counts of the linear mesh from the seeds and mesh controls,
+# it does not mesh. Constructors the stand-in does not know are journalled with a warning instead of failing, so a
+# journal also lists what a dry run could not check.
+
+import collections
+import copy
+import functools
+import hashlib
+import json
+import math
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import numpy as np
+
+from abaqus_tools.masks import decode_mask
+from abaqus_tools.seeding import EdgeSeed, SeededGrid, number_by_size
+from abaqus_tools.selection import GeometryIndex
+
+OFFLINE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'offline')
+JOURNAL_SUFFIX = '.journal.json'
+SOLVER_POLICIES = ('stop', 'continue')
+
+# Calls whose result is journalled as well, so a regression shows which entities a lookup picked
+
+LOOKUPS = ('findAt', 'getSequenceFromMask', 'sequenceFromLabels')
+
+# Default time incrementation controls of a step (I0, IR, IP, IC, IL, IG, IS, IA, IJ, IT, IIC)
+
+TIME_INCREMENTATION = (4.0, 8.0, 9.0, 16.0, 10.0, 4.0, 12.0, 5.0, 6.0, 3.0, 50.0)
+
+_TWO_PI = 2.0 * math.pi
+
+try:
+    _STRINGS = (str, unicode)
+except NameError:
+    _STRINGS = (str, )
+
+
+# Symbolic constants
+
+class SymbolicConstant(object):
+
+    # The named constants of abaqusConstants (QUAD, CLOCKWISE, ...): equal when their names are
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return isinstance(other, SymbolicConstant) and other.name == self.name
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.name)
+
+    # Constants are shared, also by copied models
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class AbaqusBoolean(SymbolicConstant):
+
+    # ON / OFF (and TRUE / FALSE), which are also true and false in conditions
+
+    def __init__(self, name, value):
+        SymbolicConstant.__init__(self, name)
+        self.value = value
+
+    def __bool__(self):
+        return self.value
+
+    __nonzero__ = __bool__
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+CONSTANT_NAMES = (
+    'ADVANCING_FRONT', 'ALL', 'ANALYSIS', 'ANALYTIC_RIGID_SURFACE', 'AUTOMATIC', 'AVERAGE_STRAIN', 'AXISYMMETRIC',
+    'BOTH', 'C3D10', 'C3D20', 'C3D20R', 'C3D4', 'C3D6', 'C3D8', 'C3D8I', 'C3D8R', 'CAX3', 'CAX4', 'CAX4R', 'CAX8',
+    'CAX8R', 'CENTROID', 'CLOCKWISE', 'COMPLETED', 'COMPUTED', 'CONSTANT_THROUGH_THICKNESS', 'COPLANAR_EDGES',
+    'COUNTERCLOCKWISE', 'CPE3', 'CPE4', 'CPE4I', 'CPE4R', 'CPE6', 'CPE8', 'CPE8R', 'CPS3', 'CPS4', 'CPS4I', 'CPS4R',
+    'CPS6', 'CPS8', 'CPS8R', 'CUBIC', 'DC2D3', 'DC2D4', 'DC2D8', 'DC3D10', 'DC3D20', 'DC3D4', 'DC3D6', 'DC3D8',
+    'DEFAULT', 'DEFORMABLE_BODY', 'DISCRETE_RIGID_SURFACE', 'DISSIPATED_ENERGY_FRACTION', 'DISTRIBUTING', 'DOMAIN',
+    'DOUBLE', 'DOUBLE_PLUS_PACK', 'EMBEDDED_COEFF', 'ENHANCED', 'EXPLICIT', 'FINER', 'FIXED', 'FREE', 'FROM_SECTION',
+    'GLOBAL', 'HARD', 'HEX', 'HEX_DOMINATED', 'INCREMENT', 'INTEGRATION_POINT', 'ISOTROPIC', 'KINEMATIC', 'LAST',
+    'LAST_INCREMENT', 'LINEAR', 'MEDIAL_AXIS', 'MIDDLE_SURFACE', 'MODEL', 'NODAL', 'NONE', 'NORMAL', 'OMIT',
+    'PENALTY', 'PERCENTAGE', 'PRESELECT', 'QUAD', 'QUAD_DOMINATED', 'QUADRATIC', 'RELATIVE', 'RIGHT',
+    'SEPARATE_FILE', 'SET', 'SIDE1', 'SIDE2', 'SINGLE', 'SMALL', 'STANDARD', 'STEP', 'STRUCTURED', 'SUPERIMPOSE',
+    'SURFACE_TO_SURFACE', 'SWEEP', 'TET', 'THREE_D', 'TIME', 'TOTAL', 'TRI', 'TWO_D_PLANAR', 'UNIFORM', 'UNSET',
+    'USER_DEFINED', 'WEDGE', 'WHOLE_SURFACE', 'XAXIS', 'XYPLANE', 'XZPLANE', 'YAXIS', 'YZPLANE', 'ZAXIS')
+
+CONSTANTS = dict((name, SymbolicConstant(name)) for name in CONSTANT_NAMES)
+CONSTANTS.update(ON=AbaqusBoolean('ON', True), OFF=AbaqusBoolean('OFF', False), TRUE=AbaqusBoolean('TRUE', True),
+                 FALSE=AbaqusBoolean('FALSE', False))
+
+
+def _constant_name(value):
+    return value.name if isinstance(value, SymbolicConstant) else value
+
+
+# Journal
+
+class Journal(object):
+
+    # What a script did: every call as [object path, method, arguments] (lookups also with their result), the
+    # warnings of the stand-in, node and element counts per meshed part, calls and seconds per method, how the run
+    # ended and how long it took
+
+    def __init__(self, script=None):
+        self.script = script
+        self.seedScale = 1.0
+        self.calls = []
+        self.warnings = []
+        self.counts = {}
+        self.timings = {}
+        self.status = None
+        self.job = None
+        self.error = None
+        self.elapsed = None
+        self._depth = 0
+
+    def warn(self, message):
+        if message not in self.warnings:
+            self.warnings.append(message)
+
+    def digest(self):
+        """SHA-1 of the calls: equal digests mean the script made the same model the same way."""
+
+        text = json.dumps(self.calls, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def as_dict(self):
+        return dict(script=self.script, seedScale=self.seedScale, status=self.status, job=self.job, error=self.error,
+                    elapsed=self.elapsed, digest=self.digest(), counts=self.counts, warnings=self.warnings,
+                    timings=self.timings, calls=self.calls)
+
+    def save(self, path):
+        with open(path, 'w') as target:
+            json.dump(self.as_dict(), target, indent=0, sort_keys=True)
+        return path
+
+    def summary(self):
+        status = self.status if self.status != 'solver' else 'reached solver (%s)' % self.job
+        return '%-36s %-28s %5d calls %4d warnings %9.1f ms  %s' % (
+            os.path.basename(self.script or '-'), status, len(self.calls), len(self.warnings),
+            1000.0 * (self.elapsed or 0.0), self.digest()[:12])
+
+
+def load_journal(path):
+    """A saved journal as a dict (see Journal.as_dict())."""
+
+    with open(path) as source:
+        return json.load(source)
+
+
+def compare_journals(first, second):
+    """The first difference of the calls of two journals (dicts or paths) as text, None when they are the same."""
+
+    first = load_journal(first) if isinstance(first, _STRINGS) else first
+    second = load_journal(second) if isinstance(second, _STRINGS) else second
+    for i, (a, b) in enumerate(zip(first['calls'], second['calls'])):
+        if a != b:
+            return 'call %d differs:\n  %s\n  %s' % (i, json.dumps(a, sort_keys=True), json.dumps(b, sort_keys=True))
+    if len(first['calls']) != len(second['calls']):
+        return '%d calls against %d, the same up to there' % (len(first['calls']), len(second['calls']))
+    return None
+
+
+def _ranges(indices):
+    # '0-3,7,9-10' for [0, 1, 2, 3, 7, 9, 10]
+    parts = []
+    for i in indices:
+        if parts and parts[-1][1] == i - 1:
+            parts[-1][1] = i
+        else:
+            parts.append([i, i])
+    return ','.join(str(a) if a == b else '%d-%d' % (a, b) for a, b in parts)
+
+
+def _render(value):
+    # JSON-able form of an argument or result: entities and stand-in objects by their path
+    if value is None or isinstance(value, (bool, ) + _STRINGS):
+        return value
+    if isinstance(value, SymbolicConstant):
+        return value.name
+    if hasattr(value, '_render'):
+        return value._render()
+    if isinstance(value, (int, float)):
+        return value
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, dict):
+        return dict((str(key), _render(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_render(item) for item in value]
+    if hasattr(value, '_path'):
+        return value._path
+    return repr(value)
+
+
+def _recorded(path, name, function, args, kwargs):
+    # Call function(*args, **kwargs) and journal it, unless it is called from inside another stand-in call
+    journal = JOURNAL
+    if journal._depth:
+        return function(*args, **kwargs)
+    arguments = dict((key, _render(value)) for key, value in kwargs.items())
+    if args:
+        arguments['*'] = _render(args)
+    entry = [path, name, arguments]
+    journal.calls.append(entry)
+    journal._depth += 1
+    start = time.time()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        journal._depth -= 1
+        timing = journal.timings.setdefault(name, [0, 0.0])
+        timing[0] += 1
+        timing[1] += time.time() - start
+    if name in LOOKUPS:
+        entry.append(_render(result))
+    return result
+
+
+def _journalled(method):
+    # Journal the calls of a method of a stand-in object (see _recorded())
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return _recorded(self._path, method.__name__, functools.partial(method, self), args, kwargs)
+    return wrapper
+
+
+# Planar curves and their arrangement
+
+class _Segment(object):
+
+    # Straight sketch curve from p0 to p1
+
+    isArc = False
+    sweep = 0.0
+
+    def __init__(self, p0, p1):
+        self.p0 = (float(p0[0]), float(p0[1]))
+        self.p1 = (float(p1[0]), float(p1[1]))
+        self.length = math.hypot(self.p1[0] - self.p0[0], self.p1[1] - self.p0[1])
+
+    def point(self, t):
+        return (self.p0[0] + t * (self.p1[0] - self.p0[0]), self.p0[1] + t * (self.p1[1] - self.p0[1]))
+
+    def param(self, point, tolerance):
+        # t of point on the segment (clipped to 0..1), None when it is farther than tolerance
+        dx, dy = self.p1[0] - self.p0[0], self.p1[1] - self.p0[1]
+        if self.length == 0.0:
+            return 0.0 if math.hypot(point[0] - self.p0[0], point[1] - self.p0[1]) <= tolerance else None
+        t = ((point[0] - self.p0[0]) * dx + (point[1] - self.p0[1]) * dy) / self.length ** 2
+        t = min(1.0, max(0.0, t))
+        x, y = self.point(t)
+        return t if math.hypot(point[0] - x, point[1] - y) <= tolerance else None
+
+    def distance(self, point):
+        t = self.param(point, float('inf'))
+        x, y = self.point(t)
+        return math.hypot(point[0] - x, point[1] - y)
+
+    def piece(self, t0, t1):
+        return _Segment(self.point(t0), self.point(t1))
+
+    def tangent(self, t):
+        # Unit direction and curvature in the direction of increasing t
+        return (self.p1[0] - self.p0[0]) / self.length, (self.p1[1] - self.p0[1]) / self.length, 0.0
+
+    def green(self):
+        # Integral of x dy - y dx along the curve (twice the area it sweeps about the origin)
+        return self.p0[0] * self.p1[1] - self.p1[0] * self.p0[1]
+
+    def crossings(self, y):
+        # x where the curve crosses the line at height y; an end point on the line counts as being above it
+        (x0, y0), (x1, y1) = self.p0, self.p1
+        if (y0 > y) == (y1 > y):
+            return []
+        return [x0 + (y - y0) * (x1 - x0) / (y1 - y0)]
+
+    def box(self):
+        return (min(self.p0[0], self.p1[0]), min(self.p0[1], self.p1[1]), max(self.p0[0], self.p1[0]),
+                max(self.p0[1], self.p1[1]))
+
+    def translated(self, dx, dy):
+        return _Segment((self.p0[0] + dx, self.p0[1] + dy), (self.p1[0] + dx, self.p1[1] + dy))
+
+
+class _Arc(object):
+
+    # Arc about centre, counter clockwise from angle start through sweep (2 pi for a full circle)
+
+    isArc = True
+
+    def __init__(self, centre, radius, start, sweep):
+        self.centre = (float(centre[0]), float(centre[1]))
+        self.radius = float(radius)
+        self.start = float(start)
+        self.sweep = float(sweep)
+        self.length = self.radius * self.sweep
+        self.p0 = self.point(0.0)
+        self.p1 = self.point(1.0)
+
+    def point(self, t):
+        angle = self.start + t * self.sweep
+        return (self.centre[0] + self.radius * math.cos(angle), self.centre[1] + self.radius * math.sin(angle))
+
+    def _offset(self, point):
+        # Angle of point after start, in 0..2 pi
+        return (math.atan2(point[1] - self.centre[1], point[0] - self.centre[0]) - self.start) % _TWO_PI
+
+    def param(self, point, tolerance):
+        if abs(math.hypot(point[0] - self.centre[0], point[1] - self.centre[1]) - self.radius) > tolerance:
+            return None
+        offset = self._offset(point)
+        slack = tolerance / self.radius
+        if offset <= self.sweep + slack:
+            return min(1.0, offset / self.sweep)
+        if offset >= _TWO_PI - slack:
+            return 0.0
+        return None
+
+    def distance(self, point):
+        if self._offset(point) <= self.sweep:
+            return abs(math.hypot(point[0] - self.centre[0], point[1] - self.centre[1]) - self.radius)
+        return min(math.hypot(point[0] - p[0], point[1] - p[1]) for p in (self.p0, self.p1))
+
+    def piece(self, t0, t1):
+        return _Arc(self.centre, self.radius, self.start + t0 * self.sweep, (t1 - t0) * self.sweep)
+
+    def tangent(self, t):
+        angle = self.start + t * self.sweep
+        return -math.sin(angle), math.cos(angle), 1.0 / self.radius
+
+    def green(self):
+        (cx, cy), (x0, y0), (x1, y1) = self.centre, self.p0, self.p1
+        return self.radius ** 2 * self.sweep + cx * (y1 - y0) - cy * (x1 - x0)
+
+    def crossings(self, y):
+        # Split at the top and bottom of the circle so every part is monotone in y, then as for a segment
+        if abs(y - self.centre[1]) >= self.radius:
+            return []
+        cuts = sorted(set([0.0, 1.0] + [((a - self.start) % _TWO_PI) / self.sweep
+                                        for a in (0.5 * math.pi, 1.5 * math.pi)
+                                        if 0.0 < ((a - self.start) % _TWO_PI) < self.sweep]))
+        xs = []
+        half = math.sqrt(self.radius ** 2 - (y - self.centre[1]) ** 2)
+        for t0, t1 in zip(cuts[:-1], cuts[1:]):
+            y0, y1 = self.point(t0)[1], self.point(t1)[1]
+            if (y0 > y) != (y1 > y):
+                side = math.cos(self.start + 0.5 * (t0 + t1) * self.sweep)
+                xs.append(self.centre[0] + (half if side > 0.0 else -half))
+        return xs
+
+    def box(self):
+        cx, cy = self.centre
+        r = self.radius
+        return cx - r, cy - r, cx + r, cy + r
+
+    def translated(self, dx, dy):
+        return _Arc((self.centre[0] + dx, self.centre[1] + dy), self.radius, self.start, self.sweep)
+
+
+def _arc_by_ends(centre, point1, point2, clockwise):
+    # ArcByCenterEnds(): the arc from point1 to point2 about centre, stored counter clockwise
+    radius = math.hypot(point1[0] - centre[0], point1[1] - centre[1])
+    a1 = math.atan2(point1[1] - centre[1], point1[0] - centre[0])
+    a2 = math.atan2(point2[1] - centre[1], point2[0] - centre[0])
+    if clockwise:
+        a1, a2 = a2, a1
+    sweep = (a2 - a1) % _TWO_PI
+    return _Arc(centre, radius, a1, sweep or _TWO_PI)
+
+
+def _meeting_points(a, b, tolerance):
+    # Points where two curves cross or touch, including the end points of each that lie on the other
+    points = [p for p in (a.p0, a.p1) if b.param(p, tolerance) is not None]
+    points += [p for p in (b.p0, b.p1) if a.param(p, tolerance) is not None]
+    if not a.isArc and not b.isArc:
+        (x0, y0), (x1, y1) = a.p0, a.p1
+        (u0, v0), (u1, v1) = b.p0, b.p1
+        rx, ry, sx, sy = x1 - x0, y1 - y0, u1 - u0, v1 - v0
+        d = rx * sy - ry * sx
+        if abs(d) > 1e-12 * (a.length * b.length):
+            t = ((u0 - x0) * sy - (v0 - y0) * sx) / d
+            points.append((x0 + t * rx, y0 + t * ry))
+    elif a.isArc and b.isArc:
+        (ax, ay), (bx, by) = a.centre, b.centre
+        d = math.hypot(bx - ax, by - ay)
+        if d > tolerance and abs(a.radius - b.radius) - tolerance <= d <= a.radius + b.radius + tolerance:
+            along = (a.radius ** 2 - b.radius ** 2 + d * d) / (2.0 * d)
+            h = math.sqrt(max(0.0, a.radius ** 2 - along ** 2))
+            mx, my = ax + along * (bx - ax) / d, ay + along * (by - ay) / d
+            points.append((mx + h * (by - ay) / d, my - h * (bx - ax) / d))
+            points.append((mx - h * (by - ay) / d, my + h * (bx - ax) / d))
+    else:
+        line, arc = (a, b) if b.isArc else (b, a)
+        (x0, y0), (x1, y1) = line.p0, line.p1
+        cx, cy = arc.centre
+        dx, dy = x1 - x0, y1 - y0
+        fx, fy = x0 - cx, y0 - cy
+        qa = dx * dx + dy * dy
+        qb = 2.0 * (fx * dx + fy * dy)
+        qc = fx * fx + fy * fy - arc.radius ** 2
+        disc = qb * qb - 4.0 * qa * qc
+        if qa > 0.0 and disc >= -1e-12 * qb * qb:
+            root = math.sqrt(max(0.0, disc))
+            for t in ((-qb - root) / (2.0 * qa), (-qb + root) / (2.0 * qa)):
+                points.append((x0 + t * dx, y0 + t * dy))
+    return [p for p in points if a.param(p, tolerance) is not None and b.param(p, tolerance) is not None]
+
+
+class _VertexPool(object):
+
+    # Points merged within the tolerance, looked up on a grid of cells a few tolerances wide
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.cell = 4.0 * tolerance
+        self.points = []
+        self._grid = {}
+
+    def add(self, point):
+        kx, ky = int(math.floor(point[0] / self.cell)), int(math.floor(point[1] / self.cell))
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for index in self._grid.get((kx + dx, ky + dy), ()):
+                    p = self.points[index]
+                    if math.hypot(p[0] - point[0], p[1] - point[1]) <= self.tolerance:
+                        return index
+        self.points.append((float(point[0]), float(point[1])))
+        self._grid.setdefault((kx, ky), []).append(len(self.points) - 1)
+        return len(self.points) - 1
+
+
+def _boxes_touch(a, b, tolerance):
+    return a[0] <= b[2] + tolerance and b[0] <= a[2] + tolerance and a[1] <= b[3] + tolerance and \
+        b[1] <= a[3] + tolerance
+
+
+def _arrangement(curves, tolerance):
+    # Split every curve where it meets another. Returns the vertex points and the pieces as (curve, first vertex,
+    # last vertex, index of the curve it came from); a piece that repeats an earlier one is dropped.
+
+    splits = [[0.0, 1.0] for _ in curves]
+    boxes = [curve.box() for curve in curves]
+    for i in range(len(curves)):
+        for j in range(i + 1, len(curves)):
+            if not _boxes_touch(boxes[i], boxes[j], tolerance):
+                continue
+            for point in _meeting_points(curves[i], curves[j], tolerance):
+                for k in (i, j):
+                    t = curves[k].param(point, tolerance)
+                    if t is not None:
+                        splits[k].append(t)
+    pool = _VertexPool(tolerance)
+    pieces = []
+    seen = set()
+    for k, curve in enumerate(curves):
+        if curve.length <= tolerance:
+            continue
+        step = tolerance / curve.length
+        kept = [0.0]
+        for t in sorted(splits[k])[1:]:
+            if t - kept[-1] > step:
+                kept.append(t)
+        kept[-1] = 1.0
+        for t0, t1 in zip(kept[:-1], kept[1:]):
+            piece = curve.piece(t0, t1)
+            v0, v1 = pool.add(piece.p0), pool.add(piece.p1)
+            middle = piece.point(0.5)
+            key = (min(v0, v1), max(v0, v1), int(round(middle[0] / pool.cell)), int(round(middle[1] / pool.cell)))
+            if (v0 == v1 and not piece.isArc) or key in seen:
+                continue
+            seen.add(key)
+            pieces.append((piece, v0, v1, k))
+    return pool.points, pieces
+
+
+def _loop_curves(pieces, loop):
+    # The curves of a loop of half edges, each in the direction it is walked, as (curve, reversed)
+    return [(pieces[h // 2][0], h % 2 == 1) for h in loop]
+
+
+def _trace_faces(points, pieces):
+    # Loops of half edges that keep the face on their left. Half edge 2k walks piece k forwards, 2k + 1 backwards;
+    # at every vertex the walk turns into the next half edge clockwise from the one it came in on. Counter clockwise
+    # loops (positive area) bound faces, clockwise ones are outer boundaries or holes.
+
+    outgoing = [[] for _ in points]
+    for k, (piece, v0, v1, source) in enumerate(pieces):
+        outgoing[v0].append(2 * k)
+        outgoing[v1].append(2 * k + 1)
+
+    def direction(h):
+        piece = pieces[h // 2][0]
+        if h % 2 == 0:
+            tx, ty, curvature = piece.tangent(0.0)
+        else:
+            tx, ty, curvature = piece.tangent(1.0)
+            tx, ty, curvature = -tx, -ty, -curvature
+        angle = math.atan2(ty, tx)
+        if angle <= -math.pi + 1e-9:
+            angle = math.pi
+        # Pieces leaving in the same direction: the one curving to the left is further counter clockwise
+        return round(angle, 9), curvature
+
+    position = {}
+    for half in outgoing:
+        half.sort(key=direction)
+        for i, h in enumerate(half):
+            position[h] = i
+
+    def following(h):
+        end = pieces[h // 2][2] if h % 2 == 0 else pieces[h // 2][1]
+        around = outgoing[end]
+        return around[(position[h ^ 1] - 1) % len(around)]
+
+    visited = set()
+    loops = []
+    for h in range(2 * len(pieces)):
+        loop = []
+        while h not in visited:
+            visited.add(h)
+            loop.append(h)
+            h = following(h)
+        if loop:
+            loops.append(loop)
+    return loops
+
+
+def _loop_area(pieces, loop):
+    return 0.5 * sum(-curve.green() if backwards else curve.green() for curve, backwards in _loop_curves(pieces, loop))
+
+
+class PlanarGeometry(object):
+
+    # Topology of a planar part made from sketch curves: vertices, edges (the curves split wherever they meet) and the
+    # faces traced from them, as lists of Entity. Edge and face lookups go through selection.GeometryIndex.
+
+    def __init__(self, part, curves, tolerance=None):
+        self.part = part
+        if tolerance is None:
+            extent = max([max(abs(c) for c in curve.box()) for curve in curves] or [1.0])
+            tolerance = 1e-9 * max(extent, 1e-3)
+        self.tolerance = tolerance
+        points, pieces = _arrangement(curves, tolerance)
+        self.curves = [piece[0] for piece in pieces]
+        self.sources = [piece[3] for piece in pieces]
+        self.vertices = [Entity(self, 'vertices', i, (x, y, 0.0)) for i, (x, y) in enumerate(points)]
+        self.edges = []
+        for k, (piece, v0, v1, source) in enumerate(pieces):
+            x, y = piece.point(0.5)
+            self.edges.append(Entity(self, 'edges', k, (x, y, 0.0), vertices=(v0, ) if v0 == v1 else (v0, v1)))
+        self._faces(points, pieces)
+        self.cells = []
+        self._index = None
+
+    def _faces(self, points, pieces):
+        loops = _trace_faces(points, pieces)
+        areas = [_loop_area(pieces, loop) for loop in loops]
+        tiny = self.tolerance ** 2
+        outer = [i for i, area in enumerate(areas) if area > tiny]
+        self.faceLoops = [[[h // 2 for h in loops[i]]] for i in outer]
+        self.faceAreas = [areas[i] for i in outer]
+        self._faceCurves = [_loop_curves(pieces, loops[i]) for i in outer]
+
+        # A clockwise loop that lies inside a face of another connected piece of the sketch is a hole of the
+        # smallest such face
+
+        component = list(range(len(points)))
+
+        def root(v):
+            while component[v] != v:
+                component[v] = component[component[v]]
+                v = component[v]
+            return v
+
+        for piece, v0, v1, source in pieces:
+            component[root(v0)] = root(v1)
+        for i, area in enumerate(areas):
+            if area >= -tiny:
+                continue
+            first = pieces[loops[i][0] // 2][1]
+            probe = points[first]
+            containing = [f for f, j in enumerate(outer) if root(pieces[loops[j][0] // 2][1]) != root(first)
+                          and self._inside(probe, f, 0.0)]
+            if containing:
+                f = min(containing, key=lambda f: self.faceAreas[f])
+                self.faceLoops[f].append([h // 2 for h in loops[i]])
+                self.faceAreas[f] += area
+                self._faceCurves[f].extend(_loop_curves(pieces, loops[i]))
+
+        self.faces = []
+        for f, faceLoops in enumerate(self.faceLoops):
+            edgeIds = sorted(set(e for loop in faceLoops for e in loop))
+            vertexIds = sorted(set(v for e in edgeIds for v in self.edges[e].getVertices()))
+            x, y = self._interior_point(f)
+            self.faces.append(Entity(self, 'faces', f, (x, y, 0.0), vertices=vertexIds, edges=edgeIds))
+
+    def _inside(self, point, f, margin):
+        # Even-odd test of point against the boundary of face f, False within margin of the boundary
+        curves = self._faceCurves[f]
+        if margin and min(curve.distance(point) for curve, backwards in curves) <= margin:
+            return False
+        count = sum(1 for curve, backwards in curves for x in curve.crossings(point[1]) if x > point[0])
+        return count % 2 == 1
+
+    def _interior_point(self, f):
+        # Middle of the widest stretch inside the face along a few horizontal lines through it
+        boxes = [curve.box() for curve, backwards in self._faceCurves[f]]
+        low = min(box[1] for box in boxes)
+        high = max(box[3] for box in boxes)
+        best = None
+        for fraction in (0.5, 0.3819, 0.6180, 0.2360, 0.7639, 0.1458, 0.8541, 0.0901, 0.9098):
+            y = low + fraction * (high - low)
+            xs = sorted(x for curve, backwards in self._faceCurves[f] for x in curve.crossings(y))
+            for x0, x1 in zip(xs[0::2], xs[1::2]):
+                if best is None or x1 - x0 > best[0]:
+                    best = (x1 - x0, 0.5 * (x0 + x1), y)
+            if best is not None and best[0] > 1e3 * self.tolerance:
+                break
+        if best is None:
+            curve = self._faceCurves[f][0][0]
+            return curve.point(0.5)
+        return best[1], best[2]
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = GeometryIndex(self)
+        return self._index
+
+    def find(self, kind, point):
+        """Index of the vertex, edge or face at point, None when there is none."""
+
+        if kind == 'vertices':
+            for vertex in self.vertices:
+                x, y, z = vertex.pointOn[0]
+                if math.hypot(x - point[0], y - point[1]) <= self.index.tolerance:
+                    return vertex.index
+            return None
+        if kind not in ('edges', 'faces') or not getattr(self, kind):
+            return None
+        try:
+            return (self.index.find_edges if kind == 'edges' else self.index.find_faces)([point])[0]
+        except ValueError:
+            return None
+
+    def partitioned(self, faceIds, curves):
+        """New geometry with the pieces of curves that lie inside the faces faceIds added as edges.
+
+        Pieces outside those faces or on their boundary are dropped, and so are pieces left dangling (a sketch line
+        must run from boundary to boundary, or to another partition line, to split a face).
+        """
+
+        existing = list(self.curves)
+        n = len(existing)
+        margin = 1e3 * self.tolerance
+        points, pieces = _arrangement(existing + list(curves), self.tolerance)
+        added = [piece for piece, v0, v1, source in pieces
+                 if source >= n and any(self._inside(piece.point(0.5), f, margin) for f in faceIds)]
+        while True:
+            points, pieces = _arrangement(existing + added, self.tolerance)
+            degree = [0] * len(points)
+            for piece, v0, v1, source in pieces:
+                degree[v0] += 1
+                degree[v1] += 1
+            dangling = set(source - n for piece, v0, v1, source in pieces
+                           if source >= n and (degree[v0] == 1 or degree[v1] == 1))
+            if not dangling:
+                break
+            added = [piece for i, piece in enumerate(added) if i not in dangling]
+        return PlanarGeometry(self.part, existing + added, self.tolerance)
+
+
+class PrismGeometry(object):
+
+    # Topology of a solid extruded from a planar profile through depth along z: bottom (z = 0) and top copies of the
+    # profile's vertices, edges and faces, a vertical edge per profile vertex, a side face per profile edge and a cell
+    # per profile face, numbered in that order
+
+    def __init__(self, part, profile, depth):
+        self.part = part
+        self.profile = profile
+        self.depth = float(depth)
+        nv, ne, nf = len(profile.vertices), len(profile.edges), len(profile.faces)
+        self.counts = (nv, ne, nf)
+        middle = 0.5 * self.depth
+        self.vertices = []
+        for z in (0.0, self.depth):
+            for vertex in profile.vertices:
+                x, y, _ = vertex.pointOn[0]
+                self.vertices.append(Entity(self, 'vertices', len(self.vertices), (x, y, z)))
+        self.edges = []
+        for level, z in enumerate((0.0, self.depth)):
+            for edge in profile.edges:
+                x, y, _ = edge.pointOn[0]
+                self.edges.append(Entity(self, 'edges', len(self.edges), (x, y, z),
+                                         vertices=[v + level * nv for v in edge.getVertices()]))
+        for vertex in profile.vertices:
+            x, y, _ = vertex.pointOn[0]
+            self.edges.append(Entity(self, 'edges', len(self.edges), (x, y, middle),
+                                     vertices=(vertex.index, vertex.index + nv)))
+        self.faces = []
+        for level, z in enumerate((0.0, self.depth)):
+            for face in profile.faces:
+                x, y, _ = face.pointOn[0]
+                self.faces.append(Entity(self, 'faces', len(self.faces), (x, y, z),
+                                         vertices=[v + level * nv for v in face.getVertices()],
+                                         edges=[e + level * ne for e in face.getEdges()]))
+        for edge in profile.edges:
+            x, y, _ = edge.pointOn[0]
+            ends = edge.getVertices()
+            self.faces.append(Entity(self, 'faces', len(self.faces), (x, y, middle),
+                                     vertices=sorted(set(ends) | set(v + nv for v in ends)),
+                                     edges=sorted(set([edge.index, edge.index + ne] + [2 * ne + v for v in ends]))))
+        self.cells = []
+        for face in profile.faces:
+            x, y, _ = face.pointOn[0]
+            edges = face.getEdges()
+            faceIds = [face.index, face.index + nf] + [2 * nf + e for e in edges]
+            edgeIds = sorted(set(list(edges) + [e + ne for e in edges] + [2 * ne + v for v in face.getVertices()]))
+            self.cells.append(Entity(self, 'cells', face.index, (x, y, middle), faces=faceIds, edges=edgeIds,
+                                     vertices=sorted(set(face.getVertices()) |
+                                                     set(v + nv for v in face.getVertices()))))
+
+    def _level(self, z):
+        # 0 at the bottom, 1 at the top, None in between, False outside
+        tolerance = self.profile.index.tolerance
+        if abs(z) <= tolerance:
+            return 0
+        if abs(z - self.depth) <= tolerance:
+            return 1
+        return None if 0.0 < z < self.depth else False
+
+    def find(self, kind, point):
+        """Index of the vertex, edge, face or cell at point, None when there is none."""
+
+        nv, ne, nf = self.counts
+        level = self._level(float(point[2]) if len(point) > 2 else 0.0)
+        if level is False:
+            return None
+        found = None
+        if kind == 'vertices' and level is not None:
+            found = self.profile.find('vertices', point)
+            return None if found is None else found + level * nv
+        if kind == 'edges':
+            if level is None:
+                found = self.profile.find('vertices', point)
+                return None if found is None else 2 * ne + found
+            found = self.profile.find('edges', point)
+            return None if found is None else found + level * ne
+        if kind == 'faces':
+            if level is None:
+                found = self.profile.find('edges', point)
+                return None if found is None else 2 * nf + found
+            found = self.profile.find('faces', point)
+            return None if found is None else found + level * nf
+        if kind == 'cells':
+            return self.profile.find('faces', point)
+        return None
+
+
+# Entities and their arrays
+
+class Entity(object):
+
+    # Vertex, edge, face or cell of a stand-in part: its index, pointOn and the indices of its vertices, edges and
+    # faces as getVertices(), getEdges() and getFaces() give them
+
+    def __init__(self, geometry, kind, index, pointOn, vertices=(), edges=(), faces=()):
+        self.geometry = geometry
+        self.kind = kind
+        self.index = index
+        self.pointOn = (tuple(float(c) for c in pointOn), )
+        self._vertices = tuple(vertices)
+        self._edges = tuple(edges)
+        self._faces = tuple(faces)
+
+    def getVertices(self):
+        return self._vertices
+
+    def getEdges(self):
+        return self._edges
+
+    def getFaces(self):
+        return self._faces
+
+    def getElements(self):
+        return self.geometry.part._elements_on(self)
+
+    def _render(self):
+        return '%s.%s[%d]' % (self.geometry.part._path, self.kind, self.index)
+
+    def __repr__(self):
+        return self._render()
+
+
+def _is_point(value):
+    return isinstance(value, (list, tuple)) and len(value) in (2, 3) and \
+        all(isinstance(c, (int, float)) or hasattr(c, '__float__') and not isinstance(c, (list, tuple))
+            for c in value)
+
+
+def _entities(value):
+    # Flat list of the entities in an entity, array, or (nested) tuple of them
+    if value is None:
+        return []
+    if isinstance(value, Entity):
+        return [value]
+    if isinstance(value, (list, tuple)):
+        return [entity for item in value for entity in _entities(item)]
+    return []
+
+
+class EntityArray(list):
+
+    # VertexArray, EdgeArray, FaceArray or CellArray of a part or instance: slices and sums are arrays again
+
+    def __init__(self, entities, kind, owner):
+        list.__init__(self, entities)
+        self.kind = kind
+        self.owner = owner
+
+    @property
+    def _path(self):
+        return '%s.%s' % (self.owner._path, self.kind)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return EntityArray(list.__getitem__(self, item), self.kind, self.owner)
+        return list.__getitem__(self, item)
+
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(i, j))
+
+    def __add__(self, other):
+        return EntityArray(list(self) + list(other), self.kind, self.owner)
+
+    def _render(self):
+        return '%s[%s]' % (self._path, _ranges([entity.index for entity in self]))
+
+    @property
+    def pointsOn(self):
+        return tuple(entity.pointOn for entity in self)
+
+    @_journalled
+    def findAt(self, *points, **kwargs):
+        # findAt(((x, y, z),), ...) gives an array, findAt((x, y, z)) the entity itself
+        if 'coordinates' in kwargs:
+            points = points + (kwargs['coordinates'], )
+        current = getattr(self.owner, self.kind)
+        found = []
+        for item in points:
+            point = item if _is_point(item) else item[0]
+            index = self.owner._geometry.find(self.kind, point) if self.owner._geometry is not None else None
+            if index is None:
+                JOURNAL.warn('%s.findAt(): nothing at (%s)' % (self._path, ', '.join('%g' % c for c in point)))
+            else:
+                found.append(current[index])
+        if len(points) == 1 and _is_point(points[0]):
+            return found[0] if found else None
+        return EntityArray(found, self.kind, self.owner)
+
+    @_journalled
+    def getSequenceFromMask(self, mask, **kwargs):
+        indices = decode_mask(mask[0] if isinstance(mask, (list, tuple)) else mask)
+        beyond = [i for i in indices if i >= len(self)]
+        if beyond:
+            JOURNAL.warn('%s.getSequenceFromMask(%r): %s beyond the %d %s of the stand-in'
+                         % (self._path, mask, _ranges(beyond), len(self), self.kind))
+        return EntityArray([self[i] for i in indices if i < len(self)], self.kind, self.owner)
+
+    def getByBoundingBox(self, xMin=-1e300, yMin=-1e300, zMin=-1e300, xMax=1e300, yMax=1e300, zMax=1e300):
+        low, high = (xMin, yMin, zMin), (xMax, yMax, zMax)
+        inside = [entity for entity in self if all(low[i] <= entity.pointOn[0][i] <= high[i] for i in range(3))]
+        return EntityArray(inside, self.kind, self.owner)
+
+
+# Mesh
+
+class MeshEntity(object):
+
+    # A node or element of the estimated mesh, known only by its label
+
+    def __init__(self, owner, kind, label):
+        self.owner = owner
+        self.kind = kind
+        self.label = label
+
+    def _render(self):
+        return '%s.%s[label %d]' % (self.owner._path, self.kind, self.label)
+
+
+class MeshSequence(object):
+
+    # Nodes or elements of a meshed part or instance (labels 1 to the estimated count), made when they are read
+
+    def __init__(self, owner, kind, labels):
+        self.owner = owner
+        self.kind = kind
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return MeshSequence(self.owner, self.kind, list(self.labels[item]))
+        return MeshEntity(self.owner, self.kind, self.labels[item])
+
+    def __iter__(self):
+        for label in self.labels:
+            yield MeshEntity(self.owner, self.kind, label)
+
+    def __add__(self, other):
+        return MeshSequence(self.owner, self.kind, list(self.labels) + list(other.labels))
+
+    def _render(self):
+        return '%s.%s[labels %s]' % (self.owner._path, self.kind, _ranges(list(self.labels)))
+
+    @property
+    def _path(self):
+        return '%s.%s' % (self.owner._path, self.kind)
+
+    @_journalled
+    def sequenceFromLabels(self, labels):
+        known = set(self.labels) if len(self.labels) < 1000 else None
+        missing = [label for label in labels
+                   if (label not in known if known is not None else not 1 <= label <= len(self.labels))]
+        if missing:
+            JOURNAL.warn('%s.sequenceFromLabels(): no %s %s in the estimated mesh' % (self._path, self.kind,
+                                                                                      _ranges(sorted(missing))))
+        return MeshSequence(self.owner, self.kind, [label for label in labels if label not in missing])
+
+
+class MeshEstimate(object):
+
+    # Node and element counts of the linear mesh a part would get from its seeds and mesh controls, its number of
+    # element edges (the midside nodes a quadratic mesh adds) and the element labels of every face (planar parts) for
+    # getElements(). A structured mesh carries the seed count of an edge along its whole row or column of faces, so a
+    # profile of axis-parallel edges (the footing models) is counted on a seeding.SeededGrid through all its vertices,
+    # as structured_mesh.bearing_mesh() counts it; on other profiles the count is carried across opposite edges of the
+    # four-sided faces before each face is counted on its own.
+
+    def __init__(self, part):
+        geometry = part._geometry
+        solid = isinstance(geometry, PrismGeometry)
+        profile = geometry.profile if solid else geometry
+        size, deviation = part._globalSeed or (part._default_seed_size(), 0.1)
+        nv, ne = len(profile.vertices), len(profile.edges)
+        seeds = [part._seeds.get(e) or (part._seeds.get(e + ne) if solid else None) for e in range(ne)]
+        self.divisions = [_divisions(curve.length, curve.sweep, seeds[e], size, deviation)
+                          for e, curve in enumerate(profile.curves)]
+        shapes = [_constant_name(part._shapes.get(f)) for f in range(len(profile.faceLoops))]
+        grid = _seeded_grid(profile, seeds, size)
+        if grid is not None:
+            nodes = self._grid(profile, grid[0], grid[1], shapes)
+        else:
+            self._carry(profile, shapes)
+            nodes = len(profile.vertices) + sum(n - 1 for n in self.divisions)
+            self.faceElements = []
+            for f, loops in enumerate(profile.faceLoops):
+                elements, interior = self._face(profile, f, loops, shapes[f])
+                self.faceElements.append(elements)
+                nodes += interior
+        elements = sum(self.faceElements)
+        # Euler's formula for a planar mesh without holes: edges = nodes + elements - 1
+        self.numEdges = nodes + elements - 1
+        self.layers = 1
+        if solid:
+            vertical = [_divisions(geometry.depth, 0.0, part._seeds.get(2 * ne + v), size, deviation)
+                        for v in range(nv) if (2 * ne + v) in part._seeds]
+            self.layers = max(vertical) if vertical else _divisions(geometry.depth, 0.0, None, size, deviation)
+            elements = sum(count * (6 if _constant_name(part._shapes.get(f)) == 'TET' else 1)
+                           for f, count in enumerate(self.faceElements)) * self.layers
+            self.numEdges = self.numEdges * (self.layers + 1) + nodes * self.layers
+            nodes *= self.layers + 1
+        self.numNodes = nodes
+        self.numElements = elements
+        self.faceStart = [sum(self.faceElements[:f]) for f in range(len(self.faceElements))]
+
+    def _grid(self, profile, grid, spans, shapes):
+        # Elements of every face from the (columns, rows) of the grid cells inside it, twice as many triangles, and
+        # the nodes at the corners of these elements
+        columns, rows = grid.divisions()
+        xMiddle, yMiddle = 0.5 * (grid.xLines[1:] + grid.xLines[:-1]), 0.5 * (grid.yLines[1:] + grid.yLines[:-1])
+        cells = np.full((len(rows), len(columns)), -1)
+        for j, y in enumerate(yMiddle):
+            for i, x in enumerate(xMiddle):
+                cells[j, i] = next((f for f in range(len(profile.faceLoops)) if profile._inside((x, y), f, 0.0)), -1)
+        counts = np.outer(rows, columns)
+        self.faceElements = [int(counts[cells == f].sum()) * (2 if shapes[f] == 'TRI' else 1)
+                             for f in range(len(profile.faceLoops))]
+        self.divisions = [sum(int(columns[i] if direction == 'h' else rows[j]) for direction, i, j in keys)
+                          for keys in spans]
+        filled = np.repeat(np.repeat(cells >= 0, rows, axis=0), columns, axis=1)
+        corners = np.zeros((filled.shape[0] + 1, filled.shape[1] + 1), dtype=bool)
+        for dj in (0, 1):
+            for di in (0, 1):
+                corners[dj:dj + filled.shape[0], di:di + filled.shape[1]] |= filled
+        return int(corners.sum())
+
+    def _carry(self, profile, shapes):
+        # The largest count along every chain of opposite edges of four-sided structured faces, the rule
+        # SeededGrid.divisions() applies to a row or column
+        chain = list(range(len(self.divisions)))
+
+        def root(e):
+            while chain[e] != e:
+                e = chain[e]
+            return e
+        for f, loops in enumerate(profile.faceLoops):
+            if shapes[f] != 'TRI' and len(loops) == 1 and len(loops[0]) == 4:
+                for a, b in ((loops[0][0], loops[0][2]), (loops[0][1], loops[0][3])):
+                    chain[root(a)] = root(b)
+        largest = {}
+        for e, n in enumerate(self.divisions):
+            largest[root(e)] = max(largest.get(root(e), 0), n)
+        self.divisions = [largest[root(e)] for e in range(len(self.divisions))]
+
+    def _face(self, profile, f, loops, shape):
+        # (elements, interior nodes) of one face: a structured grid on faces bounded by four edges, else the area
+        # over the element size along the boundary
+        divisions = [self.divisions[e] for loop in loops for e in loop]
+        if shape != 'TRI' and len(loops) == 1 and len(loops[0]) == 4:
+            n1, n2 = max(divisions[0], divisions[2]), max(divisions[1], divisions[3])
+            return n1 * n2, (n1 - 1) * (n2 - 1)
+        boundary = sum(divisions)
+        h = sum(profile.curves[e].length for loop in loops for e in loop) / float(boundary)
+        if shape == 'TRI':
+            elements = max(1, int(round(profile.faceAreas[f] / (0.25 * math.sqrt(3.0) * h * h))))
+            return elements, max(0, (elements - boundary + 2) // 2)
+        elements = max(1, int(round(profile.faceAreas[f] / (h * h))))
+        return elements, max(0, elements - boundary // 2 + 1)
+
+
+def _divisions(length, sweep, seed, size, deviation):
+    # Elements along an edge: the seeded number, else length over the seed size, with enough elements on an arc to
+    # keep its deviation factor (about sweep / (8 deviation) for small elements)
+    if seed is not None and seed[0] == 'number':
+        return int(seed[1])
+    n = max(1, int(round(length / (seed[1] if seed is not None else size))))
+    if sweep:
+        n = max(n, int(math.ceil(sweep / (8.0 * deviation))))
+    return n
+
+
+def _seeded_grid(profile, seeds, size):
+    # (SeededGrid, grid edge keys of every profile edge) when all edges of the profile are axis-parallel lines, else
+    # None. The grid lines pass through all vertices, so a partition line that stops short still splits the rows or
+    # columns across the part; a seeded number of elements is shared by the grid edges of a profile edge in proportion
+    # to their length, a seeded size is applied to each.
+    tolerance = profile.tolerance
+    if any(curve.isArc or min(abs(curve.p1[0] - curve.p0[0]), abs(curve.p1[1] - curve.p0[1])) > tolerance
+           for curve in profile.curves):
+        return None
+    lines = []
+    for axis in (0, 1):
+        values = sorted(vertex.pointOn[0][axis] for vertex in profile.vertices)
+        lines.append([value for k, value in enumerate(values) if k == 0 or value - values[k - 1] > tolerance])
+    grid = SeededGrid(lines[0], lines[1], size)
+    spans = []
+    for e, curve in enumerate(profile.curves):
+        axis = 0 if abs(curve.p1[0] - curve.p0[0]) > tolerance else 1
+        low, high = sorted((curve.p0[axis], curve.p1[axis]))
+        along, across = (grid.xLines, grid.yLines) if axis == 0 else (grid.yLines, grid.xLines)
+        line = int(np.argmin(np.abs(across - curve.p0[1 - axis])))
+        steps = [k for k in range(len(along) - 1) if along[k] >= low - tolerance and along[k + 1] <= high + tolerance]
+        keys = [('h', k, line) if axis == 0 else ('v', line, k) for k in steps]
+        lengths = [along[k + 1] - along[k] for k in steps]
+        for key, length in zip(keys, lengths):
+            if seeds[e] is not None and seeds[e][0] == 'number':
+                grid.seeds[key] = EdgeSeed('number', max(1, int(round(seeds[e][1] * length / (high - low)))))
+            elif seeds[e] is not None:
+                grid.seeds[key] = EdgeSeed('number', int(number_by_size(length, seeds[e][1])))
+        spans.append(keys)
+    return grid, spans
+
+
+# Stand-in objects
+
+class _StandIn(object):
+
+    # Base of the stand-in objects; _path names the object in the journal. A constructor (capitalised name) the
+    # stand-in does not model is still accepted: it is journalled with a warning and returns a Feature.
+
+    def __getattr__(self, name):
+        if name[:1].isupper():
+            return _unmodelled(self, name)
+        raise AttributeError('%s has no attribute %r in the offline stand-in' % (type(self).__name__, name))
+
+
+def _unmodelled(owner, name):
+    def constructor(*args, **kwargs):
+        def make(*args, **kwargs):
+            JOURNAL.warn('%s.%s() is not modelled by the offline stand-in, only journalled' % (type(owner).__name__,
+                                                                                           name))
+            return Feature('%s.%s' % (owner._path, name), name, kwargs.get('name', name), kwargs)
+        return _recorded(owner._path, name, make, args, kwargs)
+    return constructor
+
+
+class Repository(collections.OrderedDict):
+
+    # mdb.models, model.parts, model.steps, ...: an ordered dict whose deletions are journalled
+
+    def __init__(self, path):
+        collections.OrderedDict.__init__(self)
+        self._path = path
+
+    def __missing__(self, key):
+        raise KeyError('%r is not in %s (%s)' % (key, self._path, ', '.join(repr(k) for k in self.keys()) or 'empty'))
+
+    def __delitem__(self, key, *args):
+        _recorded(self._path, '__delitem__', functools.partial(collections.OrderedDict.__delitem__, self), (key, ),
+                  {})
+
+    def _item(self, key):
+        return '%s[%r]' % (self._path, key)
+
+    def __reduce__(self):
+        # copy.deepcopy() of a model makes the repository again from its path (the items of an OrderedDict of Python 2
+        # are kept in attributes of its own, which are left out)
+        own = vars(collections.OrderedDict())
+        state = dict((key, value) for key, value in vars(self).items() if key not in own)
+        return self.__class__, (self._path, ), state, None, iter(self.items())
+
+
+class _Datums(Repository):
+
+    # Part.datums: a missing feature id (the recorded scripts count features the stand-in does not make) gives a
+    # placeholder datum with a warning
+
+    def __missing__(self, key):
+        JOURNAL.warn('%s[%r] does not exist in the stand-in; a placeholder datum is used' % (self._path, key))
+        return Feature(self._item(key), 'Datum', 'Datum %r' % (key, ), {})
+
+
+class Feature(_StandIn):
+
+    # Anything made by a constructor that only has to remember its arguments: boundary conditions, loads, predefined
+    # fields, constraints, interactions, sections, output requests, datums, material behaviours, ... The arguments
+    # are attributes as well (createStepName, region, ...).
+
+    def __init__(self, path, kind, name, arguments):
+        self._path = path
+        self.kind = kind
+        self.name = name
+        self.arguments = dict(arguments)
+        self.stepValues = {}
+
+    def __getattr__(self, name):
+        arguments = self.__dict__.get('arguments', {})
+        if name in arguments:
+            return arguments[name]
+        return _StandIn.__getattr__(self, name)
+
+    @_journalled
+    def setValues(self, **kwargs):
+        self.arguments.update(kwargs)
+
+    @_journalled
+    def setValuesInStep(self, stepName, **kwargs):
+        self.stepValues.setdefault(stepName, {}).update(kwargs)
+
+    @_journalled
+    def deactivate(self, stepName):
+        self.stepValues.setdefault(stepName, {})['active'] = False
+
+    @_journalled
+    def reset(self, stepName):
+        self.stepValues.pop(stepName, None)
+
+    @_journalled
+    def resume(self):
+        self.arguments['suppressed'] = False
+
+    @_journalled
+    def suppress(self):
+        self.arguments['suppressed'] = True
+
+
+class _Behaviours(_StandIn):
+
+    # A material, or a behaviour of one: calling a capitalised name (Elastic, MohrCoulombPlasticity, ...) adds that
+    # behaviour, which is then the attribute of the same name in lower camel case (elastic, mohrCoulombPlasticity).
+    # Its arguments are attributes as well (elastic.table).
+
+    def __getattr__(self, name):
+        arguments = self.__dict__.get('arguments', {})
+        if name in arguments:
+            return arguments[name]
+        if name[:1].isupper():
+            def behaviour(**kwargs):
+                return _recorded(self._path, name, functools.partial(self._add, name), (), kwargs)
+            return behaviour
+        return _StandIn.__getattr__(self, name)
+
+    def _add(self, kind, **kwargs):
+        attribute = kind[0].lower() + kind[1:]
+        added = Behaviour('%s.%s' % (self._path, attribute), kind, kwargs)
+        self.__dict__[attribute] = added
+        return added
+
+
+class Behaviour(_Behaviours):
+
+    def __init__(self, path, kind, arguments):
+        self._path = path
+        self.kind = kind
+        self.arguments = dict(arguments)
+
+    @_journalled
+    def setValues(self, **kwargs):
+        self.arguments.update(kwargs)
+
+
+class Material(_Behaviours):
+
+    def __init__(self, model, name, arguments):
+        self._path = model.materials._item(name)
+        self.name = name
+        self.arguments = dict(arguments)
+
+
+class Region(object):
+
+    # regionToolset.Region, and the sets and surfaces of parts and assemblies: the sequences it was made from
+
+    def __init__(self, **kwargs):
+        self.name = None
+        self._path = None
+        self.arguments = kwargs
+        empty = [key for key, value in kwargs.items()
+                 if value is None or isinstance(value, (list, tuple, MeshSequence)) and not len(value)]
+        if empty:
+            JOURNAL.warn('Region with nothing in %s' % ', '.join(sorted(empty)))
+
+    def __getattr__(self, name):
+        arguments = self.__dict__.get('arguments', {})
+        if name in arguments:
+            return arguments[name]
+        raise AttributeError('Region has no %r' % (name, ))
+
+    def _render(self):
+        if self._path is not None:
+            return self._path
+        return {'Region': dict((key, _render(value)) for key, value in self.arguments.items())}
+
+
+def _named_region(repository, name, arguments):
+    region = Region(**arguments)
+    region.name = name
+    region._path = repository._item(name)
+    repository[name] = region
+    return region
+
+
+class ElemType(object):
+
+    # mesh.ElemType: an element code with its options
+
+    def __init__(self, elemCode, elemLibrary=None, **kwargs):
+        self.elemCode = elemCode
+        self.elemLibrary = elemLibrary
+        self.arguments = kwargs
+
+    def _render(self):
+        return {'ElemType': _constant_name(self.elemCode)}
+
+
+class _Settings(_StandIn):
+
+    # Objects that are only configured with setValues() (viewports, journal options, step controls)
+
+    def __init__(self, path, **values):
+        self._path = path
+        self.__dict__.update(values)
+
+    @_journalled
+    def setValues(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ConstrainedSketch(_StandIn):
+
+    def __init__(self, model, name, sheetSize=None, transform=None, arguments=None):
+        self._path = model.sketches._item(name)
+        self.name = name
+        self.sheetSize = sheetSize
+        self.transform = transform
+        self.curves = []
+
+    def _add(self, curve):
+        self.curves.append(curve)
+        return curve
+
+    @_journalled
+    def Line(self, point1, point2):
+        return self._add(_Segment(point1, point2))
+
+    @_journalled
+    def ArcByCenterEnds(self, center, point1, point2, direction=None):
+        return self._add(_arc_by_ends(center, point1, point2, _constant_name(direction) == 'CLOCKWISE'))
+
+    @_journalled
+    def CircleByCenterPerimeter(self, center, point1):
+        radius = math.hypot(point1[0] - center[0], point1[1] - center[1])
+        return self._add(_Arc(center, radius, math.atan2(point1[1] - center[1], point1[0] - center[0]), _TWO_PI))
+
+    @_journalled
+    def rectangle(self, point1, point2):
+        (x0, y0), (x1, y1) = point1, point2
+        for a, b in (((x0, y0), (x1, y0)), ((x1, y0), (x1, y1)), ((x1, y1), (x0, y1)), ((x0, y1), (x0, y0))):
+            self._add(_Segment(a, b))
+
+    @_journalled
+    def ConstructionLine(self, point1, point2):
+        pass
+
+    @_journalled
+    def setPrimaryObject(self, option=None):
+        pass
+
+    @_journalled
+    def unsetPrimaryObject(self):
+        pass
+
+    def _curves(self):
+        # The curves moved by the origin of the sketch transform
+        origin = getattr(self.transform, 'origin', None) or (0.0, 0.0, 0.0)
+        if not any(origin[:2]):
+            return list(self.curves)
+        return [curve.translated(origin[0], origin[1]) for curve in self.curves]
+
+
+def _scaled_number(number):
+    return 'number', max(1, int(round(int(number) / mdb.seedScale)))
+
+
+class Part(_StandIn):
+
+    def __init__(self, model, name, dimensionality, type, arguments):
+        self._path = model.parts._item(name)
+        self.model = model
+        self.name = name
+        self.dimensionality = dimensionality
+        self.type = type
+        self._geometry = None
+        self.features = Repository(self._path + '.features')
+        self.datums = _Datums(self._path + '.datums')
+        self.referencePoints = Repository(self._path + '.referencePoints')
+        self.sets = Repository(self._path + '.sets')
+        self.surfaces = Repository(self._path + '.surfaces')
+        self.sectionAssignments = []
+        self.elemTypes = []
+        self._nextId = 1
+        self._globalSeed = None
+        self._seeds = {}
+        self._shapes = {}
+        self._mesh = None
+
+    # Entities of the current topology
+
+    def _array(self, kind, owner=None):
+        entities = getattr(self._geometry, kind) if self._geometry is not None else []
+        return EntityArray(entities, kind, owner or self)
+
+    vertices = property(lambda self: self._array('vertices'))
+    edges = property(lambda self: self._array('edges'))
+    faces = property(lambda self: self._array('faces'))
+    cells = property(lambda self: self._array('cells'))
+    nodes = property(lambda self: self._mesh_sequence('nodes'))
+    elements = property(lambda self: self._mesh_sequence('elements'))
+
+    def _mesh_sequence(self, kind, owner=None):
+        count = 0 if self._mesh is None else (self._mesh.numNodes if kind == 'nodes' else self._mesh.numElements)
+        return MeshSequence(owner or self, kind, range(1, count + 1))
+
+    def _feature(self, kind, arguments, label):
+        # A numbered feature of the part (Abaqus numbers them from 1 in the order they are made)
+        count = sum(1 for feature in self.features.values() if feature.kind == kind) + 1
+        name = '%s-%d' % (label, count)
+        feature = Feature(self.features._item(name), kind, name, arguments)
+        feature.id = self._nextId
+        self._nextId += 1
+        self.features[name] = feature
+        return feature
+
+    def _own(self, entities, what):
+        # Indices of the entities that belong to the current topology of this part; others are ignored with a warning
+        indices = []
+        for entity in _entities(entities):
+            if entity.geometry is self._geometry:
+                indices.append(entity.index)
+            elif entity.geometry.part is self:
+                JOURNAL.warn('%s: %s from before the last partition of %s ignored' % (what, entity._render(),
+                                                                                     self.name))
+            else:
+                JOURNAL.warn('%s: %s belongs to %s, not to %s; ignored' % (what, entity._render(),
+                                                                           entity.geometry.part.name, self.name))
+        return indices
+
+    def _changed(self):
+        # The topology changed: seeds, mesh controls and the mesh refer to entities that are gone
+        self._seeds = {}
+        self._shapes = {}
+        self._mesh = None
+
+    # Base features and partitions
+
+    @_journalled
+    def BaseShell(self, sketch):
+        if _constant_name(self.dimensionality) == 'THREE_D':
+            JOURNAL.warn('%s: BaseShell() of a three dimensional part is modelled as a planar part' % self.name)
+        self._geometry = PlanarGeometry(self, sketch._curves())
+        if not self._geometry.faces:
+            JOURNAL.warn('%s: the sketch %s encloses no face' % (self.name, sketch.name))
+        self._changed()
+        return self._feature('BaseShell', dict(sketch=sketch.name), 'Shell planar')
+
+    @_journalled
+    def BaseSolidExtrude(self, sketch, depth, **kwargs):
+        profile = PlanarGeometry(self, sketch._curves())
+        if not profile.faces:
+            JOURNAL.warn('%s: the sketch %s encloses no face' % (self.name, sketch.name))
+        self._geometry = PrismGeometry(self, profile, depth)
+        self._changed()
+        feature = self._feature('BaseSolidExtrude', dict(sketch=sketch.name, depth=depth), 'Solid extrude')
+        # An extrusion takes two ids in CAE (the recorded scripts pick the first datum after it as datums[3])
+        self._nextId += 1
+        return feature
+
+    @_journalled
+    def MakeSketchTransform(self, sketchPlane, sketchPlaneSide=None, origin=(0.0, 0.0, 0.0), **kwargs):
+        transform = Feature(self._path + '.MakeSketchTransform', 'Transform', 'Transform',
+                            dict(kwargs, sketchPlane=sketchPlane, origin=tuple(origin)))
+        return transform
+
+    @_journalled
+    def PartitionFaceBySketch(self, faces, sketch, **kwargs):
+        if not isinstance(self._geometry, PlanarGeometry):
+            JOURNAL.warn('%s: PartitionFaceBySketch() of a solid is not modelled, only journalled' % self.name)
+        else:
+            faceIds = self._own(faces, 'PartitionFaceBySketch')
+            before = len(self._geometry.faces)
+            self._geometry = self._geometry.partitioned(faceIds, sketch._curves())
+            if len(self._geometry.faces) == before:
+                JOURNAL.warn('%s: PartitionFaceBySketch() with %s split no face' % (self.name, sketch.name))
+            self._changed()
+        return self._feature('PartitionFaceBySketch', {}, 'Partition face')
+
+    def _not_modelled(self, kind, label, kwargs):
+        JOURNAL.warn('%s: %s() is journalled, its partition is not modelled' % (self.name, kind))
+        return self._feature(kind, kwargs, label)
+
+    @_journalled
+    def PartitionFaceByDatumPlane(self, **kwargs):
+        return self._not_modelled('PartitionFaceByDatumPlane', 'Partition face', kwargs)
+
+    @_journalled
+    def PartitionCellByDatumPlane(self, **kwargs):
+        return self._not_modelled('PartitionCellByDatumPlane', 'Partition cell', kwargs)
+
+    @_journalled
+    def PartitionEdgeByParam(self, **kwargs):
+        return self._not_modelled('PartitionEdgeByParam', 'Partition edge', kwargs)
+
+    def _datum(self, kind, kwargs):
+        feature = self._feature(kind, kwargs, 'Datum plane' if 'Plane' in kind else 'Datum')
+        self.datums[feature.id] = feature
+        return feature
+
+    @_journalled
+    def DatumPlaneByOffset(self, **kwargs):
+        return self._datum('DatumPlaneByOffset', kwargs)
+
+    @_journalled
+    def DatumPlaneByPrincipalPlane(self, **kwargs):
+        return self._datum('DatumPlaneByPrincipalPlane', kwargs)
+
+    @_journalled
+    def DatumAxisByPrincipalAxis(self, **kwargs):
+        return self._datum('DatumAxisByPrincipalAxis', kwargs)
+
+    @_journalled
+    def ReferencePoint(self, point):
+        feature = self._feature('ReferencePoint', dict(point=tuple(point)), 'RP')
+        self.referencePoints[feature.id] = _ReferencePoint(self, feature.id, point)
+        return feature
+
+    # Sets, sections and mesh
+
+    @_journalled
+    def Set(self, name, **kwargs):
+        return _named_region(self.sets, name, kwargs)
+
+    @_journalled
+    def Surface(self, name, **kwargs):
+        return _named_region(self.surfaces, name, kwargs)
+
+    @_journalled
+    def SectionAssignment(self, region, sectionName, **kwargs):
+        if sectionName not in self.model.sections:
+            JOURNAL.warn('%s: section %r is assigned before it exists' % (self.name, sectionName))
+        self.sectionAssignments.append(Feature('%s.sectionAssignments[%d]' % (self._path,
+                                                                              len(self.sectionAssignments)),
+                                               'SectionAssignment', sectionName,
+                                               dict(kwargs, region=region, sectionName=sectionName)))
+        return self.sectionAssignments[-1]
+
+    # Seeds are scaled by mdb.seedScale (see run_script()): sizes multiplied, numbers divided
+
+    @_journalled
+    def seedPart(self, size, deviationFactor=0.1, **kwargs):
+        self._globalSeed = (float(size) * mdb.seedScale, float(deviationFactor))
+        self._mesh = None
+
+    def _seed(self, edges, seed, what):
+        for e in self._own(edges, what):
+            self._seeds[e] = seed
+        self._mesh = None
+
+    @_journalled
+    def seedEdgeByNumber(self, edges, number, **kwargs):
+        self._seed(edges, _scaled_number(number), 'seedEdgeByNumber')
+
+    @_journalled
+    def seedEdgeBySize(self, edges, size, **kwargs):
+        self._seed(edges, ('size', float(size) * mdb.seedScale), 'seedEdgeBySize')
+
+    @_journalled
+    def seedEdgeByBias(self, biasMethod=None, end1Edges=None, end2Edges=None, centerEdges=None, endEdges=None,
+                       ratio=None, number=None, minSize=None, maxSize=None, **kwargs):
+        seed = _scaled_number(number) if number is not None else ('size', 0.5 * (minSize + maxSize) * mdb.seedScale)
+        for edges in (end1Edges, end2Edges, centerEdges, endEdges):
+            self._seed(edges, seed, 'seedEdgeByBias')
+
+    @_journalled
+    def setMeshControls(self, regions, elemShape=None, **kwargs):
+        if elemShape is not None:
+            for index in self._own(regions, 'setMeshControls'):
+                self._shapes[index] = elemShape
+        self._mesh = None
+
+    @_journalled
+    def setElementType(self, regions, elemTypes):
+        self._own(regions, 'setElementType')
+        self.elemTypes.append((regions, elemTypes))
+
+    @_journalled
+    def generateMesh(self, **kwargs):
+        if self._geometry is None or not self._geometry.faces:
+            JOURNAL.warn('%s: generateMesh() of a part without faces' % self.name)
+            return
+        self._mesh = MeshEstimate(self)
+        solid = isinstance(self._geometry, PrismGeometry)
+        JOURNAL.counts['%s/%s' % (self.model.name, self.name)] = dict(
+            nodes=self._mesh.numNodes, elements=self._mesh.numElements, edges=self._mesh.numEdges,
+            dimension=3 if solid else 2, elemCode=self._elem_code() or ('C3D8R' if solid else 'CPS4R'))
+
+    def _elem_code(self):
+        # Code of the element type the last setElementType() gives first (the quad or hex one), None without any
+        if not self.elemTypes:
+            return None
+        elemTypes = self.elemTypes[-1][1]
+        first = elemTypes[0] if isinstance(elemTypes, (list, tuple)) else elemTypes
+        return _constant_name(first.elemCode)
+
+    @_journalled
+    def deleteMesh(self, **kwargs):
+        self._mesh = None
+
+    def _default_seed_size(self):
+        # Without seedPart() Abaqus picks a global size from the part; a tenth of its largest extent here
+        profile = self._geometry.profile if isinstance(self._geometry, PrismGeometry) else self._geometry
+        boxes = [curve.box() for curve in profile.curves]
+        extent = max(max(box[2] for box in boxes) - min(box[0] for box in boxes),
+                     max(box[3] for box in boxes) - min(box[1] for box in boxes))
+        JOURNAL.warn('%s: no seedPart(), a seed size of %g is assumed' % (self.name, 0.1 * extent))
+        return 0.1 * extent
+
+    def _elements_on(self, entity):
+        # Synthetic labels of the elements next to an edge (its number of divisions, within the labels of a face it
+        # bounds) or in a face of a planar part; the real connectivity is not known
+        if self._mesh is None or entity.geometry is not self._geometry:
+            return []
+        if not isinstance(self._geometry, PlanarGeometry):
+            JOURNAL.warn('%s: getElements() of a solid part is not modelled' % self.name)
+            return []
+        mesh = self._mesh
+        if entity.kind == 'faces':
+            start = mesh.faceStart[entity.index]
+            labels = range(start + 1, start + mesh.faceElements[entity.index] + 1)
+        elif entity.kind == 'edges':
+            labels = []
+            for f, loops in enumerate(self._geometry.faceLoops):
+                edgeIds = [e for loop in loops for e in loop]
+                if entity.index in edgeIds:
+                    offset = sum(mesh.divisions[e] for e in edgeIds[:edgeIds.index(entity.index)])
+                    count = mesh.faceElements[f]
+                    labels = sorted(set(mesh.faceStart[f] + (offset + k) % count + 1
+                                        for k in range(mesh.divisions[entity.index])))
+                    break
+        else:
+            return []
+        return [MeshEntity(self, 'elements', label) for label in labels]
+
+
+class _ReferencePoint(object):
+
+    def __init__(self, part, id, point):
+        self.part = part
+        self.id = id
+        self.pointOn = (tuple(float(c) for c in point), )
+
+    def _render(self):
+        return '%s[%d]' % (self.part.referencePoints._path, self.id)
+
+
+class PartInstance(_StandIn):
+
+    # A dependent instance: the entities and mesh of its part, as arrays of the instance
+
+    def __init__(self, assembly, name, part, dependent):
+        self._path = assembly.instances._item(name)
+        self.name = name
+        self.part = part
+        self.partName = part.name
+        self.dependent = dependent
+
+    _geometry = property(lambda self: self.part._geometry)
+    vertices = property(lambda self: self.part._array('vertices', self))
+    edges = property(lambda self: self.part._array('edges', self))
+    faces = property(lambda self: self.part._array('faces', self))
+    cells = property(lambda self: self.part._array('cells', self))
+    nodes = property(lambda self: self.part._mesh_sequence('nodes', self))
+    elements = property(lambda self: self.part._mesh_sequence('elements', self))
+    referencePoints = property(lambda self: self.part.referencePoints)
+    sets = property(lambda self: self.part.sets)
+    surfaces = property(lambda self: self.part.surfaces)
+
+    @_journalled
+    def translate(self, vector):
+        JOURNAL.warn('%s: instance positions are not modelled, findAt() uses part coordinates' % self.name)
+
+    @_journalled
+    def rotateAboutAxis(self, **kwargs):
+        JOURNAL.warn('%s: instance positions are not modelled, findAt() uses part coordinates' % self.name)
+
+
+class Assembly(_StandIn):
+
+    def __init__(self, model):
+        self._path = model._path + '.rootAssembly'
+        self.model = model
+        self.instances = Repository(self._path + '.instances')
+        self.sets = Repository(self._path + '.sets')
+        self.surfaces = Repository(self._path + '.surfaces')
+        self.features = Repository(self._path + '.features')
+
+    @_journalled
+    def Instance(self, name, part, dependent=None, **kwargs):
+        if _constant_name(dependent) != 'ON':
+            JOURNAL.warn('%s: independent instances are modelled as dependent ones' % name)
+        instance = PartInstance(self, name, part, dependent)
+        self.instances[name] = instance
+        return instance
+
+    @_journalled
+    def regenerate(self):
+        pass
+
+    @_journalled
+    def Set(self, name, **kwargs):
+        return _named_region(self.sets, name, kwargs)
+
+    @_journalled
+    def Surface(self, name, **kwargs):
+        return _named_region(self.surfaces, name, kwargs)
+
+
+class Step(Feature):
+
+    def __init__(self, model, name, kind, previous, arguments):
+        Feature.__init__(self, model.steps._item(name), kind, name, arguments)
+        self.previous = previous
+        self.control = _Settings(self._path + '.control', timeIncrementation=TIME_INCREMENTATION)
+        self.restart = None
+
+    @_journalled
+    def Restart(self, **kwargs):
+        self.restart = kwargs
+
+
+# Keyword of every analysis step the stand-in knows, for the keyword blocks
+
+STEP_KEYWORDS = {'StaticStep': '*Static', 'StaticRiksStep': '*Static, riks', 'HeatTransferStep': '*Heat Transfer',
+                 'CoupledTempDisplacementStep': '*Coupled Temperature-displacement', 'FrequencyStep': '*Frequency',
+                 'ImplicitDynamicsStep': '*Dynamic', 'BuckleStep': '*Buckle', 'GeostaticStep': '*Geostatic',
+                 'SoilsStep': '*Soils', 'ViscoStep': '*Visco'}
+
+# Model constructors that make a Feature, by the repository of the model it goes to
+
+MODEL_FEATURES = {
+    'boundaryConditions': ('XsymmBC', 'YsymmBC', 'ZsymmBC', 'XasymmBC', 'YasymmBC', 'ZasymmBC', 'EncastreBC',
+                           'PinnedBC', 'DisplacementBC', 'VelocityBC', 'TemperatureBC'),
+    'loads': ('Pressure', 'ConcentratedForce', 'Moment', 'Gravity', 'BodyForce', 'SurfaceTraction',
+              'ConcentratedHeatFlux', 'SurfaceHeatFlux', 'BodyHeatFlux'),
+    'predefinedFields': ('Temperature', 'Velocity'),
+    'constraints': ('Tie', 'Coupling', 'MultipointConstraint', 'Equation', 'RigidBody'),
+    'interactions': ('FilmCondition', 'RadiationToAmbient', 'SurfaceToSurfaceContactStd', 'SelfContactStd'),
+    'interactionProperties': ('ContactProperty', 'FilmConditionProp'),
+    'sections': ('HomogeneousSolidSection', 'HomogeneousShellSection', 'BeamSection', 'TrussSection',
+                 'CohesiveSection'),
+    'fieldOutputRequests': ('FieldOutputRequest', ),
+    'historyOutputRequests': ('HistoryOutputRequest', ),
+    'amplitudes': ('TabularAmplitude', 'SmoothStepAmplitude')}
+
+
+class KeywordBlock(_StandIn):
+
+    # model.keywordBlock: sieBlocks are the keyword blocks of the model after synchVersions(), one per part,
+    # instance, material and step line, so that blocks can be found and inserted as in CAE. Inserted blocks stay
+    # after the block they were inserted after when the blocks are synchronised again.
+
+    def __init__(self, model):
+        self._path = model._path + '.keywordBlock'
+        self.model = model
+        self.sieBlocks = []
+        self._inserted = []
+
+    @_journalled
+    def synchVersions(self, storeNodesAndElements=True):
+        blocks = self.model._keyword_blocks()
+        for (anchor, occurrence), text in self._inserted:
+            positions = [i for i, block in enumerate(blocks) if block == anchor]
+            position = positions[occurrence] + 1 if occurrence < len(positions) else len(blocks)
+            while position < len(blocks) and blocks[position] in [t for a, t in self._inserted]:
+                position += 1
+            blocks.insert(position, text)
+        self.sieBlocks = blocks
+
+    @_journalled
+    def insert(self, position, text):
+        anchor = self.sieBlocks[position]
+        self._inserted.append(((anchor, self.sieBlocks[:position].count(anchor)), text))
+        self.sieBlocks.insert(position + 1, text)
+
+    @_journalled
+    def replace(self, position, text):
+        self.sieBlocks[position] = text
+
+
+class Model(_StandIn):
+
+    REPOSITORIES = ('parts', 'sketches', 'materials', 'sections', 'steps', 'boundaryConditions', 'loads',
+                    'predefinedFields', 'constraints', 'interactions', 'interactionProperties', 'fieldOutputRequests',
+                    'historyOutputRequests', 'amplitudes')
+
+    def __init__(self, name, arguments=None):
+        self._path = 'mdb.models[%r]' % (name, )
+        self.name = name
+        self.arguments = arguments or {}
+        for repository in self.REPOSITORIES:
+            setattr(self, repository, Repository('%s.%s' % (self._path, repository)))
+        self.steps['Initial'] = Step(self, 'Initial', 'InitialStep', None, {})
+        self.rootAssembly = Assembly(self)
+        self.keywordBlock = KeywordBlock(self)
+
+    @_journalled
+    def ConstrainedSketch(self, name, sheetSize=None, transform=None, **kwargs):
+        sketch = ConstrainedSketch(self, name, sheetSize, transform, kwargs)
+        self.sketches[name] = sketch
+        return sketch
+
+    @_journalled
+    def Part(self, name, dimensionality, type, **kwargs):
+        part = Part(self, name, dimensionality, type, kwargs)
+        self.parts[name] = part
+        return part
+
+    @_journalled
+    def Material(self, name, **kwargs):
+        material = Material(self, name, kwargs)
+        self.materials[name] = material
+        return material
+
+    def _feature(self, repository, kind, name, kwargs):
+        step = kwargs.get('createStepName')
+        if step is not None and step not in self.steps:
+            raise KeyError('%s %r: step %r does not exist (%s)' % (kind, name, step, ', '.join(self.steps.keys())))
+        feature = Feature(getattr(self, repository)._item(name), kind, name, kwargs)
+        getattr(self, repository)[name] = feature
+        return feature
+
+    def _step(self, kind, name, previous, kwargs):
+        if previous not in self.steps:
+            raise KeyError('%s %r: previous step %r does not exist' % (kind, name, previous))
+        step = Step(self, name, kind, previous, kwargs)
+        items = [item for item in self.steps.items() if item[0] != name]
+        position = [key for key, value in items].index(previous) + 1
+        items.insert(position, (name, step))
+        collections.OrderedDict.clear(self.steps)
+        for key, value in items:
+            collections.OrderedDict.__setitem__(self.steps, key, value)
+        # The first analysis step gets the preselected output, as in CAE
+        if len(self.steps) == 2:
+            preselect = CONSTANTS['PRESELECT']
+            if 'F-Output-1' not in self.fieldOutputRequests:
+                self._feature('fieldOutputRequests', 'FieldOutputRequest', 'F-Output-1',
+                              dict(createStepName=name, variables=preselect))
+            if 'H-Output-1' not in self.historyOutputRequests:
+                self._feature('historyOutputRequests', 'HistoryOutputRequest', 'H-Output-1',
+                              dict(createStepName=name, variables=preselect))
+        return step
+
+    def _copy(self, name):
+        # The model and everything in it under a new name, as mdb.Model(objectToCopy=...) makes it
+        copied = copy.deepcopy(self)
+        copied.name = name
+        _rename(copied, self._path, 'mdb.models[%r]' % (name, ))
+        return copied
+
+    def _keyword_blocks(self):
+        # One block per keyword line of the input file outline
+        blocks = ['*Heading', '** PARTS']
+        for part in self.parts.values():
+            blocks += ['*Part, name=%s' % part.name, '*End Part']
+        blocks += ['** ASSEMBLY', '*Assembly, name=Assembly']
+        for instance in self.rootAssembly.instances.values():
+            blocks += ['*Instance, name=%s, part=%s' % (instance.name, instance.partName), '*End Instance']
+        blocks += ['*End Assembly', '** MATERIALS']
+        blocks += ['*Material, name=%s' % name for name in self.materials.keys()]
+        for step in list(self.steps.values())[1:]:
+            name = '"%s"' % step.name if ' ' in step.name else step.name
+            blocks += ['*Step, name=%s, nlgeom=NO' % name, STEP_KEYWORDS.get(step.kind, '*' + step.kind),
+                       '** OUTPUT REQUESTS', '*End Step']
+        return blocks
+
+
+def _rename(root, old, new):
+    # Replace the path prefix old by new in the journal paths of every object reachable from root
+    seen = set()
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, (SymbolicConstant, float, int) + _STRINGS) or item is None:
+            continue
+        seen.add(id(item))
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        attributes = getattr(item, '__dict__', None)
+        if attributes is not None:
+            path = attributes.get('_path')
+            if isinstance(path, _STRINGS) and path.startswith(old):
+                attributes['_path'] = new + path[len(old):]
+            stack.extend(attributes.values())
+
+
+def _feature_constructor(repository, kind):
+    def constructor(self, name, **kwargs):
+        return self._feature(repository, kind, name, kwargs)
+    constructor.__name__ = kind
+    return _journalled(constructor)
+
+
+def _step_constructor(kind):
+    def constructor(self, name, previous, **kwargs):
+        return self._step(kind, name, previous, kwargs)
+    constructor.__name__ = kind
+    return _journalled(constructor)
+
+
+for _repository, _kinds in MODEL_FEATURES.items():
+    for _kind in _kinds:
+        setattr(Model, _kind, _feature_constructor(_repository, _kind))
+for _kind in STEP_KEYWORDS:
+    setattr(Model, _kind, _step_constructor(_kind))
+
+
+class SolverReached(Exception):
+
+    # Raised by waitForCompletion() under the solver policy 'stop': the dry run has come as far as it can
+    pass
+
+
+class Job(_StandIn):
+
+    def __init__(self, mdb, name, model, arguments):
+        if model not in mdb.models:
+            raise KeyError('Job %r: model %r does not exist' % (name, model))
+        self._path = mdb.jobs._item(name)
+        self.mdb = mdb
+        self.name = name
+        self.model = model
+        self.arguments = arguments
+        self.status = None
+
+    @_journalled
+    def submit(self, **kwargs):
+        self.status = 'SUBMITTED'
+
+    @_journalled
+    def waitForCompletion(self):
+        if self.mdb.solver == 'stop':
+            raise SolverReached(self.name)
+        self.status = 'DRY_RUN'
+
+    @_journalled
+    def writeInput(self, **kwargs):
+        pass
+
+    @_journalled
+    def kill(self):
+        self.status = 'ABORTED'
+
+
+class Mdb(_StandIn):
+
+    def __init__(self):
+        self._path = 'mdb'
+        self.reset()
+
+    def reset(self, solver='stop', seedScale=1.0):
+        """Forget every model and job and start again with an empty Model-1."""
+
+        self.solver = solver
+        self.seedScale = float(seedScale)
+        self.models = Repository('mdb.models')
+        self.jobs = Repository('mdb.jobs')
+        self.models['Model-1'] = Model('Model-1')
+
+    @_journalled
+    def Model(self, name, objectToCopy=None, **kwargs):
+        model = Model(name, kwargs) if objectToCopy is None else objectToCopy._copy(name)
+        self.models[name] = model
+        return model
+
+    @_journalled
+    def Job(self, name, model, **kwargs):
+        job = Job(self, name, model, kwargs)
+        self.jobs[name] = job
+        return job
+
+
+class Session(_StandIn):
+
+    def __init__(self):
+        self._path = 'session'
+        self.reset()
+
+    def reset(self):
+        self.viewports = Repository('session.viewports')
+        self.viewports['Viewport: 1'] = _Settings(self.viewports._item('Viewport: 1'))
+        self.journalOptions = _Settings('session.journalOptions')
+
+
+# The stand-in session: the modules in abaqus_tools/offline export these objects, and reset() empties them in place
+# so names already imported by a script stay valid
+
+JOURNAL = Journal()
+mdb = Mdb()
+session = Session()
+
+
+def reset(solver='stop', script=None, seedScale=1.0):
+    """Empty mdb and session and start a new journal, which is returned.
+
+    solver 'stop' ends a script at its first waitForCompletion(), 'continue' lets it run on. seedScale multiplies
+    every seed size and divides every seed number the script sets (0.5 about doubles the elements along an edge).
+    """
+
+    global JOURNAL
+    if solver not in SOLVER_POLICIES:
+        raise ValueError('solver must be one of %s, not %r' % (', '.join(SOLVER_POLICIES), solver))
+    if seedScale <= 0.0:
+        raise ValueError('seedScale must be positive, not %r' % (seedScale, ))
+    JOURNAL = Journal(script)
+    JOURNAL.seedScale = float(seedScale)
+    mdb.reset(solver, seedScale)
+    session.reset()
+    return JOURNAL
+
+
+def run_script(path, solver='stop', directory=None, journalPath=None, seedScale=1.0):
+    """Run a CAE script against the stand-in and return its Journal (also saved to journalPath when given).
+
+    The script runs as __main__ in directory (the current one by default), where it writes any files of its own.
+    journal.status is 'completed', 'solver' (stopped at waitForCompletion() of journal.job) or 'failed' (with the
+    traceback in journal.error). seedScale scales the seeds of the script (see reset()).
+    """
+
+    path = os.path.abspath(path)
+    journal = reset(solver, path, seedScale)
+    if OFFLINE_DIRECTORY not in sys.path:
+        sys.path.insert(0, OFFLINE_DIRECTORY)
+    previous, argv = os.getcwd(), sys.argv
+    if directory is not None:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        os.chdir(directory)
+    sys.argv = [path]
+    start = time.time()
+    try:
+        runpy.run_path(path, run_name='__main__')
+        journal.status = 'completed'
+    except SolverReached as reached:
+        journal.status = 'solver'
+        journal.job = reached.args[0]
+    except SystemExit as stop:
+        journal.status = 'completed' if stop.code in (None, 0) else 'failed'
+    except Exception:
+        journal.status = 'failed'
+        journal.error = traceback.format_exc()
+    finally:
+        journal.elapsed = time.time() - start
+        sys.argv = argv
+        os.chdir(previous)
+    if journalPath is not None:
+        journal.save(journalPath)
+    return journal
+
+
+def main(arguments):
+    # python -m abaqus_tools.offline_cae run <script> ... [--journal <directory>] [--solver stop | continue]
+    #                                                     [--directory <directory>]
+    # python -m abaqus_tools.offline_cae diff <journal> <journal>
+    if arguments[:1] == ['diff'] and len(arguments) == 3:
+        difference = compare_journals(arguments[1], arguments[2])
+        print(difference or 'The calls of both journals are the same')
+        return 0 if difference is None else 1
+    if len(arguments) < 2 or arguments[0] != 'run':
+        print('Usage: python -m abaqus_tools.offline_cae run <script> ... [--journal <directory>] '
+              '[--solver stop | continue] [--directory <directory>]\n'
+              '       python -m abaqus_tools.offline_cae diff <journal> <journal>')
+        return 2
+    options = {'--journal': None, '--solver': 'stop', '--directory': None}
+    scripts = []
+    remaining = list(arguments[1:])
+    while remaining:
+        argument = remaining.pop(0)
+        if argument in options:
+            options[argument] = remaining.pop(0)
+        else:
+            scripts.append(argument)
+    # Without --directory every script runs in a scratch directory, so the files it writes do not land in the tree
+    scratch = tempfile.mkdtemp(prefix='offline_cae_') if options['--directory'] is None else None
+    if options['--journal'] is not None and not os.path.isdir(options['--journal']):
+        os.makedirs(options['--journal'])
+    failed = 0
+    try:
+        for script in scripts:
+            journalPath = None
+            if options['--journal'] is not None:
+                stem = os.path.splitext(os.path.basename(script))[0]
+                journalPath = os.path.join(options['--journal'], stem + JOURNAL_SUFFIX)
+            journal = run_script(script, options['--solver'], options['--directory'] or scratch, journalPath)
+            print(journal.summary())
+            for name, counts in sorted(journal.counts.items()):
+                print('    mesh %-40s %8d nodes %8d elements' % (name, counts['nodes'], counts['elements']))
+            for warning in journal.warnings:
+                print('    warning: %s' % warning)
+            if journal.status == 'failed':
+                failed += 1
+                print('    ' + '\n    '.join((journal.error or '').strip().splitlines()[-3:]))
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    # Through the imported module: the modules in abaqus_tools/offline import that one, not __main__
+    from abaqus_tools import offline_cae
+    sys.exit(offline_cae.main(sys.argv[1:]))
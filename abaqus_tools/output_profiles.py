@@ -0,0 +1,182 @@
+# Named output request profiles, so a job writes only the fields and history it is run for
+
+# Left at their defaults, the field and history output requests write every preselected variable of the whole model
+# at every increment; the transient FEM5_heat_transfer.py run alone writes hundreds of full frames over its 15000 s.
+# A profile replaces the requests of a step with the few variables a study reads, restricted to a set and written
+# only as often as needed:
+#
+#     from abaqus_tools.output_profiles import apply_profile, profile
+#     apply_profile(bearingModel, 'Load Step', 'settlement')             # U2, RF2 of set FOOTING
+#     apply_profile(holeModel, 'Step-1', profile('thermal', timeInterval=500.0))
+#
+# The profiles (PROFILES) are:
+#
+#     settlement   U and RF of set FOOTING at the end of the step, U2 and RF2 history at every increment
+#     scf          S of set HOLE_EDGE (the elements on the hole, see edge_element_set()) at the end of the step
+#     thermal      NT of the whole model every timeInterval of step time (1000 s by default)
+#     stress       S of the whole model at the end of the step
+#
+# apply_profile() works on a CAE model through fieldOutputRequests / historyOutputRequests; deck_keywords() gives the
+# *OUTPUT keywords of a profile for decks written without CAE (inp_writer.py). frequency LAST writes only the last
+# increment of the step, which Abaqus always writes (FREQUENCY=99999 in a deck).
+
+LAST = 'LAST'
+LAST_FREQUENCY = 99999
+
+# Output variables written per node; every other variable is element output. History components (U2, RF2) belong to
+# the variable they are a component of.
+
+NODE_VARIABLES = ('U', 'UT', 'UR', 'V', 'A', 'RF', 'RT', 'RM', 'CF', 'NT', 'RFL', 'COORD')
+
+
+class OutputProfile(object):
+
+    # fieldVariables and historyVariables are tuples of output variables, region the name of the assembly set (and of
+    # the node and element sets in a deck) they are restricted to, None for the whole model. The fields are written
+    # every `frequency` increments (LAST for the end of the step only) or, when timeInterval is set, every
+    # timeInterval of step time; the history every historyFrequency increments.
+
+    def __init__(self, name, fieldVariables=(), historyVariables=(), region=None, frequency=LAST, timeInterval=None,
+                 historyFrequency=1):
+        if frequency != LAST and (int(frequency) != frequency or frequency < 1):
+            raise ValueError('frequency must be %r or a positive number of increments, not %r' % (LAST, frequency))
+        if timeInterval is not None and timeInterval <= 0.0:
+            raise ValueError('timeInterval must be positive, not %r' % (timeInterval, ))
+        self.name = name
+        self.fieldVariables = tuple(fieldVariables)
+        self.historyVariables = tuple(historyVariables)
+        self.region = region
+        self.frequency = frequency
+        self.timeInterval = timeInterval
+        self.historyFrequency = historyFrequency
+
+    def copy(self, **changes):
+        values = dict(self.__dict__)
+        values.update(changes)
+        return OutputProfile(**values)
+
+    def __repr__(self):
+        return 'OutputProfile(%s)' % ', '.join('%s=%r' % item for item in sorted(self.__dict__.items()))
+
+
+PROFILES = dict(
+    settlement=OutputProfile('settlement', fieldVariables=('U', 'RF'), historyVariables=('U2', 'RF2'),
+                             region='FOOTING'),
+    scf=OutputProfile('scf', fieldVariables=('S', ), region='HOLE_EDGE'),
+    thermal=OutputProfile('thermal', fieldVariables=('NT', ), timeInterval=1000.0),
+    stress=OutputProfile('stress', fieldVariables=('S', )),
+)
+
+
+def profile(name, **changes):
+    """The profile of that name from PROFILES, with any attributes changed (e.g. timeInterval=500.0)."""
+
+    if name not in PROFILES:
+        raise ValueError('Unknown output profile %r, use one of %s' % (name, ', '.join(sorted(PROFILES))))
+    return PROFILES[name].copy(**changes) if changes else PROFILES[name]
+
+
+def _as_profile(value):
+    return value if isinstance(value, OutputProfile) else profile(value)
+
+
+def _base_variable(variable):
+    # U2 -> U, RF2 -> RF; S11 stays an element variable
+    base = variable.rstrip('0123456789')
+    return base if base in NODE_VARIABLES else variable
+
+
+def split_variables(variables):
+    """(node variables, element variables) of a list of output variables."""
+
+    nodal = [variable for variable in variables if _base_variable(variable) in NODE_VARIABLES]
+    return nodal, [variable for variable in variables if variable not in nodal]
+
+
+def apply_profile(model, stepName, outputProfile, region=None, replace=True):
+    """Replace the output requests of step stepName of a CAE model by those of a profile (or profile name).
+
+    region overrides the set named by the profile. With replace=False the requests are added to the existing ones.
+    Returns the names of the new (field, history) requests, None where the profile has no variables of that kind.
+    """
+
+    from abaqusConstants import LAST_INCREMENT, MODEL
+
+    outputProfile = _as_profile(outputProfile)
+    if region is None and outputProfile.region is not None:
+        sets = model.rootAssembly.sets
+        if outputProfile.region not in sets.keys():
+            raise ValueError('Output profile %s needs the assembly set %s; the assembly has %s'
+                             % (outputProfile.name, outputProfile.region, ', '.join(sorted(sets.keys())) or 'no sets'))
+        region = sets[outputProfile.region]
+    region = MODEL if region is None else region
+
+    if replace:
+        # Requests made in this step are deleted, requests carried over from earlier steps are switched off in it
+        for requests in (model.fieldOutputRequests, model.historyOutputRequests):
+            for name in list(requests.keys()):
+                if requests[name].createStepName == stepName:
+                    del requests[name]
+                else:
+                    requests[name].deactivate(stepName)
+
+    fieldName = historyName = None
+    if outputProfile.fieldVariables:
+        fieldName = 'F-%s' % outputProfile.name
+        timing = {}
+        if outputProfile.timeInterval is not None:
+            timing['timeInterval'] = outputProfile.timeInterval
+        elif outputProfile.frequency == LAST:
+            timing['frequency'] = LAST_INCREMENT
+        else:
+            timing['frequency'] = int(outputProfile.frequency)
+        model.FieldOutputRequest(name=fieldName, createStepName=stepName, variables=outputProfile.fieldVariables,
+                                 region=region, **timing)
+    if outputProfile.historyVariables:
+        historyName = 'H-%s' % outputProfile.name
+        model.HistoryOutputRequest(name=historyName, createStepName=stepName,
+                                   variables=outputProfile.historyVariables, region=region,
+                                   frequency=outputProfile.historyFrequency)
+    return fieldName, historyName
+
+
+def edge_element_set(assembly, name, instance, *edgeSequences):
+    """Assembly set of the elements of a meshed instance that have a face (or edge) on the given instance edges."""
+
+    labels = set()
+    for edges in edgeSequences:
+        for edge in edges:
+            labels.update(element.label for element in edge.getElements())
+    if not labels:
+        raise ValueError('No elements on the edges of set %s; mesh the part first' % name)
+    return assembly.Set(name=name, elements=instance.elements.sequenceFromLabels(sorted(labels)))
+
+
+def _output_keywords(variables, region):
+    nodal, element = split_variables(variables)
+    lines = []
+    if nodal:
+        lines.append('*NODE OUTPUT' + (', NSET=%s' % region if region else ''))
+        lines.append(', '.join(nodal))
+    if element:
+        lines.append('*ELEMENT OUTPUT' + (', ELSET=%s' % region if region else ''))
+        lines.append(', '.join(element))
+    return lines
+
+
+def deck_keywords(outputProfile):
+    """The *OUTPUT keywords of a profile (or profile name) for the step of an input deck, without *END STEP."""
+
+    outputProfile = _as_profile(outputProfile)
+    lines = []
+    if outputProfile.fieldVariables:
+        if outputProfile.timeInterval is not None:
+            lines.append('*OUTPUT, FIELD, TIME INTERVAL=%r' % float(outputProfile.timeInterval))
+        else:
+            lines.append('*OUTPUT, FIELD, FREQUENCY=%d' % (LAST_FREQUENCY if outputProfile.frequency == LAST
+                                                            else outputProfile.frequency))
+        lines.extend(_output_keywords(outputProfile.fieldVariables, outputProfile.region))
+    if outputProfile.historyVariables:
+        lines.append('*OUTPUT, HISTORY, FREQUENCY=%d' % outputProfile.historyFrequency)
+        lines.extend(_output_keywords(outputProfile.historyVariables, outputProfile.region))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,162 @@
+# Peak stresses at the hole edge and the plate edge of the FEM5_1.1.py / FEM5_1.2.py runs, and their k ratios
+
+# Theory_code.py divides peak stresses read off the viewer by the nominal stresses. Here the peaks come from the
+# printed (.dat) or ASCII results (.fil) output of every run in a directory:
+#
+#     python -m abaqus_tools.peak_stress runs            # every .dat / .fil below runs
+#
+# The runs need integration point output with coordinates, which request_printed_results() adds to the step of a
+# model before its job is written (FEM5_1.1.py and FEM5_1.2.py do this). The hole edge is the ring of integration
+# points nearest to the hole, the plate edge the row nearest to the top and bottom edges: the points within twice the
+# smallest distance of any point to that edge. A run is a tension run (FEM5_1.1.py, quarter model) unless it has
+# points below y = 0, i.e. it is the half model of the bending run (FEM5_1.2.py); the loading can also be given.
+
+import os
+import sys
+
+import numpy as np
+
+from abaqus_tools.result_files import fil_element_frames, read_dat_tables
+from abaqus_tools.stress_concentration import nominal_bending_hole, nominal_bending_plate, nominal_tension
+
+PRINT_KEYWORDS = ('*EL PRINT, POSITION=INTEGRATION POINT, SUMMARY=NO\n'
+                  'COORD, S11, S22, S12, MISES\n'
+                  '*EL FILE, POSITION=INTEGRATION POINT\n'
+                  'COORD, S, SINV\n'
+                  '*FILE FORMAT, ASCII')
+
+# Geometry and loads of Theory_code.py: thickness, plate width, hole radius, axial load and bending moment
+
+PLATE = dict(t=0.01, D=0.1, r=0.01, P=160000.0, M=5200000.0)
+
+
+def request_printed_results(model, stepName, keywords=PRINT_KEYWORDS):
+    """Add keywords (by default the integration point stress output) at the end of step stepName of a CAE model."""
+
+    model.keywordBlock.synchVersions(storeNodesAndElements=False)
+    inStep = False
+    for position, block in enumerate(model.keywordBlock.sieBlocks):
+        text = block.strip().upper()
+        # CAE writes *Step, name="Load Step": compare without the spaces and quotes on both sides
+        name = stepName.upper().replace(' ', '')
+        if text.startswith('*STEP') and ('NAME=%s,' % name in text.replace(' ', '').replace('"', '') + ','):
+            inStep = True
+        elif inStep and text.startswith('*END STEP'):
+            model.keywordBlock.insert(position - 1, keywords)
+            return
+    raise ValueError('Step %r not found in the keywords of the model' % (stepName, ))
+
+
+class PointResults(object):
+
+    # Integration point results of the last increment of a run: coordinates (P, 2), S11 and MISES (P, )
+
+    def __init__(self, path, coordinates, s11, mises):
+        self.path = path
+        self.coordinates = coordinates
+        self.s11 = s11
+        self.mises = mises
+
+
+def read_point_results(path):
+    """PointResults of the last increment in a .dat (printed tables) or ASCII .fil file."""
+
+    if path.lower().endswith('.fil'):
+        last = None
+        for last in fil_element_frames(path):
+            pass
+        if last is None or 'COORD' not in last.fields or 'S' not in last.fields:
+            raise ValueError('%s has no integration point COORD and S output' % path)
+        mises = last.fields.get('MISES')
+        return PointResults(path, last.fields['COORD'][:, :2], last.fields['S'][:, 0],
+                            np.full(len(last.elements), np.nan) if mises is None else mises)
+
+    tables = [table for table in read_dat_tables(path) if table.kind == 'ELEMENT' and 'S11' in table.columns
+              and 'COORD1' in table.columns]
+    if not tables:
+        raise ValueError('%s has no printed integration point table with COORD and S11' % path)
+    last = max((table.step, table.increment) for table in tables)
+    tables = [table for table in tables if (table.step, table.increment) == last]
+    values = dict((name, np.concatenate([table.column(name) for table in tables]))
+                  for name in ('COORD1', 'COORD2', 'S11'))
+    mises = (np.concatenate([table.column('MISES') for table in tables]) if all('MISES' in table.columns
+                                                                                 for table in tables)
+             else np.full(len(values['S11']), np.nan))
+    return PointResults(path, np.column_stack((values['COORD1'], values['COORD2'])), values['S11'], mises)
+
+
+def edge_layer(distances):
+    # The points nearest to an edge: within twice the smallest distance
+    return distances <= 2.0 * distances.min()
+
+
+def peak_values(results, geometry=PLATE):
+    """{'hole': (S11, MISES), 'plate': (S11, MISES)}: the largest absolute S11 and the largest Mises of each edge."""
+
+    x, y = results.coordinates.T
+    hole = edge_layer(np.abs(np.hypot(x, y) - geometry['r']))
+    plate = edge_layer(0.5 * geometry['D'] - np.abs(y))
+    peaks = {}
+    for name, selected in (('hole', hole), ('plate', plate)):
+        s11 = results.s11[selected]
+        peaks[name] = (float(s11[np.argmax(np.abs(s11))]), float(np.nanmax(results.mises[selected])))
+    return peaks
+
+
+def k_ratios(peaks, loading, geometry=PLATE):
+    """k ratios of Theory_code.py: peak S11 over the nominal stress of the loading ('tension' or 'bending')."""
+
+    g = geometry
+    if loading == 'tension':
+        return {'hole': abs(peaks['hole'][0]) / float(nominal_tension(g['t'], g['D'], g['r'], g['P']))}
+    if loading == 'bending':
+        return {'hole': abs(peaks['hole'][0]) / float(nominal_bending_hole(g['t'], g['D'], g['r'], g['M'])),
+                'plate': abs(peaks['plate'][0]) / float(nominal_bending_plate(g['t'], g['D'], g['r'], g['M']))}
+    raise ValueError("loading must be 'tension' or 'bending', not %r" % (loading, ))
+
+
+def result_paths(directory):
+    # Every .dat and .fil file below directory; a job with both is read from its .fil file
+    paths = {}
+    for folder, _, names in os.walk(directory):
+        for name in sorted(names):
+            stem, extension = os.path.splitext(name)
+            if extension.lower() in ('.dat', '.fil'):
+                key = os.path.join(folder, stem)
+                if extension.lower() == '.fil' or key not in paths:
+                    paths[key] = os.path.join(folder, name)
+    return [paths[key] for key in sorted(paths)]
+
+
+def batch_peaks(directory, loading=None, geometry=PLATE):
+    """One row per run below directory: (path, loading, peaks, k ratios); loading None decides per run."""
+
+    rows = []
+    for path in result_paths(directory):
+        try:
+            results = read_point_results(path)
+        except ValueError:
+            continue
+        runLoading = loading or ('bending' if results.coordinates[:, 1].min() < 0.0 else 'tension')
+        peaks = peak_values(results, geometry)
+        rows.append((path, runLoading, peaks, k_ratios(peaks, runLoading, geometry)))
+    return rows
+
+
+def main(arguments):
+    # python -m abaqus_tools.peak_stress <directory> [tension | bending]
+    if not arguments:
+        print('Usage: python -m abaqus_tools.peak_stress <directory> [tension | bending]')
+        return 2
+    rows = batch_peaks(arguments[0], arguments[1] if len(arguments) > 1 else None)
+    print('%-40s %-8s %12s %12s %12s %12s %8s %8s' % ('Run', 'Loading', 'S11 hole', 'Mises hole', 'S11 plate',
+                                                      'Mises plate', 'k hole', 'k plate'))
+    for path, loading, peaks, ratios in rows:
+        print('%-40s %-8s %12.4e %12.4e %12.4e %12.4e %8.4f %8s'
+              % (os.path.relpath(path, arguments[0]), loading, peaks['hole'][0], peaks['hole'][1], peaks['plate'][0],
+                 peaks['plate'][1], ratios['hole'], '%.4f' % ratios['plate'] if 'plate' in ratios else '-'))
+    return 0 if rows else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,272 @@
+# Linear elastic plane strain (CPE4 / CPE3) and plane stress (CPS4 / CPS3) solver, for screening without an Abaqus job
+
+# The elastic footing runs (Better_2D_pressure.py, Better_2D_displacement.py) only need U2 and S22 under the footing at
+# the screening stage. This module solves the same model in a few seconds:
+#
+#     from abaqus_tools.bearing_params import PRESSURE_2D
+#     from abaqus_tools.plane_strain import solve_bearing, footing_summary
+#     solution = solve_bearing(PRESSURE_2D)
+#     print(footing_summary(solution, PRESSURE_2D))
+#
+# The element stiffness matrices of all elements are computed at once (B matrices at all Gauss points, then one
+# einsum), assembled in COO format into a sparse matrix and the reduced system is solved with a sparse direct solver.
+# Full integration is used for CPE4 (2 x 2 points) and the constant strain triangle for CPE3; reduced integration
+# elements would need hourglass control and are not supported.
+#
+# ElasticSystem factorises the stiffness matrix once, so any number of load cases (for example the temperature frames
+# of thermal_coupling.py, given as thermal strains) cost one back substitution each.
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from abaqus_tools.profiling import timed
+from abaqus_tools.structured_mesh import bearing_mesh
+
+_G = 1.0 / np.sqrt(3.0)
+
+# Natural coordinates and weights of the integration points, shape functions and their derivatives
+
+ELEMENTS = {
+    'CPE4': dict(points=np.array([[-_G, -_G], [_G, -_G], [_G, _G], [-_G, _G]]), weights=np.ones(4),
+                 shape=lambda r, s: 0.25 * np.array([(1 - r) * (1 - s), (1 + r) * (1 - s), (1 + r) * (1 + s),
+                                                     (1 - r) * (1 + s)]),
+                 derivatives=lambda r, s: 0.25 * np.array([[-(1 - s), 1 - s, 1 + s, -(1 + s)],
+                                                           [-(1 - r), -(1 + r), 1 + r, 1 - r]])),
+    'CPE3': dict(points=np.array([[1.0 / 3.0, 1.0 / 3.0]]), weights=np.array([0.5]),
+                 shape=lambda r, s: np.array([1 - r - s, r, s]),
+                 derivatives=lambda r, s: np.array([[-1.0, 1.0, 0.0], [-1.0, 0.0, 1.0]])),
+}
+ELEMENTS['CPS4'] = ELEMENTS['CPE4']
+ELEMENTS['CPS3'] = ELEMENTS['CPE3']
+
+
+def elasticity_matrix(youngsModulus, poissonsRatio, planeStress=False):
+    # D for (e11, e22, g12)
+    E, nu = float(youngsModulus), float(poissonsRatio)
+    if planeStress:
+        return E / (1.0 - nu * nu) * np.array([[1.0, nu, 0.0], [nu, 1.0, 0.0], [0.0, 0.0, 0.5 * (1.0 - nu)]])
+    factor = E / ((1.0 + nu) * (1.0 - 2.0 * nu))
+    return factor * np.array([[1.0 - nu, nu, 0.0], [nu, 1.0 - nu, 0.0], [0.0, 0.0, 0.5 - nu]])
+
+
+def is_plane_stress(elemType):
+    return elemType.startswith('CPS')
+
+
+def _element(elemType):
+    if elemType not in ELEMENTS:
+        raise ValueError('Element type %r is not supported, use one of %s' % (elemType, ', '.join(sorted(ELEMENTS))))
+    return ELEMENTS[elemType]
+
+
+def shape_gradients(nodes, elements, element):
+    """Shape functions (G, n), x-y derivatives (E, G, 2, n), detJ (E, G) and point coordinates (E, G, 2)."""
+
+    coords = nodes[elements - 1]
+    shape = np.array([element['shape'](r, s) for r, s in element['points']])
+    derivatives = np.array([element['derivatives'](r, s) for r, s in element['points']])
+    jacobian = np.einsum('gan,enb->egab', derivatives, coords)
+    detJ = jacobian[..., 0, 0] * jacobian[..., 1, 1] - jacobian[..., 0, 1] * jacobian[..., 1, 0]
+    if (detJ <= 0.0).any():
+        bad = np.flatnonzero((detJ <= 0.0).any(axis=1)) + 1
+        raise ValueError('Elements %s are distorted or not numbered counter clockwise' % bad[:10].tolist())
+    inverse = np.stack((np.stack((jacobian[..., 1, 1], -jacobian[..., 0, 1]), axis=-1),
+                        np.stack((-jacobian[..., 1, 0], jacobian[..., 0, 0]), axis=-1)), axis=-2) / detJ[..., None, None]
+    dN = np.einsum('egab,gbn->egan', inverse, derivatives)
+    points = np.einsum('gn,enb->egb', shape, coords)
+    return shape, dN, detJ, points
+
+
+def b_matrices(nodes, elements, elemType):
+    """Strain-displacement matrices (E, G, 3, 2n), Jacobian determinants (E, G) and point coordinates (E, G, 2)."""
+
+    _, dN, detJ, points = shape_gradients(nodes, elements, _element(elemType))
+    numElements, numPoints, _, numNodes = dN.shape
+    B = np.zeros((numElements, numPoints, 3, 2 * numNodes))
+    B[:, :, 0, 0::2] = dN[:, :, 0]
+    B[:, :, 1, 1::2] = dN[:, :, 1]
+    B[:, :, 2, 0::2] = dN[:, :, 1]
+    B[:, :, 2, 1::2] = dN[:, :, 0]
+    return B, detJ, points
+
+
+def element_dofs(elements):
+    return np.stack((2 * (elements - 1), 2 * (elements - 1) + 1), axis=-1).reshape(len(elements), -1)
+
+
+def stiffness_matrix(nodes, elements, elemType, D, thickness):
+    # K = sum over elements and Gauss points of B^T D B detJ w t, assembled from COO triplets
+    B, detJ, _ = b_matrices(nodes, elements, elemType)
+    scale = detJ * _element(elemType)['weights'][None, :] * thickness
+    ke = np.einsum('egai,ab,egbj,eg->eij', B, D, B, scale, optimize=True)
+    return assemble_matrix(ke, element_dofs(elements), 2 * len(nodes))
+
+
+def assemble_matrix(ke, dofs, size):
+    # Sparse (size, size) matrix from element matrices ke (E, n, n) on the element dofs (E, n)
+    rows = np.repeat(dofs, dofs.shape[1], axis=1).ravel()
+    cols = np.tile(dofs, (1, dofs.shape[1])).ravel()
+    return scipy.sparse.coo_matrix((ke.ravel(), (rows, cols)), shape=(size, size)).tocsr()
+
+
+def pressure_loads(nodes, elements, faces, pressure, thickness, size):
+    # Equivalent nodal forces of a uniform pressure on element faces (face k runs from node k to node k + 1, a
+    # positive pressure pushes into the element as in Abaqus)
+    faces = np.asarray(faces, dtype=int)
+    corners = elements.shape[1]
+    first = elements[np.arange(len(elements)), faces] - 1
+    second = elements[np.arange(len(elements)), (faces + 1) % corners] - 1
+    edge = nodes[second] - nodes[first]
+    force = -0.5 * pressure * thickness * np.column_stack((edge[:, 1], -edge[:, 0]))
+    loads = np.zeros(size)
+    for n in (first, second):
+        np.add.at(loads, 2 * n, force[:, 0])
+        np.add.at(loads, 2 * n + 1, force[:, 1])
+    return loads
+
+
+class Solution(object):
+
+    # displacements: (N, 2) U1, U2 per node
+    # stresses: (E, G, 4) S11, S22, S33, S12 per integration point, points: (E, G, 2) their coordinates
+    # nodalForces: (N, 2) K u, i.e. the applied load or the reaction force at every node
+
+    def __init__(self, mesh, displacements, stresses, points, nodalForces):
+        self.mesh = mesh
+        self.displacements = displacements
+        self.stresses = stresses
+        self.points = points
+        self.nodalForces = nodalForces
+
+    def node_set_values(self, name, component=1):
+        labels = self.mesh.nodeSets[name]
+        return self.mesh.nodes[labels - 1], self.displacements[labels - 1, component]
+
+
+class ElasticSystem(object):
+
+    # The stiffness matrix of a mesh with its prescribed displacements, factorised once. fixed maps (node set name,
+    # dof 1 or 2) to a prescribed displacement; plane stress or strain follows from the element type.
+
+    def __init__(self, mesh, youngsModulus, poissonsRatio, thickness, fixed):
+        self.mesh = mesh
+        self.youngsModulus = float(youngsModulus)
+        self.poissonsRatio = float(poissonsRatio)
+        self.thickness = float(thickness)
+        self.planeStress = is_plane_stress(mesh.elemType)
+        self.D = elasticity_matrix(youngsModulus, poissonsRatio, self.planeStress)
+        self.size = 2 * mesh.numNodes
+        self.K = stiffness_matrix(mesh.nodes, mesh.elements, mesh.elemType, self.D, thickness)
+
+        prescribed = np.full(self.size, np.nan)
+        for (nset, dof), value in fixed.items():
+            prescribed[2 * (mesh.nodeSets[nset] - 1) + dof - 1] = value
+        self.known = ~np.isnan(prescribed)
+        if not self.known.any():
+            raise ValueError('The model has no boundary conditions')
+        self.prescribed = np.where(self.known, prescribed, 0.0)
+        self.free = np.flatnonzero(~self.known)
+        self.factor = scipy.sparse.linalg.splu(self.K[self.free][:, self.free].tocsc())
+        self.Kfc = self.K[self.free][:, self.known]
+
+        element = _element(mesh.elemType)
+        self.shape, _, detJ, self.points = shape_gradients(mesh.nodes, mesh.elements, element)
+        self.B, _, _ = b_matrices(mesh.nodes, mesh.elements, mesh.elemType)
+        self.volume = detJ * element['weights'][None, :] * self.thickness
+
+    def pressure_loads(self, pressures):
+        # pressures: list of (element set name, face index 0-3, pressure)
+        mesh = self.mesh
+        loads = np.zeros(self.size)
+        for elset, face, pressure in pressures:
+            selected = mesh.elements[mesh.elementSets[elset] - 1]
+            loads += pressure_loads(mesh.nodes, selected, np.full(len(selected), face), pressure, self.thickness,
+                                    self.size)
+        return loads
+
+    def point_values(self, nodalValues):
+        # Nodal values interpolated to the integration points, (E, G)
+        return np.einsum('gn,en->eg', self.shape, np.asarray(nodalValues)[self.mesh.elements - 1])
+
+    def _eigenstrain(self, thermalStrain):
+        # In-plane strain that causes no stress for a free expansion alpha dT (E, G); in plane strain the blocked
+        # out of plane expansion adds nu alpha dT
+        scale = 1.0 if self.planeStress else 1.0 + self.poissonsRatio
+        eigen = np.zeros(np.shape(thermalStrain) + (3, ))
+        eigen[..., 0] = eigen[..., 1] = scale * np.asarray(thermalStrain)
+        return eigen
+
+    def solve(self, loads=None, thermalStrain=None):
+        """Displacements and stresses for nodal loads (size 2N) and a thermal strain alpha dT per point (E, G)."""
+
+        mesh = self.mesh
+        loads = np.zeros(self.size) if loads is None else np.array(loads, dtype=float)
+        if thermalStrain is not None:
+            eigen = self._eigenstrain(thermalStrain)
+            forces = np.einsum('egai,ab,egb,eg->ei', self.B, self.D, eigen, self.volume, optimize=True)
+            np.add.at(loads, element_dofs(mesh.elements).ravel(), forces.ravel())
+        u = self.prescribed.copy()
+        u[self.free] = self.factor.solve(loads[self.free] - self.Kfc.dot(u[self.known]))
+
+        strain = np.einsum('egai,ei->ega', self.B, u[element_dofs(mesh.elements)])
+        if thermalStrain is not None:
+            strain = strain - eigen
+        inPlane = np.einsum('ab,egb->ega', self.D, strain)
+        if self.planeStress:
+            s33 = np.zeros(inPlane.shape[:2])
+        else:
+            s33 = self.poissonsRatio * (inPlane[..., 0] + inPlane[..., 1])
+            if thermalStrain is not None:
+                s33 = s33 - self.youngsModulus * np.asarray(thermalStrain)
+        stresses = np.stack((inPlane[..., 0], inPlane[..., 1], s33, inPlane[..., 2]), axis=-1)
+        return Solution(mesh, u.reshape(-1, 2), stresses, self.points, self.K.dot(u).reshape(-1, 2))
+
+
+@timed()
+def solve_plane_strain(mesh, youngsModulus, poissonsRatio, thickness, fixed, pressures=()):
+    """Solve a linear elastic problem (plane stress for CPS elements).
+
+    fixed maps (node set name, dof 1 or 2) to a prescribed displacement, pressures is a list of
+    (element set name, face index 0-3, pressure). Returns a Solution.
+    """
+
+    system = ElasticSystem(mesh, youngsModulus, poissonsRatio, thickness, fixed)
+    return system.solve(system.pressure_loads(pressures))
+
+
+def solve_bearing(params, mesh=None):
+    """Elastic solution of a footing model (the plasticity of PLASTIC_2D style parameters is ignored)."""
+
+    if params.loading not in ('pressure', 'displacement'):
+        raise ValueError("loading must be 'pressure' or 'displacement', not %r" % (params.loading, ))
+    if mesh is None:
+        mesh = bearing_mesh(params)
+    fixed = {('LEFT', 1): 0.0, ('RIGHT', 2): 0.0, ('BOTTOM', 2): 0.0}
+    if params.pinnedBase:
+        fixed[('RIGHT', 1)] = 0.0
+        fixed[('BOTTOM', 1)] = 0.0
+    pressures = []
+    if params.loading == 'pressure':
+        pressures.extend((elset, int(face[1:]) - 1, params.pressure) for elset, face in mesh.surfaces['FOOTING'])
+    else:
+        fixed[('FOOTING', 2)] = params.settlement
+    return solve_plane_strain(mesh, params.youngsModulus, params.poissonsRatio, params.thickness, fixed, pressures)
+
+
+def footing_summary(solution, params):
+    # The screening quantities: U2 at the centre line and under the footing edge, the mean U2 of the footing nodes,
+    # the total vertical footing force (over the whole section thickness, as the nodal forces are, like RF2 of Abaqus)
+    # and S22 on the centre line just below it
+    coordinates, u2 = solution.node_set_values('FOOTING')
+    x = coordinates[:, 0]
+    centreLine = np.abs(solution.points[..., 0] - solution.points[..., 0].min()) < 1e-9
+    depth = params.height - solution.points[..., 1]
+    below = np.where(centreLine, depth, np.inf)
+    nearest = np.unravel_index(np.argmin(below), below.shape)
+    footingNodes = solution.mesh.nodeSets['FOOTING'] - 1
+    return {'U2 centre': float(u2[np.argmin(x)]),
+            'U2 footing edge': float(u2[np.argmax(x)]),
+            'U2 mean': float(u2.mean()),
+            'footing force': float(solution.nodalForces[footingNodes, 1].sum()),
+            'S22 below centre': float(solution.stresses[nearest][1])}
@@ -0,0 +1,185 @@
+# Base model of the plate with a hole of FEM5_1.1.py, and the changes that make its variants
+
+# build_plate_model() builds the quarter plate of FEM_Coursework/FEM5_1.1.py (sketch, partitions, material, section,
+# symmetry BCs, pressure on the right edge, mesh and scf output) as a named model without a job, so it can be the base
+# of a ModelBatch (abaqus_tools/model_batch.py):
+#
+#     from abaqus_tools.model_batch import ModelBatch
+#     from abaqus_tools.plate_model import PLATE_CHANGES, PLATE_WITH_HOLE, build_plate_model, mesh_plate
+#     batch = ModelBatch(build_plate_model('PlateBase'), PLATE_CHANGES, remesh=mesh_plate, baseValues=PLATE_WITH_HOLE)
+#     batch.add('plate_fine_cps8', refinement=2.0, elemCode='CPS8')
+#
+# The geometry (0.12 x 0.05 quarter plate, hole radius 0.01) is that of the coursework and is not a parameter.
+
+from abaqus import *
+from abaqusConstants import *
+import regionToolset
+import mesh
+
+from abaqus_tools.model_batch import Change
+from abaqus_tools.output_profiles import apply_profile, edge_element_set
+from abaqus_tools.peak_stress import request_printed_results
+from abaqus_tools.profiling import mark, timed
+
+# FEM5_1.1.py: steel plate, 0.01 thick, pulled by 1.6e8 Pa on its right edge, CPS4 elements at the coursework seeds
+
+PLATE_WITH_HOLE = dict(pressure=1.6e8, youngsModulus=1.9e11, poissonsRatio=0.31, thickness=0.01, elemCode='CPS4',
+                       refinement=1.0)
+
+# Points on the edges and faces of the partitioned plate
+
+LOAD_POINTS = ((0.12, 0.04, 0.0), (0.12, 0.015, 0.0))
+HOLE_POINTS = ((0.00001, 0.009999, 0.0), (0.009999, 0.00001, 0.0))
+QUAD_POINTS = ((0.005, 0.015, 0.0), (0.015, 0.005, 0.0), (0.015, 0.04, 0.0), (0.05, 0.02, 0.0), (0.05, 0.04, 0.0))
+TRI_POINT = (0.0, 0.0225, 0.0)
+
+
+@timed()
+def build_plate_model(name='PlateBase', **values):
+    """Build the plate with a hole of FEM5_1.1.py as mdb.models[name]; values override PLATE_WITH_HOLE.
+
+    Any model of that name is replaced. No job is created. The model is returned.
+    """
+
+    unknown = sorted(key for key in values if key not in PLATE_WITH_HOLE)
+    if unknown:
+        raise ValueError('Unknown plate parameters %s' % ', '.join(unknown))
+    values = dict(PLATE_WITH_HOLE, **values)
+    if name in mdb.models.keys():
+        del mdb.models[name]
+    holeModel = mdb.Model(name=name)
+
+    # Part creation
+
+    mark('sketch')
+    holeSketch = holeModel.ConstrainedSketch(name='Plate Sketch', sheetSize=25.0)
+    holeSketch.Line(point1=(0.01, 0.0), point2=(0.12, 0.0))
+    holeSketch.Line(point1=(0.12, 0.0), point2=(0.12, 0.05))
+    holeSketch.Line(point1=(0.12, 0.05), point2=(0.0, 0.05))
+    holeSketch.Line(point1=(0.0, 0.05), point2=(0.0, 0.01))
+    holeSketch.ArcByCenterEnds(center=(0.0, 0.0), point1=(0.0, 0.01), point2=(0.01, 0.0), direction=CLOCKWISE)
+
+    holePart = holeModel.Part(name='Holepart', dimensionality=TWO_D_PLANAR, type=DEFORMABLE_BODY)
+    holePart.BaseShell(sketch=holeSketch)
+
+    # Material, section and assembly
+
+    mark('material and section')
+    holeMaterial = holeModel.Material(name='Steel')
+    holeMaterial.Elastic(table=((values['youngsModulus'], values['poissonsRatio']), ))
+    holeModel.HomogeneousSolidSection(name='Plate Section', material='Steel', thickness=values['thickness'])
+    face_on_plate = holePart.faces.findAt(((0.055, 0.025, 0.0),))
+    holePart.SectionAssignment(region=(face_on_plate,), sectionName='Plate Section')
+
+    holeAssembly = holeModel.rootAssembly
+    holeInstance = holeAssembly.Instance(name='Plate Instance', part=holePart, dependent=ON)
+
+    # Partitions: a square around the hole with its diagonal, and two lines through the plate
+
+    mark('partition')
+    holeSketch.Line(point1=(0.0, 0.02), point2=(0.02, 0.02))
+    holeSketch.Line(point1=(0.02, 0.02), point2=(0.02, 0.0))
+    holeSketch.Line(point1=(0.004, 0.004), point2=(0.02, 0.02))
+    holeSketch.Line(point1=(0.0, 0.025), point2=(0.12, 0.025))
+    holeSketch.Line(point1=(0.025, 0.0), point2=(0.025, 0.5))
+    holePart.PartitionFaceBySketch(faces=face_on_plate, sketch=holeSketch)
+    holeAssembly.regenerate()
+
+    # Step, symmetry BCs on the left and bottom edges and the pressure on the right edge
+
+    mark('step and loads')
+    holeModel.StaticStep(name='Load Step', previous='Initial', description='Loads is applied now')
+    for i, y in enumerate((0.015, 0.021, 0.04)):
+        edges = holeInstance.edges.findAt(((0.0, y, 0.0),))
+        holeModel.XsymmBC(name='Left Edge X_Symmetry%d' % (i + 1), createStepName='Initial',
+                          region=regionToolset.Region(edges=edges), localCsys=None)
+    for i, x in enumerate((0.015, 0.021, 0.04)):
+        edges = holeInstance.edges.findAt(((x, 0.0, 0.0),))
+        holeModel.YsymmBC(name='Bottom Edge Y_Symmetry%d' % (i + 1), createStepName='Initial',
+                          region=regionToolset.Region(edges=edges), localCsys=None)
+    for i, point in enumerate(LOAD_POINTS):
+        edges = holeInstance.edges.findAt((point,))
+        holeModel.Pressure(name='Load-%d' % (i + 1), createStepName='Load Step',
+                           region=regionToolset.Region(side1Edges=edges), distributionType=UNIFORM, field='',
+                           magnitude=-values['pressure'], amplitude=UNSET)
+
+    # Mesh controls: structured quads except in the triangle left of the hole square
+
+    mark('seeding')
+    holePart.setMeshControls(regions=holePart.faces.findAt(*[(point, ) for point in QUAD_POINTS]), elemShape=QUAD,
+                             technique=STRUCTURED)
+    holePart.setMeshControls(regions=holePart.faces.findAt((TRI_POINT, )), elemShape=TRI, technique=FREE)
+    mark(None)
+    mesh_plate(holeModel, refinement=values['refinement'], elemCode=values['elemCode'])
+
+    # Output: S on the hole edge (scf profile) and the printed integration point stresses for peak_stress.py
+
+    apply_profile(holeModel, 'Load Step', 'scf')
+    request_printed_results(holeModel, 'Load Step')
+    return holeModel
+
+
+@timed('mesh')
+def mesh_plate(holeModel, refinement=1.0, elemCode='CPS4'):
+    """Seed the plate refinement times finer than FEM5_1.1.py, set the element type, mesh it and set HOLE_EDGE.
+
+    This is the remesh function of PLATE_CHANGES: it works on a copy of the base model as well as on the base. What
+    is not given is that of PLATE_WITH_HOLE, not of the base model.
+    """
+
+    holePart = holeModel.parts['Holepart']
+    holeAssembly = holeModel.rootAssembly
+    holeInstance = holeAssembly.instances['Plate Instance']
+    holePart.deleteMesh()
+
+    faces = holePart.faces.findAt(*[(point, ) for point in QUAD_POINTS + (TRI_POINT, )])
+    quadType = mesh.ElemType(elemCode=SymbolicConstant(elemCode), elemLibrary=STANDARD)
+    triType = mesh.ElemType(elemCode=SymbolicConstant(_tri_code(elemCode)), elemLibrary=STANDARD)
+    holePart.setElementType(regions=(faces, ), elemTypes=(quadType, triType))
+
+    number = max(1, int(round(40 * refinement)))
+    holeEdges = [holeInstance.edges.findAt((point, )) for point in HOLE_POINTS]
+    for edges in holeEdges:
+        holePart.seedEdgeByNumber(edges=edges, number=number, constraint=FINER)
+    for key, point in (('end2Edges', (0.0, 0.015, 0.0)), ('end2Edges', (0.015, 0.015, 0.0)),
+                       ('end1Edges', (0.015, 0.0, 0.0))):
+        holePart.seedEdgeByBias(biasMethod=SINGLE, ratio=5.0, number=number, constraint=FINER,
+                                **{key: holeInstance.edges.findAt((point, ))})
+    holePart.seedPart(size=0.0015 / refinement, deviationFactor=0.1)
+    holePart.generateMesh()
+
+    edge_element_set(holeAssembly, 'HOLE_EDGE', holeInstance, *holeEdges)
+
+
+def _tri_code(elemCode):
+    # Triangle of the free meshed face for a quad code: CPS4 -> CPS3, CPE8R -> CPE6, CPS4I -> CPS3
+    return elemCode.rstrip('RI').replace('4', '3').replace('8', '6')
+
+
+def _set_pressure(holeModel, pressure):
+    for i in range(len(LOAD_POINTS)):
+        holeModel.loads['Load-%d' % (i + 1)].setValues(magnitude=-pressure)
+
+
+def _elastic_column(column):
+    # Change one column (0 Young's modulus, 1 Poisson's ratio) of the elastic table and keep the other
+    def change(holeModel, value):
+        elastic = holeModel.materials['Steel'].elastic
+        row = list(elastic.table[0])
+        row[column] = value
+        elastic.setValues(table=(tuple(row), ))
+    return change
+
+
+def _set_thickness(holeModel, thickness):
+    holeModel.sections['Plate Section'].setValues(thickness=thickness)
+
+
+# Parameters of the plate variants; elemCode and refinement mesh the copy again with mesh_plate()
+
+PLATE_CHANGES = dict(pressure=Change(_set_pressure),
+                     youngsModulus=Change(_elastic_column(0)),
+                     poissonsRatio=Change(_elastic_column(1)),
+                     thickness=Change(_set_thickness),
+                     elemCode=Change(remesh=True),
+                     refinement=Change(remesh=True))
@@ -0,0 +1,202 @@
+# Predicate based selection of vertices, edges, faces and cells
+
+# Masks such as getSequenceFromMask(mask=('[#1ff ]',)) only hold as long as the partitions do not change. Here the
+# entities are selected by where they are instead:
+#
+#     from abaqus_tools.predicates import EntitySelector, X, Y, R, on_arc, inside_box, where
+#
+#     selector = EntitySelector(holeInstance)
+#     holeEdges = selector.sequence('edges', on_arc(0.01))
+#     region = selector.region(faces=R <= 0.01)
+#     leftEdges = selector.sequence('edges', where('x == 0 and y > 0.01'))
+#
+# Every entity is represented by a few sample points (its vertices and pointOn). A predicate is evaluated on the
+# sample points of all entities of one type in one NumPy pass, and an entity is selected when all of its sample points
+# satisfy it. The result is turned into one getSequenceFromMask() call with a mask built by masks.encode_mask().
+
+import re
+
+import numpy as np
+
+from abaqus_tools.masks import encode_mask
+
+TOLERANCE = 1e-6
+
+KINDS = ('vertices', 'edges', 'faces', 'cells')
+
+
+class Predicate(object):
+
+    def __init__(self, function, text):
+        self.function = function
+        self.text = text
+
+    def __call__(self, xyz):
+        return np.asarray(self.function(np.asarray(xyz, dtype=float)), dtype=bool)
+
+    def __and__(self, other):
+        return Predicate(lambda xyz: self(xyz) & other(xyz), '(%s and %s)' % (self.text, other.text))
+
+    def __or__(self, other):
+        return Predicate(lambda xyz: self(xyz) | other(xyz), '(%s or %s)' % (self.text, other.text))
+
+    def __invert__(self):
+        return Predicate(lambda xyz: ~self(xyz), 'not %s' % self.text)
+
+    def __repr__(self):
+        return 'Predicate(%s)' % self.text
+
+
+class Coordinate(object):
+
+    # A coordinate of the sample points (x, y, z or r, the distance from the z axis). Comparing it with a number gives
+    # a Predicate, '==' is met within the tolerance.
+
+    def __init__(self, name, function, tolerance=TOLERANCE):
+        self.name = name
+        self.function = function
+        self.tolerance = tolerance
+
+    def _compare(self, operator, value, test):
+        return Predicate(lambda xyz: test(self.function(xyz)), '%s %s %r' % (self.name, operator, value))
+
+    def __eq__(self, value):
+        return self._compare('==', value, lambda c: np.abs(c - value) <= self.tolerance)
+
+    def __ne__(self, value):
+        return self._compare('!=', value, lambda c: np.abs(c - value) > self.tolerance)
+
+    def __lt__(self, value):
+        return self._compare('<', value, lambda c: c < value - self.tolerance)
+
+    def __le__(self, value):
+        return self._compare('<=', value, lambda c: c <= value + self.tolerance)
+
+    def __gt__(self, value):
+        return self._compare('>', value, lambda c: c > value + self.tolerance)
+
+    def __ge__(self, value):
+        return self._compare('>=', value, lambda c: c >= value - self.tolerance)
+
+    __hash__ = None
+
+
+X = Coordinate('x', lambda xyz: xyz[:, 0])
+Y = Coordinate('y', lambda xyz: xyz[:, 1])
+Z = Coordinate('z', lambda xyz: xyz[:, 2])
+R = Coordinate('r', lambda xyz: np.hypot(xyz[:, 0], xyz[:, 1]))
+
+
+def on_arc(radius, centre=(0.0, 0.0), tolerance=TOLERANCE):
+    """Points at distance radius from centre in the x-y plane (arcs, holes, cylinder faces)."""
+
+    cx, cy = centre[0], centre[1]
+    return Predicate(lambda xyz: np.abs(np.hypot(xyz[:, 0] - cx, xyz[:, 1] - cy) - radius) <= tolerance,
+                     'on arc r = %r about (%r, %r)' % (radius, cx, cy))
+
+
+def inside_circle(radius, centre=(0.0, 0.0), tolerance=TOLERANCE):
+    cx, cy = centre[0], centre[1]
+    return Predicate(lambda xyz: np.hypot(xyz[:, 0] - cx, xyz[:, 1] - cy) <= radius + tolerance,
+                     'inside circle r = %r about (%r, %r)' % (radius, cx, cy))
+
+
+def inside_box(lower, upper, tolerance=TOLERANCE):
+    """Points inside the box lower <= (x, y[, z]) <= upper."""
+
+    n = len(lower)
+    lo = np.asarray(lower, dtype=float) - tolerance
+    hi = np.asarray(upper, dtype=float) + tolerance
+    return Predicate(lambda xyz: ((xyz[:, :n] >= lo) & (xyz[:, :n] <= hi)).all(axis=1),
+                     'inside box %r to %r' % (tuple(lower), tuple(upper)))
+
+
+def everything():
+    return Predicate(lambda xyz: np.ones(len(xyz), dtype=bool), 'everything')
+
+
+_NAMES = dict(x=X, y=Y, z=Z, r=R, on_arc=on_arc, inside_circle=inside_circle, inside_box=inside_box)
+
+
+def where(text):
+    """Predicate from a short text such as 'x == 0', 'r <= 0.01 and y > 0' or 'on_arc(0.01) or x == 0.12'.
+
+    Clauses are joined with 'and' / 'or' ('and' binds first), each clause is a comparison of x, y, z or r with a number
+    or a call of on_arc(), inside_circle() or inside_box().
+    """
+
+    alternatives = []
+    for alternative in re.split(r'\s+or\s+', text.strip()):
+        clauses = [eval(clause, {'__builtins__': {}}, _NAMES) for clause in re.split(r'\s+and\s+', alternative)]
+        for clause in clauses:
+            if not isinstance(clause, Predicate):
+                raise ValueError('%r is not a predicate' % (text, ))
+        combined = clauses[0]
+        for clause in clauses[1:]:
+            combined = combined & clause
+        alternatives.append(combined)
+    predicate = alternatives[0]
+    for alternative in alternatives[1:]:
+        predicate = predicate | alternative
+    predicate.text = text
+    return predicate
+
+
+class EntitySelector(object):
+
+    def __init__(self, part):
+        # part is a Part, a PartInstance or a stand-in with the same entity arrays
+        self.part = part
+        self.vertexXYZ = _xyz([v.pointOn[0] for v in part.vertices])
+        self.samples = {}
+        self.starts = {}
+        for kind in KINDS:
+            entities = getattr(part, kind, None)
+            if entities is None or not len(entities):
+                continue
+            points = []
+            starts = []
+            for entity in entities:
+                starts.append(len(points))
+                if kind != 'vertices':
+                    points.extend(self.vertexXYZ[i] for i in entity.getVertices())
+                points.append(_xyz(entity.pointOn)[0])
+            self.samples[kind] = np.array(points, dtype=float)
+            self.starts[kind] = np.array(starts, dtype=int)
+
+    def indices(self, kind, predicate):
+        """Indices of all entities of one kind whose sample points all satisfy the predicate."""
+
+        if isinstance(predicate, str):
+            predicate = where(predicate)
+        if kind not in self.samples:
+            return []
+        hit = predicate(self.samples[kind])
+        return np.flatnonzero(np.logical_and.reduceat(hit, self.starts[kind])).tolist()
+
+    def sequence(self, kind, predicate, target=None):
+        ids = self.indices(kind, predicate)
+        if not ids:
+            text = predicate if isinstance(predicate, str) else predicate.text
+            raise ValueError('No %s where %s' % (kind, text))
+        return getattr(target or self.part, kind).getSequenceFromMask(mask=(encode_mask(ids), ))
+
+    def region(self, target=None, **predicates):
+        """regionToolset.Region from predicates keyed by Region() argument, e.g. region(faces=..., side1Edges=...)."""
+
+        import regionToolset
+
+        arguments = {}
+        for argument, predicate in predicates.items():
+            kind = [k for k in KINDS if argument.lower().endswith(k)]
+            if not kind:
+                raise ValueError('Cannot tell the entity type of Region argument %r' % (argument, ))
+            arguments[argument] = self.sequence(kind[0], predicate, target)
+        return regionToolset.Region(**arguments)
+
+
+def _xyz(points):
+    points = np.asarray(points, dtype=float).reshape(len(points), -1)
+    if points.shape[1] < 3:
+        points = np.hstack((points, np.zeros((len(points), 3 - points.shape[1]))))
+    return points[:, :3]
@@ -0,0 +1,307 @@
+# Wall clock, CPU and memory of the build stages of a model, saved per run and added up over sweeps
+
+# Whether the turnaround of a model goes to sketching, PartitionFaceBySketch, findAt lookups, generateMesh(), writing
+# the deck or the solver cannot be told from the total. Every stage is timed here, as a context manager, a decorator
+# or, in the flat scripts, by marking where the next stage begins:
+#
+#     from abaqus_tools.profiling import mark, record_mesh, save_profile, stage, timed
+#     with stage('partition'):
+#         bearingPart.PartitionFaceBySketch(faces=face_on_soil, sketch=bearingSketch)
+#
+#     @timed('mesh')
+#     def mesh_part(part): ...
+#
+#     mark('mesh')                          # ends the stage marked before (at this level) and starts 'mesh'
+#     bearingPart.generateMesh()
+#     record_mesh('bearingPart', bearingPart)
+#     mark(None)
+#     save_profile('bearingJob2D')          # bearingJob2D.profile.json and bearingJob2D.trace.json
+#
+# Stages nest: a stage (or mark) opened inside another is its child, and its time is part of the wall time of the
+# parent but not of the parent's self time. A stage records the wall time, the CPU time of this process and of the
+# processes it waited for (the solver under waitForCompletion() on Linux), and the resident memory before and after
+# with the peak so far. The .trace.json file opens in chrome://tracing or Perfetto; the .profile.json files of a
+# sweep are added up stage by stage with
+#
+#     python -m abaqus_tools.profiling report 'runs/*.profile.json'
+
+import contextlib
+import functools
+import glob
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROFILE_SUFFIX = '.profile.json'
+TRACE_SUFFIX = '.trace.json'
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def memory_usage():
+    """(resident, peak) memory of this process in bytes, None for what the platform does not report."""
+
+    resident = peak = None
+    if psutil is not None:
+        resident = psutil.Process(os.getpid()).memory_info().rss
+    elif os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as source:
+            resident = int(source.read().split()[1]) * _PAGE_SIZE
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return resident, peak
+
+
+def _cpu_times():
+    # (CPU seconds of this process, CPU seconds of its finished child processes)
+    times = os.times()
+    return times[0] + times[1], times[2] + times[3]
+
+
+def mesh_counts(source):
+    """(nodes, elements) of a StructuredMesh, a meshed CAE part or instance, or anything with those sequences."""
+
+    if hasattr(source, 'numNodes'):
+        return int(source.numNodes), int(source.numElements)
+    return len(source.nodes), len(source.elements)
+
+
+class Profiler(object):
+
+    # The stages of one run, in the order they started. Each stage is a dict with its name, depth, parent (index in
+    # stages, None at the top), start (seconds after the profiler was created), wall, self wall, cpu, childCpu,
+    # memory before / after, peak memory and the counts recorded while it was open.
+
+    def __init__(self, name='run'):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        """Forget every stage and count and start the clock again."""
+
+        self.origin = time.time()
+        self.stages = []
+        self.counts = {}
+        self._open = []
+
+    def begin(self, name, marked=False):
+        """Start a stage inside the innermost open one; returns its record. end() must follow."""
+
+        cpu, childCpu = _cpu_times()
+        resident, peak = memory_usage()
+        record = dict(name=name, depth=len(self._open), parent=self._open[-1]['index'] if self._open else None,
+                      index=len(self.stages), start=time.time() - self.origin, wall=None, selfWall=None, cpu=cpu,
+                      childCpu=childCpu, memoryBefore=resident, memoryAfter=None, peakMemory=peak, counts={},
+                      marked=marked, childWall=0.0)
+        self.stages.append(record)
+        self._open.append(record)
+        return record
+
+    def end(self, record):
+        """End a stage, and any stage still open inside it."""
+
+        if record not in self._open:
+            raise ValueError('Stage %r is not open' % record['name'])
+        while self._open:
+            current = self._open.pop()
+            cpu, childCpu = _cpu_times()
+            resident, peak = memory_usage()
+            current['wall'] = time.time() - self.origin - current['start']
+            current['selfWall'] = current['wall'] - current.pop('childWall')
+            current['cpu'] = cpu - current['cpu']
+            current['childCpu'] = childCpu - current['childCpu']
+            current['memoryAfter'] = resident
+            current['peakMemory'] = peak
+            if self._open:
+                self._open[-1]['childWall'] += current['wall']
+            if current is record:
+                break
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Context manager timing the block inside it as stage name."""
+
+        record = self.begin(name)
+        try:
+            yield record
+        finally:
+            self.end(record)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function as stage name (the function name by default)."""
+
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or function.__name__):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def mark(self, name):
+        """End the stage marked last at this level and start stage name (None only ends it)."""
+
+        if self._open and self._open[-1]['marked']:
+            self.end(self._open[-1])
+        if name is not None:
+            self.begin(name, marked=True)
+
+    def count(self, name, **values):
+        """Record counts (nodes=..., elements=...) under name, and on the innermost open stage."""
+
+        self.counts.setdefault(name, {}).update(values)
+        if self._open:
+            self._open[-1]['counts'].setdefault(name, {}).update(values)
+
+    def record_mesh(self, name, source):
+        """Record the node and element counts of a mesh (see mesh_counts()) under name."""
+
+        nodes, elements = mesh_counts(source)
+        self.count(name, nodes=nodes, elements=elements)
+        return nodes, elements
+
+    def as_dict(self):
+        finished = [dict((key, value) for key, value in record.items() if key not in ('marked', 'childWall'))
+                    for record in self.stages if record['wall'] is not None]
+        return dict(name=self.name, created=self.origin, pid=os.getpid(), stages=finished, counts=self.counts)
+
+    def trace(self):
+        """The stages as Chrome trace events (complete events and a memory counter)."""
+
+        pid = os.getpid()
+        events = [dict(name='process_name', ph='M', pid=pid, tid=0, args=dict(name=self.name))]
+        for record in self.as_dict()['stages']:
+            start = int(record['start'] * 1e6)
+            args = dict(cpu=record['cpu'], childCpu=record['childCpu'], selfWall=record['selfWall'])
+            for name, values in record['counts'].items():
+                for key, value in values.items():
+                    args['%s %s' % (name, key)] = value
+            events.append(dict(name=record['name'], ph='X', ts=start, dur=int(record['wall'] * 1e6), pid=pid, tid=0,
+                               args=args))
+            if record['memoryAfter'] is not None:
+                events.append(dict(name='memory', ph='C', ts=start + int(record['wall'] * 1e6), pid=pid, tid=0,
+                                   args=dict(residentMB=record['memoryAfter'] / 2.0 ** 20)))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def save(self, stem):
+        """Write <stem>.profile.json and <stem>.trace.json; ends any stage still open. Returns both paths."""
+
+        if self._open:
+            self.end(self._open[0])
+        paths = (stem + PROFILE_SUFFIX, stem + TRACE_SUFFIX)
+        with open(paths[0], 'w') as target:
+            json.dump(self.as_dict(), target, indent=1)
+        with open(paths[1], 'w') as target:
+            json.dump(self.trace(), target)
+        return paths
+
+    def summary(self):
+        return format_totals(stage_totals([self.as_dict()]))
+
+
+# The profiler of the session, used by the module level functions
+
+PROFILER = Profiler(os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'run')
+
+
+def stage(name):
+    return PROFILER.stage(name)
+
+
+def timed(name=None):
+    return PROFILER.timed(name)
+
+
+def mark(name):
+    PROFILER.mark(name)
+
+
+def record_mesh(name, source):
+    return PROFILER.record_mesh(name, source)
+
+
+def save_profile(stem):
+    """Save the session profiler (see Profiler.save()) and reset it for what follows."""
+
+    paths = PROFILER.save(stem)
+    PROFILER.reset()
+    return paths
+
+
+def stage_totals(profiles):
+    """Per stage name: runs it appears in, calls, wall, self wall, CPU and child CPU totals, longest call, peak memory."""
+
+    totals = {}
+    for profile in profiles:
+        seen = set()
+        for record in profile['stages']:
+            total = totals.setdefault(record['name'], dict(runs=0, calls=0, wall=0.0, selfWall=0.0, cpu=0.0,
+                                                           childCpu=0.0, longest=0.0, peakMemory=None))
+            if record['name'] not in seen:
+                seen.add(record['name'])
+                total['runs'] += 1
+            total['calls'] += 1
+            for key in ('wall', 'selfWall', 'cpu', 'childCpu'):
+                total[key] += record[key]
+            total['longest'] = max(total['longest'], record['wall'])
+            if record['peakMemory'] is not None:
+                total['peakMemory'] = max(total['peakMemory'] or 0, record['peakMemory'])
+    return totals
+
+
+def format_totals(totals):
+    # Table of stage_totals(), the largest self time first, with each stage's share of all self time
+    allSelf = sum(total['selfWall'] for total in totals.values()) or 1.0
+    lines = ['%-32s %5s %6s %10s %10s %6s %10s %10s %9s' % ('Stage', 'Runs', 'Calls', 'Wall (s)', 'Self (s)', 'Self%',
+                                                           'CPU (s)', 'Child (s)', 'Peak MB')]
+    for name, total in sorted(totals.items(), key=lambda item: -item[1]['selfWall']):
+        lines.append('%-32s %5d %6d %10.3f %10.3f %5.1f%% %10.3f %10.3f %9s'
+                     % (name[:32], total['runs'], total['calls'], total['wall'], total['selfWall'],
+                        100.0 * total['selfWall'] / allSelf, total['cpu'], total['childCpu'],
+                        '-' if total['peakMemory'] is None else '%.0f' % (total['peakMemory'] / 2.0 ** 20)))
+    return '\n'.join(lines)
+
+
+def load_profiles(patterns):
+    """The .profile.json files matching the paths or patterns, read."""
+
+    profiles = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path) as source:
+                profiles.append(json.load(source))
+    return profiles
+
+
+def main(arguments):
+    # python -m abaqus_tools.profiling report <profile or pattern> ...
+    if len(arguments) < 2 or arguments[0] != 'report':
+        print('Usage: python -m abaqus_tools.profiling report <profile or pattern> ...')
+        return 2
+    profiles = load_profiles(arguments[1:])
+    print('%d runs' % len(profiles))
+    print(format_totals(stage_totals(profiles)))
+    counts = {}
+    for profile in profiles:
+        for name, values in profile['counts'].items():
+            for key, value in values.items():
+                counts.setdefault((name, key), []).append(value)
+    for (name, key), values in sorted(counts.items()):
+        print('%s %s: %d to %d (mean %.0f)' % (name, key, min(values), max(values), float(sum(values)) / len(values)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,485 @@
+# Cutback and restart orchestration of the nonlinear footing step, with a history of the settings that converged
+
+# The increment settings of Plastic_2D_disp.py (timePeriod=1000, initialInc=100, minInc=1e-8, maxInc=100) were found
+# by trial and error, and a run that does not converge is simply lost. RestartOrchestrator runs the deck of a
+# BearingParams model with restart data written at every increment, watches its .sta and .msg files and, when the run
+# aborts or stalls, resubmits it from the last converged increment with the next settings of the cutback ladder:
+#
+#     from abaqus_tools.bearing_params import PLASTIC_2D
+#     from abaqus_tools.restart_orchestrator import RestartOrchestrator
+#     run = RestartOrchestrator('runs').run(PLASTIC_2D)
+#     print(run.summary())
+#
+# or from the shell: python -m abaqus_tools.restart_orchestrator run runs PLASTIC_2D
+#
+# A restart job is 'abaqus job=<name>_r<n> oldjob=<previous job>' on a deck that ends the old step at the restart
+# increment (*RESTART, READ, END STEP) and applies the same load over the rest of the step time. The ladder
+# (CUTBACK_LADDER) first cuts the initial and maximum increments by 10, then adds automatic stabilization with a
+# growing dissipated energy fraction and more cutbacks per increment.
+#
+# Every run is recorded in an IncrementHistory (a JSON file, HISTORY_FILE by default): the parameters of the model and
+# the settings of every attempt with its outcome. The first attempt of a later run uses the settings that converged
+# for the most similar model in the history (same loading and material model, material, load and geometry within
+# SIMILARITY), scaled to its step time; seed_settings() gives them to the CAE scripts as well.
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from abaqus_tools.inp_writer import write_bearing_deck, write_step
+from abaqus_tools.job_farm import ABAQUS_COMMAND, ABORTED, COMPLETED
+
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.abaqus_increment_history.json')
+RESTART_ARGUMENT = 'oldjob={oldjob}'
+
+STALLED = 'STALLED'
+
+# Each rung changes the settings of the failed attempt: scale multiplies the initial and maximum increments (and the
+# minimum by its square), stabilize and attempts replace the stabilization fraction and the cutbacks per increment
+
+CUTBACK_LADDER = (
+    dict(scale=0.1),
+    dict(stabilize=2e-4),
+    dict(stabilize=2e-3, attempts=10),
+    dict(scale=0.1, stabilize=2e-2, attempts=10),
+)
+
+# Largest mean relative difference of the material, load and geometry of two models whose settings are shared
+
+SIMILARITY = 0.25
+
+_CATEGORIES = ('loading', 'plastic', 'elemCode', 'pinnedBase')
+_MEASURES = ('youngsModulus', 'poissonsRatio', 'frictionAngle', 'dilationAngle', 'cohesion', 'load', 'footingWidth',
+             'width', 'height')
+
+_STA_ROW = re.compile(r'^\s*(\d+)\s+(\d+)\s+(\d+)(U?)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+)')
+_STA_END = ('THE ANALYSIS HAS COMPLETED SUCCESSFULLY', 'THE ANALYSIS HAS NOT BEEN COMPLETED')
+
+# Messages of the .msg file that name why an increment could not be completed
+
+FAILURE_MESSAGES = (
+    ('TIME INCREMENT REQUIRED IS LESS THAN THE MINIMUM', 'minimum increment'),
+    ('TOO MANY ATTEMPTS MADE FOR THIS INCREMENT', 'too many attempts'),
+    ('EXCESSIVELY DISTORTED', 'excessive distortion'),
+    ('ZERO PIVOT', 'zero pivot'),
+)
+
+
+class IncrementSettings(object):
+
+    # Time incrementation of the static step: initial, minimum and maximum increment, the dissipated energy fraction
+    # of automatic stabilization (None for none) and the cutbacks allowed per increment (None for the default)
+
+    def __init__(self, initialInc, minInc, maxInc, stabilize=None, attempts=None):
+        if not 0.0 < minInc <= initialInc:
+            raise ValueError('Increments must satisfy 0 < minInc <= initialInc, not %r and %r' % (minInc, initialInc))
+        self.initialInc = float(initialInc)
+        self.minInc = float(minInc)
+        self.maxInc = float(maxInc)
+        self.stabilize = stabilize
+        self.attempts = attempts
+
+    @classmethod
+    def from_params(cls, params):
+        # The settings of a BearingParams object, with the StaticStep() defaults where they are None
+        period = float(params.timePeriod)
+        initialInc = period if params.initialInc is None else float(params.initialInc)
+        minInc = min(initialInc, 1e-5 * period) if params.minInc is None else float(params.minInc)
+        maxInc = period if params.maxInc is None else float(params.maxInc)
+        return cls(initialInc, minInc, maxInc, params.stabilize, params.incrementAttempts)
+
+    def apply(self, params, **changes):
+        """Copy of a BearingParams object with these settings."""
+
+        return params.copy(initialInc=self.initialInc, minInc=self.minInc, maxInc=self.maxInc,
+                           stabilize=self.stabilize, incrementAttempts=self.attempts, **changes)
+
+    def adjusted(self, scale=1.0, stabilize=None, attempts=None):
+        # The settings after one rung of the ladder
+        return IncrementSettings(self.initialInc * scale, self.minInc * scale * scale, self.maxInc * scale,
+                                 self.stabilize if stabilize is None else stabilize,
+                                 self.attempts if attempts is None else attempts)
+
+    def scaled(self, factor):
+        # The same settings for a step factor times as long
+        return IncrementSettings(self.initialInc * factor, self.minInc * factor, self.maxInc * factor,
+                                 self.stabilize, self.attempts)
+
+    def as_dict(self):
+        return dict(initialInc=self.initialInc, minInc=self.minInc, maxInc=self.maxInc, stabilize=self.stabilize,
+                    attempts=self.attempts)
+
+    def __eq__(self, other):
+        return isinstance(other, IncrementSettings) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'IncrementSettings(%s)' % ', '.join('%s=%r' % item for item in sorted(self.as_dict().items()))
+
+
+def cae_step_options(settings):
+    """Keyword arguments of StaticStep() for the settings (Abaqus CAE only)."""
+
+    options = dict(initialInc=settings.initialInc, minInc=settings.minInc, maxInc=settings.maxInc)
+    if settings.stabilize is not None:
+        from abaqusConstants import DISSIPATED_ENERGY_FRACTION
+        options.update(stabilizationMethod=DISSIPATED_ENERGY_FRACTION, stabilizationMagnitude=settings.stabilize,
+                       continueDampingFactors=False)
+    return options
+
+
+def parameter_features(params):
+    """The categories and measures of a BearingParams object that decide whether settings carry over."""
+
+    features = dict((key, getattr(params, key)) for key in _CATEGORIES + _MEASURES
+                    if key in params.defaults)
+    features['plastic'] = params.frictionAngle is not None
+    features['cohesion'] = float(params.cohesionTable[0][0])
+    features['load'] = float(params.pressure if params.loading == 'pressure' else params.settlement)
+    features['timePeriod'] = float(params.timePeriod)
+    return features
+
+
+def feature_distance(first, second):
+    # Mean relative difference of the measures, None when a category differs
+    if any(first.get(key) != second.get(key) for key in _CATEGORIES):
+        return None
+    differences = []
+    for key in _MEASURES:
+        a, b = first.get(key), second.get(key)
+        if a is None or b is None:
+            if a is not b:
+                return None
+            continue
+        largest = max(abs(a), abs(b))
+        differences.append(0.0 if largest == 0.0 else abs(a - b) / largest)
+    return sum(differences) / len(differences) if differences else 0.0
+
+
+class IncrementHistory(object):
+
+    # The runs recorded in a JSON file: one record per run with the features of its model, its attempts (settings,
+    # status and reason of each) and whether it converged
+
+    version = 1
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.records = []
+        if os.path.exists(self.path):
+            with open(self.path) as source:
+                stored = json.load(source)
+            if stored.get('version') != self.version:
+                raise ValueError('%s has history version %r, expected %r' % (self.path, stored.get('version'),
+                                                                             self.version))
+            self.records = stored['records']
+
+    def record(self, params, attempts, converged):
+        """Add a run (its Attempt objects) and write the file."""
+
+        self.records.append(dict(job=params.jobName, features=parameter_features(params), converged=bool(converged),
+                                 attempts=[attempt.as_dict() for attempt in attempts], time=time.time()))
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as target:
+            json.dump({'version': self.version, 'records': self.records}, target, indent=1)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(temporary, self.path)
+
+    def nearest(self, params, similarity=SIMILARITY):
+        """The converged record of the model most like params (the latest of equals), None if there is none."""
+
+        features = parameter_features(params)
+        best, bestDistance = None, None
+        for record in self.records:
+            if not record['converged']:
+                continue
+            distance = feature_distance(features, record['features'])
+            if distance is not None and distance <= similarity and (best is None or distance <= bestDistance):
+                best, bestDistance = record, distance
+        return best
+
+    def seed(self, params, similarity=SIMILARITY):
+        """Settings for the first attempt on params: those that converged on the nearest model, else its own."""
+
+        record = self.nearest(params, similarity)
+        if record is None:
+            return IncrementSettings.from_params(params)
+        settings = IncrementSettings(**record['attempts'][-1]['settings'])
+        return settings.scaled(float(params.timePeriod) / record['features']['timePeriod'])
+
+
+def seed_settings(params, path=HISTORY_FILE):
+    """IncrementSettings for a new run of params, from the history file if it has a similar converged run."""
+
+    return IncrementHistory(path).seed(params)
+
+
+class StatusFile(object):
+
+    # The increments of a .sta file: rows of (step, increment, attempt, cutback, severe iterations, equilibrium
+    # iterations, total iterations, total time, step time, increment size), and whether the analysis has ended
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        self.completed = self.ended = False
+        if not os.path.exists(path):
+            return
+        with open(path) as source:
+            text = source.read()
+        for line in text.splitlines():
+            match = _STA_ROW.match(line)
+            if match is None:
+                continue
+            try:
+                times = [float(value) for value in match.group(8, 9, 10)]
+            except ValueError:
+                continue
+            self.rows.append(tuple(int(value) for value in match.group(1, 2, 3)) + (match.group(4) == 'U', ) +
+                             tuple(int(value) for value in match.group(5, 6, 7)) + tuple(times))
+        self.completed = _STA_END[0] in text
+        self.ended = self.completed or _STA_END[1] in text
+
+    def converged(self):
+        return [row for row in self.rows if not row[3]]
+
+    def last_converged(self, frequency=1):
+        """Last converged row whose increment has restart data (every frequency increments), None if none has."""
+
+        for row in reversed(self.rows):
+            if not row[3] and row[1] % frequency == 0:
+                return row
+        return None
+
+    def crawling(self, increments, smallest):
+        # True when the last `increments` attempts all used an increment below smallest
+        return len(self.rows) >= increments and all(row[9] < smallest for row in self.rows[-increments:])
+
+
+def failure_reason(msgPath):
+    """Why the solver gave up, from its .msg file: a FAILURE_MESSAGES reason, the last error line or 'aborted'."""
+
+    if not os.path.exists(msgPath):
+        return 'aborted'
+    with open(msgPath) as source:
+        text = source.read()
+    for message, reason in FAILURE_MESSAGES:
+        if message in text:
+            return reason
+    errors = [line.strip() for line in text.splitlines() if '***ERROR' in line]
+    return errors[-1] if errors else 'aborted'
+
+
+class Attempt(object):
+
+    # One solver run of a RestartRun: job name, settings, the (job, step, increment, total time) it restarts from
+    # (None for the first run or a fresh start) and, once run, status, reason of a failure, total time reached and
+    # wall time
+
+    def __init__(self, name, settings, restart=None):
+        self.name = name
+        self.settings = settings
+        self.restart = restart
+        self.status = None
+        self.reason = None
+        self.totalTime = restart[3] if restart else 0.0
+        self.elapsed = None
+
+    def as_dict(self):
+        return dict(name=self.name, settings=self.settings.as_dict(), restart=self.restart, status=self.status,
+                    reason=self.reason, totalTime=self.totalTime, elapsed=self.elapsed)
+
+    def __repr__(self):
+        return 'Attempt(%r, %s, t=%r)' % (self.name, self.status, self.totalTime)
+
+
+class RestartRun(object):
+
+    # The attempts of one model, in order; converged when the last one completed the step
+
+    def __init__(self, params, directory):
+        self.params = params
+        self.directory = directory
+        self.attempts = []
+
+    @property
+    def converged(self):
+        return bool(self.attempts) and self.attempts[-1].status == COMPLETED
+
+    def summary(self):
+        """One line per attempt: job, settings, status and the step time reached."""
+
+        lines = []
+        for attempt in self.attempts:
+            settings = attempt.settings
+            lines.append('%-28s inc %9.3g / %9.3g / %9.3g  stabilize %-8s %-10s t=%-10.4g %s'
+                         % (attempt.name, settings.initialInc, settings.minInc, settings.maxInc,
+                            '-' if settings.stabilize is None else '%g' % settings.stabilize, attempt.status,
+                            attempt.totalTime, attempt.reason or ''))
+        lines.append('%s %s after %d attempts' % (self.params.jobName, 'converged' if self.converged
+                                                  else 'did not converge', len(self.attempts)))
+        return '\n'.join(lines)
+
+
+def write_restart_deck(params, path, step, increment, remaining, number):
+    """Deck of a restart: end step `step` of the old job at `increment`, then load over the remaining step time."""
+
+    with open(path, 'w') as out:
+        out.write('*HEADING\n%s: restart %d written by abaqus_tools.restart_orchestrator\n' % (params.name, number))
+        out.write('*RESTART, READ, STEP=%d, INC=%d, END STEP\n' % (step, increment))
+        write_step(out, params, 'Load Step restart %d' % number, remaining)
+
+
+class RestartOrchestrator(object):
+
+    # Runs models one at a time in root/<job name>/. command is the solver command template (see job_farm.py);
+    # restarts add RESTART_ARGUMENT. An attempt counts as stalled when the .sta file has not grown for stallSeconds
+    # or its last crawlIncrements increments were all smaller than crawlFraction of the step time; it is then killed
+    # and restarted like an aborted one.
+
+    def __init__(self, root, command=ABAQUS_COMMAND, history=None, ladder=CUTBACK_LADDER, poll=5.0,
+                 stallSeconds=1800.0, crawlIncrements=20, crawlFraction=1e-6, restartFrequency=1):
+        self.root = os.path.abspath(root)
+        self.command = tuple(command)
+        self.history = IncrementHistory() if history is None else history
+        self.ladder = tuple(ladder)
+        self.poll = poll
+        self.stallSeconds = stallSeconds
+        self.crawlIncrements = crawlIncrements
+        self.crawlFraction = crawlFraction
+        self.restartFrequency = restartFrequency
+
+    def _solve(self, attempt, directory, period, report=None):
+        # Start the solver on <attempt.name>.inp and watch it until it ends or stalls
+        arguments = [part.format(job=attempt.name, input=attempt.name + '.inp', cpus=1, directory=directory,
+                                 oldjob=attempt.restart[0] if attempt.restart else '')
+                     for part in self.command + ((RESTART_ARGUMENT, ) if attempt.restart else ())]
+        staPath = os.path.join(directory, attempt.name + '.sta')
+        start = progress = time.time()
+        rows = 0
+        with open(os.path.join(directory, attempt.name + '.log'), 'w') as log:
+            try:
+                process = subprocess.Popen(arguments, cwd=directory, stdout=log, stderr=subprocess.STDOUT)
+            except OSError as error:
+                log.write('Could not start %s: %s\n' % (arguments[0], error))
+                attempt.status, attempt.reason = ABORTED, str(error)
+                return None
+            while process.poll() is None:
+                time.sleep(self.poll)
+                status = StatusFile(staPath)
+                if len(status.rows) > rows:
+                    rows, progress = len(status.rows), time.time()
+                    if report is not None:
+                        report(attempt, status.rows[-1])
+                if time.time() - progress > self.stallSeconds or \
+                        status.crawling(self.crawlIncrements, self.crawlFraction * period):
+                    process.kill()
+                    process.wait()
+                    attempt.status = STALLED
+                    break
+        attempt.elapsed = time.time() - start
+        status = StatusFile(staPath)
+        if attempt.status is None:
+            attempt.status = COMPLETED if status.completed else ABORTED
+        if attempt.status != COMPLETED:
+            attempt.reason = failure_reason(os.path.join(directory, attempt.name + '.msg')) \
+                if attempt.status == ABORTED else 'no progress'
+        return status
+
+    def run(self, params, report=None):
+        """Run one BearingParams model until it converges or the ladder is used up; returns the RestartRun.
+
+        report, if given, is called with the attempt and the .sta row of every new increment.
+        """
+
+        directory = os.path.join(self.root, params.jobName)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        period = float(params.timePeriod)
+        run = RestartRun(params, directory)
+        settings = self.history.seed(params)
+        restart = None
+        for number in range(len(self.ladder) + 1):
+            if number:
+                rung = self.ladder[number - 1]
+                settings = settings.adjusted(rung.get('scale', 1.0), rung.get('stabilize'), rung.get('attempts'))
+            name = params.jobName if number == 0 else '%s_r%d' % (params.jobName, number)
+            attempt = Attempt(name, settings, restart)
+            run.attempts.append(attempt)
+            deckParams = settings.apply(params, restartFrequency=self.restartFrequency)
+            deck = os.path.join(directory, name + '.inp')
+            if restart is None:
+                write_bearing_deck(deckParams, deck)
+            else:
+                write_restart_deck(deckParams, deck, restart[1], restart[2], period - restart[3], number)
+            status = self._solve(attempt, directory, period, report)
+            if status is None:
+                break
+            last = status.last_converged(self.restartFrequency)
+            if last is not None:
+                attempt.totalTime = last[7]
+                # A restart job continues the step numbering of its old job
+                restart = (name, last[0], last[1], last[7])
+            if attempt.status == COMPLETED or (restart is not None and period - restart[3] <= 1e-9 * period):
+                attempt.status = COMPLETED
+                break
+        self.history.record(params, run.attempts, run.converged)
+        return run
+
+
+def main(arguments):
+    # python -m abaqus_tools.restart_orchestrator run <root> [PRESSURE_2D | DISPLACEMENT_2D | PLASTIC_2D]
+    #                                                 [--history <file>] [--stall <seconds>]
+    # python -m abaqus_tools.restart_orchestrator history [<file>]
+    from abaqus_tools import bearing_params
+
+    if arguments[:1] == ['history']:
+        history = IncrementHistory(arguments[1] if len(arguments) > 1 else HISTORY_FILE)
+        for record in history.records:
+            final = record['attempts'][-1]['settings'] if record['attempts'] else {}
+            print('%-28s %-15s %d attempts  %s' % (record['job'], 'converged' if record['converged'] else 'failed',
+                                                   len(record['attempts']), IncrementSettings(**final)
+                                                   if final else '-'))
+        return 0
+    if len(arguments) < 2 or arguments[0] != 'run':
+        print('Usage: python -m abaqus_tools.restart_orchestrator run <root> [preset] [--history <file>] '
+              '[--stall <seconds>]\n       python -m abaqus_tools.restart_orchestrator history [<file>]')
+        return 2
+    options = {'--history': HISTORY_FILE, '--stall': '1800'}
+    presets = []
+    remaining = list(arguments[2:])
+    while remaining:
+        argument = remaining.pop(0)
+        if argument in options:
+            options[argument] = remaining.pop(0)
+        else:
+            presets.append(argument)
+    orchestrator = RestartOrchestrator(arguments[1], history=IncrementHistory(options['--history']),
+                                       stallSeconds=float(options['--stall']))
+
+    def report(attempt, row):
+        print('%s: step %d increment %d attempt %d%s  time %.4g' % (attempt.name, row[0], row[1], row[2],
+                                                                     'U' if row[3] else '', row[7]))
+
+    converged = True
+    for preset in presets or ['PLASTIC_2D']:
+        if not hasattr(bearing_params, preset):
+            print('Unknown preset %s' % preset)
+            return 2
+        run = orchestrator.run(getattr(bearing_params, preset), report)
+        print(run.summary())
+        converged = converged and run.converged
+    return 0 if converged else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,199 @@
+# Content addressed store of job results, so an unchanged model is never solved twice
+
+# Two runs of Better_2D_displacement.py with the same literals produce the same model under the same job name, and two
+# different variants can share a job name too, so names say nothing about whether a job has already been solved. The
+# key of a job is a hash of what determines its results instead:
+#
+#     deck_key('runs/B2/B2.inp')       # the input deck, normalised (see below)
+#     params_key(PRESSURE_2D)          # a BearingParams object, without its model and job names and CPU count
+#
+#     cache = ResultCache('~/.abaqus_results', maxBytes=20 * 2 ** 30)
+#     entry = cache.get(key)           # directory with the stored result files, or None
+#     cache.put(key, ['B2.odb', 'B2.dat', 'B2.sta'])
+#
+# The normalised deck has no comment lines and no *HEADING text, *INCLUDE files inlined, keywords and parameters in
+# upper case with the parameters sorted, and every number written the same way (1., 1.0 and 1.000e0 are equal), so
+# renaming a model or reformatting the deck keeps the key. JobFarm(cache=...) uses deck keys to skip solved decks.
+#
+# Every entry is a directory named by its key. Reading an entry marks it as used; when the store grows beyond maxBytes
+# the least recently used entries are deleted.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+# The result files kept for a job, stored as result<extension>
+
+RESULT_EXTENSIONS = ('.odb', '.dat', '.msg', '.sta', '.fil', '.res', '.prt', '.mdl', '.stt')
+
+# Parameters that do not change the results of a BearingParams model
+
+_NAME_PARAMETERS = ('name', 'jobName', 'numCpus')
+
+_USED = '.used'
+_INCLUDE = re.compile(r'INPUT\s*=\s*([^,]+)', re.IGNORECASE)
+
+
+def _number(field):
+    # One spelling per number, the field itself (upper case) when it is not a number
+    try:
+        return repr(float(field))
+    except ValueError:
+        return field.upper()
+
+
+def normalised_deck_lines(path):
+    """Generator of the lines of a deck as they enter its key, with *INCLUDE files inlined."""
+
+    heading = False
+    with open(path) as lines:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('**'):
+                continue
+            if line.startswith('*'):
+                parts = [part.strip().upper().replace(' ', '') for part in line.split(',')]
+                keyword, parameters = parts[0], sorted(part for part in parts[1:] if part)
+                heading = keyword == '*HEADING'
+                if keyword == '*INCLUDE':
+                    match = _INCLUDE.search(line)
+                    if match is None:
+                        raise ValueError('*INCLUDE without INPUT= in %s' % path)
+                    included = os.path.join(os.path.dirname(os.path.abspath(path)), match.group(1).strip())
+                    for includedLine in normalised_deck_lines(included):
+                        yield includedLine
+                    continue
+                yield ','.join([keyword] + parameters)
+            elif not heading:
+                yield ','.join(_number(field.strip()) for field in line.rstrip(',').split(','))
+
+
+def deck_key(path, salt=''):
+    """Hash of the normalised deck; salt (e.g. the solver version) is hashed with it."""
+
+    digest = hashlib.sha256(salt.encode('utf-8'))
+    for line in normalised_deck_lines(path):
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def params_key(params, salt=''):
+    """Hash of the model definition held by a BearingParams object, without its names and CPU count."""
+
+    values = params.as_dict()
+    for key in _NAME_PARAMETERS:
+        values.pop(key, None)
+    text = json.dumps(values, sort_keys=True, default=repr)
+    return hashlib.sha256((salt + text).encode('utf-8')).hexdigest()
+
+
+def _directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+class ResultCache(object):
+
+    # root is created when needed; maxBytes is the size cap of all stored result files (None for no cap)
+
+    def __init__(self, root, maxBytes=None):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self.path(key))
+
+    def get(self, key):
+        """Directory of the stored results of key (now the most recently used entry), or None."""
+
+        entry = self.path(key)
+        if not os.path.isdir(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(os.path.join(entry, _USED), 'w') as used:
+            used.write('%r\n' % time.time())
+        return entry
+
+    def put(self, key, files):
+        """Store result files under key (as result.odb, result.dat, ...), then evict down to maxBytes.
+
+        Returns the entry directory. The files are copied to a temporary directory first and renamed into place, so a
+        reader never sees a half written entry.
+        """
+
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        staging = tempfile.mkdtemp(prefix='.put-', dir=self.root)
+        try:
+            for path in files:
+                extension = os.path.splitext(path)[1].lower()
+                shutil.copyfile(path, os.path.join(staging, 'result' + extension))
+            with open(os.path.join(staging, _USED), 'w') as used:
+                used.write('%r\n' % time.time())
+            entry = self.path(key)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            os.rename(staging, entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+        return entry
+
+    def restore(self, key, directory, jobName):
+        """Copy the results of key into directory as <jobName>.odb, ... ; returns the paths, [] when not stored."""
+
+        entry = self.get(key)
+        if entry is None:
+            return []
+        paths = []
+        for name in sorted(os.listdir(entry)):
+            if name.startswith('result.'):
+                paths.append(os.path.join(directory, jobName + name[len('result'):]))
+                shutil.copyfile(os.path.join(entry, name), paths[-1])
+        return paths
+
+    def entries(self):
+        """(last used, bytes, key) of every entry, least recently used first."""
+
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for key in os.listdir(self.root):
+            entry = self.path(key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            used = os.path.join(entry, _USED)
+            lastUsed = os.path.getmtime(used) if os.path.exists(used) else os.path.getmtime(entry)
+            entries.append((lastUsed, _directory_size(entry), key))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        # Delete least recently used entries until the store fits in maxBytes; keep is never deleted
+        if self.maxBytes is None:
+            return []
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
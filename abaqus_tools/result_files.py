@@ -0,0 +1,472 @@
+# Streaming readers for the printed output (.dat) and the ASCII results file (.fil) of an Abaqus job
+
+# Both files are written by the solver itself, so a job run with *EL PRINT / *EL FILE / *NODE FILE requests (see
+# peak_stress.PRINT_KEYWORDS) can be post-processed on machines without the ODB API. The files of the C3D20R models
+# are far larger than memory, so they are never read whole: the file is memory mapped, one pass builds an index of
+# the byte ranges of its steps, increments and output blocks, and a block is only parsed, into NumPy arrays, when it is
+# asked for:
+#
+#     dat = DatFile('bearingJob3D.dat')
+#     dat.frames()                                     # [(step, increment), ...]
+#     for table in dat.tables(step=1, increment=5, column='S22'):
+#         print(table.elemType, table.column('S22').max())
+#
+#     fil = FilFile('bearingJob3D.fil')
+#     frame = fil.element_frame(1, 5, variables=('S', ))        # only the S records of that increment are parsed
+#     nodes, u = fil.node_values(1, 5, 'U')
+#
+# The index is saved next to the file as <file>.index.json and reused while the size and time stamp of the file are
+# unchanged, so a second script pulls a frame without scanning anything.
+#
+# A .dat table is one block of rows under a header line starting with ELEMENT (element output) or NODE (nodal output).
+# The .fil file must be written with *FILE FORMAT, ASCII: a stream of records, each '*', the record length, the record
+# key and its words, where an integer is 'I' + two digit width + digits, a float 'D' + number and a string 'A' + 8
+# characters. Records run on across the fixed length lines, so a position in the record stream maps to a byte offset
+# by arithmetic.
+
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+_ELEMENT_TYPE = re.compile(br'TYPE +(\w+)')
+_DAT_MARK = re.compile(br'S T E P +(\d+)|INCREMENT +(\d+) +SUMMARY|THE FOLLOWING TABLE IS PRINTED[^\n]*'
+                       br'|\n *(ELEMENT|NODE) +([A-Z][^\n]*)')
+_BLANK_LINE = re.compile(br'\n[ \t\r]*\n')
+_WORD = re.compile(br'I[ \d]\d(-?\d+)|D([ +-]?\d*\.\d*(?:[DE][+-]?\d+)?)|A(.{8})', re.DOTALL)
+_RECORD_START = re.compile(br'\*I[ \d]\d(\d+)I[ \d]\d(\d+)')
+
+# Record keys of the results file. Element records have keys below 100, nodal records 100 to 999.
+
+INCREMENT_START = 2000
+INCREMENT_END = 2001
+ELEMENT_HEADER = 1
+NODE_KEYS = {101: 'U', 102: 'V', 103: 'A', 104: 'RF', 106: 'CF', 107: 'COORD', 201: 'NT'}
+ELEMENT_KEYS = {8: 'COORD', 11: 'S', 12: 'SINV', 21: 'E', 22: 'PE'}
+SINV_NAMES = ('MISES', 'TRESC', 'PRESS', 'INV3')
+
+# Bytes of the record stream scanned at a time while indexing a .fil file, and how far a record start may reach over
+# the end of a chunk
+
+CHUNK_BYTES = 1 << 24
+_OVERLAP = 48
+
+
+def _open_map(path):
+    handle = open(path, 'rb')
+    try:
+        if os.path.getsize(path) == 0:
+            raise ValueError('%s is empty' % path)
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        handle.close()
+
+
+def _text(value):
+    return value.decode('ascii') if isinstance(value, bytes) else value
+
+
+class _IndexedFile(object):
+
+    # The memory map of a result file and its index, loaded from <path>.index.json when that matches the file
+
+    version = 1
+
+    def __init__(self, path, saveIndex=True):
+        self.path = path
+        self.map = _open_map(path)
+        stat = os.stat(path)
+        self.stamp = [stat.st_size, int(stat.st_mtime)]
+        self.blocks = self._load_index()
+        if self.blocks is None:
+            self.blocks = self._build_index()
+            if saveIndex:
+                self._save_index()
+
+    def _index_path(self):
+        return self.path + '.index.json'
+
+    def _load_index(self):
+        try:
+            with open(self._index_path()) as source:
+                stored = json.load(source)
+        except (IOError, OSError, ValueError):
+            return None
+        if stored.get('version') != self.version or stored.get('stamp') != self.stamp:
+            return None
+        return stored['blocks']
+
+    def _save_index(self):
+        # Best effort: a read only results directory just means the next reader scans again
+        try:
+            with open(self._index_path(), 'w') as target:
+                json.dump({'version': self.version, 'stamp': self.stamp, 'blocks': self.blocks}, target)
+        except (IOError, OSError):
+            pass
+
+    def frames(self):
+        """Sorted (step, increment) pairs that have output blocks."""
+
+        return sorted(set((block['step'], block['increment']) for block in self.blocks))
+
+    def select(self, step=None, increment=None, kind=None):
+        # Index entries of the blocks of one step / increment / kind (None matches all); increment -1 is the last
+        # increment of the step
+        if increment == -1:
+            increment = max(i for s, i in self.frames() if step is None or s == step)
+        return [block for block in self.blocks if (step is None or block['step'] == step)
+                and (increment is None or block['increment'] == increment) and (kind is None or block['kind'] == kind)]
+
+    def close(self):
+        self.map.close()
+
+
+class DatTable(object):
+
+    # One printed table: step and increment it belongs to, the element type (None for nodal tables), the column
+    # names of the values, the entity labels (element or node), the integration points (None for nodal tables) and the
+    # values as an array (rows, columns)
+
+    def __init__(self, step, increment, elemType, kind, columns, labels, points, values):
+        self.step = step
+        self.increment = increment
+        self.elemType = elemType
+        self.kind = kind
+        self.columns = columns
+        self.labels = labels
+        self.points = points
+        self.values = values
+
+    def column(self, name):
+        return self.values[:, self.columns.index(name)]
+
+    def __repr__(self):
+        return 'DatTable(step %d, increment %d, %s, %d rows of %s)' % (self.step, self.increment, self.kind,
+                                                                        len(self.values), ', '.join(self.columns))
+
+
+def _number(token):
+    try:
+        return float(token.replace(b'D', b'E') if isinstance(token, bytes) else token.replace('D', 'E'))
+    except ValueError:
+        return None
+
+
+def _row(tokens, labelColumns, numColumns):
+    # Labels (the element and its integration point, or the node), an optional footnote, one number per column
+    if len(tokens) < labelColumns + numColumns or not all(token.isdigit() for token in tokens[:labelColumns]):
+        return None
+    numbers = [_number(token) for token in tokens[len(tokens) - numColumns:]]
+    if None in numbers:
+        return None
+    return [int(token) for token in tokens[:labelColumns]] + numbers
+
+
+class DatFile(_IndexedFile):
+
+    # Index entries: step, increment, kind ('ELEMENT' or 'NODE'), elemType, columns, labelColumns (2 when the rows
+    # start with element and integration point), start and end byte offsets of the rows
+
+    def _build_index(self):
+        data = self.map
+        blocks = []
+        step, increment, elemType = 0, 0, None
+        position = 0
+        while True:
+            match = _DAT_MARK.search(data, position)
+            if match is None:
+                break
+            position = match.end()
+            stepText, incrementText, kind, header = match.groups()
+            if stepText is not None:
+                step, increment = int(stepText), 0
+            elif incrementText is not None:
+                increment = int(incrementText)
+            elif kind is None:
+                found = _ELEMENT_TYPE.search(match.group(0))
+                elemType = _text(found.group(1)) if found else None
+            else:
+                tokens = [_text(token) for token in header.split()]
+                names = [token for token in tokens if token not in ('PT', 'FOOT-', 'SP')]
+                labelColumns = 2 if 'PT' in tokens else 1
+                start, end = self._rows(position, labelColumns, len(names))
+                if end > start:
+                    blocks.append(dict(step=step, increment=increment, kind=_text(kind),
+                                       elemType=elemType if kind == b'ELEMENT' else None, columns=names,
+                                       labelColumns=labelColumns, start=start, end=end))
+                    position = end
+        return blocks
+
+    def _rows(self, position, labelColumns, numColumns):
+        # Byte range of the rows after a header line: skip the NOTE line and blank lines, then up to the next line
+        # that is not a row
+        data = self.map
+        start = data.find(b'\n', position) + 1
+        while start and start < len(data):
+            lineEnd = data.find(b'\n', start)
+            lineEnd = len(data) if lineEnd < 0 else lineEnd
+            tokens = data[start:lineEnd].split()
+            if tokens and tokens[0] != b'NOTE':
+                break
+            start = lineEnd + 1
+        blank = _BLANK_LINE.search(data, start)
+        end = len(data) if blank is None else blank.start() + 1
+        # A summary or message line right after the rows (no blank line in between) ends the block as well
+        lines = data[start:end].split(b'\n')
+        for k, line in enumerate(lines):
+            if line.strip() and _row(line.split(), labelColumns, numColumns) is None:
+                end = start + sum(len(previous) + 1 for previous in lines[:k])
+                break
+        return start, end
+
+    def read(self, block):
+        """The DatTable of one index entry."""
+
+        chunk = self.map[block['start']:block['end']]
+        width = block['labelColumns'] + len(block['columns'])
+        lines = [line for line in chunk.split(b'\n') if line.strip()]
+        tokens = chunk.split()
+        if len(tokens) == len(lines) * width:
+            values = np.array(tokens, dtype=float).reshape(len(lines), width)
+        else:
+            # Footnote columns: row by row
+            values = np.array([_row(line.split(), block['labelColumns'], len(block['columns'])) for line in lines],
+                              dtype=float)
+        labelColumns = block['labelColumns']
+        return DatTable(block['step'], block['increment'], block['elemType'], block['kind'], block['columns'],
+                        values[:, 0].astype(int), values[:, 1].astype(int) if labelColumns == 2 else None,
+                        values[:, labelColumns:])
+
+    def tables(self, step=None, increment=None, kind=None, column=None):
+        """Generator of the DatTable of every selected block; column limits them to tables with that column."""
+
+        for block in self.select(step, increment, kind):
+            if column is None or column in block['columns']:
+                yield self.read(block)
+
+
+def read_dat_tables(path):
+    """Generator of the DatTable objects of a .dat file, in the order they were printed."""
+
+    dat = DatFile(path)
+    try:
+        for table in dat.tables():
+            yield table
+    finally:
+        dat.close()
+
+
+class FilFrame(object):
+
+    # The element output of one increment of a .fil file at the integration points: elements and points (P, ), and
+    # fields {'COORD': (P, 2 or 3), 'S': (P, components), 'MISES': (P, ), ...}
+
+    def __init__(self, step, increment, totalTime, stepTime, elements, points, fields):
+        self.step = step
+        self.increment = increment
+        self.totalTime = totalTime
+        self.stepTime = stepTime
+        self.elements = elements
+        self.points = points
+        self.fields = fields
+
+    def __repr__(self):
+        return 'FilFrame(step %d, increment %d, %d points, %s)' % (self.step, self.increment, len(self.elements),
+                                                                    ', '.join(sorted(self.fields)))
+
+
+def _words(record):
+    words = []
+    for integer, real, string in _WORD.findall(record):
+        if integer:
+            words.append(int(integer))
+        elif real:
+            words.append(float(real.replace(b'D', b'E')))
+        else:
+            words.append(_text(string))
+    return words
+
+
+def stream_records(text, keys=None):
+    """Generator of (key, words) of the records in a piece of the record stream; text before the first '*' (the end
+    of a record cut off at the start) is skipped. keys limits which records are parsed."""
+
+    for record in text.split(b'*')[1:]:
+        head = _RECORD_START.match(b'*' + record)
+        key = int(head.group(2))
+        if keys is None or key in keys:
+            yield key, _words(record[head.end() - 1:])
+
+
+def _family(key):
+    if key < 100:
+        return 'ELEMENT'
+    return 'NODE' if key < 1000 else None
+
+
+class FilFile(_IndexedFile):
+
+    # Index entries: step, increment, totalTime, stepTime, kind ('ELEMENT', 'NODE'), the record keys in the block and
+    # its start and end positions in the record stream (the file without line ends)
+
+    def __init__(self, path, saveIndex=True):
+        self.lineLength, self.lineWidth = self._line_format(path)
+        _IndexedFile.__init__(self, path, saveIndex)
+
+    @staticmethod
+    def _line_format(path):
+        with open(path, 'rb') as source:
+            first = source.readline()
+        width = len(first.rstrip(b'\r\n'))
+        if not first.startswith(b'*') or width == 0:
+            raise ValueError('%s is not an ASCII results file (write it with *FILE FORMAT, ASCII)' % path)
+        return len(first), width
+
+    def offset(self, position):
+        # Byte offset of a position in the record stream
+        return (position // self.lineWidth) * self.lineLength + position % self.lineWidth
+
+    def stream(self, start, end):
+        """Bytes of the record stream between two positions."""
+
+        chunk = self.map[self.offset(start):self.offset(end)]
+        return chunk.replace(b'\r', b'').replace(b'\n', b'')
+
+    def length(self):
+        """Length of the record stream."""
+
+        size = len(self.map)
+        return (size // self.lineLength) * self.lineWidth + min(size % self.lineLength, self.lineWidth)
+
+    def _record_starts(self):
+        # (position, key) of every record, scanning the stream a chunk at a time
+        total = self.length()
+        chunk = max(self.lineWidth, (CHUNK_BYTES // self.lineLength) * self.lineWidth)
+        position = 0
+        while position < total:
+            end = min(total, position + chunk)
+            text = self.stream(position, end)
+            last = end >= total
+            safe = len(text) if last else len(text) - _OVERLAP
+            carry = None
+            for match in _RECORD_START.finditer(text):
+                if match.end() > safe:
+                    carry = match.start()
+                    break
+                yield position + match.start(), int(match.group(2))
+            if last:
+                break
+            position += carry if carry is not None else safe
+
+    def _build_index(self):
+        blocks = []
+        frame = None
+        block = None
+        for position, key in self._record_starts():
+            if block is not None and _family(key) != block['kind']:
+                block['end'] = position
+                blocks.append(block)
+                block = None
+            if key == INCREMENT_START:
+                frame = self._increment_start(position)
+            elif key == INCREMENT_END:
+                frame = None
+            elif frame is not None and _family(key) is not None:
+                if block is None:
+                    block = dict(frame, kind=_family(key), keys=[], start=position, end=None)
+                if key not in block['keys']:
+                    block['keys'].append(key)
+        return blocks
+
+    def _increment_start(self, position):
+        words = _words(self.stream(position, position + 800).split(b'*')[1])
+        return dict(totalTime=words[2], stepTime=words[3], step=int(words[7]), increment=int(words[8]))
+
+    def _record_words(self, start, end):
+        record = self.stream(start, end)
+        return _words(record[_RECORD_START.match(record).end():])
+
+    def records(self, block, keys=None):
+        """Generator of (key, words) of the records of one index entry; keys limits which records are parsed."""
+
+        return stream_records(self.stream(block['start'], block['end']), keys)
+
+    def element_frame(self, step, increment, variables=None):
+        """FilFrame of one increment (-1 for the last of the step); variables ('S', 'COORD', ...) limits the fields."""
+
+        wanted = None
+        if variables is not None:
+            wanted = set([ELEMENT_HEADER] + [key for key, name in ELEMENT_KEYS.items() if name in variables])
+        elements, points, fields, times = [], [], {}, None
+        for block in self.select(step, increment, 'ELEMENT'):
+            times = block['totalTime'], block['stepTime']
+            for key, words in self.records(block, wanted):
+                if key == ELEMENT_HEADER:
+                    elements.append(words[0])
+                    points.append(words[1])
+                elif key in ELEMENT_KEYS:
+                    fields.setdefault(ELEMENT_KEYS[key], []).append(words)
+        if times is None:
+            raise ValueError('%s has no element output in step %r, increment %r' % (self.path, step, increment))
+        arrays = {}
+        for name, rows in fields.items():
+            width = min(len(row) for row in rows)
+            arrays[name] = np.array([row[:width] for row in rows], dtype=float)
+        if 'SINV' in arrays:
+            for k, name in enumerate(SINV_NAMES[:arrays['SINV'].shape[1]]):
+                arrays[name] = arrays['SINV'][:, k]
+        return FilFrame(block['step'], block['increment'], times[0], times[1], np.array(elements, dtype=int),
+                        np.array(points, dtype=int), arrays)
+
+    def node_values(self, step, increment, variable):
+        """(node labels, values (N, components)) of a nodal variable ('U', 'RF', 'NT', ...) in one increment."""
+
+        keys = set(key for key, name in NODE_KEYS.items() if name == variable)
+        if not keys:
+            raise ValueError('Unknown nodal variable %r, use one of %s' % (variable,
+                                                                           ', '.join(sorted(NODE_KEYS.values()))))
+        rows = []
+        for block in self.select(step, increment, 'NODE'):
+            if keys.intersection(block['keys']):
+                rows.extend(words for _, words in self.records(block, keys))
+        if not rows:
+            raise ValueError('%s has no %s output in step %r, increment %r' % (self.path, variable, step, increment))
+        width = min(len(row) for row in rows)
+        values = np.array([row[:width] for row in rows], dtype=float)
+        return values[:, 0].astype(int), values[:, 1:]
+
+    def element_frames(self, variables=None):
+        """Generator of the FilFrame of every increment with element output."""
+
+        for step, increment in self.frames():
+            if self.select(step, increment, 'ELEMENT'):
+                yield self.element_frame(step, increment, variables)
+
+
+def fil_records(path):
+    """Generator of (key, words) of every record of an ASCII .fil file, in file order."""
+
+    fil = FilFile(path, saveIndex=False)
+    try:
+        previous = None
+        for position, key in fil._record_starts():
+            if previous is not None:
+                yield previous[1], fil._record_words(previous[0], position)
+            previous = position, key
+        if previous is not None:
+            yield previous[1], fil._record_words(previous[0], fil.length())
+    finally:
+        fil.close()
+
+
+def fil_element_frames(path, variables=None):
+    """Generator of the FilFrame of every increment of an ASCII .fil file with element output."""
+
+    fil = FilFile(path)
+    try:
+        for frame in fil.element_frames(variables):
+            yield frame
+    finally:
+        fil.close()
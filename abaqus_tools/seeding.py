@@ -0,0 +1,245 @@
+# Edge seed distributions of seedEdgeByNumber() / seedEdgeByBias() and transfinite node grids, computed with NumPy
+
+# A seed distribution is returned as the normalised positions 0 = t0 < t1 < ... < tn = 1 of the n + 1 nodes along an
+# edge. As in Abaqus the bias ratio is the ratio of the largest to the smallest element, the element sizes grow
+# geometrically:
+#
+#     single_bias(60, 20.0)            # seedEdgeByBias(biasMethod=SINGLE, end1Edges=..., ratio=20.0, number=60)
+#     double_bias(40, 5.0, 'ends')     # seedEdgeByBias(biasMethod=DOUBLE, endEdges=..., ratio=5.0, number=40)
+#
+# SeededGrid records the seeds of the edges of a rectangle partitioned by full length grid lines (the footing models)
+# the way the CAE scripts set them, tells the node and element counts of the structured mesh before anything is meshed,
+# and builds the node grid of the mesh: every face is filled by transfinite interpolation between the seeds of its four
+# edges, so opposite edges may be graded differently. coons_patch() does the same for faces with a curved side.
+
+import numpy as np
+
+TOLERANCE = 1e-9
+
+
+def uniform(number):
+    return np.linspace(0.0, 1.0, int(number) + 1)
+
+
+def single_bias(number, ratio):
+    """Node positions of a single bias seed with the smallest element at t = 0 (end1)."""
+
+    number = int(number)
+    if number < 2 or ratio == 1.0:
+        return uniform(number)
+    sizes = ratio ** (np.arange(number) / float(number - 1))
+    return np.concatenate(([0.0], np.cumsum(sizes) / sizes.sum()))
+
+
+def double_bias(number, ratio, fine='ends'):
+    """Node positions of a double bias seed, smallest elements at both ends ('ends') or in the middle ('center')."""
+
+    if fine not in ('ends', 'center'):
+        raise ValueError("fine must be 'ends' or 'center', not %r" % (fine, ))
+    number = int(number)
+    steps = np.minimum(np.arange(number), np.arange(number)[::-1])
+    if steps.max() == 0 or ratio == 1.0:
+        return uniform(number)
+    if fine == 'center':
+        steps = steps.max() - steps
+    sizes = ratio ** (steps / float(steps.max()))
+    return np.concatenate(([0.0], np.cumsum(sizes) / sizes.sum()))
+
+
+def number_by_size(length, size):
+    # seedEdgeBySize() / seedPart(): the nearest whole number of elements, at least one
+    return np.maximum(1, np.round(np.asarray(length, dtype=float) / size)).astype(int)
+
+
+def bias_by_sizes(length, minSize, maxSize):
+    """(number, ratio) of the single bias seed from minSize to maxSize whose elements best fill length."""
+
+    ratio = float(maxSize) / minSize
+    numbers = np.arange(2, max(3, int(np.ceil(length / float(minSize))) + 1))
+    steps = np.arange(numbers.max())[None, :] / (numbers[:, None] - 1.0)
+    sizes = np.where(np.arange(numbers.max())[None, :] < numbers[:, None], minSize * ratio ** steps, 0.0)
+    best = numbers[np.argmin(np.abs(sizes.sum(axis=1) - length))]
+    return int(best), ratio
+
+
+class EdgeSeed(object):
+
+    # How one edge is seeded. kind is 'number', 'single' or 'double'; for 'single' flip means the smallest element is
+    # at the end with the larger coordinate, for 'double' fine is 'ends' or 'center'. When a structured face needs more
+    # elements on the edge than it was seeded with (FINER), the same kind of distribution is used with more nodes.
+
+    def __init__(self, kind, number, ratio=1.0, flip=False, fine='ends'):
+        if kind not in ('number', 'single', 'double'):
+            raise ValueError("kind must be 'number', 'single' or 'double', not %r" % (kind, ))
+        self.kind = kind
+        self.number = int(number)
+        self.ratio = float(ratio)
+        self.flip = flip
+        self.fine = fine
+
+    def parameters(self, number=None):
+        number = self.number if number is None else int(number)
+        if self.kind == 'single':
+            t = single_bias(number, self.ratio)
+            return 1.0 - t[::-1] if self.flip else t
+        if self.kind == 'double':
+            return double_bias(number, self.ratio, self.fine)
+        return uniform(number)
+
+    def __repr__(self):
+        return 'EdgeSeed(%r, %d, ratio=%r)' % (self.kind, self.number, self.ratio)
+
+
+def transfinite_unit_square(bottom, right, top, left):
+    """Interior nodes of the unit square from the seeds of its edges (bottom/top along x, left/right along y).
+
+    Node (j, i) is where the straight line from bottom[i] to top[i] crosses the line from left[j] to right[j], which
+    is transfinite interpolation for straight sided faces. Returns arrays X, Y of shape (len(left), len(bottom)).
+    """
+
+    a, c = np.asarray(bottom, dtype=float)[None, :], np.asarray(top, dtype=float)[None, :]
+    b, d = np.asarray(left, dtype=float)[:, None], np.asarray(right, dtype=float)[:, None]
+    return _transfinite(a, b, c, d)
+
+
+def _transfinite(a, b, c, d):
+    # Crossing of the line from (a, 0) to (c, 1) with the line from (0, b) to (1, d), element by element
+    X = (a + (c - a) * b) / (1.0 - (c - a) * (d - b))
+    Y = b + (d - b) * X
+    return X, Y
+
+
+def _normalised_lengths(points):
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    lengths = np.concatenate(([0.0], np.cumsum(steps)))
+    return lengths / lengths[-1]
+
+
+def coons_patch(bottom, right, top, left):
+    """Node grid (len(left), len(bottom), 2) of a face with curved sides from the seeded points of its four sides.
+
+    bottom and top run in the same direction (u), left and right in the other (v) and the corners must coincide
+    (bottom[0] == left[0], bottom[-1] == right[0], top[0] == left[-1], top[-1] == right[-1]). Used for the faces
+    around a hole, where one side is an arc.
+    """
+
+    bottom, right, top, left = [np.asarray(side, dtype=float)[:, :2] for side in (bottom, right, top, left)]
+    u = 0.5 * (_normalised_lengths(bottom) + _normalised_lengths(top))[None, :, None]
+    v = 0.5 * (_normalised_lengths(left) + _normalised_lengths(right))[:, None, None]
+    corners = ((1 - u) * (1 - v) * bottom[0] + u * (1 - v) * bottom[-1] + (1 - u) * v * top[0] + u * v * top[-1])
+    return ((1 - v) * bottom[None] + v * top[None] + (1 - u) * left[:, None] + u * right[:, None]) - corners
+
+
+class SeededGrid(object):
+
+    # A rectangle cut by the full length lines xLines and yLines (both including the outer edges). Horizontal edges are
+    # keyed ('h', i, j): column i on line yLines[j]; vertical edges ('v', i, j): line xLines[i] in row j. Edges without
+    # a seed of their own are seeded by size like seedPart().
+
+    def __init__(self, xLines, yLines, size):
+        self.xLines = np.asarray(xLines, dtype=float)
+        self.yLines = np.asarray(yLines, dtype=float)
+        self.size = float(size)
+        self.seeds = {}
+
+    def edge_key(self, point):
+        x, y = point[0], point[1]
+        onX = np.flatnonzero(np.abs(self.xLines - x) <= TOLERANCE)
+        onY = np.flatnonzero(np.abs(self.yLines - y) <= TOLERANCE)
+        if len(onY) and not len(onX):
+            i = np.searchsorted(self.xLines, x) - 1
+            if 0 <= i < len(self.xLines) - 1:
+                return ('h', int(i), int(onY[0]))
+        if len(onX) and not len(onY):
+            j = np.searchsorted(self.yLines, y) - 1
+            if 0 <= j < len(self.yLines) - 1:
+                return ('v', int(onX[0]), int(j))
+        raise ValueError('No grid edge passes through the inside of %r' % (tuple(point), ))
+
+    def edge_ends(self, key):
+        direction, i, j = key
+        if direction == 'h':
+            return (self.xLines[i], self.yLines[j]), (self.xLines[i + 1], self.yLines[j])
+        return (self.xLines[i], self.yLines[j]), (self.xLines[i], self.yLines[j + 1])
+
+    def seed_by_number(self, points, number):
+        for point in points:
+            self.seeds[self.edge_key(point)] = EdgeSeed('number', number)
+
+    def seed_by_bias(self, points, ratio, number, towards):
+        # Single bias with the smallest element at the end of each edge that is nearest to the point towards, the
+        # offline equivalent of choosing end1Edges / end2Edges
+        for point in points:
+            key = self.edge_key(point)
+            start, end = self.edge_ends(key)
+            flip = np.hypot(end[0] - towards[0], end[1] - towards[1]) < np.hypot(start[0] - towards[0],
+                                                                                start[1] - towards[1])
+            self.seeds[key] = EdgeSeed('single', number, ratio, flip=flip)
+
+    def seed_by_double_bias(self, points, ratio, number, fine='ends'):
+        for point in points:
+            self.seeds[self.edge_key(point)] = EdgeSeed('double', number, ratio, fine=fine)
+
+    def edge_number(self, key):
+        if key in self.seeds:
+            return self.seeds[key].number
+        start, end = self.edge_ends(key)
+        return int(number_by_size(np.hypot(end[0] - start[0], end[1] - start[1]), self.size))
+
+    def divisions(self):
+        """Element counts per column and per row: the largest seed count of any edge of the column (row)."""
+
+        columns = number_by_size(np.diff(self.xLines), self.size)
+        rows = number_by_size(np.diff(self.yLines), self.size)
+        for key, seed in self.seeds.items():
+            direction, i, j = key
+            if direction == 'h':
+                columns[i] = max(columns[i], seed.number)
+            else:
+                rows[j] = max(rows[j], seed.number)
+        return columns, rows
+
+    def counts(self):
+        # (number of nodes, number of elements) of the structured quad mesh, without building it
+        columns, rows = self.divisions()
+        return int((columns.sum() + 1) * (rows.sum() + 1)), int(columns.sum() * rows.sum())
+
+    def edge_parameters(self, key, number):
+        if key in self.seeds:
+            return self.seeds[key].parameters(number)
+        return uniform(number)
+
+    def node_grid(self):
+        """Node coordinates of the structured mesh as an array of shape (rows + 1, columns + 1, 2).
+
+        The transfinite fill of all faces is one array operation: the nodes of every face, its shared sides included,
+        are laid out side by side in a (sum(rows + 1), sum(columns + 1)) array together with the seed parameters of
+        the four sides of their face, and the result is scattered into the grid (shared nodes get the same value
+        twice).
+        """
+
+        columns, rows = self.divisions()
+        xStart = np.concatenate(([0], np.cumsum(columns)))
+        yStart = np.concatenate(([0], np.cumsum(rows)))
+
+        # Face index and local node index of every entry along x (per column) and along y (per row)
+        faceX = np.repeat(np.arange(len(columns)), columns + 1)
+        faceY = np.repeat(np.arange(len(rows)), rows + 1)
+        localX = np.arange(len(faceX)) - np.repeat(xStart[:-1] + np.arange(len(columns)), columns + 1)
+        localY = np.arange(len(faceY)) - np.repeat(yStart[:-1] + np.arange(len(rows)), rows + 1)
+
+        # Seed parameters of every horizontal line (all its columns side by side) and every vertical line (all rows)
+        horizontal = np.array([np.concatenate([self.edge_parameters(('h', i, j), columns[i])
+                                               for i in range(len(columns))]) for j in range(len(rows) + 1)])
+        vertical = np.array([np.concatenate([self.edge_parameters(('v', i, j), rows[j]) for j in range(len(rows))])
+                             for i in range(len(columns) + 1)])
+
+        X, Y = _transfinite(horizontal[faceY], vertical[faceX].T, horizontal[faceY + 1], vertical[faceX + 1].T)
+        x0, width = self.xLines[faceX], np.diff(self.xLines)[faceX]
+        y0, height = self.yLines[faceY], np.diff(self.yLines)[faceY]
+        grid = np.empty((yStart[-1] + 1, xStart[-1] + 1, 2))
+        rowIds = (yStart[faceY] + localY)[:, None]
+        columnIds = (xStart[faceX] + localX)[None, :]
+        grid[rowIds, columnIds, 0] = x0[None, :] + width[None, :] * X
+        grid[rowIds, columnIds, 1] = y0[:, None] + height[:, None] * Y
+        return grid
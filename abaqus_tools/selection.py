@@ -0,0 +1,557 @@
+# Batched geometric selection of edges and faces of planar (TWO_D_PLANAR) parts
+
+# The scripts pick every edge and face with its own findAt() call, e.g.
+#
+#     edge_on_leftface = bearingInstance.edges.findAt(((0.0, 10.0, 0.0),))
+#
+# which is one geometry query per entity (20 to 40 per model). PointLookup resolves all named points of a pass
+# together: one multi-point findAt() per entity array for all of them, the entity indices read off the entities it
+# returns, and one getSequenceFromMask() per named sequence:
+#
+#     lookup = PointLookup(bearingPart)
+#     regions = lookup.regions({'left': {'edges': [(0.0, 10.0, 0.0), (0.0, 19.9, 0.0)]},
+#                               'load': {'side1Edges': [(0.5, 20.0, 0.0)]}}, target=bearingInstance)
+#     bearingModel.XsymmBC(name='Left Edge', createStepName='Initial', region=regions['left'])
+#
+# A dependent instance has the same topology as its part, so the indices found on the part serve both (pass
+# target=instance to get sequences of the instance).
+#
+# GeometryIndex does the same lookups without a kernel: it reads the vertices, edges and faces of a part once and
+# keeps them as NumPy arrays (line/arc parameters, bounding boxes, face boundaries), so all points are resolved in one
+# vectorised pass. Building it takes a getVertices() per edge and a getEdges() per face, the Abaqus API has no array
+# form of either, so in CAE it costs more calls than it saves; it is the search structure behind the findAt() of the
+# stand-ins (StandInGeometry here, the parts of offline_cae.py), which let the selection be run and timed without CAE.
+# Both ways of looking up the edges and faces of the footing models are compared, in calls to the geometry and in
+# time, with
+#
+#     python -m abaqus_tools.selection [preset ...]
+
+import math
+import sys
+import time
+
+import numpy as np
+
+from abaqus_tools.masks import sequence_from_mask_indices
+
+_TWO_PI = 2.0 * math.pi
+
+# Number of straight pieces used per arc when testing whether a point lies inside a face
+
+_ARC_PIECES = 64
+
+
+def _xy(point):
+    return float(point[0]), float(point[1])
+
+
+def _xyz(point):
+    return tuple(float(c) for c in point) + (0.0, ) * (3 - len(point))
+
+
+def _as_xy(points):
+    points = np.asarray(points, dtype=float)
+    return points.reshape(len(points), -1)[:, :2]
+
+
+def _points_on(entities):
+    # pointOn of every entity as (n, 2): one pointsOn call for an Abaqus array, entity by entity for a plain list
+    points = getattr(entities, 'pointsOn', None)
+    if points is None:
+        points = [entity.pointOn[0] for entity in entities]
+    return _as_xy(points) if len(points) else np.zeros((0, 2))
+
+
+def _describe(points):
+    return ', '.join('(%g, %g)' % (x, y) for x, y in points)
+
+
+def _circle_through(a, b, c):
+    # Centre and radius of the circle through three points, None if they are (nearly) on one line
+
+    ax, ay = a
+    bx, by = b
+    cx, cy = c
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    scale = max(abs(bx - ax), abs(by - ay), abs(cx - ax), abs(cy - ay)) ** 2
+    if abs(d) <= 1e-9 * scale:
+        return None
+    ux = ((ax * ax + ay * ay) * (by - cy) + (bx * bx + by * by) * (cy - ay) + (cx * cx + cy * cy) * (ay - by)) / d
+    uy = ((ax * ax + ay * ay) * (cx - bx) + (bx * bx + by * by) * (ax - cx) + (cx * cx + cy * cy) * (bx - ax)) / d
+    return (ux, uy), math.hypot(ax - ux, ay - uy)
+
+
+class _PointSelection(object):
+
+    # Sequences, named sequences and regions on top of find_edges() / find_faces() of a subclass
+
+    def edge_sequence(self, points, target=None):
+        return sequence_from_indices((target or self.part).edges, self.find_edges(points))
+
+    def face_sequence(self, points, target=None):
+        return sequence_from_indices((target or self.part).faces, self.find_faces(points))
+
+    def select(self, spec, target=None):
+        """Resolve {name: ('edges' or 'faces', points)} into {name: sequence} with one lookup per entity type."""
+
+        target = target or self.part
+        resolved = self._resolve([(name, kind, points) for name, (kind, points) in spec.items()])
+        return dict((name, sequence_from_indices(getattr(target, kind), ids))
+                    for (name, kind), ids in resolved.items())
+
+    def regions(self, spec, target=None):
+        """Resolve {name: {regionArgument: points}} into {name: regionToolset.Region} in one pass.
+
+        regionArgument is any keyword of regionToolset.Region() that takes edges or faces (edges, side1Edges,
+        side2Edges, faces, side1Faces, side2Faces).
+        """
+
+        import regionToolset
+
+        target = target or self.part
+        queries = []
+        for name, arguments in spec.items():
+            for argument, points in arguments.items():
+                queries.append(((name, argument), 'faces' if 'aces' in argument else 'edges', points))
+        resolved = self._resolve(queries)
+        regionArguments = dict((name, {}) for name in spec)
+        for ((name, argument), kind), ids in resolved.items():
+            regionArguments[name][argument] = sequence_from_indices(getattr(target, kind), ids)
+        return dict((name, regionToolset.Region(**arguments)) for name, arguments in regionArguments.items())
+
+    def _resolve(self, queries):
+        # queries is a list of (key, 'edges' or 'faces', points). All points of one kind go through one lookup.
+
+        resolved = {}
+        for kind, finder in (('edges', self.find_edges), ('faces', self.find_faces)):
+            selected = [(key, [tuple(p) for p in points]) for key, k, points in queries if k == kind]
+            allPoints = [p for key, points in selected for p in points]
+            ids = finder(allPoints) if allPoints else []
+            start = 0
+            for key, points in selected:
+                resolved[(key, kind)] = ids[start:start + len(points)]
+                start += len(points)
+        return resolved
+
+
+class PointLookup(_PointSelection):
+
+    # Entity indices at points from one multi-point findAt() of the part per call, whatever the number of points.
+    # Repeated points are asked for once.
+
+    def __init__(self, part):
+        self.part = part
+
+    def _find(self, kind, points):
+        if not len(points):
+            return []
+        unique = []
+        for point in map(_xyz, points):
+            if point not in unique:
+                unique.append(point)
+        found = getattr(self.part, kind).findAt(*[(point, ) for point in unique])
+        if found is None or len(found) != len(unique):
+            raise ValueError('findAt() gave %d %s for the %d points %s'
+                             % (0 if found is None else len(found), kind, len(unique), _describe(_as_xy(unique))))
+        ids = dict((point, entity.index) for point, entity in zip(unique, found))
+        return [ids[_xyz(point)] for point in points]
+
+    def find_vertices(self, points):
+        return self._find('vertices', points)
+
+    def find_edges(self, points):
+        """Index of the edge at each point, with one findAt() call."""
+
+        return self._find('edges', points)
+
+    def find_faces(self, points):
+        """Index of the face at each point, with one findAt() call."""
+
+        return self._find('faces', points)
+
+
+class GeometryIndex(_PointSelection):
+
+    def __init__(self, part, tolerance=1e-6):
+        self.tolerance = tolerance
+        self.part = part
+        self._index_edges(part.edges, _points_on(part.vertices))
+        self._index_faces(part.faces)
+
+    # Edges are stored as straight segments p0-p1 or as arcs (centre, radius, start angle, counter clockwise sweep).
+    # Abaqus does not hand out the arc parameters directly, so the arc is recovered from its two vertices and pointOn.
+
+    def _index_edges(self, edges, vertexXY):
+        n = len(edges)
+        self.edgeP0 = np.zeros((n, 2))
+        self.edgeP1 = np.zeros((n, 2))
+        self.edgeCentre = np.zeros((n, 2))
+        self.edgeRadius = np.zeros(n)
+        self.edgeStart = np.zeros(n)
+        self.edgeSweep = np.zeros(n)
+        self.edgeIsArc = np.zeros(n, dtype=bool)
+        edgeMid = _points_on(edges)
+        for i, edge in enumerate(edges):
+            ids = edge.getVertices()
+            p0 = vertexXY[ids[0]]
+            p1 = vertexXY[ids[-1]]
+            self.edgeP0[i] = p0
+            self.edgeP1[i] = p1
+            mid = _xy(edgeMid[i])
+            circle = _circle_through(tuple(p0), mid, tuple(p1)) if len(ids) > 1 else None
+            if circle is None:
+                continue
+            (cx, cy), r = circle
+            a0 = math.atan2(p0[1] - cy, p0[0] - cx)
+            a1 = math.atan2(p1[1] - cy, p1[0] - cx)
+            am = math.atan2(mid[1] - cy, mid[0] - cx)
+            sweep = (a1 - a0) % _TWO_PI
+            if (am - a0) % _TWO_PI <= sweep:
+                start = a0
+            else:
+                start, sweep = a1, _TWO_PI - sweep
+            self.edgeIsArc[i] = True
+            self.edgeCentre[i] = (cx, cy)
+            self.edgeRadius[i] = r
+            self.edgeStart[i] = start
+            self.edgeSweep[i] = sweep
+
+        # Bounding boxes: the end points for segments, the full circle for arcs (conservative, only used as a filter)
+
+        self.edgeLo = np.minimum(self.edgeP0, self.edgeP1)
+        self.edgeHi = np.maximum(self.edgeP0, self.edgeP1)
+        r = self.edgeRadius[:, None]
+        arc = self.edgeIsArc[:, None]
+        self.edgeLo = np.where(arc, self.edgeCentre - r, self.edgeLo)
+        self.edgeHi = np.where(arc, self.edgeCentre + r, self.edgeHi)
+
+    def _edge_polyline(self, i):
+        if not self.edgeIsArc[i]:
+            return np.array([self.edgeP0[i], self.edgeP1[i]])
+        t = self.edgeStart[i] + np.linspace(0.0, self.edgeSweep[i], _ARC_PIECES + 1)
+        return self.edgeCentre[i] + self.edgeRadius[i] * np.column_stack((np.cos(t), np.sin(t)))
+
+    # Faces are stored as the unordered set of their boundary segments (arcs split into short segments). That is all
+    # an even-odd crossing test needs, so the edge loops never have to be put in order.
+
+    def _index_faces(self, faces):
+        starts, ends, owners = [], [], []
+        for i, face in enumerate(faces):
+            for e in face.getEdges():
+                line = self._edge_polyline(e)
+                starts.append(line[:-1])
+                ends.append(line[1:])
+                owners.append(np.full(len(line) - 1, i))
+        nFaces = len(faces)
+        if starts:
+            self.segStart = np.concatenate(starts)
+            self.segEnd = np.concatenate(ends)
+            self.segOwner = np.concatenate(owners)
+        else:
+            self.segStart = self.segEnd = np.zeros((0, 2))
+            self.segOwner = np.zeros(0, dtype=int)
+        self.faceLo = np.full((nFaces, 2), np.inf)
+        self.faceHi = np.full((nFaces, 2), -np.inf)
+        np.minimum.at(self.faceLo, self.segOwner, np.minimum(self.segStart, self.segEnd))
+        np.maximum.at(self.faceHi, self.segOwner, np.maximum(self.segStart, self.segEnd))
+        self.faceOwnerMatrix = np.zeros((len(self.segOwner), nFaces))
+        self.faceOwnerMatrix[np.arange(len(self.segOwner)), self.segOwner] = 1.0
+
+    @property
+    def edgeCentroids(self):
+        mid = 0.5 * (self.edgeP0 + self.edgeP1)
+        t = self.edgeStart + 0.5 * self.edgeSweep
+        arcMid = self.edgeCentre + self.edgeRadius[:, None] * np.column_stack((np.cos(t), np.sin(t)))
+        return np.where(self.edgeIsArc[:, None], arcMid, mid)
+
+    def edge_distances(self, points):
+        # Distance of every point to every edge, shape (points, edges)
+
+        p = _as_xy(points)[:, None, :]
+        v = self.edgeP1 - self.edgeP0
+        length2 = np.maximum((v * v).sum(axis=1), 1e-300)
+        t = np.clip(((p - self.edgeP0) * v).sum(axis=2) / length2, 0.0, 1.0)
+        lineDist = np.linalg.norm(p - (self.edgeP0 + t[..., None] * v), axis=2)
+
+        rel = p - self.edgeCentre
+        angle = (np.arctan2(rel[..., 1], rel[..., 0]) - self.edgeStart) % _TWO_PI
+        onArc = angle <= self.edgeSweep
+        radial = np.abs(np.linalg.norm(rel, axis=2) - self.edgeRadius)
+        toEnds = np.minimum(np.linalg.norm(p - self.edgeP0, axis=2), np.linalg.norm(p - self.edgeP1, axis=2))
+        arcDist = np.where(onArc, radial, toEnds)
+        return np.where(self.edgeIsArc, arcDist, lineDist)
+
+    def find_edges(self, points):
+        """Index of the edge at each point (within the tolerance), in one pass over all points and edges."""
+
+        if not len(points):
+            return []
+        points = _as_xy(points)
+        tol = self.tolerance
+        inBox = ((points[:, None, :] >= self.edgeLo - tol) & (points[:, None, :] <= self.edgeHi + tol)).all(axis=2)
+        dist = np.where(inBox, self.edge_distances(points), np.inf)
+        nearest = dist.argmin(axis=1)
+        missing = dist[np.arange(len(points)), nearest] > tol
+        if missing.any():
+            raise ValueError('No edge found at %s' % _describe(points[missing]))
+        return nearest.tolist()
+
+    def find_faces(self, points):
+        """Index of the face containing each point, by an even-odd crossing test against all boundaries at once."""
+
+        if not len(points):
+            return []
+        points = _as_xy(points)
+        px = points[:, 0:1]
+        py = points[:, 1:2]
+        x0, y0 = self.segStart[:, 0], self.segStart[:, 1]
+        x1, y1 = self.segEnd[:, 0], self.segEnd[:, 1]
+        straddle = (y0 > py) != (y1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xCross = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        crossings = (straddle & (px < xCross)).astype(float).dot(self.faceOwnerMatrix)
+        inBox = ((points[:, None, :] >= self.faceLo) & (points[:, None, :] <= self.faceHi)).all(axis=2)
+        inside = (np.round(crossings).astype(int) % 2 == 1) & inBox
+        missing = ~inside.any(axis=1)
+        if missing.any():
+            raise ValueError('No face found at %s' % _describe(points[missing]))
+        return inside.argmax(axis=1).tolist()
+
+
+def sequence_from_indices(entities, indices):
+    # Turn entity indices into an Abaqus sequence (EdgeArray, FaceArray, ...) of the whole array entities, with one
+    # getSequenceFromMask() call whatever the number of indices
+
+    if not len(indices):
+        raise ValueError('Cannot build an empty sequence')
+    return sequence_from_mask_indices(entities, indices)
+
+
+# Stand-in geometry
+
+# The objects below offer just the parts of the Abaqus geometry interface that GeometryIndex uses (pointOn, pointsOn,
+# getVertices(), getEdges(), getSequenceFromMask(), findAt()). They let the selection layer be run, checked and timed
+# without a CAE licence. StandInGeometry.calls counts the calls a script makes to the geometry, each of which is a
+# round trip to the kernel in CAE.
+
+class _StandInEntity(object):
+
+    def __init__(self, geometry, index, pointOn):
+        self.geometry = geometry
+        self.index = index
+        self._pointOn = ((float(pointOn[0]), float(pointOn[1]), 0.0),)
+
+    @property
+    def pointOn(self):
+        self.geometry.calls += 1
+        return self._pointOn
+
+
+class StandInVertex(_StandInEntity):
+    pass
+
+
+class StandInEdge(_StandInEntity):
+
+    def __init__(self, geometry, index, vertexIds, pointOn):
+        _StandInEntity.__init__(self, geometry, index, pointOn)
+        self._vertices = tuple(vertexIds)
+
+    def getVertices(self):
+        self.geometry.calls += 1
+        return self._vertices
+
+
+class StandInFace(_StandInEntity):
+
+    def __init__(self, geometry, index, edgeIds, vertexIds, pointOn):
+        _StandInEntity.__init__(self, geometry, index, pointOn)
+        self._edges = tuple(edgeIds)
+        self._vertices = tuple(vertexIds)
+
+    def getEdges(self):
+        self.geometry.calls += 1
+        return self._edges
+
+    def getVertices(self):
+        self.geometry.calls += 1
+        return self._vertices
+
+
+class StandInArray(list):
+
+    def __init__(self, entities=(), owner=None):
+        list.__init__(self, entities)
+        self._owner = owner
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return StandInArray(list.__getitem__(self, item), self._owner)
+        return list.__getitem__(self, item)
+
+    def __add__(self, other):
+        return StandInArray(list(self) + list(other), self._owner)
+
+    @property
+    def pointsOn(self):
+        self._owner.calls += 1
+        return tuple(entity._pointOn for entity in self)
+
+    def findAt(self, *points):
+        # One lookup per point, as the scripts call it
+        self._owner.calls += 1
+        return StandInArray([self._owner.find_one(self, point) for (point,) in points], self._owner)
+
+    def getSequenceFromMask(self, mask):
+        from abaqus_tools.masks import decode_mask
+        self._owner.calls += 1
+        return StandInArray([self[i] for i in decode_mask(mask[0])], self._owner)
+
+
+class StandInGeometry(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.vertices = StandInArray(owner=self)
+        self.edges = StandInArray(owner=self)
+        self.faces = StandInArray(owner=self)
+        self._vertexIds = {}
+        self._edgeIds = {}
+
+    def vertex(self, point):
+        key = (round(point[0], 12), round(point[1], 12))
+        if key not in self._vertexIds:
+            self._vertexIds[key] = len(self.vertices)
+            self.vertices.append(StandInVertex(self, len(self.vertices), point))
+        return self._vertexIds[key]
+
+    def line(self, point1, point2):
+        ids = (self.vertex(point1), self.vertex(point2))
+        key = ('line',) + tuple(sorted(ids))
+        if key not in self._edgeIds:
+            mid = (0.5 * (point1[0] + point2[0]), 0.5 * (point1[1] + point2[1]))
+            self._edgeIds[key] = len(self.edges)
+            self.edges.append(StandInEdge(self, len(self.edges), ids, mid))
+        return self._edgeIds[key]
+
+    def arc(self, centre, point1, point2):
+        # Counter clockwise arc from point1 to point2 about centre
+        r = math.hypot(point1[0] - centre[0], point1[1] - centre[1])
+        a0 = math.atan2(point1[1] - centre[1], point1[0] - centre[0])
+        a1 = math.atan2(point2[1] - centre[1], point2[0] - centre[0])
+        am = a0 + 0.5 * ((a1 - a0) % _TWO_PI)
+        mid = (centre[0] + r * math.cos(am), centre[1] + r * math.sin(am))
+        ids = (self.vertex(point1), self.vertex(point2))
+        key = ('arc',) + tuple(sorted(ids)) + (round(centre[0], 12), round(centre[1], 12))
+        if key not in self._edgeIds:
+            self._edgeIds[key] = len(self.edges)
+            self.edges.append(StandInEdge(self, len(self.edges), ids, mid))
+        return self._edgeIds[key]
+
+    def face(self, edgeIds, pointOn):
+        vertexIds = sorted(set(v for e in edgeIds for v in self.edges[e]._vertices))
+        self.faces.append(StandInFace(self, len(self.faces), edgeIds, vertexIds, pointOn))
+        return len(self.faces) - 1
+
+    def index(self):
+        # Cached GeometryIndex, rebuilt when entities have been added since the last lookup. It stands for the
+        # kernel's own search structure, so building it is not counted in calls.
+        size = (len(self.vertices), len(self.edges), len(self.faces))
+        if getattr(self, '_indexSize', None) != size:
+            calls = self.calls
+            self._index = GeometryIndex(self)
+            self._indexSize = size
+            self.calls = calls
+        return self._index
+
+    def find_one(self, array, point):
+        if array is self.edges:
+            return array[self.index().find_edges([point])[0]]
+        if array is self.faces:
+            return array[self.index().find_faces([point])[0]]
+        for v in array:
+            if math.hypot(v._pointOn[0][0] - point[0], v._pointOn[0][1] - point[1]) < 1e-6:
+                return v
+        raise ValueError('No vertex found at %s' % (point, ))
+
+
+def partitioned_rectangle(xLines, yLines):
+    """Stand-in geometry of a rectangle partitioned by full length grid lines (the footing models of bearing_model)."""
+
+    geometry = StandInGeometry()
+    xLines = sorted(xLines)
+    yLines = sorted(yLines)
+    for j in range(len(yLines) - 1):
+        for i in range(len(xLines) - 1):
+            x0, x1, y0, y1 = xLines[i], xLines[i + 1], yLines[j], yLines[j + 1]
+            edges = (geometry.line((x0, y0), (x1, y0)), geometry.line((x1, y0), (x1, y1)),
+                     geometry.line((x1, y1), (x0, y1)), geometry.line((x0, y1), (x0, y0)))
+            geometry.face(edges, (0.5 * (x0 + x1), 0.5 * (y0 + y1)))
+    return geometry
+
+
+def compare_with_findat(geometry, edgePoints, facePoints, repeat=20):
+    """Calls to the geometry and seconds per selection of the edges and faces at the points, in both ways.
+
+    'findAt' is one findAt() per point, as the scripts do; 'lookup' is a PointLookup of geometry and one sequence of
+    the edges and one of the faces; 'index' builds a GeometryIndex of geometry for them instead. Returns
+    {way: (calls, seconds)}. The seconds are those of the stand-in, where a call costs next to nothing; in CAE every
+    call is also a round trip to the kernel.
+    """
+
+    def by_findat():
+        return ([geometry.edges.findAt((point, )) for point in edgePoints],
+                [geometry.faces.findAt((point, )) for point in facePoints])
+
+    def by_lookup():
+        lookup = PointLookup(geometry)
+        return lookup.edge_sequence(edgePoints), lookup.face_sequence(facePoints)
+
+    def by_index():
+        index = GeometryIndex(geometry)
+        return index.edge_sequence(edgePoints), index.face_sequence(facePoints)
+
+    geometry.index()
+    results = {}
+    for name, function in (('findAt', by_findat), ('lookup', by_lookup), ('index', by_index)):
+        geometry.calls = 0
+        function()
+        calls = geometry.calls
+        start = time.time()
+        for _ in range(repeat):
+            function()
+        results[name] = (calls, (time.time() - start) / repeat)
+    return results
+
+
+def main(arguments):
+    # python -m abaqus_tools.selection [preset ...]
+    from abaqus_tools import bearing_params
+
+    presets = dict(pressure=bearing_params.PRESSURE_2D, displacement=bearing_params.DISPLACEMENT_2D,
+                   plastic=bearing_params.PLASTIC_2D)
+    names = arguments or sorted(presets)
+    unknown = [name for name in names if name not in presets]
+    if unknown:
+        print('Usage: python -m abaqus_tools.selection [%s ...]' % ' | '.join(sorted(presets)))
+        return 2
+    ways = ('findAt', 'lookup', 'index')
+    print('%-14s %6s %6s %6s' % ('Preset', 'Edges', 'Faces', 'Points')
+          + ''.join(' %12s' % ('%s calls' % way) for way in ways)
+          + ''.join(' %12s' % ('%s (ms)' % way) for way in ways))
+    for name in names:
+        params = presets[name]
+        geometry = partitioned_rectangle(params.x_lines(), params.y_lines())
+        # The edges build_bearing_model() looks up (the BCs and load, then the left and footing seeds), all faces
+        points = bearing_params.edge_points(params)
+        edgePoints = points['left'] + points['right'] + points['bottom'] + 2 * points['footing'] + points['left']
+        facePoints = bearing_params.face_points(params)
+        results = compare_with_findat(geometry, edgePoints, facePoints)
+        print('%-14s %6d %6d %6d' % (name, len(geometry.edges), len(geometry.faces), len(edgePoints) + len(facePoints))
+              + ''.join(' %12d' % results[way][0] for way in ways)
+              + ''.join(' %12.2f' % (1e3 * results[way][1]) for way in ways))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
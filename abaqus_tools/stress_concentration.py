@@ -0,0 +1,151 @@
+# Nominal stresses and stress concentration factors of plates with a central hole, for whole design spaces at once
+
+# Theory_code.py evaluates sig_nom(), k_theoretical(), sig_nom_hole() and sig_nom_plate() for one set of module
+# globals. Here every argument is a NumPy array and all of them broadcast against each other, so a design space of
+# millions of (t, D, r, P, M) combinations is one call:
+#
+#     from abaqus_tools.stress_concentration import tension, design_table
+#     tension(0.01, 0.1, 0.01, 160000.0)['peak']            # the FEM5_1.1.py plate, 5.02e8 Pa
+#     table = design_table('tension', t=np.linspace(0.005, 0.02, 100), D=0.1,
+#                          r=np.linspace(0.002, 0.03, 200), P=np.linspace(1e4, 2e5, 100))
+#     table[table['peak'] < 2.5e8]
+#
+# The families return structured arrays with the hole ratio 2r / D, the nominal stress, Kt and the peak stress
+# Kt * nominal. t is the plate thickness, D its width, r the hole radius, P the axial or pin load and M the in-plane
+# bending moment, as in Theory_code.py. Where a Kt fit is outside its range the result is NaN instead of an error, so
+# one bad corner does not spoil a table; where the hole is as wide as the plate or wider, the nominal stresses are
+# NaN as well.
+
+import numpy as np
+
+# Finite width plate in tension (Heywood's fit of Howland's solution, Peterson chart 4.1), net section nominal stress
+
+TENSION_KT = (3.0, -3.13, 3.66, -1.53)
+
+# Pin loaded lug with a close fitting pin and L / D >= 1 (Peterson chart 5.12), net section nominal stress, valid for
+# 0.15 <= 2r / D <= 0.75
+
+PIN_KT = (12.882, -52.714, 89.762, -51.667)
+PIN_RANGE = (0.15, 0.75)
+
+# In-plane bending with the hole on the neutral axis (Peterson chart 4.81): twice the nominal stress at the hole edge
+
+BENDING_KT = 2.0
+
+TENSION_FIELDS = [('ratio', float), ('nominal', float), ('kt', float), ('peak', float)]
+BENDING_FIELDS = [('ratio', float), ('nominalHole', float), ('nominalPlate', float), ('kt', float), ('peak', float)]
+FAMILIES = ('tension', 'bending', 'pin')
+
+
+def hole_ratio(D, r):
+    # 2r / D, NaN where the hole does not fit in the plate
+    ratio = 2.0 * np.asarray(r, dtype=float) / np.asarray(D, dtype=float)
+    return np.where((ratio >= 0.0) & (ratio < 1.0), ratio, np.nan)
+
+
+def _net_section(D, r, value):
+    # value where the hole fits in the plate, NaN elsewhere (the net section is gone or negative there)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.isnan(hole_ratio(D, r)), np.nan, value())
+
+
+def _cubic(coefficients, x):
+    a, b, c, d = coefficients
+    return a + x * (b + x * (c + x * d))
+
+
+def nominal_tension(t, D, r, P):
+    """sig_nom() of Theory_code.py: P / (t (D - 2r)), the mean stress of the net section."""
+
+    t, D, r, P = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (t, D, r, P)))
+    return _net_section(D, r, lambda: P / (t * (D - 2.0 * r)))
+
+
+def nominal_bending_hole(t, D, r, M):
+    """sig_nom_hole() of Theory_code.py: 12 M r / (t (D^3 - (2r)^3)), the bending stress of the net section at the
+    hole edge."""
+
+    t, D, r, M = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (t, D, r, M)))
+    return _net_section(D, r, lambda: 12.0 * M * r / (t * (D ** 3 - (2.0 * r) ** 3)))
+
+
+def nominal_bending_plate(t, D, r, M):
+    """sig_nom_plate() of Theory_code.py: 6 M D / (t (D^3 - (2r)^3)), the same at the plate edge."""
+
+    t, D, r, M = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (t, D, r, M)))
+    return _net_section(D, r, lambda: 6.0 * M * D / (t * (D ** 3 - (2.0 * r) ** 3)))
+
+
+def kt_tension(D, r):
+    """k_theoretical() of Theory_code.py, the Peterson cubic in 2r / D."""
+
+    return _cubic(TENSION_KT, hole_ratio(D, r))
+
+
+def kt_pin(D, r):
+    ratio = hole_ratio(D, r)
+    inside = (ratio >= PIN_RANGE[0]) & (ratio <= PIN_RANGE[1])
+    return np.where(inside, _cubic(PIN_KT, ratio), np.nan)
+
+
+def kt_bending(D, r):
+    return np.where(np.isnan(hole_ratio(D, r)), np.nan, BENDING_KT)
+
+
+def _table(fields, columns):
+    shape = np.broadcast(*columns.values()).shape
+    table = np.empty(shape, dtype=fields)
+    for name, _ in fields:
+        table[name] = columns[name]
+    return table
+
+
+def tension(t, D, r, P):
+    """Structured array (ratio, nominal, kt, peak) of plates with a central hole in tension."""
+
+    nominal = nominal_tension(t, D, r, P)
+    kt = kt_tension(D, r)
+    return _table(TENSION_FIELDS, dict(ratio=hole_ratio(D, r), nominal=nominal, kt=kt, peak=kt * nominal))
+
+
+def pin_loaded(t, D, r, P):
+    """Structured array (ratio, nominal, kt, peak) of lugs loaded by a pin in the hole."""
+
+    nominal = nominal_tension(t, D, r, P)
+    kt = kt_pin(D, r)
+    return _table(TENSION_FIELDS, dict(ratio=hole_ratio(D, r), nominal=nominal, kt=kt, peak=kt * nominal))
+
+
+def bending(t, D, r, M):
+    """Structured array (ratio, nominalHole, nominalPlate, kt, peak) of plates with a central hole under in-plane
+    bending; kt and peak refer to the hole edge."""
+
+    nominalHole = nominal_bending_hole(t, D, r, M)
+    kt = kt_bending(D, r)
+    return _table(BENDING_FIELDS, dict(ratio=hole_ratio(D, r), nominalHole=nominalHole,
+                                       nominalPlate=nominal_bending_plate(t, D, r, M), kt=kt, peak=kt * nominalHole))
+
+
+def design_table(family, t, D, r, P=None, M=None):
+    """Every combination of the given parameter values (an outer product) as one flat structured array.
+
+    The inputs are fields of the result next to the fields of the family: 'tension' and 'pin' need P, 'bending'
+    needs M.
+    """
+
+    if family not in FAMILIES:
+        raise ValueError('family must be one of %s, not %r' % (', '.join(FAMILIES), family))
+    load, loadName = (M, 'M') if family == 'bending' else (P, 'P')
+    if load is None:
+        raise ValueError('The %s family needs %s' % (family, loadName))
+    grids = np.meshgrid(*(np.atleast_1d(np.asarray(value, dtype=float)) for value in (t, D, r, load)),
+                        indexing='ij', sparse=True)
+    result = {'tension': tension, 'bending': bending, 'pin': pin_loaded}[family](*grids).ravel()
+    shape = np.broadcast(*grids).shape
+    inputs = [('t', float), ('D', float), ('r', float), (loadName, float)]
+    table = np.empty(result.shape, dtype=inputs + result.dtype.descr)
+    for (name, _), grid in zip(inputs, grids):
+        table[name] = np.broadcast_to(grid, shape).ravel()
+    for name in result.dtype.names:
+        table[name] = result[name]
+    return table
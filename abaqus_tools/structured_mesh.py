@@ -0,0 +1,247 @@
+# Structured quad meshes of partitioned rectangles, generated with NumPy instead of generateMesh()
+
+# The soil domain of the 2D footing models is a rectangle cut by full length partition lines, so its structured mesh
+# is a grid of (rows + 1) x (columns + 1) nodes. The node positions follow the edge seeds of the CAE model (seeding.py,
+# including the bias towards the footing corner), the connectivity, node and element sets and load surface are built
+# with a few array operations and the mesh can be written straight to an input deck by inp_writer.py.
+
+import numpy as np
+
+from abaqus_tools.bearing_params import edge_points
+from abaqus_tools.seeding import SeededGrid, coons_patch, number_by_size, single_bias, uniform
+
+
+class Mesh(object):
+
+    # nodes: (N, 2) coordinates, the label of node i is i + 1
+    # elements: (E, 4) node labels, counter clockwise starting bottom left, the label of element e is e + 1
+    # nodeSets / elementSets: name -> sorted array of labels
+    # surfaces: name -> list of (element set name, face identifier S1 to S4)
+
+    def __init__(self, nodes, elements, elemType='CPE4'):
+        self.nodes = nodes
+        self.elements = elements
+        self.elemType = elemType
+        self.nodeSets = {}
+        self.elementSets = {}
+        self.surfaces = {}
+
+    @property
+    def numNodes(self):
+        return len(self.nodes)
+
+    @property
+    def numElements(self):
+        return len(self.elements)
+
+    def copy(self, elemType=None):
+        # Same nodes, elements and sets (shared, not copied), optionally with another element type, e.g. the CPS4
+        # stress model on the mesh of a DC2D4 heat transfer model
+        other = Mesh(self.nodes, self.elements, elemType or self.elemType)
+        other.nodeSets = dict(self.nodeSets)
+        other.elementSets = dict(self.elementSets)
+        other.surfaces = dict(self.surfaces)
+        return other
+
+    def centroids(self):
+        return self.nodes[self.elements - 1].mean(axis=1)
+
+    def __repr__(self):
+        return 'Mesh(%d nodes, %d %s elements)' % (self.numNodes, self.numElements, self.elemType)
+
+
+def grid_mesh(grid, elemType='CPE4'):
+    """Structured quad mesh of a node grid of shape (rows + 1, columns + 1, 2), numbered row by row from the bottom."""
+
+    labels = np.arange(1, grid.shape[0] * grid.shape[1] + 1).reshape(grid.shape[:2])
+    elements = np.stack((labels[:-1, :-1], labels[:-1, 1:], labels[1:, 1:], labels[1:, :-1]), axis=-1)
+    return Mesh(grid.reshape(-1, 2).copy(), elements.reshape(-1, 4), elemType)
+
+
+def rectangle_mesh(xCoords, yCoords, elemType='CPE4'):
+    """Structured quad mesh on the tensor grid xCoords x yCoords."""
+
+    gx, gy = np.meshgrid(np.asarray(xCoords, dtype=float), np.asarray(yCoords, dtype=float))
+    return grid_mesh(np.stack((gx, gy), axis=-1), elemType)
+
+
+def bearing_grid(params):
+    # The seeds of bearing_model.build_bearing_model() on a SeededGrid: seedPart(size), the left edge seeded in
+    # proportion to the length of each segment, the footing edges by number and the edges that meet at the footing
+    # corner biased towards it
+
+    xs = params.x_lines()
+    ys = params.y_lines()
+    height = params.height
+    grid = SeededGrid(xs, ys, params.seedSize)
+    for y0, y1 in zip(ys[:-1], ys[1:]):
+        grid.seed_by_number([(0.0, 0.5 * (y0 + y1))], max(1, int(round(params.leftSeeds * (y1 - y0) / height))))
+    grid.seed_by_number(edge_points(params)['footing'], params.footingSeeds)
+    corner = (0.5 * params.footingWidth, height)
+    i = xs.index(corner[0])
+    grid.seed_by_bias([(corner[0], 0.5 * (ys[-2] + ys[-1])),
+                       (0.5 * (xs[i - 1] + xs[i]), height),
+                       (0.5 * (xs[i] + xs[i + 1]), height)], params.biasRatio, params.biasSeeds, corner)
+    return grid
+
+
+def bearing_mesh(params):
+    """Structured mesh of a footing model with the node sets, element sets and surface its deck needs.
+
+    Three node element types (CPE3) give the triangulated mesh, with the FOOTING surface on the triangle faces.
+    """
+
+    mesh = grid_mesh(bearing_grid(params).node_grid(), params.elemCode)
+    add_bearing_sets(mesh, params)
+    return triangulate(mesh, params.elemCode) if params.elemCode[-1] == '3' else mesh
+
+
+def add_bearing_sets(mesh, params, tolerance=1e-9):
+    x, y = mesh.nodes[:, 0], mesh.nodes[:, 1]
+    halfWidth = 0.5 * params.footingWidth
+    labels = np.arange(1, mesh.numNodes + 1)
+    mesh.nodeSets['LEFT'] = labels[np.abs(x) <= tolerance]
+    mesh.nodeSets['RIGHT'] = labels[np.abs(x - params.width) <= tolerance]
+    mesh.nodeSets['BOTTOM'] = labels[np.abs(y) <= tolerance]
+    mesh.nodeSets['TOP'] = labels[np.abs(y - params.height) <= tolerance]
+    mesh.nodeSets['FOOTING'] = labels[(np.abs(y - params.height) <= tolerance) & (x <= halfWidth + tolerance)]
+
+    centroids = mesh.centroids()
+    elementLabels = np.arange(1, mesh.numElements + 1)
+    topRow = mesh.nodes[mesh.elements[:, 2] - 1, 1] >= params.height - tolerance
+    mesh.elementSets['SOIL'] = elementLabels
+    mesh.elementSets['FOOTING_TOP'] = elementLabels[topRow & (centroids[:, 0] < halfWidth)]
+    mesh.surfaces['FOOTING'] = [('FOOTING_TOP', 'S3')]
+    return mesh
+
+
+def merge_patches(grids, elemType='CPE4', decimals=9):
+    """Quad mesh of several node grids (see grid_mesh()) whose nodes on shared sides coincide and are merged."""
+
+    points = np.concatenate([grid.reshape(-1, 2) for grid in grids])
+    keys = np.round(points / np.abs(points).max(), decimals)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    labels = rank[inverse.ravel()] + 1
+    elements = []
+    offset = 0
+    for grid in grids:
+        patch = labels[offset:offset + grid.shape[0] * grid.shape[1]].reshape(grid.shape[:2])
+        elements.append(np.stack((patch[:-1, :-1], patch[:-1, 1:], patch[1:, 1:], patch[1:, :-1]), axis=-1)
+                        .reshape(-1, 4))
+        offset += grid.shape[0] * grid.shape[1]
+    return Mesh(points[first[order]], np.concatenate(elements), elemType)
+
+
+def add_surface(mesh, name, nodeSet):
+    # Element faces whose nodes all lie in a node set, as element sets NAME_S1 to NAME_S4 and the surface NAME
+    inSet = np.zeros(mesh.numNodes + 1, dtype=bool)
+    inSet[mesh.nodeSets[nodeSet]] = True
+    corners = mesh.elements.shape[1]
+    mesh.surfaces[name] = []
+    for face in range(corners):
+        onFace = inSet[mesh.elements[:, face]] & inSet[mesh.elements[:, (face + 1) % corners]]
+        if onFace.any():
+            elset = '%s_S%d' % (name, face + 1)
+            mesh.elementSets[elset] = np.flatnonzero(onFace) + 1
+            mesh.surfaces[name].append((elset, 'S%d' % (face + 1)))
+    return mesh
+
+
+def triangulate(mesh, elemType='CPE3'):
+    """Split every quad along its n1-n3 diagonal; element e becomes 2e - 1 and 2e, node sets are kept and the
+    surfaces are rebuilt from the node sets of the same name."""
+
+    elements = mesh.elements
+    triangles = np.stack((elements[:, [0, 1, 2]], elements[:, [0, 2, 3]]), axis=1).reshape(-1, 3)
+    result = Mesh(mesh.nodes, triangles, elemType)
+    result.nodeSets = dict(mesh.nodeSets)
+    surfaceSets = set(elset for faces in mesh.surfaces.values() for elset, _ in faces)
+    for name, labels in mesh.elementSets.items():
+        if name not in surfaceSets:
+            result.elementSets[name] = np.column_stack((2 * labels - 1, 2 * labels)).ravel()
+    for name in mesh.surfaces:
+        add_surface(result, name, name)
+    return result
+
+
+def plate_with_hole_mesh(width=0.12, height=0.05, radius=0.01, square=0.02, arcSeeds=40, radialSeeds=80,
+                         radialRatio=5.0, size=0.0015, elemType='CPE4'):
+    """Structured quarter model of the plate with a hole of FEM_Coursework (hole centre at the origin).
+
+    The square around the hole is split along its diagonal into two faces meshed between the arc (arcSeeds per
+    45 degrees) and the square sides, biased towards the hole like the radial seeds of FEM5_heat_transfer.py; the rest
+    of the plate is three rectangles seeded by size. Node sets HOLE, LEFT, BOTTOM, RIGHT, TOP, ALL, element set ALL and
+    the surfaces HOLE, RIGHT and TOP are defined. Three node element types (CPE3, DC2D3) give the triangulated mesh.
+    """
+
+    if not 0 < radius < square < min(width, height):
+        raise ValueError('Need 0 < radius < square < plate size, got radius %r, square %r' % (radius, square))
+    t = uniform(arcSeeds)[:, None]
+    radial = single_bias(radialSeeds, radialRatio)[:, None]
+    angles = 0.25 * np.pi * t
+    lowerArc = radius * np.hstack((np.cos(angles), np.sin(angles)))
+    upperArc = radius * np.hstack((np.cos(angles + 0.25 * np.pi), np.sin(angles + 0.25 * np.pi)))
+    diagonalInner, diagonalOuter = lowerArc[-1], np.array([square, square])
+    diagonal = diagonalInner + radial * (diagonalOuter - diagonalInner)
+    side = square * t
+
+    lower = coons_patch(np.hstack((radius + radial * (square - radius), 0.0 * radial)),
+                        np.hstack((square + 0.0 * side, side)), diagonal, lowerArc)
+    upper = coons_patch(diagonal, np.hstack((side[::-1], square + 0.0 * side)),
+                        np.hstack((0.0 * radial, radius + radial * (square - radius))), upperArc)
+
+    xOuter = square + uniform(number_by_size(width - square, size)) * (width - square)
+    yOuter = square + uniform(number_by_size(height - square, size)) * (height - square)
+    ySquare = side.ravel()
+    grids = [lower, upper]
+    for xs, ys in ((xOuter, ySquare), (ySquare, yOuter), (xOuter, yOuter)):
+        gx, gy = np.meshgrid(xs, ys)
+        grids.append(np.stack((gx, gy), axis=-1))
+    mesh = merge_patches(grids, elemType)
+
+    tolerance = 1e-9 * max(width, height)
+    x, y = mesh.nodes[:, 0], mesh.nodes[:, 1]
+    labels = np.arange(1, mesh.numNodes + 1)
+    mesh.nodeSets['ALL'] = labels
+    mesh.nodeSets['HOLE'] = labels[np.abs(np.hypot(x, y) - radius) <= tolerance]
+    mesh.nodeSets['LEFT'] = labels[np.abs(x) <= tolerance]
+    mesh.nodeSets['BOTTOM'] = labels[np.abs(y) <= tolerance]
+    mesh.nodeSets['RIGHT'] = labels[np.abs(x - width) <= tolerance]
+    mesh.nodeSets['TOP'] = labels[np.abs(y - height) <= tolerance]
+    mesh.elementSets['ALL'] = np.arange(1, mesh.numElements + 1)
+    for name in ('HOLE', 'RIGHT', 'TOP'):
+        add_surface(mesh, name, name)
+    return triangulate(mesh, elemType) if elemType[-1] == '3' else mesh
+
+
+def hole_ring_mesh(radius=0.01, outerRadius=0.03, arcSeeds=80, radialSeeds=40, radialRatio=5.0, elemType='CPE4'):
+    """Structured quarter ring around a hole at the origin, from radius to outerRadius (a submodel of the plate).
+
+    arcSeeds elements over the 90 degrees, radialSeeds elements across the ring biased towards the hole. Node sets
+    HOLE, OUTER (the driven boundary), LEFT, BOTTOM and ALL, element set ALL and the surface HOLE are defined.
+    """
+
+    if not 0 < radius < outerRadius:
+        raise ValueError('Need 0 < radius < outerRadius, got radius %r, outerRadius %r' % (radius, outerRadius))
+    # Rows run along the arc and columns outwards, so the elements are numbered counter clockwise
+    angles = 0.5 * np.pi * uniform(arcSeeds)[:, None]
+    radii = radius + single_bias(radialSeeds, radialRatio)[None, :] * (outerRadius - radius)
+    grid = np.stack((radii * np.cos(angles), radii * np.sin(angles)), axis=-1)
+    grid[-1, :, 0] = 0.0
+    mesh = grid_mesh(grid, elemType)
+
+    tolerance = 1e-9 * outerRadius
+    x, y = mesh.nodes[:, 0], mesh.nodes[:, 1]
+    distance = np.hypot(x, y)
+    labels = np.arange(1, mesh.numNodes + 1)
+    mesh.nodeSets['ALL'] = labels
+    mesh.nodeSets['HOLE'] = labels[np.abs(distance - radius) <= tolerance]
+    mesh.nodeSets['OUTER'] = labels[np.abs(distance - outerRadius) <= tolerance]
+    mesh.nodeSets['LEFT'] = labels[np.abs(x) <= tolerance]
+    mesh.nodeSets['BOTTOM'] = labels[np.abs(y) <= tolerance]
+    mesh.elementSets['ALL'] = np.arange(1, mesh.numElements + 1)
+    add_surface(mesh, 'HOLE', 'HOLE')
+    return triangulate(mesh, elemType) if elemType[-1] == '3' else mesh
@@ -0,0 +1,200 @@
+# Sequential thermal to stress coupling: the nodal temperatures of a heat transfer run drive the stress model
+
+# FEM5_thermal_stress_analysis.py and Thermal_analysis_two_parts.py prescribe uniform temperatures (20 C, 125 C in the
+# hole). Here the temperature field computed by heat_transfer.py is used instead, node by node, at chosen times:
+#
+#     from abaqus_tools.heat_transfer import plate_heat_model, transient_frames, FEM5_HEAT_STEP
+#     from abaqus_tools.thermal_coupling import plate_thermal_stress, write_thermal_stress_deck
+#
+#     for time, solution in plate_thermal_stress([100.0, 1000.0, 15000.0]):
+#         print(time, solution.stresses[..., 0].min())
+#
+#     heatModel = plate_heat_model()
+#     write_thermal_stress_deck('PlateThermalStress.inp', heatModel.mesh.copy('CPS4'),
+#                               transient_frames(heatModel, **FEM5_HEAT_STEP), [100.0, 1000.0, 15000.0])
+#
+# The temperatures are consumed as a stream of (time, nodal temperatures) frames, e.g. the transient_frames()
+# generator, and only the two frames around the next requested time are held. The NT output of an Abaqus heat transfer
+# job is such a stream as well, one frame read at a time, from its field store or its ASCII results file:
+#
+#     frames = job_temperature_frames('PlateWithHoleJob')        # FEM5_heat_transfer.py, after export_job()
+#     write_thermal_stress_deck('PlateThermalStress.inp', stressMesh, frames, [1000.0, 15000.0])
+#
+# The frames are in node label order, so the stress mesh has to carry the node labels of the heat transfer mesh (the
+# same part meshed with stress elements). FEM5_thermal_stress_analysis.py is not such a model: it fills the hole and
+# is seeded differently, so it keeps its uniform predefined temperatures. The stress model uses the mesh of the
+# heat transfer model with a stress element type, so the node labels are the same. The deck has one static step per
+# requested time with the temperatures as a *TEMPERATURE predefined field; the native solution factorises the
+# stiffness matrix once and solves every time with the thermal strains as the only load.
+
+import itertools
+import os
+
+import numpy as np
+
+from abaqus_tools.field_store import MANIFEST, FieldStore
+from abaqus_tools.heat_transfer import FEM5_HEAT_STEP, plate_heat_model, transient_frames
+from abaqus_tools.inp_writer import write_mesh, write_node_values
+from abaqus_tools.plane_strain import ElasticSystem
+from abaqus_tools.result_files import NODE_KEYS, FilFile
+
+# Material of FEM5_thermal_stress_analysis.py and the symmetry conditions of the quarter plate
+
+PLATE_STEEL = dict(youngsModulus=1.9e11, poissonsRatio=0.31, expansion=1.2e-6, thickness=0.01)
+PLATE_SYMMETRY = {('LEFT', 1): 0.0, ('BOTTOM', 2): 0.0}
+
+
+def frames_at(frames, times):
+    """Generator of (time, nodal temperatures) at the requested times, linear in time between the frames."""
+
+    iterator = iter(frames)
+    before = next(iterator, None)
+    if before is None:
+        raise ValueError('The temperature stream has no frames')
+    after = before
+    for time in sorted(float(t) for t in times):
+        if time < before[0]:
+            raise ValueError('Time %r is before the first frame (%r)' % (time, before[0]))
+        while after[0] < time:
+            before = after
+            after = next(iterator, None)
+            if after is None:
+                raise ValueError('Time %r is after the last frame (%r)' % (time, before[0]))
+        if after[0] == before[0]:
+            yield time, after[1]
+        else:
+            weight = (time - before[0]) / (after[0] - before[0])
+            yield time, before[1] + weight * (after[1] - before[1])
+
+
+def _by_label(labels, values, numNodes=None):
+    # Nodal temperatures in node label order (label 1 first), NaN for labels without output
+    labels = np.asarray(labels, dtype=int)
+    size = int(labels.max()) if numNodes is None else int(numNodes)
+    if labels.min() < 1 or labels.max() > size:
+        raise ValueError('Node labels %d to %d do not fit %d nodes' % (labels.min(), labels.max(), size))
+    temperatures = np.full(size, np.nan)
+    temperatures[labels - 1] = np.asarray(values, dtype=float).reshape(len(labels), -1)[:, 0]
+    return temperatures
+
+
+def fil_temperature_frames(path, step=None, numNodes=None, initial=None):
+    """Generator of (total time, nodal temperatures) of every increment with NT output in an ASCII .fil file.
+
+    The .fil file has no frame at time 0: initial, if given, is yielded first as the temperature of every node then.
+    """
+
+    keys = set(key for key, name in NODE_KEYS.items() if name == 'NT')
+    fil = FilFile(path)
+    try:
+        for stepNumber, increment in fil.frames():
+            if step is not None and stepNumber != step:
+                continue
+            blocks = [block for block in fil.select(stepNumber, increment, 'NODE') if keys.intersection(block['keys'])]
+            if not blocks:
+                continue
+            temperatures = _by_label(*fil.node_values(stepNumber, increment, 'NT'), numNodes=numNodes)
+            if initial is not None:
+                yield 0.0, np.full_like(temperatures, float(initial))
+                initial = None
+            yield blocks[0]['totalTime'], temperatures
+    finally:
+        fil.close()
+
+
+def stored_temperature_frames(store, step=None, instance=None, numNodes=None):
+    """Generator of (step time, nodal temperatures) of every NT frame of a FieldStore (or its directory).
+
+    step and instance may be left out when the store has only one with NT output.
+    """
+
+    store = store if isinstance(store, FieldStore) else FieldStore(store)
+    entries = store.select('NT', step, None, instance)
+    keys = sorted(set((entry['step'], entry['instance']) for entry in entries))
+    if len(keys) != 1:
+        raise ValueError('%d stored NT fields match step %r, instance %r: %s' % (len(keys), step, instance, keys))
+    for entry in sorted(entries, key=lambda entry: entry['frame']):
+        field = store.open(entry)
+        yield entry['frameValue'], _by_label(field.labels, field.values, numNodes)
+
+
+def job_temperature_frames(jobName, directory='.', step=None, instance=None, numNodes=None, initial=None):
+    """The NT frames of a finished heat transfer job: from <jobName>_fields if export_job() wrote it, else from
+    <jobName>.fil (initial as in fil_temperature_frames())."""
+
+    root = os.path.join(directory, jobName + '_fields')
+    filPath = os.path.join(directory, jobName + '.fil')
+    if os.path.exists(os.path.join(root, MANIFEST)):
+        return stored_temperature_frames(root, step, instance, numNodes)
+    if os.path.exists(filPath):
+        return fil_temperature_frames(filPath, step, numNodes, initial)
+    raise ValueError('No temperatures of job %s in %s (export_job() or *NODE FILE NT with *FILE FORMAT, ASCII)'
+                     % (jobName, os.path.abspath(directory)))
+
+
+def _split_first(frames):
+    # The first frame (the stress free reference state) and the whole stream again
+    iterator = iter(frames)
+    first = next(iterator, None)
+    if first is None:
+        raise ValueError('The temperature stream has no frames')
+    return first, itertools.chain([first], iterator)
+
+
+def thermal_stress_frames(mesh, frames, times, youngsModulus, poissonsRatio, expansion, thickness, fixed,
+                          reference=None):
+    """Generator of (time, Solution) of the stress model at the requested times.
+
+    The thermal strain is expansion * (T - reference); reference defaults to the temperatures of the first frame.
+    """
+
+    first, frames = _split_first(frames)
+    reference = first[1] if reference is None else reference
+    system = ElasticSystem(mesh, youngsModulus, poissonsRatio, thickness, fixed)
+    for time, temperatures in frames_at(frames, times):
+        yield time, system.solve(thermalStrain=expansion * system.point_values(temperatures - reference))
+
+
+def write_thermal_stress_deck(path, mesh, frames, times, youngsModulus=PLATE_STEEL['youngsModulus'],
+                              poissonsRatio=PLATE_STEEL['poissonsRatio'], expansion=PLATE_STEEL['expansion'],
+                              thickness=PLATE_STEEL['thickness'], fixed=PLATE_SYMMETRY, heading='Thermal stress'):
+    """Write a stress deck with one static step per requested time, each with the nodal temperatures of that time.
+
+    The mesh needs the element set ALL. The first frame is the initial temperature. Returns the number of steps.
+    """
+
+    first, frames = _split_first(frames)
+    labels = np.arange(1, mesh.numNodes + 1)
+    steps = 0
+    with open(path, 'w') as out:
+        out.write('*HEADING\n%s, temperatures from a heat transfer run\n' % heading)
+        out.write('*PREPRINT, ECHO=NO, MODEL=NO, HISTORY=NO, CONTACT=NO\n')
+        write_mesh(out, mesh)
+        out.write('*SOLID SECTION, ELSET=ALL, MATERIAL=STEEL\n%r,\n' % float(thickness))
+        out.write('*MATERIAL, NAME=STEEL\n*ELASTIC\n%r, %r\n*EXPANSION\n%r,\n'
+                  % (float(youngsModulus), float(poissonsRatio), float(expansion)))
+        out.write('*BOUNDARY\n')
+        for (nset, dof), value in sorted(fixed.items()):
+            out.write('%s, %d, %d, %r\n' % (nset, dof, dof, float(value)))
+        out.write('*INITIAL CONDITIONS, TYPE=TEMPERATURE\n')
+        write_node_values(out, labels, first[1])
+        for time, temperatures in frames_at(frames, times):
+            steps += 1
+            out.write('*STEP, NAME="Temperature at %g s"\n*STATIC\n1., 1., 1e-05, 1.\n' % time)
+            out.write('*TEMPERATURE\n')
+            write_node_values(out, labels, temperatures)
+            out.write('*OUTPUT, FIELD, VARIABLE=PRESET\n*END STEP\n')
+    return steps
+
+
+def plate_thermal_stress(times, heatModel=None, step=FEM5_HEAT_STEP, elemType='CPS4', **material):
+    """Thermal stresses of the plate with a hole at the requested times of the FEM5_heat_transfer.py analysis.
+
+    Generator of (time, Solution); material overrides the entries of PLATE_STEEL.
+    """
+
+    heatModel = heatModel or plate_heat_model()
+    properties = dict(PLATE_STEEL)
+    properties.update(material)
+    return thermal_stress_frames(heatModel.mesh.copy(elemType), transient_frames(heatModel, **step), times,
+                                 fixed=PLATE_SYMMETRY, **properties)